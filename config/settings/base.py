@@ -7,6 +7,7 @@ import os
 import environ
 import requests
 import sentry_sdk
+from celery.schedules import crontab
 from sentry_sdk.integrations.django import DjangoIntegration
 
 # (src/config/settings/base.py - 3 = src/)
@@ -197,6 +198,7 @@ MIDDLEWARE = [
     "django.middleware.clickjacking.XFrameOptionsMiddleware",
     "django_prometheus.middleware.PrometheusAfterMiddleware",
     "src.jwt_middleware.JWTAuthenticationMiddleware",
+    "src.dados_comuns.calendario_prioridade.CalendarioPrioridadeMiddleware",
     "auditlog.middleware.AuditlogMiddleware",
 ]
 
@@ -298,6 +300,73 @@ MANAGERS = ADMINS
 
 # Your stuff...
 # ------------------------------------------------------------------------------
+# Quando ativo, os paineis consolidados leem a tabela
+# solicitacoes_consolidadas_materializadas (atualizada a cada transição) em vez
+# da view solicitacoes_consolidadas.
+SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = env.bool(
+    "SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS", default=False
+)
+# Tempo (segundos) que a identidade do usuário (vínculo atual e instituição)
+# fica no cache entre requests. Com 0, é resolvida uma vez por request.
+IDENTIDADE_USUARIO_CACHE_TIMEOUT = env.int(
+    "IDENTIDADE_USUARIO_CACHE_TIMEOUT", default=0
+)
+# Horas após a última atualização em que o retrato local dos alunos do EOL
+# (RetratoAlunosEOL) deixa de ser considerado atual.
+RETRATO_ALUNOS_EOL_VALIDADE_HORAS = env.int(
+    "RETRATO_ALUNOS_EOL_VALIDADE_HORAS", default=26
+)
+# Consultas simultâneas ao SGP (uma por DRE) na gravação diária de matriculados
+# por escola e período.
+MATRICULADOS_CONSULTAS_SIMULTANEAS_DRE = env.int(
+    "MATRICULADOS_CONSULTAS_SIMULTANEAS_DRE", default=4
+)
+# Sincronização do calendário escolar com o SGP: consultas simultâneas (uma por
+# escola) e quantas escolas têm os dias gravados de uma vez.
+CALENDARIO_SGP_CONSULTAS_SIMULTANEAS = env.int(
+    "CALENDARIO_SGP_CONSULTAS_SIMULTANEAS", default=8
+)
+CALENDARIO_SGP_ESCOLAS_POR_LOTE = env.int(
+    "CALENDARIO_SGP_ESCOLAS_POR_LOTE", default=200
+)
+# Históricos de matrícula (registra_historico_matriculas_alunos e
+# encerra_historicos_alunos_inativos): consultas simultâneas ao EOL e quantos
+# alunos têm os históricos gravados de uma vez.
+HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS = env.int(
+    "HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS", default=16
+)
+HISTORICO_MATRICULAS_ALUNOS_POR_LOTE = env.int(
+    "HISTORICO_MATRICULAS_ALUNOS_POR_LOTE", default=500
+)
+# Segundos sem renovação do acesso após os quais uma SolicitacaoAberta é removida
+# pela task deleta_solicitacoes_abertas.
+SOLICITACOES_ABERTAS_EXPIRACAO_SEGUNDOS = env.int(
+    "SOLICITACOES_ABERTAS_EXPIRACAO_SEGUNDOS", default=10
+)
+# Validade (segundos) do contador de notificações não lidas no cache. O contador
+# é recalculado a cada alteração; a validade só limita divergências.
+NOTIFICACOES_CONTADOR_CACHE_TIMEOUT = env.int(
+    "NOTIFICACOES_CONTADOR_CACHE_TIMEOUT", default=24 * 60 * 60
+)
+# Envio de anexos em partes (/arquivos-em-partes/): tamanho máximo de cada parte,
+# do arquivo inteiro e horas até os envios não usados serem removidos.
+ARQUIVOS_EM_PARTES_TAMANHO_PARTE = env.int(
+    "ARQUIVOS_EM_PARTES_TAMANHO_PARTE", default=5 * 1024 * 1024
+)
+ARQUIVOS_EM_PARTES_TAMANHO_MAXIMO = env.int(
+    "ARQUIVOS_EM_PARTES_TAMANHO_MAXIMO", default=200 * 1024 * 1024
+)
+ARQUIVOS_EM_PARTES_EXPIRACAO_HORAS = env.int(
+    "ARQUIVOS_EM_PARTES_EXPIRACAO_HORAS", default=24
+)
+# Outbox de emails e chamadas externas: tentativas até o evento ser marcado como
+# falho, espera (segundos) antes da 2ª tentativa, dobrada a cada nova falha,
+# eventos enviados por execução de despacha_eventos_outbox_task e prazo
+# (segundos) em que os eventos reservados por um despacho ficam fora da fila.
+OUTBOX_MAX_TENTATIVAS = env.int("OUTBOX_MAX_TENTATIVAS", default=8)
+OUTBOX_ESPERA_BASE_SEGUNDOS = env.int("OUTBOX_ESPERA_BASE_SEGUNDOS", default=30)
+OUTBOX_EVENTOS_POR_DESPACHO = env.int("OUTBOX_EVENTOS_POR_DESPACHO", default=200)
+OUTBOX_PRAZO_ENVIO_SEGUNDOS = env.int("OUTBOX_PRAZO_ENVIO_SEGUNDOS", default=600)
 REST_FRAMEWORK = {
     # https://www.django-rest-framework.org/api-guide/settings/
     "DEFAULT_PERMISSION_CLASSES": ("rest_framework.permissions.IsAuthenticated",),
@@ -378,6 +447,28 @@ CELERY_TASK_SERIALIZER = "json"
 CELERY_RESULT_SERIALIZER = "json"
 CELERY_ACCEPT_CONTENT = ["json"]
 CELERY_TIMEZONE = TIME_ZONE
+# Tarefas periódicas instaladas pelo NaiveDatabaseScheduler ao iniciar o beat.
+CELERY_BEAT_SCHEDULE = {
+    "reconcilia-solicitacoes-consolidadas": {
+        "task": "src.paineis_consolidados.tasks.reconcilia_solicitacoes_consolidadas",
+        "schedule": crontab(hour=3, minute=0),
+    },
+    "deleta-arquivos-em-partes-expirados": {
+        "task": "src.dados_comuns.tasks.deleta_arquivos_em_partes_expirados",
+        "schedule": crontab(hour=4, minute=0),
+    },
+    # retrato local dos alunos do EOL lido nas contagens por faixa etária das
+    # escolas CEI e CEMEI (validade RETRATO_ALUNOS_EOL_VALIDADE_HORAS)
+    "atualiza-retratos-alunos-eol": {
+        "task": "src.escola.tasks.atualiza_retratos_alunos_eol",
+        "schedule": crontab(hour=1, minute=0),
+    },
+    # garantia para eventos do outbox cujo agendamento após o commit se perdeu
+    "despacha-eventos-outbox": {
+        "task": "src.dados_comuns.tasks.despacha_eventos_outbox_task",
+        "schedule": crontab(minute="*/5"),
+    },
+}
 
 # reset password
 PASSWORD_RESET_TIMEOUT_DAYS = 1
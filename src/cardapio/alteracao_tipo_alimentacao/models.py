@@ -186,6 +186,8 @@ class AlteracaoCardapio(
         """
         return f"alteracao-do-tipo-de-alimentacao/relatorio?uuid={self.uuid}&tipoSolicitacao=solicitacao-normal"
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         """Registra no log a transição de status da solicitação.
 
@@ -209,7 +211,7 @@ class AlteracaoCardapio(
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -132,6 +132,8 @@ class AlteracaoCardapioCEI(
         """
         return f"alteracao-do-tipo-de-alimentacao/relatorio?uuid={self.uuid}&tipoSolicitacao=solicitacao-cei"
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         """Registra no log a transição de status da solicitação.
 
@@ -155,7 +157,7 @@ class AlteracaoCardapioCEI(
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -263,6 +263,8 @@ class AlteracaoCardapioCEMEI(
         )
         return periodos
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         """Registra no log a transição de status da solicitação.
 
@@ -286,7 +288,7 @@ class AlteracaoCardapioCEMEI(
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -177,6 +177,8 @@ class InversaoCardapio(
         """
         return ""
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.INVERSAO_DE_CARDAPIO
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         """Registra no log a transicao de status da solicitacao.
 
@@ -198,7 +200,7 @@ class InversaoCardapio(
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.INVERSAO_DE_CARDAPIO,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -580,10 +580,12 @@ def logs_alunos_matriculados_periodo_escola(escola, periodo_escolar):
         quantidade_alunos=100,
         tipo_turma=models.TipoTurma.REGULAR.name,
     )
-    models.LogAlunosMatriculadosPeriodoEscola.objects.all().update(criado_em=ontem)
+    models.LogAlunosMatriculadosPeriodoEscola.objects.all().update(
+        criado_em=ontem, data=ontem
+    )
     models.LogAlunosMatriculadosPeriodoEscola.objects.filter(
         quantidade_alunos=100
-    ).update(criado_em=quatro_dias_atras)
+    ).update(criado_em=quatro_dias_atras, data=quatro_dias_atras)
     return models.LogAlunosMatriculadosPeriodoEscola.objects.all()
 
 
@@ -0,0 +1,72 @@
+import datetime
+
+import pytest
+from freezegun import freeze_time
+from model_bakery import baker
+
+from src.dados_comuns.calendario_prioridade import (
+    CalendarioPrioridade,
+    calcula_limites,
+    calendario_prioridade,
+    get_calendario_prioridade,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def inversao_com_suspensao():
+    edital = baker.make("Edital")
+    lote = baker.make("Lote")
+    baker.make("Contrato", edital=edital, lotes=[lote], encerrado=False)
+    tipo_unidade = baker.make("TipoUnidadeEscolar")
+    escola = baker.make("Escola", lote=lote, tipo_unidade=tipo_unidade)
+    for data in [datetime.date(2023, 5, 3), datetime.date(2023, 5, 10)]:
+        baker.make(
+            "DiaSuspensaoAtividades",
+            data=data,
+            tipo_unidade=tipo_unidade,
+            edital=edital,
+        )
+    return baker.make(
+        "InversaoCardapio",
+        escola=escola,
+        data_de_inversao=datetime.date(2023, 5, 8),
+        data_para_inversao=datetime.date(2023, 5, 9),
+    )
+
+
+@freeze_time("2023-05-02")
+def test_calendario_limites_iguais_aos_sem_calendario(inversao_com_suspensao):
+    calendario = CalendarioPrioridade()
+    esperado = calcula_limites(
+        calendario.hoje, inversao_com_suspensao.get_dias_suspensao_por_prioridade()
+    )
+    assert calendario.limites(inversao_com_suspensao) == esperado
+
+
+@freeze_time("2023-05-02")
+def test_calendario_prioridade_igual_a_sem_calendario(inversao_com_suspensao):
+    sem_calendario = inversao_com_suspensao.prioridade
+    with calendario_prioridade():
+        assert inversao_com_suspensao.prioridade == sem_calendario
+
+
+@freeze_time("2023-05-02")
+def test_calendario_sem_consultas_repetidas(
+    inversao_com_suspensao, django_assert_max_num_queries
+):
+    with calendario_prioridade():
+        inversao_com_suspensao.prioridade
+        with django_assert_max_num_queries(0):
+            for _ in range(10):
+                inversao_com_suspensao.prioridade
+
+
+def test_calendario_ativo_apenas_no_contexto():
+    assert get_calendario_prioridade() is None
+    with calendario_prioridade() as calendario:
+        assert get_calendario_prioridade() is calendario
+        with calendario_prioridade() as calendario_aninhado:
+            assert calendario_aninhado is calendario
+    assert get_calendario_prioridade() is None
@@ -0,0 +1,173 @@
+import datetime
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from asgiref.sync import async_to_sync
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from model_bakery import baker
+from rest_framework_simplejwt.tokens import AccessToken
+
+from src.dados_comuns.consumers import (
+    SolicitacoesAbertasConsumer,
+    grupo_solicitacao_aberta,
+)
+from src.dados_comuns.models import SolicitacaoAberta
+
+pytestmark = pytest.mark.django_db
+
+UUID_SOLICITACAO = "9b7a6ad5-4c1a-4f8e-a1a3-2b1f9c3e7d10"
+
+
+@pytest.fixture
+def channel_layer_em_memoria(settings):
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    }
+
+
+def test_grupo_solicitacao_aberta():
+    assert (
+        grupo_solicitacao_aberta(UUID_SOLICITACAO.upper())
+        == f"solicitacao_aberta.{UUID_SOLICITACAO}"
+    )
+    assert grupo_solicitacao_aberta("uuid inválido") is None
+
+
+def test_signals_publicam_apenas_deltas_apos_commit(
+    django_capture_on_commit_callbacks,
+):
+    channel_layer = MagicMock(group_send=AsyncMock())
+    with patch(
+        "src.dados_comuns.signals.get_channel_layer", return_value=channel_layer
+    ):
+        with django_capture_on_commit_callbacks() as callbacks:
+            solicitacao = baker.make(
+                "SolicitacaoAberta",
+                uuid_solicitacao=UUID_SOLICITACAO,
+                datetime_ultimo_acesso=datetime.datetime.now(),
+            )
+            channel_layer.group_send.assert_not_called()
+        for callback in callbacks:
+            callback()
+
+        grupo, mensagem = channel_layer.group_send.call_args.args
+        assert grupo == f"solicitacao_aberta.{UUID_SOLICITACAO}"
+        assert mensagem["data"]["tipo"] == "adicionada"
+        assert mensagem["data"]["solicitacao"]["id"] == solicitacao.id
+
+        with django_capture_on_commit_callbacks(execute=True):
+            solicitacao.datetime_ultimo_acesso = datetime.datetime.now()
+            solicitacao.save()
+        assert channel_layer.group_send.call_count == 1
+
+        id_solicitacao = solicitacao.id
+        with django_capture_on_commit_callbacks(execute=True):
+            solicitacao.delete()
+        grupo, mensagem = channel_layer.group_send.call_args.args
+        assert mensagem["data"] == {
+            "tipo": "removida",
+            "solicitacao": {
+                "id": id_solicitacao,
+                "uuid_solicitacao": UUID_SOLICITACAO,
+            },
+        }
+
+
+def test_consumer_envia_estado_e_deltas_das_inscricoes(channel_layer_em_memoria):
+    baker.make(
+        "SolicitacaoAberta",
+        uuid_solicitacao=UUID_SOLICITACAO,
+        datetime_ultimo_acesso=datetime.datetime.now(),
+    )
+    baker.make(
+        "SolicitacaoAberta",
+        uuid_solicitacao="outra-solicitacao",
+        datetime_ultimo_acesso=datetime.datetime.now(),
+    )
+
+    async def fluxo():
+        communicator = WebsocketCommunicator(
+            SolicitacoesAbertasConsumer.as_asgi(),
+            f"/ws/solicitacoes-abertas/?uuids={UUID_SOLICITACAO}",
+        )
+        conectado, _ = await communicator.connect()
+        assert conectado
+        estado = await communicator.receive_json_from()
+        assert estado["tipo"] == "estado"
+        assert [s["uuid_solicitacao"] for s in estado["solicitacoes"]] == [
+            UUID_SOLICITACAO
+        ]
+
+        channel_layer = get_channel_layer()
+        await channel_layer.group_send(
+            grupo_solicitacao_aberta("outra-solicitacao"),
+            {"type": "solicitacao.delta", "data": {"tipo": "removida"}},
+        )
+        assert await communicator.receive_nothing()
+
+        await channel_layer.group_send(
+            grupo_solicitacao_aberta(UUID_SOLICITACAO),
+            {"type": "solicitacao.delta", "data": {"tipo": "removida"}},
+        )
+        assert await communicator.receive_json_from() == {"tipo": "removida"}
+
+        await communicator.send_json_to(
+            {"acao": "cancelar", "uuids": [UUID_SOLICITACAO]}
+        )
+        await communicator.send_json_to({"acao": "inscrever", "uuids": ["inexistente"]})
+        assert await communicator.receive_json_from() == {
+            "tipo": "estado",
+            "solicitacoes": [],
+        }
+        await channel_layer.group_send(
+            grupo_solicitacao_aberta(UUID_SOLICITACAO),
+            {"type": "solicitacao.delta", "data": {"tipo": "removida"}},
+        )
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async_to_sync(fluxo)()
+    assert SolicitacaoAberta.objects.count() == 2
+
+
+def test_consumer_manter_renova_apenas_solicitacoes_do_usuario_do_token(
+    channel_layer_em_memoria,
+):
+    usuario = baker.make("perfil.Usuario")
+    ultimo_acesso = datetime.datetime(2024, 1, 1, 10, 0)
+    propria = baker.make(
+        "SolicitacaoAberta",
+        uuid_solicitacao=UUID_SOLICITACAO,
+        usuario=usuario,
+        datetime_ultimo_acesso=ultimo_acesso,
+    )
+    de_outro_usuario = baker.make(
+        "SolicitacaoAberta",
+        uuid_solicitacao=UUID_SOLICITACAO,
+        usuario=baker.make("perfil.Usuario"),
+        datetime_ultimo_acesso=ultimo_acesso,
+    )
+
+    async def fluxo(token):
+        communicator = WebsocketCommunicator(
+            SolicitacoesAbertasConsumer.as_asgi(),
+            f"/ws/solicitacoes-abertas/?token={token}",
+        )
+        conectado, _ = await communicator.connect()
+        assert conectado
+        await communicator.send_json_to(
+            {"acao": "manter", "ids": [propria.id, de_outro_usuario.id]}
+        )
+        assert await communicator.receive_nothing()
+        await communicator.disconnect()
+
+    async_to_sync(fluxo)("token-invalido")
+    propria.refresh_from_db()
+    assert propria.datetime_ultimo_acesso == ultimo_acesso
+
+    async_to_sync(fluxo)(str(AccessToken.for_user(usuario)))
+    propria.refresh_from_db()
+    de_outro_usuario.refresh_from_db()
+    assert propria.datetime_ultimo_acesso > ultimo_acesso
+    assert de_outro_usuario.datetime_ultimo_acesso == ultimo_acesso
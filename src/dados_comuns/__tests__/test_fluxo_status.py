@@ -4,13 +4,17 @@ from unittest.mock import patch
 import pytest
 import xworkflows
 from django.core.files.base import ContentFile
+from model_bakery import baker
 from rest_framework.exceptions import PermissionDenied, ValidationError
 
 from src.dados_comuns.fluxo_status import (
+    PedidoAPartirDaEscolaWorkflow,
     ReclamacaoProdutoWorkflow,
     SolicitacaoMedicaoInicialWorkflow,
+    transiciona_em_massa,
 )
 from src.dados_comuns.models import AnexoLogSolicitacoesUsuario, LogSolicitacoesUsuario
+from src.inclusao_alimentacao.models import GrupoInclusaoAlimentacaoNormal
 from src.pre_recebimento.cronograma_entrega.models import Cronograma
 
 pytestmark = pytest.mark.django_db
@@ -488,3 +492,106 @@ def test_finaliza_solicitacao_alteracao_hook_com_fichas_mantem_referencia(
     assert etapa_antiga.cronograma is None
     assert ficha.etapa == etapa_nova_correspondente
     assert etapa_nova_correspondente in cronograma.etapas.all()
+
+
+@pytest.fixture
+def grupos_inclusao_dre_a_validar(escola):
+    baker.make(
+        GrupoInclusaoAlimentacaoNormal,
+        escola=escola,
+        rastro_escola=escola,
+        status=PedidoAPartirDaEscolaWorkflow.DRE_VALIDADO,
+    )
+    return baker.make(
+        GrupoInclusaoAlimentacaoNormal,
+        escola=escola,
+        rastro_escola=escola,
+        status=PedidoAPartirDaEscolaWorkflow.DRE_A_VALIDAR,
+        _quantity=2,
+    )
+
+
+def test_transiciona_em_massa(
+    grupos_inclusao_dre_a_validar,
+    user_diretor_escola,
+    django_capture_on_commit_callbacks,
+):
+    usuario, _ = user_diretor_escola
+    with patch(
+        "src.dados_comuns.fluxo_status.executa_efeitos_transicao_em_massa_task.delay"
+    ) as efeitos:
+        with django_capture_on_commit_callbacks(execute=True):
+            transicionados = transiciona_em_massa(
+                GrupoInclusaoAlimentacaoNormal.objects.all(),
+                "dre_nao_valida",
+                usuario=usuario,
+                justificativa="Fora do prazo",
+                ignora_invalidos=True,
+            )
+
+    assert {grupo.uuid for grupo in transicionados} == {
+        grupo.uuid for grupo in grupos_inclusao_dre_a_validar
+    }
+    assert all(
+        grupo.status == PedidoAPartirDaEscolaWorkflow.DRE_NAO_VALIDOU_PEDIDO_ESCOLA
+        for grupo in transicionados
+    )
+    logs = LogSolicitacoesUsuario.objects.filter(
+        status_evento=LogSolicitacoesUsuario.DRE_NAO_VALIDOU,
+        solicitacao_tipo=LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_NORMAL,
+        usuario=usuario,
+        justificativa="Fora do prazo",
+    )
+    assert logs.count() == 2
+    efeitos.assert_called_once()
+    modelo, metodo, logs_por_objeto = efeitos.call_args.args
+    assert modelo == "inclusao_alimentacao.GrupoInclusaoAlimentacaoNormal"
+    assert metodo == "_envia_email_dre_nao_valida"
+    assert len(logs_por_objeto) == 2
+
+
+def test_transiciona_em_massa_status_invalido(
+    grupos_inclusao_dre_a_validar, user_diretor_escola
+):
+    usuario, _ = user_diretor_escola
+    with pytest.raises(xworkflows.InvalidTransitionError):
+        transiciona_em_massa(
+            GrupoInclusaoAlimentacaoNormal.objects.all(),
+            "dre_nao_valida",
+            usuario=usuario,
+        )
+    assert (
+        GrupoInclusaoAlimentacaoNormal.objects.filter(
+            status=PedidoAPartirDaEscolaWorkflow.DRE_A_VALIDAR
+        ).count()
+        == 2
+    )
+    assert not LogSolicitacoesUsuario.objects.exists()
+
+
+def test_transiciona_em_massa_transicao_nao_disponivel(user_diretor_escola):
+    usuario, _ = user_diretor_escola
+    with pytest.raises(ValueError):
+        transiciona_em_massa(
+            GrupoInclusaoAlimentacaoNormal.objects.all(), "dre_valida", usuario=usuario
+        )
+
+
+def test_transiciona_em_massa_agenda_atualizacao_da_projecao(
+    grupos_inclusao_dre_a_validar, user_diretor_escola
+):
+    usuario, _ = user_diretor_escola
+    with patch(
+        "src.dados_comuns.fluxo_status.agenda_atualizacao_solicitacoes"
+    ) as agenda:
+        transiciona_em_massa(
+            GrupoInclusaoAlimentacaoNormal.objects.all(),
+            "dre_nao_valida",
+            usuario=usuario,
+            ignora_invalidos=True,
+        )
+
+    agenda.assert_called_once()
+    assert set(agenda.call_args.args[0]) == {
+        grupo.uuid for grupo in grupos_inclusao_dre_a_validar
+    }
@@ -0,0 +1,35 @@
+import datetime
+
+from ..intervalos import filtro_dia, filtro_dias, filtro_mes
+
+
+def test_filtro_dia_aceita_date_datetime_e_texto():
+    esperado = {
+        "criado_em__gte": datetime.date(2024, 2, 29),
+        "criado_em__lt": datetime.date(2024, 3, 1),
+    }
+
+    assert filtro_dia("criado_em", datetime.date(2024, 2, 29)) == esperado
+    assert filtro_dia("criado_em", datetime.datetime(2024, 2, 29, 18)) == esperado
+    assert filtro_dia("criado_em", "2024-02-29") == esperado
+
+
+def test_filtro_dias_inclui_o_ultimo_dia():
+    assert filtro_dias("criado_em", "2024-01-10", "2024-01-20") == {
+        "criado_em__gte": datetime.date(2024, 1, 10),
+        "criado_em__lt": datetime.date(2024, 1, 21),
+    }
+
+
+def test_filtro_mes_aceita_texto_e_vira_o_ano():
+    assert filtro_mes("data", "2023", "12") == {
+        "data__gte": datetime.date(2023, 12, 1),
+        "data__lt": datetime.date(2024, 1, 1),
+    }
+
+
+def test_filtro_mes_sem_mes_filtra_o_ano():
+    assert filtro_mes("data", 2024) == {
+        "data__gte": datetime.date(2024, 1, 1),
+        "data__lt": datetime.date(2025, 1, 1),
+    }
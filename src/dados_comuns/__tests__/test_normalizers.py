@@ -1,4 +1,4 @@
-from ..normalizers import normalizar_nome_categoria
+from ..normalizers import normalizar_busca, normalizar_nome_categoria
 
 
 def test_normalizar_nome_categoria_remove_acentos():
@@ -39,4 +39,8 @@ def test_normalizar_nome_categoria_ignora_maiusculas_e_minusculas():
         "DúViDaS FrEqUeNtEs SoBrE ReFeIçÕeS"
     )
 
-    assert resultado == "duvidas frequentes sobre refeicoes"
\ No newline at end of file
+    assert resultado == "duvidas frequentes sobre refeicoes"
+
+def test_normalizar_busca_remove_acentos_e_espacos_repetidos():
+    assert normalizar_busca("  Feijão   CARIOCA  ") == "feijao carioca"
+    assert normalizar_busca(None) == ""
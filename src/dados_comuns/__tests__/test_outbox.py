@@ -0,0 +1,102 @@
+import datetime
+from unittest.mock import MagicMock, patch
+
+import pytest
+from django.test import override_settings
+
+from src.dados_comuns import outbox
+from src.dados_comuns.models import EventoOutbox
+from src.dados_comuns.outbox import (
+    TipoEventoOutbox,
+    despacha_eventos,
+    reenvia_eventos,
+    registra_chamada_papa,
+    registra_evento,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+@pytest.fixture
+def envia():
+    envia = MagicMock()
+    with patch.dict(outbox.TIPOS, {"teste": TipoEventoOutbox("teste", envia)}):
+        with patch("src.dados_comuns.outbox._agenda_despacho") as agenda:
+            envia.agenda = agenda
+            yield envia
+
+
+def test_registra_evento_idempotente(envia):
+    primeiro = registra_chamada_papa("confirmacao_de_envio", "123", "SOL1", 2)
+    segundo = registra_chamada_papa("confirmacao_de_envio", "123", "SOL1", 2)
+
+    assert primeiro == segundo
+    assert EventoOutbox.objects.count() == 1
+    assert primeiro.destino == "eol_papa"
+    assert primeiro.status == EventoOutbox.PENDENTE
+    assert primeiro.payload == {
+        "cnpj": "123",
+        "numero_solicitacao": "SOL1",
+        "sequencia_envio": 2,
+    }
+
+
+def test_despacha_eventos_envia_pendentes(envia):
+    registra_evento("teste", {"numero": 1})
+    registra_evento("teste", {"numero": 2})
+
+    assert despacha_eventos() == {EventoOutbox.ENVIADO: 2}
+    assert [chamada.args[0] for chamada in envia.call_args_list] == [
+        {"numero": 1},
+        {"numero": 2},
+    ]
+    assert not EventoOutbox.objects.exclude(status=EventoOutbox.ENVIADO).exists()
+    assert despacha_eventos() == {}
+    assert envia.call_count == 2
+
+
+@override_settings(OUTBOX_ESPERA_BASE_SEGUNDOS=30, OUTBOX_MAX_TENTATIVAS=3)
+def test_despacha_eventos_falha_reagenda_com_espera_crescente(envia):
+    envia.side_effect = ConnectionError("fora do ar")
+    evento = registra_evento("teste", {})
+
+    antes = datetime.datetime.now()
+    assert despacha_eventos() == {EventoOutbox.PENDENTE: 1}
+    evento.refresh_from_db()
+    assert evento.tentativas == 1
+    assert evento.ultimo_erro == "ConnectionError: fora do ar"
+    assert evento.proxima_tentativa_em >= antes + datetime.timedelta(seconds=30)
+    envia.agenda.assert_called_with(eta=evento.proxima_tentativa_em)
+
+    assert despacha_eventos() == {}
+    EventoOutbox.objects.update(proxima_tentativa_em=datetime.datetime.now())
+    antes = datetime.datetime.now()
+    despacha_eventos()
+    evento.refresh_from_db()
+    assert evento.tentativas == 2
+    assert evento.proxima_tentativa_em >= antes + datetime.timedelta(seconds=60)
+
+    EventoOutbox.objects.update(proxima_tentativa_em=datetime.datetime.now())
+    assert despacha_eventos() == {EventoOutbox.FALHOU: 1}
+    evento.refresh_from_db()
+    assert evento.tentativas == 3
+
+    reenvia_eventos(EventoOutbox.objects.all())
+    envia.side_effect = None
+    assert despacha_eventos() == {EventoOutbox.ENVIADO: 1}
+
+
+def test_despacha_eventos_reserva_eventos_antes_do_envio(envia):
+    evento = registra_evento("teste", {})
+    agora = datetime.datetime.now()
+
+    def envia_e_despacha_de_novo(payload, conexao):
+        evento.refresh_from_db()
+        assert evento.proxima_tentativa_em > agora
+        # um despacho simultâneo não pega o evento reservado
+        assert despacha_eventos() == {}
+
+    envia.side_effect = envia_e_despacha_de_novo
+
+    assert despacha_eventos() == {EventoOutbox.ENVIADO: 1}
+    assert envia.call_count == 1
@@ -1,5 +1,6 @@
 import datetime
 import json
+from io import BytesIO
 
 import pytest
 from django.core.cache import cache
@@ -7,16 +8,20 @@ from faker import Faker
 from freezegun import freeze_time
 from model_bakery import baker
 from rest_framework import status
+from rest_framework.exceptions import ValidationError
 from rest_framework.test import APIRequestFactory
 
 from ...escola.models import TipoUnidadeEscolar
 from ..models import (
+    ArquivoEmPartes,
     CategoriaPerguntaFrequente,
     CentralDeDownload,
     Notificacao,
     PerguntaFrequente,
     VersaoSistema,
 )
+from ..tasks import deleta_arquivos_em_partes_expirados
+from ..utils import convert_base64_to_contentfile, size
 
 fake = Faker("pt_BR")
 Faker.seed(420)
@@ -883,4 +888,139 @@ def test_url_lista_categorias_ordenadas_da_mais_antiga_para_mais_recente(
     )
     assert uuids.index(str(categoria_2.uuid)) < uuids.index(
         str(categoria_3.uuid)
-    )
\ No newline at end of file
+    )
+
+def test_get_notificacoes_feed_por_cursor(
+    usuario_teste_notificacao_autenticado, notificacao, notificacao_de_pendencia
+):
+    user, client = usuario_teste_notificacao_autenticado
+    response = client.get("/notificacoes/feed/?page_size=1")
+    result = response.json()
+    assert response.status_code == status.HTTP_200_OK
+    assert "count" not in result
+    # pendências não resolvidas vêm antes, mesmo sendo mais antigas
+    assert [n["uuid"] for n in result["results"]] == [
+        str(notificacao_de_pendencia.uuid)
+    ]
+
+    response = client.get(result["next"])
+    result = response.json()
+    assert [n["uuid"] for n in result["results"]] == [str(notificacao.uuid)]
+    assert result["next"] is None
+
+    response = client.get("/notificacoes/feed/?cursor=invalido")
+    assert response.status_code == status.HTTP_404_NOT_FOUND
+
+
+def test_contador_nao_lidos_atualizado_apos_commit(
+    usuario_teste_notificacao_autenticado,
+    notificacao_de_pendencia_com_requisicao,
+    django_capture_on_commit_callbacks,
+    settings,
+):
+    settings.CHANNEL_LAYERS = {
+        "default": {"BACKEND": "channels.layers.InMemoryChannelLayer"}
+    }
+    user, client = usuario_teste_notificacao_autenticado
+    pendencia = notificacao_de_pendencia_com_requisicao
+    cache.clear()
+    assert Notificacao.quantidade_nao_lidos(user.id) == 1
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Notificacao.notificar(
+            tipo=Notificacao.TIPO_NOTIFICACAO_ALERTA,
+            categoria=Notificacao.CATEGORIA_NOTIFICACAO_GUIA_DE_REMESSA,
+            titulo="Nova guia",
+            descricao="A guia 0001 foi enviada",
+            usuario=user,
+            link="/",
+        )
+    response = client.get("/notificacoes/quantidade-nao-lidos/")
+    assert response.json() == {"quantidade_nao_lidos": 2}
+
+    with django_capture_on_commit_callbacks(execute=True):
+        Notificacao.resolver_pendencia(
+            titulo=pendencia.titulo, requisicao=pendencia.requisicao
+        )
+    assert Notificacao.quantidade_nao_lidos(user.id) == 1
+
+
+def test_envio_de_arquivo_em_partes(
+    usuario_teste_notificacao_autenticado, settings, tmp_path
+):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.ARQUIVOS_EM_PARTES_TAMANHO_PARTE = 4
+    user, client = usuario_teste_notificacao_autenticado
+    conteudo = b"conteudo do pdf"
+
+    response = client.post(
+        "/arquivos-em-partes/",
+        {
+            "nome": "anexo.pdf",
+            "content_type": "application/pdf",
+            "tamanho_total": len(conteudo),
+        },
+        content_type="application/json",
+    )
+    assert response.status_code == status.HTTP_201_CREATED
+    upload = response.json()
+    assert upload["recebido"] == 0
+    assert upload["tamanho_parte"] == 4
+    url_partes = f"/arquivos-em-partes/{upload['uuid']}/partes/"
+
+    def envia(inicio, fim):
+        return client.put(
+            url_partes,
+            conteudo[inicio : fim + 1],
+            content_type="application/octet-stream",
+            HTTP_CONTENT_RANGE=f"bytes {inicio}-{fim}/{len(conteudo)}",
+        )
+
+    assert envia(0, 3).json()["recebido"] == 4
+    response = envia(8, 11)
+    assert response.status_code == status.HTTP_409_CONFLICT
+    assert response.json()["recebido"] == 4
+    assert envia(4, 9).status_code == status.HTTP_400_BAD_REQUEST
+
+    with pytest.raises(ValidationError):
+        convert_base64_to_contentfile(upload["token"], user)
+
+    for inicio in range(4, len(conteudo), 4):
+        response = envia(inicio, min(inicio + 3, len(conteudo) - 1))
+    assert response.json()["concluido"] is True
+
+    outro_usuario = baker.make("perfil.Usuario")
+    with pytest.raises(ValidationError):
+        convert_base64_to_contentfile(upload["token"], outro_usuario)
+    assert size(upload["token"], user) == len(conteudo)
+
+    arquivo = convert_base64_to_contentfile(upload["token"], user)
+    assert arquivo.name.endswith(".pdf")
+    assert arquivo.read() == conteudo
+    arquivo.close()
+
+    with pytest.raises(ValidationError):
+        convert_base64_to_contentfile(upload["token"], user)
+
+
+def test_deleta_arquivos_em_partes_expirados(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path)
+    settings.ARQUIVOS_EM_PARTES_EXPIRACAO_HORAS = 1
+    usuario = baker.make("perfil.Usuario")
+    expirado = ArquivoEmPartes.objects.create(
+        usuario=usuario, nome="antigo.pdf", tamanho_total=3
+    )
+    expirado.anexa_parte(0, BytesIO(b"pdf"), 3)
+    caminho = tmp_path / expirado.arquivo.name
+    assert caminho.exists()
+    ArquivoEmPartes.objects.filter(pk=expirado.pk).update(
+        alterado_em=datetime.datetime.now() - datetime.timedelta(hours=2)
+    )
+    recente = ArquivoEmPartes.objects.create(
+        usuario=usuario, nome="novo.pdf", tamanho_total=3
+    )
+
+    deleta_arquivos_em_partes_expirados()
+
+    assert list(ArquivoEmPartes.objects.all()) == [recente]
+    assert not caminho.exists()
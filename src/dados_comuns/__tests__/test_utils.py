@@ -170,6 +170,17 @@ def test_analisa_logs_quantidade_dietas_autorizadas(
     assert len(logs_dietas_cemei) == 5
 
 
+def test_analisa_logs_alunos_matriculados_periodo_escola_dry_run(
+    logs_alunos_matriculados_periodo_escola,
+):
+    resultado = analisa_logs_alunos_matriculados_periodo_escola(dry_run=True)
+    assert resultado["LogAlunosMatriculadosPeriodoEscola"] == {
+        "deletados": 1,
+        "criados": 2,
+    }
+    assert LogAlunosMatriculadosPeriodoEscola.objects.count() == 3
+
+
 def test_atualiza_central_download(obj_central_download):
     identificador_pdf = "relatorio.pdf"
     arquivo = b"conteudo do arquivo"
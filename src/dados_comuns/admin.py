@@ -5,11 +5,13 @@ from .models import (
     CentralDeDownload,
     Contato,
     Endereco,
+    EventoOutbox,
     LogSolicitacoesUsuario,
     Notificacao,
     PerguntaFrequente,
     VersaoSistema,
 )
+from .outbox import reenvia_eventos
 
 
 @admin.register(Contato)
@@ -39,3 +41,26 @@ admin.site.register(PerguntaFrequente)
 class VersaoSistemaAdmin(admin.ModelAdmin):
     list_display = ("versao", "atualizada_em")
     readonly_fields = ("atualizada_em",)
+
+
+@admin.register(EventoOutbox)
+class EventoOutboxAdmin(admin.ModelAdmin):
+    list_display = (
+        "tipo",
+        "destino",
+        "status",
+        "tentativas",
+        "proxima_tentativa_em",
+        "criado_em",
+        "enviado_em",
+    )
+    list_filter = ("status", "destino", "tipo")
+    search_fields = ("chave_idempotencia", "tipo")
+    readonly_fields = ("uuid", "criado_em", "enviado_em", "ultimo_erro")
+    actions = ["reenviar"]
+
+    def reenviar(self, request, queryset):
+        quantidade = reenvia_eventos(queryset)
+        self.message_user(request, f"{quantidade} evento(s) devolvido(s) à fila.")
+
+    reenviar.short_description = "Reenviar eventos"
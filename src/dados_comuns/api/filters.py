@@ -1,8 +1,36 @@
 from django_filters import rest_framework as filters
 
+from ..intervalos import filtro_mes
 from ..models import Notificacao
 
 
+class MesAnoFilterSet(filters.FilterSet):
+    """
+    Filtros `mes` e `ano` sobre `campo_mes_ano`. Com o ano informado, o filtro
+    é um intervalo semiaberto de datas, que usa os índices por data.
+    """
+
+    campo_mes_ano = "data"
+
+    mes = filters.CharFilter(method="filtra_mes_ano")
+    ano = filters.CharFilter(method="filtra_mes_ano")
+
+    def filtra_mes_ano(self, queryset, name, value):
+        mes = self.form.cleaned_data.get("mes")
+        ano = self.form.cleaned_data.get("ano")
+        if name == "ano":
+            try:
+                filtro = filtro_mes(self.campo_mes_ano, value, mes or None)
+            except (ValueError, OverflowError):
+                # mês ou ano inválido: nenhum resultado, como o __month/__year
+                return queryset.none()
+            return queryset.filter(**filtro)
+        if ano:
+            # aplicado junto com o ano
+            return queryset
+        return queryset.filter(**{f"{self.campo_mes_ano}__month": value})
+
+
 class NotificacaoFilter(filters.FilterSet):
     uuid = filters.CharFilter(
         field_name="uuid",
@@ -1,5 +1,12 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
 from rest_framework.response import Response
+from rest_framework.utils.urls import replace_query_param
 
 DEFAULT_PAGE = 1
 DEFAULT_PAGE_SIZE = 10
@@ -68,3 +75,87 @@ class HistoricoDietasPagination(PageNumberPagination):
                 "results": data,
             }
         )
+
+
+class FeedPorCursorPagination(BasePagination):
+    """
+    Paginação por cursor (keyset) sobre uma sequência de querysets: os itens do
+    primeiro são listados antes dos do segundo, e assim por diante, cada um do
+    mais recente para o mais antigo (`-criado_em`, `-id`).
+
+    Cada página é uma consulta por faixa de `(criado_em, id)` a partir do último
+    item entregue, sem COUNT nem OFFSET, então o custo não cresce com a
+    quantidade de registros. O cursor (`?cursor=`) vem do `next` da página anterior.
+    """
+
+    page_size = 5
+    max_page_size = DEFAULT_MAX_PAGE_SIZE
+    cursor_query_param = "cursor"
+    page_size_query_param = "page_size"
+    invalid_cursor_message = "Cursor inválido."
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params.get(self.page_size_query_param))
+        except (TypeError, ValueError):
+            return self.page_size
+        return max(1, min(page_size, self.max_page_size))
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return 0, None, None
+        try:
+            dados = json.loads(urlsafe_b64decode(cursor.encode()).decode())
+            return (
+                int(dados["f"]),
+                datetime.fromisoformat(dados["c"]),
+                int(dados["i"]),
+            )
+        except (TypeError, ValueError, KeyError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, indice, item):
+        dados = {"f": indice, "c": item.criado_em.isoformat(), "i": item.id}
+        return urlsafe_b64encode(json.dumps(dados).encode()).decode()
+
+    def paginate_querysets(self, querysets, request):
+        self.request = request
+        self.page_size_atual = self.get_page_size(request)
+        indice_inicial, criado_em, id_ = self.decode_cursor(request)
+
+        itens = []
+        for indice in range(indice_inicial, len(querysets)):
+            queryset = querysets[indice].order_by("-criado_em", "-id")
+            if indice == indice_inicial and criado_em is not None:
+                queryset = queryset.filter(
+                    Q(criado_em__lt=criado_em) | Q(criado_em=criado_em, id__lt=id_)
+                )
+            faltam = self.page_size_atual + 1 - len(itens)
+            itens.extend((indice, item) for item in queryset[:faltam])
+            if len(itens) > self.page_size_atual:
+                break
+
+        self.next_cursor = None
+        if len(itens) > self.page_size_atual:
+            itens = itens[: self.page_size_atual]
+            self.next_cursor = self.encode_cursor(*itens[-1])
+        return [item for _, item in itens]
+
+    def get_next_link(self):
+        if self.next_cursor is None:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(),
+            self.cursor_query_param,
+            self.next_cursor,
+        )
+
+    def get_paginated_response(self, data):
+        return Response(
+            {
+                "next": self.get_next_link(),
+                "page_size": self.page_size_atual,
+                "results": data,
+            }
+        )
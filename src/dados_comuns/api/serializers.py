@@ -2,11 +2,13 @@ from datetime import datetime
 
 import environ
 from des.models import DynamicEmailConfiguration
+from django.conf import settings
 from rest_framework import serializers
 
 from ...perfil.api.serializers import UsuarioSerializer, UsuarioSimplesSerializer
 from ..models import (
     AnexoLogSolicitacoesUsuario,
+    ArquivoEmPartes,
     CategoriaPerguntaFrequente,
     CentralDeDownload,
     Contato,
@@ -312,6 +314,7 @@ class CentralDeDownloadSerializer(serializers.ModelSerializer):
             "data_criacao",
             "msg_erro",
             "visto",
+            "progresso",
         ]
 
 
@@ -339,3 +342,41 @@ class SolicitacaoAbertaSerializer(serializers.ModelSerializer):
     class Meta:
         model = SolicitacaoAberta
         fields = ("id", "uuid_solicitacao", "usuario", "datetime_ultimo_acesso")
+
+
+class ArquivoEmPartesSerializer(serializers.ModelSerializer):
+    token = serializers.CharField(read_only=True)
+    concluido = serializers.BooleanField(read_only=True)
+    tamanho_parte = serializers.SerializerMethodField()
+
+    def get_tamanho_parte(self, obj):
+        return settings.ARQUIVOS_EM_PARTES_TAMANHO_PARTE
+
+    def validate_tamanho_total(self, tamanho_total):
+        if not tamanho_total:
+            raise serializers.ValidationError("O arquivo está vazio.")
+        if tamanho_total > settings.ARQUIVOS_EM_PARTES_TAMANHO_MAXIMO:
+            raise serializers.ValidationError(
+                "O arquivo ultrapassa o tamanho máximo de "
+                f"{settings.ARQUIVOS_EM_PARTES_TAMANHO_MAXIMO} bytes."
+            )
+        return tamanho_total
+
+    def create(self, validated_data):
+        return ArquivoEmPartes.objects.create(
+            usuario=self.context["request"].user, **validated_data
+        )
+
+    class Meta:
+        model = ArquivoEmPartes
+        fields = [
+            "uuid",
+            "token",
+            "nome",
+            "content_type",
+            "tamanho_total",
+            "recebido",
+            "concluido",
+            "tamanho_parte",
+        ]
+        read_only_fields = ["uuid", "recebido"]
@@ -1,11 +1,14 @@
 import datetime
+import re
 
 from des.models import DynamicEmailConfiguration
+from django.conf import settings
 from django.db import IntegrityError
+from django.db.models import Case, IntegerField, Value, When
 from django.utils.decorators import method_decorator
 from django.views.decorators.cache import cache_page
 from django_filters import rest_framework as filters
-from rest_framework import status, viewsets
+from rest_framework import mixins, status, viewsets
 from rest_framework.decorators import action
 from rest_framework.permissions import AllowAny, IsAuthenticated
 from rest_framework.response import Response
@@ -16,6 +19,8 @@ from ...escola.models import DiaSuspensaoAtividades, Escola
 from ..behaviors import DiasSemana, TempoPasseio
 from ..constants import TEMPO_CACHE_1H, TEMPO_CACHE_6H, obter_dias_uteis_apos_hoje
 from ..models import (
+    ArquivoEmPartes,
+    ArquivoEmPartesException,
     CategoriaPerguntaFrequente,
     CentralDeDownload,
     Notificacao,
@@ -29,8 +34,13 @@ from ..permissions import (
 )
 from ..utils import obter_dias_uteis_apos
 from .filters import CentralDeDownloadFilter, NotificacaoFilter
-from .paginations import CustomPagination, DownloadPagination
+from .paginations import (
+    CustomPagination,
+    DownloadPagination,
+    FeedPorCursorPagination,
+)
 from .serializers import (
+    ArquivoEmPartesSerializer,
     CategoriaPerguntaFrequenteSerializer,
     CentralDeDownloadSerializer,
     ConfiguracaoEmailSerializer,
@@ -264,18 +274,22 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         return qs
 
     def list(self, request, *args, **kwargs):
-        pendencias = self.filter_queryset(
-            self.get_queryset().filter(
-                tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA, resolvido=False
-            )
-        )
-        gerais = self.filter_queryset(
-            self.get_queryset().exclude(
-                tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA, resolvido=False
+        # Notificações de pendencias não resolvidas tem precedencia na listagem de notificações
+        queryset = (
+            self.filter_queryset(self.get_queryset())
+            .annotate(
+                pendencia_nao_resolvida=Case(
+                    When(
+                        tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA,
+                        resolvido=False,
+                        then=Value(0),
+                    ),
+                    default=Value(1),
+                    output_field=IntegerField(),
+                )
             )
+            .order_by("pendencia_nao_resolvida", "-criado_em", "-id")
         )
-        # Notificações de pendencias não resolvidas tem precedencia na listagem de notificações
-        queryset = list(pendencias) + list(gerais)
         page = self.paginate_queryset(queryset)
         if page is not None:
             serializer = NotificacaoSerializer(page, many=True)
@@ -285,6 +299,29 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
         serializer = NotificacaoSerializer(queryset, many=True)
         return Response(serializer.data)
 
+    @action(detail=False, methods=["get"], url_path="feed")
+    def feed(self, request):
+        """
+        Mesma ordem da listagem (pendências não resolvidas primeiro), paginada
+        por cursor: `?cursor=<cursor do next>&page_size=<n>`. Não há `count`;
+        o tempo de resposta não depende de quantas notificações o usuário tem.
+        """
+        notificacoes = self.filter_queryset(self.get_queryset())
+        paginator = FeedPorCursorPagination()
+        page = paginator.paginate_querysets(
+            [
+                notificacoes.filter(
+                    tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA, resolvido=False
+                ),
+                notificacoes.exclude(
+                    tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA, resolvido=False
+                ),
+            ],
+            request,
+        )
+        serializer = NotificacaoSerializer(page, many=True)
+        return paginator.get_paginated_response(serializer.data)
+
     @action(detail=False, methods=["get"], url_path="gerais")
     def lista_notificacoes_gerais(self, request):
         queryset = self.filter_queryset(
@@ -319,23 +356,12 @@ class NotificacaoViewSet(viewsets.ModelViewSet):
 
     @action(detail=False, methods=["get"], url_path="quantidade-nao-lidos")
     def quantidade_de_nao_lidos(self, request):
-        notificacoes = (
-            Notificacao.objects.filter(usuario=self.request.user)
-            .filter(
-                lido=False,
-                tipo__in=[
-                    Notificacao.TIPO_NOTIFICACAO_ALERTA,
-                    Notificacao.TIPO_NOTIFICACAO_AVISO,
-                ],
+        # contador mantido no cache e também enviado pelo websocket ws/notificacoes/
+        data = {
+            "quantidade_nao_lidos": Notificacao.quantidade_nao_lidos(
+                self.request.user.id
             )
-            .count()
-        )
-        pendencias = (
-            Notificacao.objects.filter(usuario=self.request.user)
-            .filter(resolvido=False, tipo=Notificacao.TIPO_NOTIFICACAO_PENDENCIA)
-            .count()
-        )
-        data = {"quantidade_nao_lidos": notificacoes + pendencias}
+        }
         return Response(data)
 
     @action(detail=False, methods=["put"], url_path="marcar-lido")
@@ -408,6 +434,71 @@ class CentralDeDownloadViewSet(viewsets.ModelViewSet):
         return Response(resultado, status=status_code)
 
 
+REGEX_CONTENT_RANGE = re.compile(r"^bytes (\d+)-(\d+)/(\d+)$")
+
+
+class ArquivoEmPartesViewSet(
+    mixins.CreateModelMixin, mixins.RetrieveModelMixin, viewsets.GenericViewSet
+):
+    """
+    Envio de anexos em partes, para não trafegar arquivos grandes em base64.
+
+    1. `POST /arquivos-em-partes/` com `nome`, `content_type` e `tamanho_total`
+       devolve o `uuid`, o `token` e o `tamanho_parte` máximo.
+    2. `PUT /arquivos-em-partes/<uuid>/partes/` com os bytes no corpo e o
+       cabeçalho `Content-Range: bytes <inicio>-<fim>/<tamanho_total>`, em ordem.
+       Se a parte não começar em `recebido` a resposta é 409 com o `recebido`
+       atual; `GET /arquivos-em-partes/<uuid>/` também o informa, para retomar.
+    3. Com o envio concluído, o `token` vai no lugar do base64 do anexo.
+    """
+
+    lookup_field = "uuid"
+    permission_classes = [IsAuthenticated]
+    serializer_class = ArquivoEmPartesSerializer
+
+    def get_queryset(self):
+        return ArquivoEmPartes.objects.filter(usuario=self.request.user)
+
+    @staticmethod
+    def _le_content_range(request):
+        """Início, tamanho e total da parte, validados pelos cabeçalhos."""
+        match = REGEX_CONTENT_RANGE.match(request.headers.get("Content-Range", ""))
+        if not match:
+            raise ArquivoEmPartesException("Cabeçalho Content-Range inválido.")
+        inicio, fim, total = (int(valor) for valor in match.groups())
+        tamanho = fim - inicio + 1
+        if tamanho <= 0 or tamanho > settings.ARQUIVOS_EM_PARTES_TAMANHO_PARTE:
+            raise ArquivoEmPartesException(
+                "A parte deve ter até "
+                f"{settings.ARQUIVOS_EM_PARTES_TAMANHO_PARTE} bytes."
+            )
+        if tamanho != int(request.headers.get("Content-Length") or 0):
+            raise ArquivoEmPartesException(
+                "O Content-Range não confere com o Content-Length."
+            )
+        return inicio, tamanho, total
+
+    @action(detail=True, methods=["put"], url_path="partes")
+    def envia_parte(self, request, uuid=None):
+        try:
+            inicio, tamanho, total = self._le_content_range(request)
+            arquivo = (
+                self.get_queryset().select_for_update().get(pk=self.get_object().pk)
+            )
+            if total != arquivo.tamanho_total:
+                raise ArquivoEmPartesException(
+                    "O tamanho total não confere com o informado no envio."
+                )
+            if inicio != arquivo.recebido:
+                return Response(
+                    self.get_serializer(arquivo).data, status=status.HTTP_409_CONFLICT
+                )
+            arquivo.anexa_parte(inicio, request.stream, tamanho)
+        except ArquivoEmPartesException as err:
+            return Response(dict(detail=str(err)), status=status.HTTP_400_BAD_REQUEST)
+        return Response(self.get_serializer(arquivo).data)
+
+
 class SolicitacaoAbertaViewSet(ModelViewSet):
     lookup_field = "id"
     queryset = SolicitacaoAberta.objects.all()
@@ -8,6 +8,12 @@ from django.core.validators import MinLengthValidator, MinValueValidator
 from django.db import models
 from django.db.models.fields.files import FileField
 
+from .calendario_prioridade import (
+    calcula_limites,
+    classifica_prioridade,
+    get_calendario_prioridade,
+    ultimo_dia_util,
+)
 from .constants import (
     LIMITE_INFERIOR,
     LIMITE_SUPERIOR,
@@ -15,7 +21,8 @@ from .constants import (
     StatusProcessamentoArquivo,
 )
 from .models import LogSolicitacoesUsuario
-from .utils import eh_dia_util, obter_dias_uteis_apos, ordena_dias_semana_comeca_domingo
+from .normalizers import normalizar_busca
+from .utils import ordena_dias_semana_comeca_domingo
 
 
 class Iniciais(models.Model):
@@ -39,6 +46,66 @@ class Nomeavel(models.Model):
         abstract = True
 
 
+class TemNomeBusca(models.Model):
+    """
+    Mantém em `nome_busca` o `nome` normalizado (`normalizar_busca`), para as
+    buscas por trecho do nome usarem o índice trigram da coluna em vez de
+    `unaccent(nome)` em todas as linhas. O índice (`GinIndex` com
+    `gin_trgm_ops`) é declarado no Meta de cada model.
+
+    Alterações que não passam pelo `save()` (`update()`, `bulk_create()`)
+    precisam de `atualizar_nomes_busca` (comando `atualiza_nomes_busca`).
+    """
+
+    nome_busca = models.CharField(
+        "Nome para busca", blank=True, max_length=250, editable=False
+    )
+
+    class Meta:
+        abstract = True
+
+    def save(self, *args, **kwargs):
+        self.nome_busca = normalizar_busca(self.nome)
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "nome" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "nome_busca"}
+        super().save(*args, **kwargs)
+
+    @staticmethod
+    def filtra_por_nome_busca(queryset, campo: str, termo: str):
+        """
+        `campo__contains` com o termo normalizado; `campo` é o caminho até o
+        `nome_busca` (ex.: "marca__nome_busca").
+        """
+        termo = normalizar_busca(termo)
+        if not termo:
+            return queryset
+        return queryset.filter(**{f"{campo}__contains": termo})
+
+    @classmethod
+    def atualizar_nomes_busca(cls, tamanho_lote: int = 2000) -> int:
+        """Recalcula `nome_busca` onde estiver desatualizado; devolve quantos."""
+        alterados = []
+        total = 0
+        for objeto in (
+            cls.objects.only("id", "nome", "nome_busca")
+            .order_by("id")
+            .iterator(chunk_size=tamanho_lote)
+        ):
+            nome_busca = normalizar_busca(objeto.nome)
+            if objeto.nome_busca != nome_busca:
+                objeto.nome_busca = nome_busca
+                alterados.append(objeto)
+            if len(alterados) >= tamanho_lote:
+                cls.objects.bulk_update(alterados, ["nome_busca"])
+                total += len(alterados)
+                alterados = []
+        if alterados:
+            cls.objects.bulk_update(alterados, ["nome_busca"])
+            total += len(alterados)
+        return total
+
+
 class TemNomeMaior(models.Model):
     nome = models.CharField("Nome", blank=True, max_length=250)
 
@@ -311,48 +378,21 @@ class TemPrioridade(object):
 
     @property
     def prioridade(self):
-        descricao = "VENCIDO"
         hoje = datetime.date.today()
         try:
             data_pedido = self.data_evento
         except AttributeError:
             data_pedido = self.data
-        ultimo_dia_util = self._get_ultimo_dia_util(data_pedido)
-        (
-            dias_suspensao_prioritario,
-            dias_suspensao_inferior,
-            dias_suspensao_superior,
-        ) = self.get_dias_suspensao_por_prioridade()
-        minimo_dias_para_pedido = obter_dias_uteis_apos(
-            hoje, (PRIORITARIO + dias_suspensao_prioritario)
-        )
-        dias_uteis_limite_inferior = obter_dias_uteis_apos(
-            hoje, (LIMITE_INFERIOR + dias_suspensao_inferior)
-        )
-        dias_uteis_limite_superior = obter_dias_uteis_apos(
-            hoje, (LIMITE_SUPERIOR + dias_suspensao_superior)
-        )
-
-        if ultimo_dia_util and minimo_dias_para_pedido >= ultimo_dia_util >= hoje:
-            descricao = "PRIORITARIO"
-        elif (
-            ultimo_dia_util
-            and dias_uteis_limite_superior >= data_pedido >= dias_uteis_limite_inferior
-        ):
-            descricao = "LIMITE"
-        elif ultimo_dia_util and ultimo_dia_util >= dias_uteis_limite_superior:
-            descricao = "REGULAR"
-        return descricao
+        calendario = get_calendario_prioridade()
+        if calendario is not None:
+            return calendario.prioridade(self, data_pedido)
+        ultimo_dia_util_pedido = self._get_ultimo_dia_util(data_pedido)
+        limites = calcula_limites(hoje, self.get_dias_suspensao_por_prioridade())
+        return classifica_prioridade(hoje, data_pedido, ultimo_dia_util_pedido, limites)
 
     def _get_ultimo_dia_util(self, data: datetime.date) -> datetime.date:
         """Assumindo que é sab, dom ou feriado volta para o dia util anterior."""
-        data_retorno = data
-        if data_retorno:
-            while not eh_dia_util(data_retorno):
-                data_retorno -= datetime.timedelta(days=1)
-            if isinstance(data_retorno, datetime.datetime):
-                return data_retorno.date()
-        return data_retorno
+        return ultimo_dia_util(data)
 
 
 class Logs(object):
@@ -0,0 +1,246 @@
+"""
+Calendário de prioridade das solicitações.
+
+`TemPrioridade.prioridade` compara a data da solicitação com três limites
+(PRIORITARIO, LIMITE_INFERIOR e LIMITE_SUPERIOR dias úteis a partir de hoje),
+estendidos pelos dias de suspensão de atividades do tipo de unidade e editais
+da escola. Esses limites só dependem do dia atual e do par (tipo de unidade,
+editais), então o calendário os calcula uma única vez por par e reaproveita
+o resultado para todas as solicitações classificadas no mesmo request.
+"""
+
+import datetime
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property
+from typing import NamedTuple, Optional
+
+from .constants import LIMITE_INFERIOR, LIMITE_SUPERIOR, PRIORITARIO
+from .utils import datetime_range, eh_dia_util, obter_dias_uteis_apos
+
+_calendario_ativo: ContextVar[Optional["CalendarioPrioridade"]] = ContextVar(
+    "calendario_prioridade", default=None
+)
+
+
+class LimitesPrioridade(NamedTuple):
+    minimo_dias_para_pedido: datetime.date
+    dias_uteis_limite_inferior: datetime.date
+    dias_uteis_limite_superior: datetime.date
+
+
+def ultimo_dia_util(data):
+    """Assumindo que é sab, dom ou feriado volta para o dia util anterior."""
+    data_retorno = data
+    if data_retorno:
+        while not eh_dia_util(data_retorno):
+            data_retorno -= datetime.timedelta(days=1)
+        if isinstance(data_retorno, datetime.datetime):
+            return data_retorno.date()
+    return data_retorno
+
+
+def calcula_limites(hoje, dias_suspensao) -> LimitesPrioridade:
+    prioritario, inferior, superior = dias_suspensao
+    return LimitesPrioridade(
+        obter_dias_uteis_apos(hoje, PRIORITARIO + prioritario),
+        obter_dias_uteis_apos(hoje, LIMITE_INFERIOR + inferior),
+        obter_dias_uteis_apos(hoje, LIMITE_SUPERIOR + superior),
+    )
+
+
+def classifica_prioridade(hoje, data_pedido, ultimo_dia_util_pedido, limites) -> str:
+    if ultimo_dia_util_pedido and (
+        limites.minimo_dias_para_pedido >= ultimo_dia_util_pedido >= hoje
+    ):
+        return "PRIORITARIO"
+    if ultimo_dia_util_pedido and (
+        limites.dias_uteis_limite_superior
+        >= data_pedido
+        >= limites.dias_uteis_limite_inferior
+    ):
+        return "LIMITE"
+    if ultimo_dia_util_pedido and (
+        ultimo_dia_util_pedido >= limites.dias_uteis_limite_superior
+    ):
+        return "REGULAR"
+    return "VENCIDO"
+
+
+class CalendarioPrioridade:
+    """
+    Limites de prioridade do dia, calculados uma vez por (tipo de unidade,
+    editais) ou por DRE (solicitações unificadas).
+
+    Os dados são carregados sob demanda: os dias de suspensão da janela dos
+    limites em uma consulta, as escolas e os editais dos lotes em outras duas.
+    """
+
+    def __init__(self, hoje: datetime.date = None):
+        self.hoje = hoje or datetime.date.today()
+        self._suspensoes = None
+        self._quantidade_tipos_unidade = None
+        self._escolas = None
+        self._editais_por_lote = None
+        self._editais_por_dre = {}
+        self._limites = {}
+        self._ultimo_dia_util = {}
+
+    @cached_property
+    def _fim_janela(self) -> dict:
+        return {
+            quantidade: obter_dias_uteis_apos(self.hoje, quantidade)
+            for quantidade in (PRIORITARIO, LIMITE_INFERIOR, LIMITE_SUPERIOR)
+        }
+
+    def _carrega_suspensoes(self):
+        from src.escola.models import DiaSuspensaoAtividades
+
+        if self._suspensoes is None:
+            self._suspensoes = [
+                (data, tipo_unidade_id, str(edital_uuid))
+                for data, tipo_unidade_id, edital_uuid in (
+                    DiaSuspensaoAtividades.objects.filter(
+                        data__gte=self.hoje,
+                        data__lte=max(self._fim_janela.values()),
+                    ).values_list("data", "tipo_unidade_id", "edital__uuid")
+                )
+            ]
+        return self._suspensoes
+
+    def _editais_do_lote(self, lote_id) -> frozenset:
+        """Equivale a Escola.editais para as escolas do lote."""
+        from src.escola.models import Lote
+
+        if self._editais_por_lote is None:
+            self._editais_por_lote = {}
+            for id_lote, edital_uuid in Lote.objects.filter(
+                contratos_do_lote__edital__isnull=False,
+                contratos_do_lote__encerrado=False,
+            ).values_list("id", "contratos_do_lote__edital__uuid"):
+                self._editais_por_lote.setdefault(id_lote, set()).add(str(edital_uuid))
+        return frozenset(self._editais_por_lote.get(lote_id, ()))
+
+    def _chave_escola(self, escola_uuid) -> tuple:
+        from src.escola.models import Escola
+
+        if self._escolas is None:
+            self._escolas = {
+                str(uuid): (tipo_unidade_id, lote_id)
+                for uuid, tipo_unidade_id, lote_id in Escola.objects.values_list(
+                    "uuid", "tipo_unidade_id", "lote_id"
+                )
+            }
+        try:
+            tipo_unidade_id, lote_id = self._escolas[str(escola_uuid)]
+        except KeyError:
+            raise Escola.DoesNotExist("Escola matching query does not exist.")
+        return ("escola", tipo_unidade_id, self._editais_do_lote(lote_id))
+
+    def _dias_suspensao_escola(self, tipo_unidade_id, editais) -> tuple:
+        """Equivale a DiaSuspensaoAtividades.get_dias_com_suspensao_escola."""
+        return tuple(
+            sum(
+                1
+                for data, tipo, edital in self._carrega_suspensoes()
+                if data <= self._fim_janela[quantidade]
+                and tipo == tipo_unidade_id
+                and edital in editais
+            )
+            for quantidade in (PRIORITARIO, LIMITE_INFERIOR, LIMITE_SUPERIOR)
+        )
+
+    def _dias_suspensao_dre(self, editais) -> tuple:
+        """Equivale a DiaSuspensaoAtividades.get_dias_com_suspensao_solicitacao_unificada."""
+        from src.escola.models import TipoUnidadeEscolar
+
+        if self._quantidade_tipos_unidade is None:
+            self._quantidade_tipos_unidade = TipoUnidadeEscolar.objects.count()
+        suspensoes_por_dia = {}
+        for data, _, edital in self._carrega_suspensoes():
+            if edital in editais:
+                suspensoes_por_dia[data] = suspensoes_por_dia.get(data, 0) + 1
+        return tuple(
+            sum(
+                1
+                for data in datetime_range(self.hoje, self._fim_janela[quantidade])
+                if suspensoes_por_dia.get(data, 0) == self._quantidade_tipos_unidade
+            )
+            for quantidade in (PRIORITARIO, LIMITE_INFERIOR, LIMITE_SUPERIOR)
+        )
+
+    def _chave(self, obj) -> Optional[tuple]:
+        from src.kit_lanche.models import SolicitacaoKitLancheUnificada
+        from src.paineis_consolidados.models import MoldeConsolidado
+
+        if isinstance(obj, MoldeConsolidado):
+            return self._chave_escola(obj.escola_uuid)
+        escola = obj.escola if hasattr(obj, "escola") else None
+        if escola:
+            return (
+                "escola",
+                escola.tipo_unidade_id,
+                self._editais_do_lote(escola.lote_id),
+            )
+        if isinstance(obj, SolicitacaoKitLancheUnificada):
+            dre = obj.diretoria_regional
+            if dre.id not in self._editais_por_dre:
+                self._editais_por_dre[dre.id] = frozenset(dre.editais)
+            return ("dre", self._editais_por_dre[dre.id])
+        return None
+
+    def limites(self, obj) -> LimitesPrioridade:
+        chave = self._chave(obj)
+        if chave not in self._limites:
+            if chave is None:
+                dias_suspensao = (0, 0, 0)
+            elif chave[0] == "escola":
+                dias_suspensao = self._dias_suspensao_escola(chave[1], chave[2])
+            else:
+                dias_suspensao = self._dias_suspensao_dre(chave[1])
+            self._limites[chave] = calcula_limites(self.hoje, dias_suspensao)
+        return self._limites[chave]
+
+    def ultimo_dia_util(self, data):
+        if data not in self._ultimo_dia_util:
+            self._ultimo_dia_util[data] = ultimo_dia_util(data)
+        return self._ultimo_dia_util[data]
+
+    def prioridade(self, obj, data_pedido) -> str:
+        return classifica_prioridade(
+            self.hoje, data_pedido, self.ultimo_dia_util(data_pedido), self.limites(obj)
+        )
+
+
+def get_calendario_prioridade() -> Optional[CalendarioPrioridade]:
+    calendario = _calendario_ativo.get()
+    if calendario is not None and calendario.hoje != datetime.date.today():
+        return None
+    return calendario
+
+
+@contextmanager
+def calendario_prioridade():
+    """
+    Ativa um calendário de prioridade no contexto corrente. Chamadas aninhadas
+    reaproveitam o calendário já ativo.
+    """
+    if _calendario_ativo.get() is not None:
+        yield _calendario_ativo.get()
+        return
+    token = _calendario_ativo.set(CalendarioPrioridade())
+    try:
+        yield _calendario_ativo.get()
+    finally:
+        _calendario_ativo.reset(token)
+
+
+class CalendarioPrioridadeMiddleware:
+    """Classifica as solicitações de cada request com um único calendário."""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        with calendario_prioridade():
+            return self.get_response(request)
@@ -1,41 +1,156 @@
-import json
 import logging
+import re
+from datetime import datetime
+from urllib.parse import parse_qs
 
 from channels.db import database_sync_to_async
 from channels.generic.websocket import AsyncJsonWebsocketConsumer
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.tokens import AccessToken
 
 from .api.serializers import SolicitacaoAbertaSerializer
-from .models import SolicitacaoAberta
+from .models import Notificacao, SolicitacaoAberta
 
 logger = logging.getLogger()
 
+REGEX_UUID_SOLICITACAO = re.compile(r"^[0-9A-Za-z-]{1,50}$")
+
+# limite de solicitações acompanhadas por conexão
+MAXIMO_INSCRICOES = 50
+
+
+def grupo_solicitacao_aberta(uuid_solicitacao):
+    """Grupo do channel layer de uma solicitação; None para uuid inválido."""
+    uuid_solicitacao = str(uuid_solicitacao)
+    if not REGEX_UUID_SOLICITACAO.match(uuid_solicitacao):
+        return None
+    return f"solicitacao_aberta.{uuid_solicitacao.lower()}"
+
+
+def grupo_notificacoes_usuario(usuario_id):
+    return f"notificacoes.{usuario_id}"
+
+
+def mensagem_delta(tipo: str, solicitacao: dict) -> dict:
+    """Mensagem de grupo com uma alteração ("adicionada" ou "removida")."""
+    return {
+        "type": "solicitacao.delta",
+        "data": {"tipo": tipo, "solicitacao": solicitacao},
+    }
+
+
+def usuario_id_do_scope(scope):
+    """
+    Id do usuário da conexão: da sessão ou do token JWT informado em
+    `?token=<access token>`, que é como o frontend autentica.
+    """
+    usuario = scope.get("user")
+    if usuario and usuario.is_authenticated:
+        return usuario.id
+
+    query_string = parse_qs(scope.get("query_string", b"").decode())
+    token = (query_string.get("token") or [None])[0]
+    if not token:
+        return None
+    try:
+        return AccessToken(token).get("user_id")
+    except TokenError:
+        return None
+
 
 class SolicitacoesAbertasConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Avisa quais solicitações estão abertas (em edição) e por quem.
+
+    O cliente se inscreve apenas nas solicitações que tem abertas, pela query
+    string (`?uuids=<uuid>,<uuid>`) ou pela mensagem
+    `{"acao": "inscrever" | "cancelar", "uuids": [...]}`. Ao se inscrever recebe
+    `{"tipo": "estado", "solicitacoes": [...]}` com as solicitações abertas dos
+    uuids informados e, depois, apenas as alterações:
+    `{"tipo": "adicionada" | "removida", "solicitacao": {...}}`.
+
+    `{"acao": "manter", "ids": [...]}` renova `datetime_ultimo_acesso` das
+    solicitações abertas pelo próprio usuário, identificado pela sessão ou por
+    `?token=<access token>`; as que deixam de ser renovadas são removidas pela
+    task `deleta_solicitacoes_abertas`.
+    """
+
     async def connect(self):
-        await self.channel_layer.group_add("solicitacoes_abertas", self.channel_name)
+        self.inscricoes = set()
+        self.usuario_id = await database_sync_to_async(usuario_id_do_scope)(self.scope)
         await self.accept()
 
-        solicitacoes_abertas = await self.get_solicitacoes_abertas()
+        query_string = parse_qs(self.scope.get("query_string", b"").decode())
+        uuids = [
+            uuid_solicitacao
+            for valor in query_string.get("uuids", [])
+            for uuid_solicitacao in valor.split(",")
+            if uuid_solicitacao
+        ]
+        if uuids:
+            await self.inscrever(uuids)
+
+    async def disconnect(self, code):
+        for grupo in getattr(self, "inscricoes", ()):
+            await self.channel_layer.group_discard(grupo, self.channel_name)
+
+    async def receive_json(self, content, **kwargs):
+        if not isinstance(content, dict):
+            return
+        acao = content.get("acao")
+        if acao == "inscrever":
+            await self.inscrever(content.get("uuids") or [])
+        elif acao == "cancelar":
+            await self.cancelar(content.get("uuids") or [])
+        elif acao == "manter":
+            await self.manter_abertas(content.get("ids") or [])
+
+    async def inscrever(self, uuids):
+        novos = []
+        for uuid_solicitacao in uuids:
+            grupo = grupo_solicitacao_aberta(uuid_solicitacao)
+            if not grupo or grupo in self.inscricoes:
+                continue
+            if len(self.inscricoes) >= MAXIMO_INSCRICOES:
+                break
+            await self.channel_layer.group_add(grupo, self.channel_name)
+            self.inscricoes.add(grupo)
+            novos.append(str(uuid_solicitacao).lower())
+
+        if novos:
+            solicitacoes_abertas = await self.get_solicitacoes_abertas(novos)
+            await self.send_json(
+                {"tipo": "estado", "solicitacoes": solicitacoes_abertas}
+            )
 
-        await self.send(text_data=json.dumps({"message": solicitacoes_abertas}))
+    async def cancelar(self, uuids):
+        for uuid_solicitacao in uuids:
+            grupo = grupo_solicitacao_aberta(uuid_solicitacao)
+            if grupo in self.inscricoes:
+                await self.channel_layer.group_discard(grupo, self.channel_name)
+                self.inscricoes.discard(grupo)
 
     @database_sync_to_async
-    def get_solicitacoes_abertas(self):
+    def get_solicitacoes_abertas(self, uuids):
         return SolicitacaoAbertaSerializer(
-            SolicitacaoAberta.objects.all(), many=True
+            SolicitacaoAberta.objects.filter(uuid_solicitacao__in=uuids).select_related(
+                "usuario"
+            ),
+            many=True,
         ).data
 
-    async def disconnect(self, code):
-        solicitacoes_abertas = await self.get_solicitacoes_abertas()
-
-        await self.send(text_data=json.dumps({"message": solicitacoes_abertas}))
-
-        await self.channel_layer.group_discard(
-            "solicitacoes_abertas", self.channel_name
+    @database_sync_to_async
+    def manter_abertas(self, ids):
+        if not self.usuario_id:
+            return
+        ids = [id_ for id_ in ids if isinstance(id_, int)]
+        # update() não dispara post_save: renovar o acesso não gera alteração
+        SolicitacaoAberta.objects.filter(id__in=ids, usuario_id=self.usuario_id).update(
+            datetime_ultimo_acesso=datetime.now()
         )
 
-    async def solicitacao_message(self, event):
-        await self.send(text_data=json.dumps(event["data"]))
+    async def solicitacao_delta(self, event):
+        await self.send_json(event["data"])
 
     async def dispatch(self, message):
         """Created because when the ValueErrorException is raised the connection is broken."""
@@ -44,3 +159,41 @@ class SolicitacoesAbertasConsumer(AsyncJsonWebsocketConsumer):
 
         except ValueError as exception:
             logger.error(exception)
+
+
+class NotificacoesConsumer(AsyncJsonWebsocketConsumer):
+    """
+    Envia ao usuário `{"quantidade_nao_lidos": n}` ao conectar e sempre que o
+    contador muda, substituindo a consulta periódica a
+    `/notificacoes/quantidade-nao-lidos/`.
+
+    O usuário vem de `usuario_id_do_scope`.
+    """
+
+    async def connect(self):
+        self.usuario_id = await self.get_usuario_id()
+        if not self.usuario_id:
+            await self.close()
+            return
+
+        self.grupo = grupo_notificacoes_usuario(self.usuario_id)
+        await self.channel_layer.group_add(self.grupo, self.channel_name)
+        await self.accept()
+        await self.send_json(
+            {"quantidade_nao_lidos": await self.get_quantidade_nao_lidos()}
+        )
+
+    @database_sync_to_async
+    def get_usuario_id(self):
+        return usuario_id_do_scope(self.scope)
+
+    @database_sync_to_async
+    def get_quantidade_nao_lidos(self):
+        return Notificacao.quantidade_nao_lidos(self.usuario_id)
+
+    async def disconnect(self, code):
+        if getattr(self, "grupo", None):
+            await self.channel_layer.group_discard(self.grupo, self.channel_name)
+
+    async def notificacoes_contador(self, event):
+        await self.send_json(event["data"])
@@ -4,11 +4,13 @@ Na pasta docs tem os BMPNs dos fluxos
 """
 
 import datetime
+from dataclasses import dataclass
+from typing import Optional
 
 import environ
 import xworkflows
 from django.contrib.contenttypes.models import ContentType
-from django.db import IntegrityError, models
+from django.db import IntegrityError, models, transaction
 from django.template.loader import render_to_string
 from django_xworkflows import models as xwf_models
 from rest_framework.exceptions import PermissionDenied, ValidationError
@@ -16,6 +18,9 @@ from rest_framework.exceptions import PermissionDenied, ValidationError
 from src.dados_comuns import constants
 
 from ..escola import models as m
+from ..paineis_consolidados.services.solicitacoes_materializadas import (
+    agenda_atualizacao_solicitacoes,
+)
 from ..perfil.models import Usuario
 from ..relatorios.utils import html_to_pdf_email_anexo
 from .constants import (
@@ -28,8 +33,9 @@ from .constants import (
     DIRETOR_UE,
 )
 from .models import AnexoLogSolicitacoesUsuario, LogSolicitacoesUsuario, Notificacao
+from .outbox import registra_email_em_massa, registra_email_unico
 from .services import EmailENotificacaoService, PartesInteressadasService
-from .tasks import envia_email_em_massa_task, envia_email_unico_task
+from .tasks import executa_efeitos_transicao_em_massa_task
 from .utils import (
     convert_base64_to_contentfile,
     envia_email_unico_com_anexo_inmemory,
@@ -893,9 +899,115 @@ class HomologacaoProdutoWorkflow(xwf_models.Workflow):
     initial_state = RASCUNHO
 
 
+@dataclass(frozen=True)
+class TransicaoEmMassa:
+    """
+    Como uma transição é aplicada a vários objetos de uma vez por
+    `transiciona_em_massa`, no lugar dos hooks de cada objeto.
+
+    Attributes:
+        status_evento: evento do LogSolicitacoesUsuario criado para cada objeto.
+        efeitos: método de instância `(self, log_transicao)` com os emails e
+            notificações da transição, executado para todos os objetos num
+            único job depois do commit.
+        em_lote: classmethod `(cls, ids)` com as alterações que acompanham a
+            troca de status, feitas na mesma transação.
+        exige_usuario: sem usuário apenas o status é alterado, como nos hooks
+            que só registram a transição quando há `user`.
+    """
+
+    status_evento: int
+    efeitos: Optional[str] = None
+    em_lote: Optional[str] = None
+    exige_usuario: bool = True
+
+
+def transiciona_em_massa(
+    queryset, transicao, usuario=None, justificativa="", ignora_invalidos=False
+):
+    """
+    Aplica a transição `transicao` aos objetos de `queryset` com um único
+    UPDATE do status e um bulk_create dos logs. A transição precisa estar em
+    `TRANSICOES_EM_MASSA` do fluxo do modelo.
+
+    Objetos fora dos status de origem da transição levantam
+    InvalidTransitionError, como na transição de cada objeto, e nenhum objeto
+    é alterado; com `ignora_invalidos` esses objetos são apenas ignorados.
+
+    Returns:
+        list: objetos transicionados, já com o novo status.
+    """
+    modelo = queryset.model
+    em_massa = getattr(modelo, "TRANSICOES_EM_MASSA", {}).get(transicao)
+    if em_massa is None:
+        raise ValueError(f"{modelo.__name__} não aplica {transicao} em massa")
+    definicao = modelo.workflow_class.transitions[transicao]
+
+    with transaction.atomic():
+        ids = _ids_em_status_de_origem(queryset, definicao, ignora_invalidos)
+        if not ids:
+            return []
+        modelo.objects.filter(id__in=ids).update(status=definicao.target.name)
+        if em_massa.em_lote:
+            getattr(modelo, em_massa.em_lote)(ids)
+        objetos = list(modelo.objects.filter(id__in=ids).order_by("id"))
+        # o UPDATE e o bulk_create dos logs não disparam os signals da projeção
+        agenda_atualizacao_solicitacoes([objeto.uuid for objeto in objetos])
+        if usuario is not None or not em_massa.exige_usuario:
+            _registra_logs_em_massa(modelo, objetos, em_massa, usuario, justificativa)
+    return objetos
+
+
+def _ids_em_status_de_origem(queryset, definicao, ignora_invalidos):
+    """Trava os objetos e devolve os ids dos que estão num status de origem."""
+    origens = [estado.name for estado in definicao.source]
+    status_por_id = dict(
+        queryset.select_for_update(of=("self",)).values_list("id", "status")
+    )
+    ids = [id_ for id_, status in status_por_id.items() if status in origens]
+    if len(ids) < len(status_por_id) and not ignora_invalidos:
+        raise xworkflows.InvalidTransitionError(
+            f"Transição {definicao.name} indisponível para "
+            f"{len(status_por_id) - len(ids)} objeto(s) de {queryset.model.__name__}"
+        )
+    return ids
+
+
+def _registra_logs_em_massa(modelo, objetos, em_massa, usuario, justificativa):
+    """Cria os logs da transição e agenda os efeitos para depois do commit."""
+    logs = LogSolicitacoesUsuario.objects.bulk_create(
+        [
+            LogSolicitacoesUsuario(
+                descricao=str(objeto),
+                status_evento=em_massa.status_evento,
+                solicitacao_tipo=modelo.TIPO_SOLICITACAO_LOG,
+                usuario=usuario,
+                uuid_original=objeto.uuid,
+                justificativa=justificativa,
+            )
+            for objeto in objetos
+        ]
+    )
+    if em_massa.efeitos:
+        logs_por_objeto = [[objeto.id, log.id] for objeto, log in zip(objetos, logs)]
+        transaction.on_commit(
+            lambda: executa_efeitos_transicao_em_massa_task.delay(
+                modelo._meta.label, em_massa.efeitos, logs_por_objeto
+            )
+        )
+
+
 class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
     workflow_class = SolicitacaoRemessaWorkFlow
     status = xwf_models.StateField(workflow_class)
+    TRANSICOES_EM_MASSA = {
+        "inicia_fluxo": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.DILOG_ENVIA_SOLICITACAO,
+            efeitos="_notifica_distribuidor_envio_solicitacao",
+            em_lote="_libera_guias_para_confirmacao",
+            exige_usuario=False,
+        ),
+    }
 
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         raise NotImplementedError("Deve criar um método salvar_log_transicao")
@@ -924,7 +1036,7 @@ class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
                 "url": url,
             },
         )
-        envia_email_unico_task.delay(
+        registra_email_unico(
             assunto=f"[SIGPAE] Nova Requisição de Entrega N° {self.numero_solicitacao}",
             corpo="",
             email=self.distribuidor.responsavel_email,
@@ -942,7 +1054,7 @@ class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
                 "url": url,
             },
         )
-        envia_email_unico_task.delay(
+        registra_email_unico(
             assunto=f"[SIGPAE] Cancelamento de Guia(s) de Remessa da Requisição N° {self.numero_solicitacao}",
             corpo="",
             email=self.distribuidor.responsavel_email,
@@ -963,7 +1075,7 @@ class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
             },
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"Cancelamento Confirmado - Guias de Remessa da Requisição N° {self.numero_solicitacao}",
             emails=partes_interessadas,
             corpo="",
@@ -1037,18 +1149,15 @@ class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
         )
         return [usuario for usuario in queryset]
 
-    @xworkflows.after_transition("inicia_fluxo")
-    def _inicia_fluxo_hook(self, *args, **kwargs):
-        user = kwargs["user"]
-        log_transicao = self.salvar_log_transicao(
-            status_evento=LogSolicitacoesUsuario.DILOG_ENVIA_SOLICITACAO,
-            usuario=user,
-            justificativa=kwargs.get("justificativa", ""),
-        )
+    @classmethod
+    def _libera_guias_para_confirmacao(cls, ids):
+        from src.logistica.models import Guia
 
-        self.guias.filter(status=GuiaRemessaWorkFlow.AGUARDANDO_ENVIO).update(
-            status=GuiaRemessaWorkFlow.AGUARDANDO_CONFIRMACAO
-        )
+        Guia.objects.filter(
+            solicitacao_id__in=ids, status=GuiaRemessaWorkFlow.AGUARDANDO_ENVIO
+        ).update(status=GuiaRemessaWorkFlow.AGUARDANDO_CONFIRMACAO)
+
+    def _notifica_distribuidor_envio_solicitacao(self, log_transicao):
         self._envia_email_dilog_envia_solicitacao_para_distibuidor(
             log_transicao=log_transicao
         )
@@ -1063,6 +1172,18 @@ class FluxoSolicitacaoRemessa(xwf_models.WorkflowEnabled, models.Model):
             template_notif, titulo_notif, usuarios, link, tipo, log_transicao
         )
 
+    @xworkflows.after_transition("inicia_fluxo")
+    def _inicia_fluxo_hook(self, *args, **kwargs):
+        user = kwargs["user"]
+        log_transicao = self.salvar_log_transicao(
+            status_evento=LogSolicitacoesUsuario.DILOG_ENVIA_SOLICITACAO,
+            usuario=user,
+            justificativa=kwargs.get("justificativa", ""),
+        )
+
+        self._libera_guias_para_confirmacao([self.id])
+        self._notifica_distribuidor_envio_solicitacao(log_transicao)
+
     @xworkflows.after_transition("empresa_atende")
     def _empresa_atende_hook(self, *args, **kwargs):
         user = kwargs["user"]
@@ -1189,7 +1310,7 @@ class FluxoSolicitacaoDeAlteracao(xwf_models.WorkflowEnabled, models.Model):
                 "situacao": situacao,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto, emails=partes_interessadas, corpo="", html=html
         )
 
@@ -1302,7 +1423,7 @@ class FluxoSolicitacaoDeAlteracao(xwf_models.WorkflowEnabled, models.Model):
                 "url": url,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"[SIGPAE] Solicitação de Alteração N° {self.numero_solicitacao}",
             emails=partes_interessadas,
             corpo="",
@@ -1397,6 +1518,12 @@ class FluxoSolicitacaoDeAlteracao(xwf_models.WorkflowEnabled, models.Model):
 class FluxoGuiaRemessa(xwf_models.WorkflowEnabled, models.Model):
     workflow_class = GuiaRemessaWorkFlow
     status = xwf_models.StateField(workflow_class)
+    TRANSICOES_EM_MASSA = {
+        "distribuidor_confirma_guia": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.ABASTECIMENTO_GUIA_DE_REMESSA,
+            exige_usuario=False,
+        ),
+    }
 
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         raise NotImplementedError("Deve criar um método salvar_log_transicao")
@@ -1413,7 +1540,7 @@ class FluxoGuiaRemessa(xwf_models.WorkflowEnabled, models.Model):
                 "url": url,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto, emails=partes_interessadas, corpo="", html=html
         )
 
@@ -1692,7 +1819,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
             "perfil_que_autorizou": user.nome,
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -1744,7 +1871,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "link_pdf": link_pdf,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="Produto Homologado com sucesso",
             emails=self._partes_interessadas_codae_homologa_ou_nao_homologa(),
             corpo="",
@@ -1761,7 +1888,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "link_pdf": link_pdf,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="Produto não homologado",
             emails=self._partes_interessadas_codae_homologa_ou_nao_homologa(),
             corpo="",
@@ -1783,7 +1910,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "link_pdf": link_pdf,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="Produto Cadastrado Exige Correção",
             emails=self._partes_interessadas_codae_questiona(),
             corpo="",
@@ -1808,7 +1935,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
             vinculos__data_inicial__isnull=False,
             vinculos__data_final__isnull=True,
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="Nova reclamação de produto requer análise",
             emails=[usuario.email for usuario in partes_interessadas],
             corpo="",
@@ -1829,7 +1956,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "link_pdf": link_pdf,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="[SIGPAE] Solicitação de Análise Sensorial",
             emails=self._partes_interessadas_codae_pede_analise_sensorial(),
             corpo="",
@@ -1850,9 +1977,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
             },
         )
         emails = self._partes_interessadas_codae_ativa_ou_suspende()
-        envia_email_em_massa_task.delay(
-            assunto=assunto, emails=emails, corpo="", html=html
-        )
+        registra_email_em_massa(assunto=assunto, emails=emails, corpo="", html=html)
 
     def _envia_email_codae_questiona_produto(
         self, reclamacao, log_transicao, emails, link
@@ -1869,7 +1994,7 @@ class FluxoHomologacaoProduto(xwf_models.WorkflowEnabled, models.Model):
             },
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="Questionamento da CODAE", emails=emails, corpo="", html=html
         )
 
@@ -2207,6 +2332,20 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
     workflow_class = PedidoAPartirDaEscolaWorkflow
     status = xwf_models.StateField(workflow_class)
     DIAS_UTEIS_PARA_CANCELAR = 2
+    TRANSICOES_EM_MASSA = {
+        "dre_nao_valida": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.DRE_NAO_VALIDOU,
+            efeitos="_envia_email_dre_nao_valida",
+        ),
+        "codae_nega": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
+            efeitos="_envia_email_codae_nega",
+        ),
+        "codae_nega_questionamento": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
+            efeitos="_envia_email_codae_nega",
+        ),
+    }
 
     rastro_escola = models.ForeignKey(
         "escola.Escola",
@@ -2405,7 +2544,7 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
             "movimentacao_realizada": str(self.status),
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -2431,7 +2570,7 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
             "movimentacao_realizada": str(self.status),
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -2457,7 +2596,7 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
             "movimentacao_realizada": str(self.status),
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -2491,30 +2630,32 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
                 status_evento=LogSolicitacoesUsuario.DRE_PEDIU_REVISAO, usuario=user
             )
 
+    def _envia_email_dre_nao_valida(self, log_transicao):
+        # manda email pra escola que solicitou de que a solicitacao NAO foi
+        # validada
+        id_externo = "#" + self.id_externo
+        assunto = "[SIGPAE] Status de solicitação - " + id_externo
+        titulo = f"Solicitação de {self.tipo} Não Validada"
+        criado_em = log_transicao.criado_em.strftime("%d/%m/%Y - %H:%M")
+        self._preenche_template_e_envia_email_dre_nega(
+            assunto,
+            titulo,
+            id_externo,
+            criado_em,
+            self._partes_interessadas_dre_nao_valida,
+        )
+
     @xworkflows.after_transition("dre_nao_valida")
     def _dre_nao_valida_hook(self, *args, **kwargs):
         user = kwargs["user"]
         justificativa = kwargs.get("justificativa", "")
-        # manda email pra escola que solicitou de que a solicitacao NAO foi
-        # validada
         if user:
-            id_externo = "#" + self.id_externo
-            assunto = "[SIGPAE] Status de solicitação - " + id_externo
-            titulo = f"Solicitação de {self.tipo} Não Validada"
             self.salvar_log_transicao(
                 status_evento=LogSolicitacoesUsuario.DRE_NAO_VALIDOU,
                 justificativa=justificativa,
                 usuario=user,
             )
-            log_criado = self.logs.last().criado_em
-            criado_em = log_criado.strftime("%d/%m/%Y - %H:%M")
-            self._preenche_template_e_envia_email_dre_nega(
-                assunto,
-                titulo,
-                id_externo,
-                criado_em,
-                self._partes_interessadas_dre_nao_valida,
-            )
+            self._envia_email_dre_nao_valida(self.logs.last())
 
     @xworkflows.after_transition("escola_revisa")
     def _escola_revisa_hook(self, *args, **kwargs):
@@ -2586,31 +2727,33 @@ class FluxoAprovacaoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model):
                 self._partes_interessadas_codae_autoriza,
             )
 
+    def _envia_email_codae_nega(self, log_transicao):
+        # manda email pra escola que solicitou e a DRE dela que validou de que
+        # a solicitacao NAO foi autorizada
+        id_externo = "#" + self.id_externo
+        assunto = "[SIGPAE] Status de solicitação - " + id_externo
+        titulo = f"Solicitação de {self.tipo} Negada"
+        criado_em = log_transicao.criado_em.strftime("%d/%m/%Y - %H:%M")
+        self._preenche_template_e_envia_email_codae_autoriza_ou_nega(
+            assunto,
+            titulo,
+            id_externo,
+            criado_em,
+            self._partes_interessadas_codae_nega,
+        )
+
     @xworkflows.after_transition("codae_nega_questionamento")
     @xworkflows.after_transition("codae_nega")
     def _codae_recusou_hook(self, *args, **kwargs):
         user = kwargs["user"]
         justificativa = kwargs.get("justificativa", "")
-        # manda email pra escola que solicitou e a DRE dela que validou de que
-        # a solicitacao NAO foi autorizada
         if user:
-            id_externo = "#" + self.id_externo
-            assunto = "[SIGPAE] Status de solicitação - " + id_externo
-            titulo = f"Solicitação de {self.tipo} Negada"
             self.salvar_log_transicao(
                 status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
                 usuario=user,
                 justificativa=justificativa,
             )
-            log_criado = self.logs.last().criado_em
-            criado_em = log_criado.strftime("%d/%m/%Y - %H:%M")
-            self._preenche_template_e_envia_email_codae_autoriza_ou_nega(
-                assunto,
-                titulo,
-                id_externo,
-                criado_em,
-                self._partes_interessadas_codae_nega,
-            )
+            self._envia_email_codae_nega(self.logs.last())
 
     @xworkflows.after_transition("terceirizada_toma_ciencia")
     def _terceirizada_toma_ciencia_hook(self, *args, **kwargs):
@@ -2644,6 +2787,16 @@ class FluxoAprovacaoPartindoDaDiretoriaRegional(
     workflow_class = PedidoAPartirDaDiretoriaRegionalWorkflow
     status = xwf_models.StateField(workflow_class)
     DIAS_UTEIS_PARA_CANCELAR = 2
+    TRANSICOES_EM_MASSA = {
+        "codae_nega": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
+            efeitos="_envia_email_codae_nega",
+        ),
+        "codae_nega_questionamento": TransicaoEmMassa(
+            status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
+            efeitos="_envia_email_codae_nega",
+        ),
+    }
 
     rastro_escolas = models.ManyToManyField(
         "escola.Escola",
@@ -2795,7 +2948,7 @@ class FluxoAprovacaoPartindoDaDiretoriaRegional(
             "perfil_que_autorizou": user.nome,
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -2827,7 +2980,7 @@ class FluxoAprovacaoPartindoDaDiretoriaRegional(
         }
         html = render_to_string(template, dados_template)
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -2907,33 +3060,35 @@ class FluxoAprovacaoPartindoDaDiretoriaRegional(
                 usuario=user,
             )
 
+    def _envia_email_codae_nega(self, log_transicao):
+        id_externo = "#" + self.id_externo
+        assunto = "[SIGPAE] Status de solicitação - #" + self.id_externo
+        titulo = f"Solicitação de {self.tipo} Negada"
+        criado_em = log_transicao.criado_em.strftime("%d/%m/%Y - %H:%M")
+        escolas = [eq.escola for eq in self.escolas_quantidades.all()]
+        for escola in escolas:
+            self._preenche_template_e_envia_email_codae_autoriza_ou_nega(
+                assunto,
+                titulo,
+                id_externo,
+                log_transicao.usuario,
+                criado_em,
+                self._partes_interessadas_codae_nega(escola),
+                escola,
+            )
+
     @xworkflows.after_transition("codae_nega_questionamento")
     @xworkflows.after_transition("codae_nega")
     def _codae_recusou_hook(self, *args, **kwargs):
         user = kwargs["user"]
         justificativa = kwargs.get("justificativa", "")
         if user:
-            id_externo = "#" + self.id_externo
-            assunto = "[SIGPAE] Status de solicitação - #" + self.id_externo
-            titulo = f"Solicitação de {self.tipo} Negada"
             self.salvar_log_transicao(
                 status_evento=LogSolicitacoesUsuario.CODAE_NEGOU,
                 usuario=user,
                 justificativa=justificativa,
             )
-            log_criado = self.logs.last().criado_em
-            criado_em = log_criado.strftime("%d/%m/%Y - %H:%M")
-            escolas = [eq.escola for eq in self.escolas_quantidades.all()]
-            for escola in escolas:
-                self._preenche_template_e_envia_email_codae_autoriza_ou_nega(
-                    assunto,
-                    titulo,
-                    id_externo,
-                    user,
-                    criado_em,
-                    self._partes_interessadas_codae_nega(escola),
-                    escola,
-                )
+            self._envia_email_codae_nega(self.logs.last())
 
     class Meta:
         abstract = True
@@ -3025,7 +3180,7 @@ class FluxoInformativoPartindoDaEscola(xwf_models.WorkflowEnabled, models.Model)
             "perfil_que_autorizou": user.nome,
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -3332,7 +3487,7 @@ class FluxoDietaEspecialPartindoDaEscola(xwf_models.WorkflowEnabled, models.Mode
             template = "fluxo_autorizar_negar_cancelar.html"
 
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=partes_interessadas,
@@ -3527,7 +3682,7 @@ class FluxoDietaEspecialPartindoDaEscola(xwf_models.WorkflowEnabled, models.Mode
             "titulo": titulo,
         }
         html = render_to_string(template, dados_template)
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=assunto,
             corpo="",
             emails=self._partes_interessadas_termino,
@@ -3713,7 +3868,7 @@ class FluxoReclamacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "log_recusa": log_recusa,
             },
         )
-        envia_email_unico_task.delay(
+        registra_email_unico(
             assunto="[SIGPAE] Reclamação Analisada",
             email=self.criado_por.email,
             corpo="",
@@ -3729,7 +3884,7 @@ class FluxoReclamacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "log_resposta": log_resposta,
             },
         )
-        envia_email_unico_task.delay(
+        registra_email_unico(
             assunto="[SIGPAE] Resposta a reclamação realizada",
             email=self.criado_por.email,
             corpo="",
@@ -3745,7 +3900,7 @@ class FluxoReclamacaoProduto(xwf_models.WorkflowEnabled, models.Model):
                 "log_transicao": log_aceite,
             },
         )
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto="[SIGPAE] Suspensão de Produto",
             emails=self._partes_interessadas_suspensao_por_reclamacao(),
             corpo="",
@@ -3883,9 +4038,7 @@ class FluxoSolicitacaoCadastroProduto(xwf_models.WorkflowEnabled, models.Model):
         emails.append(self.terceirizada.contatos.last().email)
         corpo = ""
 
-        envia_email_em_massa_task.delay(
-            assunto=assunto, emails=emails, corpo=corpo, html=html
-        )
+        registra_email_em_massa(assunto=assunto, emails=emails, corpo=corpo, html=html)
 
 
 class SolicitacaoMedicaoInicialWorkflow(xwf_models.Workflow):
@@ -4169,7 +4322,7 @@ class FluxoSolicitacaoMedicaoInicial(xwf_models.WorkflowEnabled, models.Model):
                         "usuario": "DRE",
                     },
                 )
-                envia_email_unico_task.delay(
+                registra_email_unico(
                     assunto="[SIGPAE] Medição Inicial aprovada pela DRE",
                     email=self.escola.contato.email,
                     corpo="",
@@ -4223,7 +4376,7 @@ class FluxoSolicitacaoMedicaoInicial(xwf_models.WorkflowEnabled, models.Model):
                         "usuario": "DRE",
                     },
                 )
-                envia_email_unico_task.delay(
+                registra_email_unico(
                     assunto="Solicitação de correção da Medição Inicial pela DRE",
                     email=self.escola.contato.email,
                     corpo="",
@@ -4343,7 +4496,7 @@ class FluxoSolicitacaoMedicaoInicial(xwf_models.WorkflowEnabled, models.Model):
                         "usuario": "CODAE",
                     },
                 )
-                envia_email_unico_task.delay(
+                registra_email_unico(
                     assunto="[SIGPAE] Medição Inicial aprovada pela CODAE",
                     email=self.escola.contato.email,
                     corpo="",
@@ -4377,7 +4530,7 @@ class FluxoSolicitacaoMedicaoInicial(xwf_models.WorkflowEnabled, models.Model):
                         "usuario": "CODAE",
                     },
                 )
-                envia_email_unico_task.delay(
+                registra_email_unico(
                     assunto="[SIGPAE] Solicitação de correção da Medição Inicial pela CODAE",
                     email=self.escola.contato.email,
                     corpo="",
@@ -4727,7 +4880,7 @@ class FluxoCronograma(xwf_models.WorkflowEnabled, models.Model):
             },
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"[SIGPAE] Solicitação de Alteração do Cronograma {self.numero}",
             corpo="",
             html=html,
@@ -4876,7 +5029,7 @@ class FluxoCronograma(xwf_models.WorkflowEnabled, models.Model):
             self, True
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"[SIGPAE] Assinatura do cronograma Nº {numero_cronograma}",
             emails=partes_interessadas,
             corpo="",
@@ -5044,7 +5197,7 @@ class FluxoAlteracaoCronograma(xwf_models.WorkflowEnabled, models.Model):
             },
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"[SIGPAE] Alteração do Cronograma {numero_cronograma}",
             corpo="",
             html=html,
@@ -5342,7 +5495,7 @@ class FluxoAlteracaoCronograma(xwf_models.WorkflowEnabled, models.Model):
             )
         )
 
-        envia_email_em_massa_task.delay(
+        registra_email_em_massa(
             assunto=f"[SIGPAE] Retorno Solicitação de Alteração do Cronograma {numero_cronograma}",
             emails=partes_interessadas,
             corpo="",
@@ -0,0 +1,73 @@
+"""
+Filtros de data como intervalos semiabertos (`campo >= início AND campo < fim`).
+
+Lookups como `criado_em__day` e `data__month` viram `EXTRACT(...)` e
+`criado_em__date` vira `criado_em::date`, que o Postgres não consegue atender
+com um índice btree; o intervalo equivalente permite um index range scan e
+funciona tanto para DateField quanto para DateTimeField.
+
+Os filtros são dicionários de lookups, para uso direto em `filter(**...)`,
+`Q(**...)` ou na montagem de dicionários de filtros.
+"""
+
+import datetime
+from typing import Dict, Optional, Tuple
+
+from dateutil.relativedelta import relativedelta
+
+Intervalo = Tuple[datetime.date, datetime.date]
+
+
+def _como_data(data) -> datetime.date:
+    """Aceita date, datetime ou texto no formato ISO (AAAA-MM-DD)."""
+    if isinstance(data, str):
+        return datetime.date.fromisoformat(data)
+    if isinstance(data, datetime.datetime):
+        return data.date()
+    return data
+
+
+def intervalo_dia(data: datetime.date) -> Intervalo:
+    data = _como_data(data)
+    return data, data + datetime.timedelta(days=1)
+
+
+def intervalo_dias(data_inicial: datetime.date, data_final: datetime.date) -> Intervalo:
+    """Do início de `data_inicial` ao fim de `data_final`, inclusive."""
+    return _como_data(data_inicial), intervalo_dia(data_final)[1]
+
+
+def intervalo_mes(ano: int, mes: int) -> Intervalo:
+    inicio = datetime.date(int(ano), int(mes), 1)
+    return inicio, inicio + relativedelta(months=1)
+
+
+def intervalo_ano(ano: int) -> Intervalo:
+    inicio = datetime.date(int(ano), 1, 1)
+    return inicio, inicio + relativedelta(years=1)
+
+
+def filtro_intervalo(campo: str, intervalo: Intervalo) -> Dict[str, datetime.date]:
+    inicio, fim = intervalo
+    return {f"{campo}__gte": inicio, f"{campo}__lt": fim}
+
+
+def filtro_dia(campo: str, data: datetime.date) -> Dict[str, datetime.date]:
+    """Substitui `campo__date=data` e `campo__year/__month/__day` de um dia."""
+    return filtro_intervalo(campo, intervalo_dia(data))
+
+
+def filtro_dias(
+    campo: str, data_inicial: datetime.date, data_final: datetime.date
+) -> Dict[str, datetime.date]:
+    """Substitui `campo__date__range=(data_inicial, data_final)`."""
+    return filtro_intervalo(campo, intervalo_dias(data_inicial, data_final))
+
+
+def filtro_mes(
+    campo: str, ano: int, mes: Optional[int] = None
+) -> Dict[str, datetime.date]:
+    """Substitui `campo__year=ano, campo__month=mes`; sem `mes`, o ano inteiro."""
+    if mes is None:
+        return filtro_intervalo(campo, intervalo_ano(ano))
+    return filtro_intervalo(campo, intervalo_mes(ano, mes))
@@ -0,0 +1,111 @@
+import asyncio
+import random
+import time
+import uuid
+
+from channels.layers import get_channel_layer
+from channels.testing import WebsocketCommunicator
+from django.core.management import BaseCommand
+
+from ...consumers import (
+    SolicitacoesAbertasConsumer,
+    grupo_solicitacao_aberta,
+    mensagem_delta,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Teste de carga do websocket de solicitações abertas: conecta vários "
+        "sockets ao consumer usando o channel layer configurado (Redis local), "
+        "publica alterações nas solicitações e mede o tempo de conexão e de entrega."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--sockets", type=int, default=2000)
+        parser.add_argument("--solicitacoes", type=int, default=500)
+        parser.add_argument("--por-socket", type=int, default=3)
+        parser.add_argument("--publicacoes", type=int, default=1000)
+        parser.add_argument("--timeout", type=float, default=30)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        asyncio.run(self._executa(options))
+
+    async def _conecta(self, inscricoes, timeout):
+        communicator = WebsocketCommunicator(
+            SolicitacoesAbertasConsumer.as_asgi(),
+            f"/ws/solicitacoes-abertas/?uuids={','.join(inscricoes)}",
+        )
+        conectado, _ = await communicator.connect(timeout=timeout)
+        if conectado:
+            await communicator.receive_json_from(timeout=timeout)
+        return communicator
+
+    async def _recebe(self, communicator, quantidade, timeout):
+        recebidas = 0
+        try:
+            for _ in range(quantidade):
+                await communicator.receive_json_from(timeout=timeout)
+                recebidas += 1
+        except asyncio.TimeoutError:
+            pass
+        return recebidas
+
+    async def _executa(self, options):
+        sorteio = random.Random(options["seed"])  # nosec B311
+        timeout = options["timeout"]
+        uuids = [str(uuid.uuid4()) for _ in range(options["solicitacoes"])]
+        inscricoes = [
+            sorteio.sample(uuids, min(options["por_socket"], len(uuids)))
+            for _ in range(options["sockets"])
+        ]
+
+        inicio = time.perf_counter()
+        communicators = await asyncio.gather(
+            *(self._conecta(uuids_socket, timeout) for uuids_socket in inscricoes)
+        )
+        tempo_conexao = time.perf_counter() - inicio
+
+        publicacoes = [sorteio.choice(uuids) for _ in range(options["publicacoes"])]
+        por_uuid = {uuid_solicitacao: 0 for uuid_solicitacao in uuids}
+        for uuid_solicitacao in publicacoes:
+            por_uuid[uuid_solicitacao] += 1
+        esperadas = [
+            sum(por_uuid[uuid_solicitacao] for uuid_solicitacao in uuids_socket)
+            for uuids_socket in inscricoes
+        ]
+
+        channel_layer = get_channel_layer()
+        inicio = time.perf_counter()
+        for uuid_solicitacao in publicacoes:
+            await channel_layer.group_send(
+                grupo_solicitacao_aberta(uuid_solicitacao),
+                mensagem_delta("adicionada", {"uuid_solicitacao": uuid_solicitacao}),
+            )
+        recebidas = await asyncio.gather(
+            *(
+                self._recebe(communicator, quantidade, timeout)
+                for communicator, quantidade in zip(communicators, esperadas)
+            )
+        )
+        tempo_entrega = time.perf_counter() - inicio
+
+        await asyncio.gather(
+            *(communicator.disconnect() for communicator in communicators)
+        )
+
+        total_esperadas = sum(esperadas)
+        total_recebidas = sum(recebidas)
+        self.stdout.write(
+            f"{len(communicators)} sockets conectados em {tempo_conexao:.2f}s\n"
+            f"{len(publicacoes)} publicações: {total_recebidas} de {total_esperadas} "
+            f"entregas em {tempo_entrega:.2f}s "
+            f"({total_recebidas / max(tempo_entrega, 1e-9):.0f} mensagens/s)"
+        )
+        if total_recebidas == total_esperadas:
+            self.stdout.write(self.style.SUCCESS("Todas as alterações entregues."))
+        else:
+            self.stdout.write(
+                self.style.ERROR("Alterações perdidas (capacidade do channel layer?).")
+            )
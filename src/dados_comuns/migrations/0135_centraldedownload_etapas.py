@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dados_comuns", "0134_versaosistema"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="centraldedownload",
+            name="etapas_total",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Total de etapas"
+            ),
+        ),
+        migrations.AddField(
+            model_name="centraldedownload",
+            name="etapas_concluidas",
+            field=models.PositiveIntegerField(
+                default=0, verbose_name="Etapas concluídas"
+            ),
+        ),
+    ]
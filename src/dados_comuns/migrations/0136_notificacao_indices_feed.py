@@ -0,0 +1,25 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dados_comuns", "0135_centraldedownload_etapas"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="notificacao",
+            index=models.Index(
+                fields=["usuario", "tipo", "resolvido", "lido", "criado_em"],
+                name="notificacao_usuario_tipo_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="notificacao",
+            index=models.Index(
+                fields=["usuario", "-criado_em", "-id"],
+                name="notificacao_usuario_feed_idx",
+            ),
+        ),
+    ]
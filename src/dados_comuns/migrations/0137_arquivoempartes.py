@@ -0,0 +1,85 @@
+import uuid
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ("dados_comuns", "0136_notificacao_indices_feed"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ArquivoEmPartes",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                (
+                    "nome",
+                    models.CharField(max_length=255, verbose_name="Nome do arquivo"),
+                ),
+                (
+                    "content_type",
+                    models.CharField(
+                        blank=True, max_length=255, verbose_name="Tipo do arquivo"
+                    ),
+                ),
+                (
+                    "tamanho_total",
+                    models.PositiveBigIntegerField(
+                        verbose_name="Tamanho total (bytes)"
+                    ),
+                ),
+                (
+                    "recebido",
+                    models.PositiveBigIntegerField(
+                        default=0, verbose_name="Bytes recebidos"
+                    ),
+                ),
+                (
+                    "arquivo",
+                    models.FileField(
+                        blank=True,
+                        upload_to="arquivos_em_partes",
+                        verbose_name="Arquivo",
+                    ),
+                ),
+                (
+                    "criado_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criado em"),
+                ),
+                (
+                    "alterado_em",
+                    models.DateTimeField(auto_now=True, verbose_name="Alterado em"),
+                ),
+                (
+                    "usuario",
+                    models.ForeignKey(
+                        blank=True,
+                        null=True,
+                        on_delete=django.db.models.deletion.CASCADE,
+                        to=settings.AUTH_USER_MODEL,
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Arquivo enviado em partes",
+                "verbose_name_plural": "Arquivos enviados em partes",
+            },
+        ),
+    ]
@@ -0,0 +1,102 @@
+import datetime
+import uuid
+
+import django.core.serializers.json
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dados_comuns", "0137_arquivoempartes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="EventoOutbox",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                ("tipo", models.CharField(max_length=100, verbose_name="Tipo")),
+                ("destino", models.CharField(max_length=100, verbose_name="Destino")),
+                (
+                    "chave_idempotencia",
+                    models.CharField(
+                        max_length=255,
+                        unique=True,
+                        verbose_name="Chave de idempotência",
+                    ),
+                ),
+                (
+                    "payload",
+                    models.JSONField(
+                        default=dict,
+                        encoder=django.core.serializers.json.DjangoJSONEncoder,
+                        verbose_name="Dados",
+                    ),
+                ),
+                (
+                    "status",
+                    models.CharField(
+                        choices=[
+                            ("PENDENTE", "Pendente"),
+                            ("ENVIADO", "Enviado"),
+                            ("FALHOU", "Falhou"),
+                        ],
+                        default="PENDENTE",
+                        max_length=10,
+                        verbose_name="Status",
+                    ),
+                ),
+                (
+                    "tentativas",
+                    models.PositiveSmallIntegerField(
+                        default=0, verbose_name="Tentativas"
+                    ),
+                ),
+                (
+                    "proxima_tentativa_em",
+                    models.DateTimeField(
+                        default=datetime.datetime.now,
+                        verbose_name="Próxima tentativa em",
+                    ),
+                ),
+                (
+                    "ultimo_erro",
+                    models.TextField(blank=True, verbose_name="Último erro"),
+                ),
+                (
+                    "criado_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criado em"),
+                ),
+                (
+                    "enviado_em",
+                    models.DateTimeField(
+                        blank=True, null=True, verbose_name="Enviado em"
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Evento do outbox",
+                "verbose_name_plural": "Eventos do outbox",
+                "indexes": [
+                    models.Index(
+                        condition=models.Q(("status", "PENDENTE")),
+                        fields=["proxima_tentativa_em"],
+                        name="outbox_pendentes",
+                    )
+                ],
+            },
+        ),
+    ]
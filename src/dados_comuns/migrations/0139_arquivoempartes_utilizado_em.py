@@ -0,0 +1,18 @@
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dados_comuns", "0138_eventooutbox"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="arquivoempartes",
+            name="utilizado_em",
+            field=models.DateTimeField(
+                blank=True, null=True, verbose_name="Utilizado em"
+            ),
+        ),
+    ]
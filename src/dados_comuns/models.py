@@ -1,10 +1,21 @@
+import logging
+import os
 import uuid
 from datetime import datetime
+from mimetypes import guess_extension
 
+from django.conf import settings
+from django.core.cache import cache
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile, File
+from django.core.serializers.json import DjangoJSONEncoder
 from django.core.validators import MinLengthValidator
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Q
 from django_prometheus.models import ExportModelOperationsMixin
 
+logger = logging.getLogger(__name__)
+
 
 class LogSolicitacoesUsuario(
     ExportModelOperationsMixin("log_solicitacoes"), models.Model
@@ -655,10 +666,83 @@ class Notificacao(models.Model):
     class Meta:
         verbose_name = "Notificação"
         verbose_name_plural = "Notificações"
+        indexes = [
+            models.Index(
+                fields=["usuario", "tipo", "resolvido", "lido", "criado_em"],
+                name="notificacao_usuario_tipo_idx",
+            ),
+            models.Index(
+                fields=["usuario", "-criado_em", "-id"],
+                name="notificacao_usuario_feed_idx",
+            ),
+        ]
 
     def __str__(self):
         return self.titulo
 
+    @staticmethod
+    def _chave_contador(usuario_id):
+        return f"notificacoes:nao_lidos:{usuario_id}"
+
+    @classmethod
+    def contar_nao_lidos(cls, usuario_id) -> int:
+        """Alertas e avisos não lidos mais pendências não resolvidas do usuário."""
+        nao_lidos = Q(
+            lido=False,
+            tipo__in=[cls.TIPO_NOTIFICACAO_ALERTA, cls.TIPO_NOTIFICACAO_AVISO],
+        )
+        pendencias = Q(tipo=cls.TIPO_NOTIFICACAO_PENDENCIA, resolvido=False)
+        return cls.objects.filter(
+            Q(usuario_id=usuario_id) & (nao_lidos | pendencias)
+        ).count()
+
+    @classmethod
+    def quantidade_nao_lidos(cls, usuario_id) -> int:
+        """Contador do usuário guardado no cache; calculado apenas quando ausente."""
+        quantidade = cache.get(cls._chave_contador(usuario_id))
+        if quantidade is None:
+            quantidade = cls.contar_nao_lidos(usuario_id)
+            cache.set(
+                cls._chave_contador(usuario_id),
+                quantidade,
+                timeout=settings.NOTIFICACOES_CONTADOR_CACHE_TIMEOUT,
+            )
+        return quantidade
+
+    @classmethod
+    def atualizar_contador_nao_lidos(cls, usuario_id):
+        """
+        Depois do commit, recalcula o contador do usuário no cache e o envia
+        pelo channel layer (grupo do usuário em `NotificacoesConsumer`).
+        """
+        if not usuario_id:
+            return
+
+        def atualiza():
+            from asgiref.sync import async_to_sync
+            from channels.layers import get_channel_layer
+
+            from .consumers import grupo_notificacoes_usuario
+
+            quantidade = cls.contar_nao_lidos(usuario_id)
+            cache.set(
+                cls._chave_contador(usuario_id),
+                quantidade,
+                timeout=settings.NOTIFICACOES_CONTADOR_CACHE_TIMEOUT,
+            )
+            try:
+                async_to_sync(get_channel_layer().group_send)(
+                    grupo_notificacoes_usuario(usuario_id),
+                    {
+                        "type": "notificacoes.contador",
+                        "data": {"quantidade_nao_lidos": quantidade},
+                    },
+                )
+            except Exception as e:
+                logger.error(e)
+
+        transaction.on_commit(atualiza)
+
     @classmethod
     def notificar(
         cls,
@@ -734,7 +818,10 @@ class Notificacao(models.Model):
             guia=guia,
             resolvido=False,
         )
+        usuarios_ids = set(pendencias.values_list("usuario_id", flat=True))
         pendencias.update(resolvido=True, lido=True)
+        for usuario_id in usuarios_ids:
+            cls.atualizar_contador_nao_lidos(usuario_id)
 
 
 class CentralDeDownload(models.Model):
@@ -769,6 +856,8 @@ class CentralDeDownload(models.Model):
         "perfil.Usuario", on_delete=models.CASCADE, default="", null=True, blank=True
     )
     criado_em = models.DateTimeField("Criado em", editable=False, auto_now_add=True)
+    etapas_total = models.PositiveIntegerField("Total de etapas", default=0)
+    etapas_concluidas = models.PositiveIntegerField("Etapas concluídas", default=0)
 
     class Meta:
         verbose_name = "Central de Download"
@@ -777,6 +866,13 @@ class CentralDeDownload(models.Model):
     def __str__(self):
         return self.identificador
 
+    @property
+    def progresso(self):
+        """Percentual concluído, para arquivos gerados em etapas."""
+        if not self.etapas_total:
+            return None
+        return min(100, int(100 * self.etapas_concluidas / self.etapas_total))
+
     def delete(self, using=None, keep_parents=False):
         if self.arquivo:
             self.arquivo.storage.delete(self.arquivo.name)
@@ -817,3 +913,227 @@ class VersaoSistema(models.Model):
 
     def __str__(self):
         return self.versao
+
+
+class ArquivoEmPartesException(Exception):
+    pass
+
+
+class ArquivoDoStorage(File):
+    """Arquivo do storage que se fecha assim que é copiado em chunks."""
+
+    def chunks(self, chunk_size=None):
+        try:
+            yield from super().chunks(chunk_size)
+        finally:
+            self.close()
+
+
+class ArquivoEmPartes(models.Model):
+    """
+    Arquivo enviado em partes (`PUT` com `Content-Range`), gravado direto no
+    storage sem passar pela memória inteiro. Depois de concluído, o `token`
+    ("upload:<uuid>") pode ser enviado no lugar do base64 `data:...;base64,` nos
+    campos de anexo (ver `convert_base64_to_contentfile`).
+
+    O envio pode ser retomado: a próxima parte sempre começa em `recebido`. O
+    token só vale para o usuário que fez o envio e anexa um único arquivo.
+    """
+
+    PREFIXO_TOKEN = "upload:"
+
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    usuario = models.ForeignKey(
+        "perfil.Usuario", on_delete=models.CASCADE, null=True, blank=True
+    )
+    nome = models.CharField("Nome do arquivo", max_length=255)
+    content_type = models.CharField("Tipo do arquivo", max_length=255, blank=True)
+    tamanho_total = models.PositiveBigIntegerField("Tamanho total (bytes)")
+    recebido = models.PositiveBigIntegerField("Bytes recebidos", default=0)
+    arquivo = models.FileField(
+        blank=True, verbose_name="Arquivo", upload_to="arquivos_em_partes"
+    )
+    utilizado_em = models.DateTimeField("Utilizado em", null=True, blank=True)
+    criado_em = models.DateTimeField("Criado em", editable=False, auto_now_add=True)
+    alterado_em = models.DateTimeField("Alterado em", auto_now=True)
+
+    class Meta:
+        verbose_name = "Arquivo enviado em partes"
+        verbose_name_plural = "Arquivos enviados em partes"
+
+    def __str__(self):
+        return f"{self.nome} ({self.recebido}/{self.tamanho_total} bytes)"
+
+    @property
+    def concluido(self):
+        return self.recebido == self.tamanho_total
+
+    @property
+    def token(self):
+        return f"{self.PREFIXO_TOKEN}{self.uuid}"
+
+    @property
+    def extensao(self):
+        extensao = os.path.splitext(self.nome)[1].lower()
+        if not extensao and self.content_type:
+            extensao = guess_extension(self.content_type) or ""
+        return extensao
+
+    @classmethod
+    def eh_token(cls, valor) -> bool:
+        return isinstance(valor, str) and valor.startswith(cls.PREFIXO_TOKEN)
+
+    @classmethod
+    def do_token(cls, token: str, usuario) -> "ArquivoEmPartes":
+        """Envio concluído e ainda não utilizado do `usuario`."""
+        if not usuario or not usuario.is_authenticated:
+            raise ArquivoEmPartesException(f"Upload {token} não encontrado.")
+        try:
+            arquivo = cls.objects.get(
+                uuid=token[len(cls.PREFIXO_TOKEN) :],
+                usuario=usuario,
+                utilizado_em__isnull=True,
+            )
+        except (cls.DoesNotExist, ValidationError):
+            raise ArquivoEmPartesException(f"Upload {token} não encontrado.")
+        if not arquivo.concluido:
+            raise ArquivoEmPartesException(
+                f"Upload {token} incompleto: {arquivo.recebido} de "
+                f"{arquivo.tamanho_total} bytes recebidos."
+            )
+        return arquivo
+
+    def utiliza(self) -> None:
+        """
+        Marca o envio como utilizado, para o token não anexar o arquivo de novo.
+        O arquivo é removido depois por `deleta_arquivos_em_partes_expirados`.
+        """
+        agora = datetime.now()
+        marcados = ArquivoEmPartes.objects.filter(
+            pk=self.pk, utilizado_em__isnull=True
+        ).update(utilizado_em=agora, alterado_em=agora)
+        if not marcados:
+            raise ArquivoEmPartesException(f"Upload {self.token} já utilizado.")
+        self.utilizado_em = self.alterado_em = agora
+
+    def _valida_parte(self, inicio: int, tamanho: int) -> None:
+        if inicio != self.recebido:
+            raise ArquivoEmPartesException(
+                f"A parte deve começar no byte {self.recebido}."
+            )
+        if inicio + tamanho > self.tamanho_total:
+            raise ArquivoEmPartesException(
+                "A parte ultrapassa o tamanho total do arquivo."
+            )
+
+    def _cria_arquivo_vazio(self) -> None:
+        self.arquivo.name = self.arquivo.storage.save(
+            self.arquivo.field.generate_filename(self, f"{self.uuid}{self.extensao}"),
+            ContentFile(b""),
+        )
+        self.save(update_fields=["arquivo", "alterado_em"])
+
+    @staticmethod
+    def _copia(stream, destino, tamanho: int) -> int:
+        """Copia até `tamanho` bytes em pedaços; retorna quantos faltaram."""
+        restante = tamanho
+        while restante:
+            pedaco = stream.read(min(restante, settings.FILE_UPLOAD_MAX_MEMORY_SIZE))
+            if not pedaco:
+                break
+            destino.write(pedaco)
+            restante -= len(pedaco)
+        return restante
+
+    def anexa_parte(self, inicio: int, stream, tamanho: int) -> None:
+        """
+        Grava `tamanho` bytes lidos de `stream` a partir do byte `inicio`, em
+        pedaços de FILE_UPLOAD_MAX_MEMORY_SIZE no máximo. A escrita passa pelo
+        storage do campo, que precisa abrir arquivos em modo "r+b".
+        """
+        self._valida_parte(inicio, tamanho)
+        if not self.arquivo:
+            self._cria_arquivo_vazio()
+
+        with self.arquivo.storage.open(self.arquivo.name, "r+b") as destino:
+            destino.seek(inicio)
+            destino.truncate()
+            restante = self._copia(stream, destino, tamanho)
+        if restante:
+            raise ArquivoEmPartesException(
+                f"Parte incompleta: faltaram {restante} bytes."
+            )
+        self.recebido = inicio + tamanho
+        self.save(update_fields=["arquivo", "recebido", "alterado_em"])
+
+    def abre(self) -> File:
+        """
+        Arquivo concluído, aberto do storage, para ser copiado em chunks. Fecha
+        ao fim da cópia ou, se lido de outra forma, ao fim da transação.
+        """
+        aberto = ArquivoDoStorage(
+            self.arquivo.storage.open(self.arquivo.name, "rb"),
+            name=f"{uuid.uuid4()}{self.extensao}",
+        )
+        if transaction.get_connection().in_atomic_block:
+            transaction.on_commit(aberto.close)
+        return aberto
+
+    def delete(self, using=None, keep_parents=False):
+        if self.arquivo:
+            self.arquivo.storage.delete(self.arquivo.name)
+        super().delete()
+
+
+class EventoOutbox(models.Model):
+    """
+    Efeito externo (chamada a um parceiro, envio de email) gravado na mesma
+    transação da alteração que o originou e despachado depois do commit por
+    `despacha_eventos_outbox_task` (ver `dados_comuns.outbox`).
+
+    Eventos com falha voltam a ser tentados com espera crescente até
+    OUTBOX_MAX_TENTATIVAS; a `chave_idempotencia` impede que o mesmo efeito
+    seja registrado duas vezes.
+    """
+
+    PENDENTE = "PENDENTE"
+    ENVIADO = "ENVIADO"
+    FALHOU = "FALHOU"
+
+    STATUS_CHOICES = (
+        (PENDENTE, "Pendente"),
+        (ENVIADO, "Enviado"),
+        (FALHOU, "Falhou"),
+    )
+
+    uuid = models.UUIDField(default=uuid.uuid4, editable=False, unique=True)
+    tipo = models.CharField("Tipo", max_length=100)
+    destino = models.CharField("Destino", max_length=100)
+    chave_idempotencia = models.CharField(
+        "Chave de idempotência", max_length=255, unique=True
+    )
+    payload = models.JSONField("Dados", default=dict, encoder=DjangoJSONEncoder)
+    status = models.CharField(
+        "Status", max_length=10, choices=STATUS_CHOICES, default=PENDENTE
+    )
+    tentativas = models.PositiveSmallIntegerField("Tentativas", default=0)
+    proxima_tentativa_em = models.DateTimeField(
+        "Próxima tentativa em", default=datetime.now
+    )
+    ultimo_erro = models.TextField("Último erro", blank=True)
+    criado_em = models.DateTimeField("Criado em", editable=False, auto_now_add=True)
+    enviado_em = models.DateTimeField("Enviado em", null=True, blank=True)
+
+    class Meta:
+        verbose_name = "Evento do outbox"
+        verbose_name_plural = "Eventos do outbox"
+        indexes = [
+            models.Index(
+                fields=["proxima_tentativa_em"],
+                name="outbox_pendentes",
+                condition=Q(status="PENDENTE"),
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.tipo} ({self.chave_idempotencia}) - {self.status}"
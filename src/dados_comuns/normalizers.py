@@ -10,3 +10,12 @@ def normalizar_nome_categoria(nome: str) -> str:
         for caractere in nome_normalizado
         if not unicodedata.combining(caractere)
     ).casefold()
+
+
+def normalizar_busca(texto: str) -> str:
+    """
+    Texto como é gravado nas colunas `nome_busca`: sem acentos, em minúsculas e
+    com os espaços repetidos reduzidos a um. O termo pesquisado passa pela mesma
+    normalização.
+    """
+    return " ".join(normalizar_nome_categoria(texto or "").split())
@@ -0,0 +1,258 @@
+"""
+Outbox transacional dos efeitos externos (chamadas a parceiros e emails).
+
+Em vez de chamar o parceiro ou enfileirar o email no meio da request, o efeito
+é gravado como um EventoOutbox na mesma transação da alteração que o originou:
+se a transação for desfeita o efeito também é, e a request não espera nem
+segura locks durante a chamada externa. Depois do commit,
+`despacha_eventos_outbox_task` envia os eventos pendentes agrupados por
+destino (uma conexão SMTP para todos os emails, por exemplo), com novas
+tentativas e espera crescente para os que falharem.
+
+Cada tipo de evento é registrado em TIPOS com o seu destino e a função que o
+envia, chamada com o payload e a conexão aberta para o destino.
+"""
+
+import contextlib
+import datetime
+import logging
+import uuid
+from dataclasses import dataclass
+from itertools import groupby
+from typing import Callable, Optional
+
+from django.conf import settings
+from django.core.mail import get_connection
+from django.db import transaction
+
+from .models import EventoOutbox
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True)
+class TipoEventoOutbox:
+    destino: str
+    envia: Callable[[dict, object], None]
+
+
+def _envia_email_em_massa(payload, conexao):
+    from .utils import envia_email_em_massa
+
+    envia_email_em_massa(
+        payload["assunto"],
+        payload["corpo"],
+        payload["emails"],
+        None,
+        None,
+        html=payload["html"],
+        connection=conexao,
+    )
+
+
+def _envia_email_unico(payload, conexao):
+    from .utils import envia_email_unico
+
+    envia_email_unico(
+        payload["assunto"],
+        payload["corpo"],
+        payload["email"],
+        None,
+        None,
+        html=payload["html"],
+        connection=conexao,
+    )
+
+
+def _confirmacao_de_envio_papa(payload, conexao):
+    from ..eol_servico.utils import EOLPapaService
+
+    EOLPapaService.confirmacao_de_envio(**payload)
+
+
+def _confirmacao_de_cancelamento_papa(payload, conexao):
+    from ..eol_servico.utils import EOLPapaService
+
+    EOLPapaService.confirmacao_de_cancelamento(**payload)
+
+
+TIPOS = {
+    "email_em_massa": TipoEventoOutbox("email", _envia_email_em_massa),
+    "email_unico": TipoEventoOutbox("email", _envia_email_unico),
+    "papa_confirmacao_de_envio": TipoEventoOutbox(
+        "eol_papa", _confirmacao_de_envio_papa
+    ),
+    "papa_confirmacao_de_cancelamento": TipoEventoOutbox(
+        "eol_papa", _confirmacao_de_cancelamento_papa
+    ),
+}
+
+# Conexão compartilhada pelos eventos de um mesmo destino em cada despacho.
+CONEXOES = {"email": get_connection}
+
+
+def _agenda_despacho(eta: Optional[datetime.datetime] = None):
+    from .tasks import despacha_eventos_outbox_task
+
+    if eta is None:
+        despacha_eventos_outbox_task.delay()
+    else:
+        despacha_eventos_outbox_task.apply_async(eta=eta)
+
+
+def registra_evento(
+    tipo: str, payload: dict, chave_idempotencia: Optional[str] = None
+) -> EventoOutbox:
+    """
+    Grava o evento na transação atual e agenda o despacho para depois do
+    commit. Um evento com a mesma `chave_idempotencia` não é gravado de novo.
+    """
+    evento, criado = EventoOutbox.objects.get_or_create(
+        chave_idempotencia=chave_idempotencia or f"{tipo}:{uuid.uuid4()}",
+        defaults={"tipo": tipo, "destino": TIPOS[tipo].destino, "payload": payload},
+    )
+    if criado:
+        transaction.on_commit(_agenda_despacho)
+    return evento
+
+
+def registra_email_em_massa(
+    assunto, corpo, emails, template=None, dados_template=None, html=None
+):
+    """Mesmos parâmetros de `envia_email_em_massa_task`."""
+    return registra_evento(
+        "email_em_massa",
+        {"assunto": assunto, "corpo": corpo, "emails": list(emails), "html": html},
+    )
+
+
+def registra_email_unico(
+    assunto, corpo, email, template=None, dados_template=None, html=None
+):
+    """Mesmos parâmetros de `envia_email_unico_task`."""
+    return registra_evento(
+        "email_unico",
+        {"assunto": assunto, "corpo": corpo, "email": email, "html": html},
+    )
+
+
+def registra_chamada_papa(metodo, cnpj, numero_solicitacao, sequencia_envio):
+    """
+    `metodo` é `confirmacao_de_envio` ou `confirmacao_de_cancelamento` de
+    EOLPapaService; a mesma confirmação é registrada uma única vez.
+    """
+    tipo = f"papa_{metodo}"
+    return registra_evento(
+        tipo,
+        {
+            "cnpj": cnpj,
+            "numero_solicitacao": numero_solicitacao,
+            "sequencia_envio": sequencia_envio,
+        },
+        chave_idempotencia=f"{tipo}:{numero_solicitacao}:{sequencia_envio}",
+    )
+
+
+def reenvia_eventos(queryset) -> int:
+    """Devolve à fila os eventos do queryset, com as tentativas zeradas."""
+    quantidade = queryset.exclude(status=EventoOutbox.ENVIADO).update(
+        status=EventoOutbox.PENDENTE,
+        tentativas=0,
+        proxima_tentativa_em=datetime.datetime.now(),
+    )
+    if quantidade:
+        transaction.on_commit(_agenda_despacho)
+    return quantidade
+
+
+def _registra_falha(evento: EventoOutbox, erro: Exception, agora):
+    evento.tentativas += 1
+    evento.ultimo_erro = f"{type(erro).__name__}: {erro}"
+    if evento.tentativas >= settings.OUTBOX_MAX_TENTATIVAS:
+        evento.status = EventoOutbox.FALHOU
+        logger.error(f"Evento do outbox {evento} falhou: {evento.ultimo_erro}")
+    else:
+        espera = settings.OUTBOX_ESPERA_BASE_SEGUNDOS * 2 ** (evento.tentativas - 1)
+        evento.proxima_tentativa_em = agora + datetime.timedelta(seconds=espera)
+
+
+def _envia_evento(evento: EventoOutbox, conexao, agora):
+    try:
+        TIPOS[evento.tipo].envia(evento.payload, conexao)
+    except Exception as erro:
+        _registra_falha(evento, erro, agora)
+    else:
+        evento.status = EventoOutbox.ENVIADO
+        evento.enviado_em = datetime.datetime.now()
+        evento.ultimo_erro = ""
+
+
+def _despacha_destino(destino, eventos, agora):
+    abre_conexao = CONEXOES.get(destino)
+    restantes = iter(eventos)
+    try:
+        conexao = abre_conexao() if abre_conexao else contextlib.nullcontext()
+        with conexao:
+            for evento in restantes:
+                _envia_evento(evento, conexao, agora)
+    except Exception as erro:
+        # Falha ao abrir a conexão do destino: os eventos que não chegaram a
+        # ser enviados ficam para a próxima tentativa.
+        for evento in restantes:
+            _registra_falha(evento, erro, agora)
+
+
+def _reserva_eventos(limite: int, agora) -> list:
+    """
+    Trava os eventos vencidos com SKIP LOCKED e adia a próxima tentativa deles
+    em OUTBOX_PRAZO_ENVIO_SEGUNDOS, numa transação curta que termina antes dos
+    envios. Outros despachos não pegam os eventos reservados e, se o envio for
+    interrompido, eles voltam à fila quando o prazo vence.
+    """
+    with transaction.atomic():
+        eventos = list(
+            EventoOutbox.objects.select_for_update(skip_locked=True)
+            .filter(status=EventoOutbox.PENDENTE, proxima_tentativa_em__lte=agora)
+            .order_by("destino", "id")[:limite]
+        )
+        EventoOutbox.objects.filter(id__in=[evento.id for evento in eventos]).update(
+            proxima_tentativa_em=agora
+            + datetime.timedelta(seconds=settings.OUTBOX_PRAZO_ENVIO_SEGUNDOS)
+        )
+    return eventos
+
+
+def despacha_eventos(limite: Optional[int] = None) -> dict:
+    """
+    Envia até `limite` eventos pendentes cuja tentativa já venceu, agrupados
+    por destino. Os eventos são reservados antes do envio (`_reserva_eventos`),
+    então despachos simultâneos não enviam o mesmo evento e nenhuma transação
+    fica aberta durante as chamadas externas.
+
+    Returns:
+        dict: quantidade de eventos por status resultante.
+    """
+    limite = limite or settings.OUTBOX_EVENTOS_POR_DESPACHO
+    agora = datetime.datetime.now()
+    eventos = _reserva_eventos(limite, agora)
+    for destino, eventos_destino in groupby(eventos, key=lambda e: e.destino):
+        _despacha_destino(destino, list(eventos_destino), agora)
+    EventoOutbox.objects.bulk_update(
+        eventos,
+        ["status", "tentativas", "proxima_tentativa_em", "ultimo_erro", "enviado_em"],
+    )
+
+    resultado = {}
+    for evento in eventos:
+        resultado[evento.status] = resultado.get(evento.status, 0) + 1
+    proxima = (
+        EventoOutbox.objects.filter(status=EventoOutbox.PENDENTE)
+        .order_by("proxima_tentativa_em")
+        .values_list("proxima_tentativa_em", flat=True)
+        .first()
+    )
+    if len(eventos) == limite:
+        _agenda_despacho()
+    elif proxima is not None and proxima > agora:
+        _agenda_despacho(eta=proxima)
+    return resultado
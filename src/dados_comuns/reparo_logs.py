@@ -0,0 +1,271 @@
+import datetime
+import logging
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, Optional, Tuple
+
+from django.db import connection, transaction
+
+logger = logging.getLogger(__name__)
+
+# Dias anteriores consultados para copiar os logs de um dia sem registro.
+DIAS_PARA_REPETIR = 5
+
+# gen_random_uuid() só existe nativamente a partir do Postgres 13.
+EXPRESSAO_UUID = "md5(random()::text || clock_timestamp()::text)::uuid"
+
+
+@dataclass(frozen=True)
+class ReparoLog:
+    """
+    Descreve como reparar uma tabela de logs diários por escola.
+
+    Attributes:
+        modelo: modelo do log.
+        coluna_dia: coluna que define o dia do log (`criado_em` ou `data`).
+        chave: colunas que, junto com escola e dia, identificam um log; entre
+            logs com a mesma chave permanece o de `criado_em` mais recente.
+        colunas_copiadas: colunas copiadas do dia anterior para o dia sem logs.
+        valores_fixos: valores das demais colunas obrigatórias dos logs criados.
+        coluna_data: com `coluna_dia` = `criado_em`, coluna date que guarda o
+            mesmo dia e também é preenchida nos logs criados.
+        escolas: queryset das escolas reparadas; None para todas.
+    """
+
+    modelo: type
+    coluna_dia: str
+    chave: Tuple[str, ...]
+    colunas_copiadas: Tuple[str, ...]
+    valores_fixos: Dict[str, object] = field(default_factory=dict)
+    escolas: Optional[Callable] = None
+    coluna_data: Optional[str] = None
+
+    @property
+    def tabela(self) -> str:
+        return self.modelo._meta.db_table
+
+    def filtro_escolas(self, params: dict) -> str:
+        if self.escolas is None:
+            return ""
+        params["escolas"] = list(self.escolas().values_list("id", flat=True))
+        return "AND escola_id = ANY(%(escolas)s)"
+
+
+def deleta_logs_duplicados(
+    reparo: ReparoLog, data_inicial: datetime.date, data_final: datetime.date
+) -> int:
+    """
+    Remove, com um único DELETE, os logs repetidos de cada escola e dia entre
+    `data_inicial` e `data_final` (inclusive), mantendo o mais recente.
+    """
+    params = {
+        "inicio": data_inicial,
+        "fim": data_final + datetime.timedelta(days=1),
+    }
+    sql = f"""
+        DELETE FROM {reparo.tabela} WHERE id IN (
+            SELECT id FROM (
+                SELECT id, ROW_NUMBER() OVER (
+                    PARTITION BY escola_id, {reparo.coluna_dia}::date,
+                        {", ".join(reparo.chave)}
+                    ORDER BY criado_em DESC, id DESC
+                ) AS ordem
+                FROM {reparo.tabela}
+                WHERE {reparo.coluna_dia} >= %(inicio)s
+                    AND {reparo.coluna_dia} < %(fim)s
+                    {reparo.filtro_escolas(params)}
+            ) AS logs
+            WHERE ordem > 1
+        )
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def cria_logs_inexistentes(
+    reparo: ReparoLog,
+    data_inicial: datetime.date,
+    data_final: datetime.date,
+    dias_para_repetir: int = DIAS_PARA_REPETIR,
+) -> int:
+    """
+    Para cada escola e dia sem logs entre `data_inicial` e `data_final`
+    (inclusive), copia, com um único INSERT ... SELECT, os logs do dia anterior
+    mais próximo em até `dias_para_repetir` dias.
+
+    Os dias sem log não servem de origem uns para os outros, então o resultado é
+    o mesmo de preencher os dias um a um, do mais recente para o mais antigo.
+    """
+    params = {
+        "inicio_origem": data_inicial - datetime.timedelta(days=dias_para_repetir),
+        "inicio": data_inicial,
+        "ultimo": data_final,
+        "fim": data_final + datetime.timedelta(days=1),
+        "dias_para_repetir": dias_para_repetir,
+        "agora": datetime.datetime.now(),
+    }
+    colunas = ("escola_id", *reparo.colunas_copiadas)
+    colunas_fixas = []
+    for indice, (coluna, valor) in enumerate(reparo.valores_fixos.items()):
+        params[f"fixo_{indice}"] = valor
+        colunas_fixas.append((coluna, f"%(fixo_{indice})s"))
+    if reparo.coluna_dia == "criado_em":
+        colunas_fixas.append(("criado_em", "faltantes.dia::timestamp"))
+        if reparo.coluna_data:
+            colunas_fixas.append((reparo.coluna_data, "faltantes.dia"))
+    else:
+        colunas_fixas.append((reparo.coluna_dia, "faltantes.dia"))
+        colunas_fixas.append(("criado_em", "%(agora)s"))
+
+    sql = f"""
+        WITH logs AS (
+            SELECT {", ".join(colunas)}, {reparo.coluna_dia}::date AS dia
+            FROM {reparo.tabela}
+            WHERE {reparo.coluna_dia} >= %(inicio_origem)s
+                AND {reparo.coluna_dia} < %(fim)s
+                {reparo.filtro_escolas(params)}
+        ),
+        faltantes AS (
+            SELECT escolas.escola_id, dias.dia::date AS dia, (
+                SELECT max(logs.dia) FROM logs
+                WHERE logs.escola_id = escolas.escola_id
+                    AND logs.dia >= dias.dia::date - %(dias_para_repetir)s
+                    AND logs.dia < dias.dia::date
+            ) AS dia_origem
+            FROM (SELECT DISTINCT escola_id FROM logs) AS escolas
+            CROSS JOIN generate_series(
+                %(inicio)s::date, %(ultimo)s::date, interval '1 day'
+            ) AS dias (dia)
+            WHERE NOT EXISTS (
+                SELECT 1 FROM logs
+                WHERE logs.escola_id = escolas.escola_id
+                    AND logs.dia = dias.dia::date
+            )
+        )
+        INSERT INTO {reparo.tabela} (
+            uuid, {", ".join(colunas)}, {", ".join(c for c, _ in colunas_fixas)}
+        )
+        SELECT {EXPRESSAO_UUID}, {", ".join(f"logs.{c}" for c in colunas)},
+            {", ".join(expressao for _, expressao in colunas_fixas)}
+        FROM faltantes
+        JOIN logs
+            ON logs.escola_id = faltantes.escola_id
+            AND logs.dia = faltantes.dia_origem
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql, params)
+        return cursor.rowcount
+
+
+def repara_logs(
+    reparos: Iterable[ReparoLog],
+    data_inicial: datetime.date,
+    data_final: datetime.date,
+    dias_para_repetir: int = DIAS_PARA_REPETIR,
+    dry_run: bool = False,
+) -> Dict[str, Dict[str, int]]:
+    """
+    Remove os logs duplicados e cria os inexistentes de cada reparo, cada um em
+    uma transação.
+
+    Returns:
+        dict: {nome do modelo: {"deletados": n, "criados": n}}. Com `dry_run`
+            as alterações são desfeitas e apenas as quantidades são retornadas.
+    """
+    resultado = {}
+    for reparo in reparos:
+        with transaction.atomic():
+            deletados = deleta_logs_duplicados(reparo, data_inicial, data_final)
+            criados = cria_logs_inexistentes(
+                reparo, data_inicial, data_final, dias_para_repetir
+            )
+            if dry_run:
+                transaction.set_rollback(True)
+        resultado[reparo.modelo.__name__] = {
+            "deletados": deletados,
+            "criados": criados,
+        }
+        logger.info(
+            f"{reparo.modelo.__name__} de {data_inicial} a {data_final}: "
+            f"{deletados} logs duplicados deletados, {criados} logs criados"
+            f"{' (dry run)' if dry_run else ''}"
+        )
+    return resultado
+
+
+def reparo_logs_alunos_matriculados() -> ReparoLog:
+    from src.escola.models import LogAlunosMatriculadosPeriodoEscola
+
+    return ReparoLog(
+        modelo=LogAlunosMatriculadosPeriodoEscola,
+        coluna_dia="criado_em",
+        chave=(
+            "periodo_escolar_id",
+            "tipo_turma",
+            "cei_ou_emei",
+            "infantil_ou_fundamental",
+        ),
+        colunas_copiadas=(
+            "periodo_escolar_id",
+            "quantidade_alunos",
+            "tipo_turma",
+            "cei_ou_emei",
+            "infantil_ou_fundamental",
+        ),
+        valores_fixos={"observacao": ""},
+        coluna_data="data",
+    )
+
+
+def reparos_logs_quantidade_dietas_autorizadas() -> Tuple[ReparoLog, ReparoLog]:
+    """
+    Escolas TERC TOTAL: CEIs usam apenas LogQuantidadeDietasAutorizadasCEI,
+    CEMEIs os dois modelos e as demais apenas LogQuantidadeDietasAutorizadas.
+    """
+    from src.dieta_especial.logs_models.models import (
+        LogQuantidadeDietasAutorizadas,
+        LogQuantidadeDietasAutorizadasCEI,
+    )
+    from src.escola.models import LISTA_TIPOS_UNIDADES, Escola
+
+    tipos_cemei = ["CEU CEMEI", "CEMEI"]
+
+    def escolas_terceirizadas():
+        return Escola.objects.filter(tipo_gestao__nome="TERC TOTAL")
+
+    return (
+        ReparoLog(
+            modelo=LogQuantidadeDietasAutorizadas,
+            coluna_dia="data",
+            chave=(
+                "periodo_escolar_id",
+                "classificacao_id",
+                "infantil_ou_fundamental",
+                "cei_ou_emei",
+            ),
+            colunas_copiadas=(
+                "quantidade",
+                "classificacao_id",
+                "periodo_escolar_id",
+                "cei_ou_emei",
+                "infantil_ou_fundamental",
+            ),
+            escolas=lambda: escolas_terceirizadas().exclude(
+                tipo_unidade__iniciais__in=LISTA_TIPOS_UNIDADES
+            ),
+        ),
+        ReparoLog(
+            modelo=LogQuantidadeDietasAutorizadasCEI,
+            coluna_dia="data",
+            chave=("periodo_escolar_id", "classificacao_id", "faixa_etaria_id"),
+            colunas_copiadas=(
+                "quantidade",
+                "classificacao_id",
+                "periodo_escolar_id",
+                "faixa_etaria_id",
+            ),
+            escolas=lambda: escolas_terceirizadas().filter(
+                tipo_unidade__iniciais__in=LISTA_TIPOS_UNIDADES + tipos_cemei
+            ),
+        ),
+    )
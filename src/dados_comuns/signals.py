@@ -2,32 +2,47 @@ import logging
 
 from asgiref.sync import async_to_sync
 from channels.layers import get_channel_layer
+from django.db import transaction
 from django.db.models.signals import post_delete, post_save
 from django.dispatch import receiver
 
 from .api.serializers import SolicitacaoAbertaSerializer
-from .models import SolicitacaoAberta
+from .consumers import grupo_solicitacao_aberta, mensagem_delta
+from .models import Notificacao, SolicitacaoAberta
 
 logger = logging.getLogger(__name__)
 
 
+def publica_delta_solicitacao_aberta(tipo, solicitacao):
+    """
+    Envia a alteração apenas aos inscritos na solicitação, depois do commit da
+    transação que a gerou.
+    """
+    grupo = grupo_solicitacao_aberta(solicitacao["uuid_solicitacao"])
+    if not grupo:
+        return
+
+    def publica():
+        try:
+            channel_layer = get_channel_layer()
+            async_to_sync(channel_layer.group_send)(
+                grupo, mensagem_delta(tipo, solicitacao)
+            )
+        except Exception as e:
+            logger.error(e)
+
+    transaction.on_commit(publica)
+
+
 @receiver(post_save, sender=SolicitacaoAberta)
 def post_save(sender, instance, created, **kwargs):
+    # salvar uma solicitação já aberta só renova o último acesso
+    if not created:
+        return
     try:
-        channel_layer = get_channel_layer()
-
-        async_to_sync(channel_layer.group_send)(
-            "solicitacoes_abertas",
-            {
-                "type": "solicitacao.message",
-                "data": {
-                    "message": SolicitacaoAbertaSerializer(
-                        SolicitacaoAberta.objects.all(), many=True
-                    ).data
-                },
-            },
+        publica_delta_solicitacao_aberta(
+            "adicionada", dict(SolicitacaoAbertaSerializer(instance).data)
         )
-
     except Exception as e:
         logger.error(e)
 
@@ -35,19 +50,15 @@ def post_save(sender, instance, created, **kwargs):
 @receiver(post_delete, sender=SolicitacaoAberta)
 def post_delete(sender, instance, **kwargs):
     try:
-        channel_layer = get_channel_layer()
-
-        async_to_sync(channel_layer.group_send)(
-            "solicitacoes_abertas",
-            {
-                "type": "solicitacao.message",
-                "data": {
-                    "message": SolicitacaoAbertaSerializer(
-                        SolicitacaoAberta.objects.all(), many=True
-                    ).data
-                },
-            },
+        publica_delta_solicitacao_aberta(
+            "removida",
+            {"id": instance.id, "uuid_solicitacao": instance.uuid_solicitacao},
         )
-
     except Exception as e:
         logger.error(e)
+
+
+@receiver(post_save, sender=Notificacao)
+@receiver(post_delete, sender=Notificacao)
+def atualiza_contador_notificacoes(sender, instance, **kwargs):
+    Notificacao.atualizar_contador_nao_lidos(instance.usuario_id)
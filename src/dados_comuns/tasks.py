@@ -1,9 +1,18 @@
-from datetime import datetime
+import logging
+from datetime import datetime, timedelta
 from smtplib import SMTPServerDisconnected
 
 from celery import shared_task
+from django.apps import apps
+from django.conf import settings
 
-from .models import SolicitacaoAberta, VersaoSistema
+from .models import (
+    ArquivoEmPartes,
+    LogSolicitacoesUsuario,
+    SolicitacaoAberta,
+    VersaoSistema,
+)
+from .outbox import despacha_eventos
 from .utils import (
     analisa_logs_alunos_matriculados_periodo_escola,
     analisa_logs_quantidade_dietas_autorizadas,
@@ -12,6 +21,8 @@ from .utils import (
     obter_versao_api,
 )
 
+logger = logging.getLogger(__name__)
+
 
 # https://docs.celeryproject.org/en/latest/userguide/tasks.html
 @shared_task(
@@ -36,14 +47,73 @@ def envia_email_unico_task(
     return envia_email_unico(assunto, corpo, email, template, dados_template, html)
 
 
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+)
+def executa_efeitos_transicao_em_massa_task(modelo, metodo, logs_por_objeto):
+    """
+    Executa num único job os efeitos (emails e notificações) de uma transição
+    aplicada com `transiciona_em_massa`: `metodo` de cada objeto de `modelo`
+    ("app_label.Modelo") recebe o log da sua transição. A falha de um objeto
+    não impede os efeitos dos demais.
+    """
+    classe = apps.get_model(modelo)
+    objetos = classe.objects.in_bulk([objeto_id for objeto_id, _ in logs_por_objeto])
+    logs = LogSolicitacoesUsuario.objects.select_related("usuario").in_bulk(
+        [log_id for _, log_id in logs_por_objeto]
+    )
+    for objeto_id, log_id in logs_por_objeto:
+        try:
+            getattr(objetos[objeto_id], metodo)(logs[log_id])
+        except Exception:
+            logger.exception(f"Erro em {metodo} de {modelo} {objeto_id}")
+
+
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+)
+def despacha_eventos_outbox_task():
+    """
+    Envia os eventos pendentes do outbox. É agendada após o commit de cada
+    evento registrado e reagendada para a próxima tentativa dos que falharam;
+    o beat também a executa a cada 5 minutos, como garantia para eventos cujo
+    agendamento se perdeu.
+    """
+    return despacha_eventos()
+
+
 @shared_task(
     retry_backoff=2,
     retry_kwargs={"max_retries": 8},
 )
 def deleta_solicitacoes_abertas():
-    for solicitacao in SolicitacaoAberta.objects.all():
-        if (datetime.now() - solicitacao.datetime_ultimo_acesso).total_seconds() > 10:
-            solicitacao.delete()
+    """
+    Remove as solicitações abertas sem acesso renovado há mais de
+    SOLICITACOES_ABERTAS_EXPIRACAO_SEGUNDOS; os inscritos recebem a remoção.
+    """
+    limite = datetime.now() - timedelta(
+        seconds=settings.SOLICITACOES_ABERTAS_EXPIRACAO_SEGUNDOS
+    )
+    SolicitacaoAberta.objects.filter(datetime_ultimo_acesso__lt=limite).delete()
+
+
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+)
+def deleta_arquivos_em_partes_expirados():
+    """
+    Remove os ArquivoEmPartes (e seus arquivos) sem alteração há mais de
+    ARQUIVOS_EM_PARTES_EXPIRACAO_HORAS: os anexos já foram copiados ao usar o
+    token e os envios incompletos não serão mais retomados.
+    """
+    limite = datetime.now() - timedelta(
+        hours=settings.ARQUIVOS_EM_PARTES_EXPIRACAO_HORAS
+    )
+    for arquivo in ArquivoEmPartes.objects.filter(alterado_em__lt=limite):
+        arquivo.delete()
 
 
 @shared_task(
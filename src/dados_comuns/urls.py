@@ -2,7 +2,7 @@ from django.urls import include, path, re_path
 from rest_framework import routers
 
 from .api import viewsets
-from .consumers import SolicitacoesAbertasConsumer
+from .consumers import NotificacoesConsumer, SolicitacoesAbertasConsumer
 from .views import send_test_email, test_visualiza_email
 
 router = routers.DefaultRouter()
@@ -26,6 +26,11 @@ router.register(
 )
 router.register("notificacoes", viewsets.NotificacaoViewSet, basename="Notificações")
 router.register("downloads", viewsets.CentralDeDownloadViewSet, basename="Downloads")
+router.register(
+    "arquivos-em-partes",
+    viewsets.ArquivoEmPartesViewSet,
+    basename="Arquivos em partes",
+)
 router.register(
     "solicitacoes-abertas",
     viewsets.SolicitacaoAbertaViewSet,
@@ -39,5 +44,6 @@ urlpatterns = [
 ]
 
 ws_urlpatterns = [
-    re_path(r"ws/solicitacoes-abertas/", SolicitacoesAbertasConsumer.as_asgi())
+    re_path(r"ws/solicitacoes-abertas/", SolicitacoesAbertasConsumer.as_asgi()),
+    re_path(r"ws/notificacoes/", NotificacoesConsumer.as_asgi()),
 ]
@@ -19,7 +19,7 @@ from des.models import DynamicEmailConfiguration
 from django.conf import settings
 from django.contrib import admin
 from django.contrib.auth import get_user_model
-from django.core.files.base import ContentFile
+from django.core.files.base import ContentFile, File
 from django.core.files.uploadedfile import SimpleUploadedFile
 from django.core.mail import (
     EmailMessage,
@@ -28,7 +28,7 @@ from django.core.mail import (
     send_mail,
 )
 from django.db import DatabaseError, transaction
-from django.db.models import Model, QuerySet
+from django.db.models import F, Model, QuerySet
 from django.http import QueryDict
 from django.template.loader import render_to_string
 from django_celery_beat.schedulers import DatabaseScheduler
@@ -39,9 +39,16 @@ from config.settings.base import URL_CONFIGS
 from src.dados_comuns.docs import (
     DOCS_FLUXO_PARTINDO_ESCOLA_GESTAO_ALIMENTACAO_DJANGO_WORKFLOW,
 )
+from src.perfil.identidade import get_usuario_do_request
 
 from .constants import DAQUI_A_SETE_DIAS, DAQUI_A_TRINTA_DIAS, DOMINIOS_DEV
-from .models import CentralDeDownload, LogSolicitacoesUsuario, Notificacao
+from .models import (
+    ArquivoEmPartes,
+    ArquivoEmPartesException,
+    CentralDeDownload,
+    LogSolicitacoesUsuario,
+    Notificacao,
+)
 
 calendar = BrazilSaoPauloCity()
 
@@ -71,12 +78,23 @@ def remove_emails_dev(lista_emails, modo_debug=settings.DEBUG):
 
 
 def envia_email_unico(
-    assunto: str, corpo: str, email: str, template: str, dados_template: Any, html=None
+    assunto: str,
+    corpo: str,
+    email: str,
+    template: str,
+    dados_template: Any,
+    html=None,
+    connection=None,
 ):
     config = DynamicEmailConfiguration.get_solo()
 
     return send_mail(
-        assunto, corpo, config.from_email or None, [email], html_message=html
+        assunto,
+        corpo,
+        config.from_email or None,
+        [email],
+        html_message=html,
+        connection=connection,
     )
 
 
@@ -99,16 +117,20 @@ def envia_email_em_massa(
     template: str,
     dados_template: Any,
     html=None,
+    connection=None,
 ):
+    """Com `connection`, reaproveita uma conexão SMTP já aberta."""
     config = DynamicEmailConfiguration.get_solo()
     from_email = config.from_email
+    messages = []
+    for email in remove_emails_dev(emails):
+        message = EmailMultiAlternatives(assunto, corpo, from_email, [email])
+        if html:
+            message.attach_alternative(html, "text/html")
+        messages.append(message)
+    if connection is not None:
+        return connection.send_messages(messages)
     with get_connection() as connection:
-        messages = []
-        for email in remove_emails_dev(emails):
-            message = EmailMultiAlternatives(assunto, corpo, from_email, [email])
-            if html:
-                message.attach_alternative(html, "text/html")
-            messages.append(message)
         return connection.send_messages(messages)
 
 
@@ -155,7 +177,23 @@ def url_configs(variable, content):
     )
 
 
-def convert_base64_to_contentfile(base64_str: str):
+def convert_base64_to_contentfile(base64_str: str, usuario=None):
+    """
+    Converte o anexo recebido pela API em arquivo. Aceita o base64
+    `data:<tipo>;base64,...` ou o token ("upload:<uuid>") de um
+    ArquivoEmPartes concluído, que é aberto do storage sem ser lido em memória.
+    O token precisa ser do `usuario` (por padrão, o usuário do request) e só
+    pode ser usado uma vez.
+    """
+    if ArquivoEmPartes.eh_token(base64_str):
+        try:
+            arquivo = ArquivoEmPartes.do_token(
+                base64_str, usuario or get_usuario_do_request()
+            )
+            arquivo.utiliza()
+        except ArquivoEmPartesException as e:
+            raise ValidationError(str(e))
+        return arquivo.abre()
     format, imgstr = base64_str.split(";base64,")
     if format == "data:application/vnd.ms-excel":
         ext = ".xls"
@@ -207,7 +245,15 @@ def parse_date(value: str) -> datetime.date:
         raise ValidationError(f"Formato de data inválido: {value}. Use DD/MM/YYYY")
 
 
-def size(b64string):
+def size(b64string, usuario=None):
+    """Tamanho em bytes do anexo em base64 ou do envio em partes do token."""
+    if ArquivoEmPartes.eh_token(b64string):
+        try:
+            return ArquivoEmPartes.do_token(
+                b64string, usuario or get_usuario_do_request()
+            ).tamanho_total
+        except ArquivoEmPartesException as e:
+            raise ValidationError(str(e))
     return (len(b64string) * 3) / 4 - b64string.count("=", -2)
 
 
@@ -287,6 +333,21 @@ def atualiza_central_download(obj_central_download, identificador, arquivo):
     obj_central_download.save()
 
 
+def atualiza_central_download_de_arquivo(obj_central_download, identificador, caminho):
+    """Como atualiza_central_download, mas lê o conteúdo de um arquivo em disco."""
+    with open(caminho, "rb") as arquivo:
+        obj_central_download.arquivo.save(identificador, File(arquivo), save=False)
+    obj_central_download.status = CentralDeDownload.STATUS_CONCLUIDO
+    obj_central_download.etapas_concluidas = obj_central_download.etapas_total
+    obj_central_download.save()
+
+
+def registra_etapa_central_download(id_central_download):
+    CentralDeDownload.objects.filter(id=id_central_download).update(
+        etapas_concluidas=F("etapas_concluidas") + 1
+    )
+
+
 def atualiza_central_download_com_erro(obj_central_download, msg_erro):
     obj_central_download.status = CentralDeDownload.STATUS_ERRO
     obj_central_download.msg_erro = msg_erro
@@ -434,223 +495,39 @@ def datetime_range(start=None, end=None):
     return dates
 
 
-def analisa_logs_alunos_matriculados_periodo_escola():
-    from src.escola.models import Escola
-
-    escolas = Escola.objects.all()
-    for index, escola in enumerate(escolas):
-        msg = f"análise de LogAlunosMatriculadosPeriodoEscola para escola {escola.nome}"
-        msg += f" ({index + 1}/{(escolas).count()})"
-        try:
-            logger.info(f"x-x-x-x Iniciando {msg} x-x-x-x")
-            hoje = datetime.date.today()
-            deletar_logs_alunos_matriculados_duplicados(escola, hoje)
-            criar_logs_alunos_matriculados_inexistentes(escola, hoje)
-            logger.info(f"x-x-x-x Finaliza {msg} x-x-x-x")
-        except Exception as e:
-            logger.error(f"x-x-x-x Erro na {msg} x-x-x-x")
-            logger.error(f"`--> {e}")
-
-
-def deletar_logs_alunos_matriculados_duplicados(escola, hoje):
-    from src.escola.models import LogAlunosMatriculadosPeriodoEscola
-
-    for i in range(1, 8):
-        data = hoje - datetime.timedelta(days=i)
-        logs = LogAlunosMatriculadosPeriodoEscola.objects.filter(
-            escola=escola,
-            criado_em__year=data.year,
-            criado_em__month=data.month,
-            criado_em__day=data.day,
-        )
-        logs_para_deletar = []
-        for log in logs:
-            logs_filtrados = logs.filter(
-                periodo_escolar=log.periodo_escolar,
-                tipo_turma=log.tipo_turma,
-                cei_ou_emei=log.cei_ou_emei,
-                infantil_ou_fundamental=log.infantil_ou_fundamental,
-            ).order_by("-criado_em")
-            for log_filtrado in logs_filtrados[1 : logs_filtrados.count()]:
-                if log_filtrado.uuid not in logs_para_deletar:
-                    logs_para_deletar.append(log_filtrado.uuid)
-        logs.filter(uuid__in=logs_para_deletar).delete()
-
-
-def criar_logs_alunos_matriculados_inexistentes(escola, hoje):
-    from src.escola.models import LogAlunosMatriculadosPeriodoEscola
-
-    for i in range(1, 8):
-        data = hoje - datetime.timedelta(days=i)
-        logs = LogAlunosMatriculadosPeriodoEscola.objects.filter(
-            escola=escola,
-            criado_em__year=data.year,
-            criado_em__month=data.month,
-            criado_em__day=data.day,
-        )
-        if not logs:
-            for i_para_repetir in range(1, 6):
-                quantidade_dias = i + i_para_repetir
-                data_para_repetir = hoje - datetime.timedelta(days=quantidade_dias)
-                logs_para_repetir = LogAlunosMatriculadosPeriodoEscola.objects.filter(
-                    escola=escola,
-                    criado_em__year=data_para_repetir.year,
-                    criado_em__month=data_para_repetir.month,
-                    criado_em__day=data_para_repetir.day,
-                )
-                if logs_para_repetir:
-                    for log_para_criar in logs_para_repetir:
-                        log_criado = LogAlunosMatriculadosPeriodoEscola.objects.create(
-                            escola=log_para_criar.escola,
-                            periodo_escolar=log_para_criar.periodo_escolar,
-                            quantidade_alunos=log_para_criar.quantidade_alunos,
-                            tipo_turma=log_para_criar.tipo_turma,
-                            cei_ou_emei=log_para_criar.cei_ou_emei,
-                            infantil_ou_fundamental=log_para_criar.infantil_ou_fundamental,
-                        )
-                        log_criado.criado_em = data
-                        log_criado.save()
-                    break
-
-
-def analisa_logs_quantidade_dietas_autorizadas():
-    from src.dieta_especial.logs_models.models import (
-        LogQuantidadeDietasAutorizadas,
-        LogQuantidadeDietasAutorizadasCEI,
+def analisa_logs_alunos_matriculados_periodo_escola(dry_run=False):
+    """Repara os LogAlunosMatriculadosPeriodoEscola dos últimos 7 dias."""
+    from src.dados_comuns.reparo_logs import (
+        repara_logs,
+        reparo_logs_alunos_matriculados,
     )
-    from src.escola.models import Escola
-
-    escolas = Escola.objects.filter(tipo_gestao__nome="TERC TOTAL")
-    for index, escola in enumerate(escolas):
-        msg = "análise de LogQuantidadeDietasAutorizadas / LogQuantidadeDietasAutorizadasCEI"
-        msg += f" para escola {escola.nome} ({index + 1}/{(escolas).count()})"
-        try:
-            logger.info(f"x-x-x-x Iniciando {msg} x-x-x-x")
-            hoje = datetime.date.today()
-            if escola.eh_cemei:
-                analisa_logs_quantidade_dietas_autorizadas_cemei(escola, hoje)
-            else:
-                if escola.eh_cei:
-                    modelo = LogQuantidadeDietasAutorizadasCEI
-                else:
-                    modelo = LogQuantidadeDietasAutorizadas
-                deletar_logs_quantidade_dietas_autorizadas(escola, hoje, modelo)
-                criar_logs_quantidade_dietas_autorizadas_inexistentes(
-                    escola, hoje, modelo
-                )
-            logger.info(f"x-x-x-x Finaliza {msg} x-x-x-x")
-        except Exception as e:
-            logger.error(f"x-x-x-x Erro na {msg} x-x-x-x")
-            logger.error(f"`--> {e}")
 
-
-def analisa_logs_quantidade_dietas_autorizadas_cemei(escola, hoje):
-    from src.dieta_especial.logs_models.models import (
-        LogQuantidadeDietasAutorizadas,
-        LogQuantidadeDietasAutorizadasCEI,
+    hoje = datetime.date.today()
+    return repara_logs(
+        [reparo_logs_alunos_matriculados()],
+        hoje - datetime.timedelta(days=7),
+        hoje - datetime.timedelta(days=1),
+        dry_run=dry_run,
     )
 
-    for modelo in [LogQuantidadeDietasAutorizadas, LogQuantidadeDietasAutorizadasCEI]:
-        deletar_logs_quantidade_dietas_autorizadas(escola, hoje, modelo)
-        criar_logs_quantidade_dietas_autorizadas_inexistentes(escola, hoje, modelo)
-
-
-def deletar_logs_quantidade_dietas_autorizadas(escola, hoje, modelo):
-    for i in range(1, 8):
-        data = hoje - datetime.timedelta(days=i)
-        logs = modelo.objects.filter(
-            escola=escola,
-            data__year=data.year,
-            data__month=data.month,
-            data__day=data.day,
-        )
-        logs_para_deletar = []
-        for log in logs:
-            logs_filtrados = logs.filter(
-                periodo_escolar=log.periodo_escolar, classificacao=log.classificacao
-            ).order_by("-criado_em")
-            if modelo.__name__ == "LogQuantidadeDietasAutorizadas":
-                logs_filtrados = logs_filtrados.filter(
-                    infantil_ou_fundamental=log.infantil_ou_fundamental
-                ).order_by("-criado_em")
-            if escola.eh_cei or (
-                escola.eh_cemei
-                and modelo.__name__ == "LogQuantidadeDietasAutorizadasCEI"
-            ):
-                logs_filtrados = logs_filtrados.filter(
-                    faixa_etaria=log.faixa_etaria
-                ).order_by("-criado_em")
-            if escola.eh_cemei and modelo.__name__ == "LogQuantidadeDietasAutorizadas":
-                logs_filtrados = logs_filtrados.filter(
-                    cei_ou_emei=log.cei_ou_emei
-                ).order_by("-criado_em")
-            logs_para_deletar = logs_para_deletar + uuids_logs_para_deletar(
-                logs_filtrados
-            )
-        logs.filter(uuid__in=logs_para_deletar).delete()
-
 
-def uuids_logs_para_deletar(logs_filtrados):
-    logs_para_deletar = []
-    for log_filtrado in logs_filtrados[1 : logs_filtrados.count()]:
-        if log_filtrado.uuid not in logs_para_deletar:
-            logs_para_deletar.append(log_filtrado.uuid)
-    return logs_para_deletar
-
-
-def criar_logs_quantidade_dietas_autorizadas_inexistentes(escola, hoje, modelo):
-    for i in range(1, 8):
-        data = hoje - datetime.timedelta(days=i)
-        logs = modelo.objects.filter(
-            escola=escola,
-            data__year=data.year,
-            data__month=data.month,
-            data__day=data.day,
-        )
-        if not logs:
-            for i_para_repetir in range(1, 6):
-                quantidade_dias = i + i_para_repetir
-                data_para_repetir = hoje - datetime.timedelta(days=quantidade_dias)
-                logs_para_repetir = modelo.objects.filter(
-                    escola=escola,
-                    data__year=data_para_repetir.year,
-                    data__month=data_para_repetir.month,
-                    data__day=data_para_repetir.day,
-                )
-                if logs_para_repetir:
-                    for log_para_criar in logs_para_repetir:
-                        create_objects_logs(escola, log_para_criar, data)
-                    break
-
-
-def create_objects_logs(escola, log_para_criar, data):
-    from src.dieta_especial.logs_models.models import (
-        LogQuantidadeDietasAutorizadas,
-        LogQuantidadeDietasAutorizadasCEI,
+def analisa_logs_quantidade_dietas_autorizadas(dry_run=False):
+    """
+    Repara os LogQuantidadeDietasAutorizadas / LogQuantidadeDietasAutorizadasCEI
+    dos últimos 7 dias das escolas TERC TOTAL.
+    """
+    from src.dados_comuns.reparo_logs import (
+        repara_logs,
+        reparos_logs_quantidade_dietas_autorizadas,
     )
 
-    if escola.eh_cei or (
-        escola.eh_cemei
-        and log_para_criar._meta.model.__name__ == "LogQuantidadeDietasAutorizadasCEI"
-    ):
-        LogQuantidadeDietasAutorizadasCEI.objects.create(
-            quantidade=log_para_criar.quantidade,
-            escola=log_para_criar.escola,
-            data=data,
-            classificacao=log_para_criar.classificacao,
-            periodo_escolar=log_para_criar.periodo_escolar,
-            faixa_etaria=log_para_criar.faixa_etaria,
-        )
-    else:
-        LogQuantidadeDietasAutorizadas.objects.create(
-            quantidade=log_para_criar.quantidade,
-            escola=log_para_criar.escola,
-            data=data,
-            classificacao=log_para_criar.classificacao,
-            periodo_escolar=log_para_criar.periodo_escolar,
-            cei_ou_emei=log_para_criar.cei_ou_emei,
-            infantil_ou_fundamental=log_para_criar.infantil_ou_fundamental,
-        )
+    hoje = datetime.date.today()
+    return repara_logs(
+        reparos_logs_quantidade_dietas_autorizadas(),
+        hoje - datetime.timedelta(days=7),
+        hoje - datetime.timedelta(days=1),
+        dry_run=dry_run,
+    )
 
 
 def preencher_template_e_notificar(
@@ -78,19 +78,19 @@ class GeraProtocolosCommandTests(TestCase):
     @mock.patch(
         "src.dieta_especial.management.commands.gera_zip_protocolos.envia_email_unico_com_anexo_inmemory"
     )
-    @mock.patch("src.dieta_especial.management.commands.gera_zip_protocolos.HTML")
+    @mock.patch(
+        "src.dieta_especial.management.commands.gera_zip_protocolos.renderiza_pdf"
+    )
     @mock.patch(
         "src.dieta_especial.management.commands.gera_zip_protocolos.relatorio_dieta_especial_protocolo"
     )
     def test_gera_pdfs_com_sucesso(
-        self, mock_relatorio, mock_html_cls, mock_envia_email
+        self, mock_relatorio, mock_renderiza_pdf, mock_envia_email
     ):
         self.setup_generico()
         self.setup_dieta_em_vigencia()
 
-        mock_html_instance = mock.Mock()
-        mock_html_cls.return_value = mock_html_instance
-        mock_html_instance.write_pdf.side_effect = lambda buf: buf.write(b"PDFDATA")
+        mock_renderiza_pdf.return_value = b"PDFDATA"
 
         call_command(
             "gera_zip_protocolos",
@@ -103,8 +103,7 @@ class GeraProtocolosCommandTests(TestCase):
         mock_relatorio.assert_called_once_with(
             None, self.solicitacao_dieta_especial_em_vigencia
         )
-        mock_html_cls.assert_called_once()
-        mock_html_instance.write_pdf.assert_called_once()
+        mock_renderiza_pdf.assert_called_once()
 
         args, kwargs = mock_envia_email.call_args
         anexo_bytes = kwargs["anexo"]
@@ -32,3 +32,45 @@ def logs_dieta_recreio_nas_ferias(escola, classificacoes_dietas):
             classificacao=classificacao,
             data=data,
         )
+
+
+@pytest.fixture
+def massa_dietas_autorizadas():
+    """
+    Escolas TERC TOTAL com milhares de dietas autorizadas, para medir a geração
+    diária dos logs. Retorna uma função que recebe a quantidade de escolas.
+    """
+
+    def cria_massa(quantidade_escolas=30, dietas_por_escola=100):
+        tipo_gestao = baker.make("TipoGestao", nome="TERC TOTAL")
+        tipo_unidade = baker.make("TipoUnidadeEscolar", iniciais="EMEF")
+        classificacoes = baker.make("ClassificacaoDieta", _quantity=2)
+        periodos = [
+            baker.make("PeriodoEscolar", nome=nome) for nome in ["MANHA", "TARDE"]
+        ]
+        escolas = baker.make(
+            "Escola",
+            tipo_gestao=tipo_gestao,
+            tipo_unidade=tipo_unidade,
+            _quantity=quantidade_escolas,
+        )
+        for escola in escolas:
+            alunos = [
+                baker.make("Aluno", escola=escola, periodo_escolar=periodo)
+                for periodo in periodos
+            ]
+            baker.make(
+                "SolicitacaoDietaEspecial",
+                aluno=iter(alunos * dietas_por_escola),
+                escola_destino=escola,
+                rastro_escola=escola,
+                classificacao=iter(classificacoes * dietas_por_escola),
+                tipo_solicitacao="COMUM",
+                status="CODAE_AUTORIZADO",
+                ativo=True,
+                _quantity=dietas_por_escola,
+                _bulk_create=True,
+            )
+        return escolas, classificacoes, periodos
+
+    return cria_massa
@@ -178,6 +178,35 @@ def test_gera_logs_dietas_especiais_diariamente_com_logs_gerados_sem_duplicidade
     assert LogQuantidadeDietasAutorizadas.objects.count() == 18
 
 
+@freeze_time("2025-05-05")
+def test_gera_logs_dietas_especiais_diariamente_consultas_independem_das_escolas(
+    massa_dietas_autorizadas, django_assert_max_num_queries
+):
+    escolas, classificacoes, periodos = massa_dietas_autorizadas(
+        quantidade_escolas=30, dietas_por_escola=100
+    )
+
+    with django_assert_max_num_queries(17):
+        gera_logs_dietas_especiais_diariamente()
+
+    # um log sem período e um por período, por classificação e escola
+    assert LogQuantidadeDietasAutorizadas.objects.count() == 30 * 2 * 3
+    log = LogQuantidadeDietasAutorizadas.objects.get(
+        escola=escolas[0],
+        classificacao=classificacoes[0],
+        periodo_escolar=periodos[0],
+    )
+    assert log.quantidade == 50
+    assert (
+        LogQuantidadeDietasAutorizadas.objects.get(
+            escola=escolas[0],
+            classificacao=classificacoes[0],
+            periodo_escolar__isnull=True,
+        ).quantidade
+        == 50
+    )
+
+
 @freeze_time("2026-02-02")
 def test_gera_logs_dietas_recreio_ferias_diariamente_sem_duplicidade(
         escola_cei,
@@ -102,6 +102,12 @@ class LogQuantidadeDietasAutorizadas(TemChaveExterna, TemData, CriadoEm):
             "Logs da quantidade de dietas autorizadas por unidade escolar"
         )
         ordering = ("-data", "escola__nome")
+        indexes = [
+            models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_dietas_escola_data",
+            ),
+        ]
 
 
 class LogQuantidadeDietasAutorizadasCEI(TemChaveExterna, TemData, CriadoEm):
@@ -137,6 +143,12 @@ class LogQuantidadeDietasAutorizadasCEI(TemChaveExterna, TemData, CriadoEm):
             "Logs da quantidade de dietas autorizadas por unidade escolar CEI"
         )
         ordering = ("-data", "escola__nome")
+        indexes = [
+            models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_dietas_cei_escola_data",
+            ),
+        ]
 
 
 class LogQuantidadeDietasAutorizadasRecreioNasFerias(
@@ -3,13 +3,13 @@ from io import BytesIO
 
 from django.conf import settings
 from django.core.management.base import BaseCommand, CommandError
-from weasyprint import HTML
 
 from src.dados_comuns.utils import envia_email_unico_com_anexo_inmemory
 from src.dieta_especial.solicitacao_dieta_especial.models import (
     SolicitacaoDietaEspecial,
 )
 from src.relatorios.relatorios import relatorio_dieta_especial_protocolo
+from src.relatorios.renderizador_pdf import renderiza_pdf
 
 
 class Command(BaseCommand):
@@ -53,12 +53,9 @@ class Command(BaseCommand):
                 filename = f"Protocolo - {nome_escola} - {nome} - {codigo}.pdf"
 
                 html_string = relatorio_dieta_especial_protocolo(None, dieta)
-                pdf_buffer = BytesIO()
-                HTML(string=html_string, base_url=settings.STATIC_URL).write_pdf(
-                    pdf_buffer
-                )
+                pdf = renderiza_pdf(html_string, base_url=settings.STATIC_URL)
 
-                zip_file.writestr(filename, pdf_buffer.getvalue())
+                zip_file.writestr(filename, pdf)
                 self.stdout.write(self.style.SUCCESS(f"Adicionado: {filename}"))
 
         envia_email_unico_com_anexo_inmemory(
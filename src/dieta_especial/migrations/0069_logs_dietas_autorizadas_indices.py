@@ -0,0 +1,28 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # índices criados sem bloquear a escrita nas tabelas de logs
+    atomic = False
+
+    dependencies = [
+        ("dieta_especial", "0068_delete_tipocontagem"),
+    ]
+
+    operations = [
+        AddIndexConcurrently(
+            model_name="logquantidadedietasautorizadas",
+            index=models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_dietas_escola_data",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="logquantidadedietasautorizadascei",
+            index=models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_dietas_cei_escola_data",
+            ),
+        ),
+    ]
@@ -48,7 +48,7 @@ class SolicitacaoDietaEspecialCreateSerializer(serializers.ModelSerializer):
 
     def validate_anexos(self, anexos):
         for anexo in anexos:
-            filesize = size(anexo["arquivo"])
+            filesize = size(anexo["arquivo"], self.context["request"].user)
             if filesize > DEZ_MB:
                 msg = "O tamanho máximo de um arquivo é 10MB"
                 raise serializers.ValidationError(msg)
@@ -3,6 +3,7 @@ import logging
 
 import environ
 from celery import shared_task
+from django.db import connection, transaction
 from django.db.models import Q
 
 from src.dieta_especial.logs_models.models import (
@@ -12,12 +13,14 @@ from src.dieta_especial.logs_models.models import (
     LogQuantidadeDietasAutorizadasRecreioNasFeriasCEI,
 )
 from src.dieta_especial.solicitacao_dieta_especial.models import (
+    ClassificacaoDieta,
     SolicitacaoDietaEspecial,
 )
 from src.dieta_especial.tasks.utils.logs import (
+    agrupa_dietas_autorizadas,
     cria_logs_totais_cei_por_faixa_etaria,
     gera_logs_dietas_escolas_cei,
-    gera_logs_dietas_escolas_comuns,
+    gera_logs_dietas_escolas_comuns_agrupadas,
     gera_logs_dietas_recreio_ferias_escolas_cei,
     gera_logs_dietas_recreio_ferias_escolas_comuns,
     gera_logs_dietas_recreio_ferias_parte_sem_faixa_cemei,
@@ -25,14 +28,19 @@ from src.dieta_especial.tasks.utils.logs import (
     filtrar_logs_cei_ja_existentes,
     filtrar_logs_recreio_ferias_ja_existentes,
     filtrar_logs_recreio_ferias_cei_ja_existentes,
+    periodos_escolares_com_alunos_por_escola,
 )
-from src.escola.models import Escola
+from src.escola.models import Escola, PeriodoEscolar
 from src.escola.utils import datas_para_gerar_logs
 
 logger = logging.getLogger(__name__)
 
 env = environ.Env()
 
+# Chave do lock (pg_advisory_xact_lock) que serializa a gravação dos logs diários
+# de dietas autorizadas entre execuções simultâneas da task.
+LOCK_LOGS_DIETAS_AUTORIZADAS = 4_301_001
+
 
 @shared_task(
     retry_backoff=2,
@@ -53,26 +61,37 @@ def gera_logs_dietas_especiais_diariamente():
     )
     logs_a_criar_escolas_comuns = []
     logs_a_criar_escolas_cei = []
-    escolas = Escola.objects.filter(tipo_gestao__nome="TERC TOTAL")
+    escolas = list(
+        Escola.objects.filter(tipo_gestao__nome="TERC TOTAL").select_related(
+            "tipo_unidade"
+        )
+    )
+    total_escolas = len(escolas)
+    # contagens das escolas sem faixa etária em uma consulta para todas as escolas
+    grupos = agrupa_dietas_autorizadas(
+        dietas_autorizadas.filter(escola_destino__in=escolas)
+    )
+    periodos_por_escola = periodos_escolares_com_alunos_por_escola(escolas)
+    classificacoes = list(ClassificacaoDieta.objects.all())
+    dict_periodos = PeriodoEscolar.dict_periodos()
     for index, escola in enumerate(escolas):
         datas = datas_para_gerar_logs(escola)
         for data_ref in datas:
             msg = "x-x-x-x Logs de quantidade de dietas autorizadas para a escola"
-            msg += f" {escola.nome} ({index + 1}/{(escolas).count()}) x-x-x-x"
+            msg += f" {escola.nome} ({index + 1}/{total_escolas}) x-x-x-x"
             logger.info(msg)
-            if escola.eh_cei:
-                logs_escola = gera_logs_dietas_escolas_cei(
-                    escola, dietas_autorizadas, data_ref
-                )
-                logs_escola = cria_logs_totais_cei_por_faixa_etaria(
-                    logs_escola, data_ref, escola
-                )
-                logs_a_criar_escolas_cei += logs_escola
-            elif escola.eh_cemei:
-                logs_a_criar_escolas_comuns += gera_logs_dietas_escolas_comuns(
-                    escola, dietas_autorizadas, data_ref
+            if not escola.eh_cei:
+                logs_a_criar_escolas_comuns += (
+                    gera_logs_dietas_escolas_comuns_agrupadas(
+                        escola,
+                        grupos.get(escola.id, {}),
+                        periodos_por_escola.get(escola.id, []),
+                        classificacoes,
+                        dict_periodos,
+                        data_ref,
+                    )
                 )
-
+            if escola.eh_cei or escola.eh_cemei:
                 logs_escola = gera_logs_dietas_escolas_cei(
                     escola, dietas_autorizadas, data_ref
                 )
@@ -80,26 +99,28 @@ def gera_logs_dietas_especiais_diariamente():
                     logs_escola, data_ref, escola
                 )
                 logs_a_criar_escolas_cei += logs_escola
-            else:
-                logs_a_criar_escolas_comuns += gera_logs_dietas_escolas_comuns(
-                    escola, dietas_autorizadas, data_ref
-                )
 
-    logs_filtrados_comuns = filtrar_logs_comuns_ja_existentes(
-        logs_a_criar_escolas_comuns
-    )
+    # As tabelas aceitam logs repetidos (corrigidos pela rotina de reparo), então a
+    # consulta dos logs existentes e a inserção rodam sob um lock de transação:
+    # duas execuções simultâneas não gravam o mesmo log.
+    with transaction.atomic():
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT pg_advisory_xact_lock(%s)", [LOCK_LOGS_DIETAS_AUTORIZADAS]
+            )
+        logs_filtrados_comuns = filtrar_logs_comuns_ja_existentes(
+            logs_a_criar_escolas_comuns
+        )
 
-    logs_filtrados_cei = filtrar_logs_cei_ja_existentes(
-        logs_a_criar_escolas_cei
-    )
+        logs_filtrados_cei = filtrar_logs_cei_ja_existentes(logs_a_criar_escolas_cei)
 
-    LogQuantidadeDietasAutorizadas.objects.bulk_create(
-        logs_filtrados_comuns
-    )
+        LogQuantidadeDietasAutorizadas.objects.bulk_create(
+            logs_filtrados_comuns, batch_size=1000
+        )
 
-    LogQuantidadeDietasAutorizadasCEI.objects.bulk_create(
-        logs_filtrados_cei
-    )
+        LogQuantidadeDietasAutorizadasCEI.objects.bulk_create(
+            logs_filtrados_cei, batch_size=1000
+        )
 
 
 @shared_task(
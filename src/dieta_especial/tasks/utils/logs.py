@@ -1,9 +1,19 @@
 import datetime
 from collections import Counter
+from typing import NamedTuple
 
 from dateutil.relativedelta import relativedelta
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import Q
+from django.db.models import (
+    BooleanField,
+    Case,
+    Count,
+    DateField,
+    F,
+    Q,
+    Value,
+    When,
+)
 
 from src.dados_comuns.utils import quantidade_meses
 from src.dieta_especial.constants import ETAPA_INFANTIL
@@ -16,7 +26,7 @@ from src.dieta_especial.logs_models.models import (
 from src.dieta_especial.solicitacao_dieta_especial.models import (
     ClassificacaoDieta,
 )
-from src.escola.models import FaixaEtaria, PeriodoEscolar
+from src.escola.models import Aluno, FaixaEtaria, PeriodoEscolar
 from src.medicao_inicial.models import SolicitacaoMedicaoInicial
 
 
@@ -40,58 +50,121 @@ def cria_logs_totais_cei_por_faixa_etaria(logs_escola, ontem, escola):
     return logs_escola
 
 
-def get_quantidade_nao_matriculados_entre_4_e_6_anos(dietas, data_referencia):
-    return dietas.filter(
-        tipo_solicitacao="ALUNO_NAO_MATRICULADO",
-        aluno__data_nascimento__lte=data_referencia - relativedelta(years=4),
-        aluno__data_nascimento__gte=data_referencia - relativedelta(years=6),
-    ).count()
+class GrupoDietasAutorizadas(NamedTuple):
+    periodo_escolar: str | None
+    nao_matriculado: bool
+    sem_serie: bool
+    ciclo_cei: bool
+    etapa_infantil: bool
+    data_nascimento: datetime.date | None
+    quantidade: int
+
+
+def _condicao(condicao: Q) -> Case:
+    return Case(
+        When(condicao, then=Value(True)),
+        default=Value(False),
+        output_field=BooleanField(),
+    )
+
 
+def agrupa_dietas_autorizadas(dietas_autorizadas) -> dict:
+    """
+    Conta as dietas autorizadas por escola de destino, classificação, período
+    do aluno, ciclo/etapa e data de nascimento (apenas dos alunos não
+    matriculados, cuja idade define a etapa), em uma única consulta.
 
-def get_quantidade_nao_matriculados_maior_6_anos(dietas, data_referencia):
-    return dietas.filter(
-        tipo_solicitacao="ALUNO_NAO_MATRICULADO",
-        aluno__data_nascimento__lte=data_referencia - relativedelta(years=6),
-    ).count()
+    Returns:
+        dict: {escola_id: {classificacao_id: [GrupoDietasAutorizadas, ...]}}
+    """
+    nao_matriculado = Q(tipo_solicitacao="ALUNO_NAO_MATRICULADO")
+    grupos = {}
+    for escola_id, classificacao_id, *valores in (
+        dietas_autorizadas.filter(classificacao__isnull=False)
+        .annotate(
+            nao_matriculado=_condicao(nao_matriculado),
+            sem_serie=_condicao(Q(aluno__serie__isnull=True) | Q(aluno__serie="")),
+            ciclo_cei=_condicao(Q(aluno__ciclo=Aluno.CICLO_ALUNO_CEI)),
+            etapa_infantil=_condicao(Q(aluno__etapa=ETAPA_INFANTIL)),
+            nascimento_nao_matriculado=Case(
+                When(nao_matriculado, then=F("aluno__data_nascimento")),
+                default=None,
+                output_field=DateField(),
+            ),
+        )
+        .values_list(
+            "escola_destino_id",
+            "classificacao_id",
+            "aluno__periodo_escolar__nome",
+            "nao_matriculado",
+            "sem_serie",
+            "ciclo_cei",
+            "etapa_infantil",
+            "nascimento_nao_matriculado",
+        )
+        .annotate(quantidade=Count("id"))
+        .order_by()
+    ):
+        grupos.setdefault(escola_id, {}).setdefault(classificacao_id, []).append(
+            GrupoDietasAutorizadas(*valores)
+        )
+    return grupos
+
+
+def periodos_escolares_com_alunos_por_escola(escolas) -> dict:
+    """Equivale a `Escola.periodos_escolares_com_alunos` para várias escolas."""
+    periodos = {}
+    for escola_id, periodo_escolar_nome in (
+        Aluno.objects.filter(escola__in=escolas, periodo_escolar__isnull=False)
+        .values_list("escola_id", "periodo_escolar__nome")
+        .distinct()
+        .order_by("escola_id", "periodo_escolar__nome")
+    ):
+        periodos.setdefault(escola_id, []).append(periodo_escolar_nome)
+    return periodos
 
 
-def get_quantidade_dietas_emebs(each, dietas, data_referencia):
-    dietas_sem_alunos_nao_matriculados = dietas.exclude(
-        tipo_solicitacao="ALUNO_NAO_MATRICULADO"
+def _soma(grupos, condicao=None) -> int:
+    return sum(
+        grupo.quantidade for grupo in grupos if condicao is None or condicao(grupo)
+    )
+
+
+def get_quantidade_dietas_emebs(each, grupos, data_referencia):
+    quatro_anos_atras = data_referencia - relativedelta(years=4)
+    seis_anos_atras = data_referencia - relativedelta(years=6)
+    matriculados = [grupo for grupo in grupos if not grupo.nao_matriculado]
+    nao_matriculados = [
+        grupo
+        for grupo in grupos
+        if grupo.nao_matriculado and grupo.data_nascimento is not None
+    ]
+    # os limites se sobrepõem em seis anos completos, como nas consultas de origem
+    entre_4_e_6_anos = _soma(
+        nao_matriculados,
+        lambda grupo: seis_anos_atras <= grupo.data_nascimento <= quatro_anos_atras,
+    )
+    maior_6_anos = _soma(
+        nao_matriculados, lambda grupo: grupo.data_nascimento <= seis_anos_atras
     )
     if each == "INFANTIL":
-        quantidade = dietas_sem_alunos_nao_matriculados.filter(
-            aluno__etapa=ETAPA_INFANTIL
-        ).count()
-        quantidade += get_quantidade_nao_matriculados_entre_4_e_6_anos(
-            dietas, data_referencia
-        )
-    elif each == "FUNDAMENTAL":
-        quantidade = dietas_sem_alunos_nao_matriculados.exclude(
-            aluno__etapa=ETAPA_INFANTIL
-        ).count()
-        quantidade += get_quantidade_nao_matriculados_maior_6_anos(
-            dietas, data_referencia
-        )
-    else:
-        quantidade = dietas_sem_alunos_nao_matriculados.count()
-        quantidade += get_quantidade_nao_matriculados_maior_6_anos(
-            dietas, data_referencia
+        return _soma(matriculados, lambda grupo: grupo.etapa_infantil) + (
+            entre_4_e_6_anos
         )
-        quantidade += get_quantidade_nao_matriculados_entre_4_e_6_anos(
-            dietas, data_referencia
+    if each == "FUNDAMENTAL":
+        return _soma(matriculados, lambda grupo: not grupo.etapa_infantil) + (
+            maior_6_anos
         )
-    return quantidade
+    return _soma(matriculados) + maior_6_anos + entre_4_e_6_anos
 
 
 def logs_a_criar_sem_periodo_escolar(
-    logs_a_criar, escola, dietas_filtradas, ontem, classificacao
+    logs_a_criar, escola, grupos, ontem, classificacao
 ):
     if escola.eh_emebs:
         for each in ["INFANTIL", "FUNDAMENTAL", "N/A"]:
-            quantidade = get_quantidade_dietas_emebs(each, dietas_filtradas, ontem)
             log = LogQuantidadeDietasAutorizadas(
-                quantidade=quantidade,
+                quantidade=get_quantidade_dietas_emebs(each, grupos, ontem),
                 escola=escola,
                 data=ontem,
                 classificacao=classificacao,
@@ -100,7 +173,7 @@ def logs_a_criar_sem_periodo_escolar(
             logs_a_criar.append(log)
     else:
         log = LogQuantidadeDietasAutorizadas(
-            quantidade=dietas_filtradas.count(),
+            quantidade=_soma(grupos),
             escola=escola,
             data=ontem,
             classificacao=classificacao,
@@ -110,35 +183,20 @@ def logs_a_criar_sem_periodo_escolar(
 
 
 def logs_periodo_integral_cei_ou_emei_escola_cemei(
-    logs_a_criar,
-    dietas_autorizadas,
-    classificacao,
-    escola,
-    periodo_escolar_nome,
-    dict_periodos,
-    ontem,
+    logs_a_criar, grupos_periodo, classificacao, escola, periodo_escolar, ontem
 ):
-    dietas = dietas_autorizadas.filter(
-        classificacao=classificacao, escola_destino=escola
-    ).filter(
-        Q(aluno__periodo_escolar__nome=periodo_escolar_nome)
-        | Q(tipo_solicitacao="ALUNO_NAO_MATRICULADO")
+    # alunos sem série contam para as duas partes da CEMEI
+    quantidade_cei = _soma(
+        grupos_periodo, lambda grupo: grupo.sem_serie or grupo.ciclo_cei
+    )
+    quantidade_emei = _soma(
+        grupos_periodo, lambda grupo: grupo.sem_serie or not grupo.ciclo_cei
     )
-    quantidade_cei = 0
-    quantidade_emei = 0
-    for dieta in dietas:
-        if not dieta.aluno.serie:
-            quantidade_cei += 1
-            quantidade_emei += 1
-        elif dieta.aluno.ciclo == dieta.aluno.CICLO_ALUNO_CEI:
-            quantidade_cei += 1
-        else:
-            quantidade_emei += 1
     log_cei = LogQuantidadeDietasAutorizadas(
         quantidade=quantidade_cei,
         escola=escola,
         data=ontem,
-        periodo_escolar=dict_periodos[periodo_escolar_nome],
+        periodo_escolar=periodo_escolar,
         classificacao=classificacao,
         cei_ou_emei="CEI",
     )
@@ -146,47 +204,56 @@ def logs_periodo_integral_cei_ou_emei_escola_cemei(
         quantidade=quantidade_emei,
         escola=escola,
         data=ontem,
-        periodo_escolar=dict_periodos[periodo_escolar_nome],
+        periodo_escolar=periodo_escolar,
         classificacao=classificacao,
         cei_ou_emei="EMEI",
     )
     return logs_a_criar + [log_cei] + [log_emei]
 
 
-def gera_logs_dietas_escolas_comuns(escola, dietas_autorizadas, ontem):
+def gera_logs_dietas_escolas_comuns_agrupadas(
+    escola, grupos_escola, periodos_escolares, classificacoes, dict_periodos, ontem
+):
+    """
+    Logs de quantidade de dietas autorizadas da escola a partir das contagens
+    de `agrupa_dietas_autorizadas`, sem novas consultas.
+
+    Args:
+        escola (Escola): escola dos logs.
+        grupos_escola (dict): {classificacao_id: [GrupoDietasAutorizadas, ...]}.
+        periodos_escolares (list): nomes dos períodos com alunos na escola.
+        classificacoes (list): classificações de dieta.
+        dict_periodos (dict): `PeriodoEscolar.dict_periodos()`.
+        ontem (date): data dos logs.
+    """
     logs_a_criar = []
-    dict_periodos = PeriodoEscolar.dict_periodos()
-    for classificacao in ClassificacaoDieta.objects.all():
-        dietas_filtradas = dietas_autorizadas.filter(
-            classificacao=classificacao, escola_destino=escola
-        )
+    for classificacao in classificacoes:
+        grupos = grupos_escola.get(classificacao.id, [])
         logs_a_criar = logs_a_criar_sem_periodo_escolar(
-            logs_a_criar, escola, dietas_filtradas, ontem, classificacao
-        )
-        for periodo_escolar_nome in escola.periodos_escolares_com_alunos:
-            dietas_filtradas_periodo = dietas_autorizadas.filter(
-                classificacao=classificacao, escola_destino=escola
-            ).filter(
-                Q(aluno__periodo_escolar__nome=periodo_escolar_nome)
-                | Q(tipo_solicitacao="ALUNO_NAO_MATRICULADO")
-            )
+            logs_a_criar, escola, grupos, ontem, classificacao
+        )
+        for periodo_escolar_nome in periodos_escolares:
+            grupos_periodo = [
+                grupo
+                for grupo in grupos
+                if grupo.periodo_escolar == periodo_escolar_nome
+                or grupo.nao_matriculado
+            ]
             if escola.eh_cemei and periodo_escolar_nome == "INTEGRAL":
                 logs_a_criar = logs_periodo_integral_cei_ou_emei_escola_cemei(
                     logs_a_criar,
-                    dietas_autorizadas,
+                    grupos_periodo,
                     classificacao,
                     escola,
-                    periodo_escolar_nome,
-                    dict_periodos,
+                    dict_periodos[periodo_escolar_nome],
                     ontem,
                 )
             if escola.eh_emebs:
                 for each in ["INFANTIL", "FUNDAMENTAL"]:
-                    quantidade = get_quantidade_dietas_emebs(
-                        each, dietas_filtradas_periodo, ontem
-                    )
                     log = LogQuantidadeDietasAutorizadas(
-                        quantidade=quantidade,
+                        quantidade=get_quantidade_dietas_emebs(
+                            each, grupos_periodo, ontem
+                        ),
                         escola=escola,
                         data=ontem,
                         periodo_escolar=dict_periodos[periodo_escolar_nome],
@@ -196,7 +263,7 @@ def gera_logs_dietas_escolas_comuns(escola, dietas_autorizadas, ontem):
                     logs_a_criar.append(log)
             else:
                 log = LogQuantidadeDietasAutorizadas(
-                    quantidade=dietas_filtradas_periodo.count(),
+                    quantidade=_soma(grupos_periodo),
                     escola=escola,
                     data=ontem,
                     periodo_escolar=dict_periodos[periodo_escolar_nome],
@@ -206,6 +273,18 @@ def gera_logs_dietas_escolas_comuns(escola, dietas_autorizadas, ontem):
     return logs_a_criar
 
 
+def gera_logs_dietas_escolas_comuns(escola, dietas_autorizadas, ontem):
+    grupos = agrupa_dietas_autorizadas(dietas_autorizadas.filter(escola_destino=escola))
+    return gera_logs_dietas_escolas_comuns_agrupadas(
+        escola,
+        grupos.get(escola.id, {}),
+        escola.periodos_escolares_com_alunos,
+        ClassificacaoDieta.objects.all(),
+        PeriodoEscolar.dict_periodos(),
+        ontem,
+    )
+
+
 def append_periodo_parcial(periodos, solicitacao_medicao):
     if solicitacao_medicao.ue_possui_alunos_periodo_parcial:
         periodos.append("PARCIAL")
@@ -314,11 +314,28 @@ class EOLServicoSGP:
             return None
 
     @classmethod
-    def get_lista_alunos_por_escola_ano_corrente_ou_seguinte(cls, codigo_eol):
+    def get_lista_alunos_e_ano_letivo_por_escola(cls, codigo_eol):
+        """
+        Alunos do ano corrente ou, se não houver, do ano seguinte.
+
+        Returns:
+            tuple: (ano letivo, lista de alunos). A lista é None quando as duas
+                consultas falharam.
+        """
+        ano_corrente = datetime.today().year
         lista = cls._tenta_ano_corrente(codigo_eol)
-        if lista is None or not lista:
-            lista = cls._tenta_ano_seguinte(codigo_eol)
+        if lista:
+            return ano_corrente, lista
+        lista_ano_seguinte = cls._tenta_ano_seguinte(codigo_eol)
+        if lista_ano_seguinte:
+            return ano_corrente + 1, lista_ano_seguinte
+        if lista is None and lista_ano_seguinte is None:
+            return ano_corrente, None
+        return ano_corrente, []
 
+    @classmethod
+    def get_lista_alunos_por_escola_ano_corrente_ou_seguinte(cls, codigo_eol):
+        _, lista = cls.get_lista_alunos_e_ano_letivo_por_escola(codigo_eol)
         return lista or []
 
 
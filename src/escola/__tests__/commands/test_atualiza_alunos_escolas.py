@@ -4,6 +4,7 @@ from unittest import TestCase
 from unittest.mock import MagicMock, patch
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 from freezegun.api import freeze_time
 from requests.models import Response
@@ -17,6 +18,7 @@ from src.escola.fixtures.factories.escola_factory import (
     PeriodoEscolarFactory,
 )
 from src.escola.management.commands.atualiza_alunos_escolas import (
+    CHAVE_CHECKPOINT,
     Command,
     MaxRetriesExceeded,
 )
@@ -230,6 +232,32 @@ class AtualizaAlunosEscolasCommandTest(TestCase):
 
         assert Aluno.objects.filter(nome="ZOE ALUNA TESTE").exists() is False
 
+    @freeze_time("2025-01-01")
+    @patch(
+        "src.escola.management.commands.atualiza_alunos_escolas.Command.get_response_alunos_por_escola"
+    )
+    @pytest.mark.django_db
+    def test_command_atualiza_alunos_escolas_d_menos_1_retomar(
+        self,
+        mock_get_response_alunos_por_escola,
+    ) -> None:
+        self.setup_escola2()
+        cache.set(
+            CHAVE_CHECKPOINT,
+            {"data": "2025-01-01", "modo": "d_menos_1", "ultima_escola": "000086"},
+        )
+
+        mock_get_response_alunos_por_escola.side_effect = [
+            self.mocked_response_dados_alunos_2,
+            mocked_response({}, 404),
+        ]
+        self.call_command(retomar=True)
+
+        assert mock_get_response_alunos_por_escola.call_count == 2
+        assert mock_get_response_alunos_por_escola.call_args_list[0][0][0] == "000094"
+        assert Aluno.objects.get(nome="DAVI ALUNO TESTE").escola == self.escola2
+        assert cache.get(CHAVE_CHECKPOINT) is None
+
     @freeze_time("2025-01-01")
     @patch(
         "src.escola.management.commands.atualiza_alunos_escolas.Command.get_response_alunos_por_escola"
@@ -86,12 +86,6 @@ class AtualizaCacheMatriculadosPorFaixaCommandTest(TestCase):
     ) -> None:
         mock_get_alunos_por_escola_por_ano_letivo.side_effect = [
             self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
             self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
         ]
 
@@ -128,22 +122,6 @@ class AtualizaCacheMatriculadosPorFaixaCommandTest(TestCase):
     ) -> None:
         mock_get_alunos_por_escola_por_ano_letivo.side_effect = [
             self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_1,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
-            self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
             self.mock_chamada_externa_alunos_por_escola_por_ano_letivo_2,
         ]
 
@@ -0,0 +1,16 @@
+import pytest
+from django.core.management import CommandError, call_command
+
+pytestmark = pytest.mark.django_db
+
+
+def test_benchmark_faixas_etarias(faixas_etarias_ativas, capsys):
+    call_command("benchmark_faixas_etarias", "--quantidade", "2000")
+    saida = capsys.readouterr().out
+    assert "2000 alunos em 8 faixas" in saida
+    assert "Contagens idênticas." in saida
+
+
+def test_benchmark_faixas_etarias_sem_faixas():
+    with pytest.raises(CommandError):
+        call_command("benchmark_faixas_etarias", "--quantidade", "10")
@@ -197,3 +197,14 @@ def test_log_aluno_filter_dia(log_alunos_matriculados_faixa_etaria_dia):
         queryset=LogAlunosMatriculadosFaixaEtariaDia.objects.all(),
     )
     assert filtro.qs.count() == 0
+
+
+@pytest.mark.parametrize("mes, ano", [("13", "2024"), ("0", "2024"), ("1", "0")])
+def test_log_aluno_filter_mes_ano_invalidos(
+    log_alunos_matriculados_faixa_etaria_dia, mes, ano
+):
+    filtro = LogAlunosMatriculadosFaixaEtariaDiaFilter(
+        data={"mes": mes, "ano": ano},
+        queryset=LogAlunosMatriculadosFaixaEtariaDia.objects.all(),
+    )
+    assert filtro.qs.count() == 0
@@ -7,6 +7,8 @@ from freezegun import freeze_time
 from model_bakery import baker
 
 from ...dados_comuns.constants import DAQUI_A_SETE_DIAS, DAQUI_A_TRINTA_DIAS, SEM_FILTRO
+from ...dados_comuns.intervalos import filtro_mes
+from ...eol_servico.utils import EOLException, EOLServicoSGP
 from ..admin import PlanilhaAtualizacaoTipoGestaoEscolaAdmin
 from ..models import (
     AlunosMatriculadosPeriodoEscola,
@@ -22,6 +24,7 @@ from ..models import (
     PeriodoEscolar,
     PlanilhaAtualizacaoTipoGestaoEscola,
     PlanilhaEscolaDeParaCodigoEolCodigoCoade,
+    RetratoAlunosEOL,
     TipoGestao,
     TipoUnidadeEscolar,
 )
@@ -220,6 +223,7 @@ def test_escola_periodo_escolar_alunos_por_faixa_etaria(
     escola_periodo_escolar,
     eolservicosgp_get_lista_alunos,
 ):
+    RetratoAlunosEOL.atualiza(escola_periodo_escolar.escola)
     faixas_alunos = escola_periodo_escolar.alunos_por_faixa_etaria(
         datetime.date(2020, 10, 25)
     )
@@ -343,6 +347,24 @@ def test_modelo_log_alunos_matriculados_periodo_escola_programas(
     assert model.tipo_turma == "PROGRAMAS"
 
 
+def test_log_alunos_matriculados_periodo_escola_data_acompanha_criado_em(
+    log_alunos_matriculados_periodo_escola_regular,
+):
+    log = log_alunos_matriculados_periodo_escola_regular
+    assert log.data == log.criado_em.date()
+    log.criado_em = datetime.datetime(2024, 3, 31, 23, 59)
+    log.save(update_fields=["criado_em"])
+    logs_do_mes = LogAlunosMatriculadosPeriodoEscola.objects.filter(
+        **filtro_mes("data", 2024, 3)
+    )
+    assert list(logs_do_mes.values_list("data", flat=True)) == [
+        datetime.date(2024, 3, 31)
+    ]
+    assert not LogAlunosMatriculadosPeriodoEscola.objects.filter(
+        **filtro_mes("data", 2024, 4)
+    ).exists()
+
+
 def test_criar_alunos_matriculados_periodo_escola_regular(escola, periodo_escolar):
     assert AlunosMatriculadosPeriodoEscola.objects.count() == 0
     AlunosMatriculadosPeriodoEscola.criar(
@@ -512,6 +534,7 @@ def test_log_alteracao_quantidade_alunos_por_escola_periodo(
 def test_alunos_por_periodo_e_faixa_etaria(
     escola, faixas_etarias, periodo_escolar, eolservicosgp_get_lista_alunos
 ):
+    RetratoAlunosEOL.atualiza(escola)
     response = escola.alunos_por_periodo_e_faixa_etaria()
     assert len(response) == 1
     assert response["INTEGRAL"] == Counter(
@@ -529,6 +552,7 @@ def test_alunos_periodo_parcial_e_faixa_etaria(
     periodo_escolar,
     eolservicosgp_get_lista_alunos,
 ):
+    RetratoAlunosEOL.atualiza(escola_cei)
     response = escola_cei.alunos_periodo_parcial_e_faixa_etaria()
     assert len(response) == 1
     assert response["PARCIAL"] == Counter(
@@ -555,6 +579,7 @@ def test_alunos_por_periodo_e_faixa_etaria_objetos_alunos(
 def test_alunos_por_faixa_etaria(
     escola_cei, faixas_etarias, eolservicosgp_get_lista_alunos
 ):
+    RetratoAlunosEOL.atualiza(escola_cei)
     response = escola_cei.alunos_por_faixa_etaria()
     assert len(response.items()) == 1
     assert response == Counter(
@@ -564,6 +589,57 @@ def test_alunos_por_faixa_etaria(
     )
 
 
+@freeze_time("2023-08-28")
+def test_retrato_alunos_eol(escola_cei, eolservicosgp_get_lista_alunos):
+    assert escola_cei.retrato_alunos_eol().desatualizado
+
+    retrato = RetratoAlunosEOL.atualiza(escola_cei)
+    assert retrato.ano_letivo == 2023
+    assert retrato.versao == 1
+    assert set(retrato.alunos[0]) == set(RetratoAlunosEOL.CAMPOS_ALUNO)
+
+    consulta = escola_cei.retrato_alunos_eol()
+    assert not consulta.desatualizado
+    assert len(consulta.alunos) == 3
+
+    RetratoAlunosEOL.atualiza(escola_cei)
+    assert escola_cei.retrato_alunos_eol().versao == 1
+
+    with freeze_time("2023-08-30"):
+        assert escola_cei.retrato_alunos_eol().desatualizado
+
+
+@freeze_time("2023-08-28")
+def test_alunos_por_faixa_etaria_sem_retrato_consulta_eol(
+    escola_cei, faixas_etarias, eolservicosgp_get_lista_alunos
+):
+    assert not RetratoAlunosEOL.objects.filter(escola=escola_cei).exists()
+
+    response = escola_cei.alunos_por_faixa_etaria()
+
+    assert sum(response.values()) == 3
+    assert RetratoAlunosEOL.objects.filter(escola=escola_cei).count() == 1
+
+
+def test_retrato_alunos_eol_mantido_quando_eol_falha(escola_cei, monkeypatch):
+    retrato = baker.make(
+        "RetratoAlunosEOL",
+        escola=escola_cei,
+        ano_letivo=datetime.date.today().year,
+        alunos=[{"codigoAluno": 1}],
+        atualizado_em=datetime.datetime.now(),
+    )
+    monkeypatch.setattr(
+        EOLServicoSGP,
+        "get_lista_alunos_e_ano_letivo_por_escola",
+        lambda codigo_eol: (datetime.date.today().year, None),
+    )
+    with pytest.raises(EOLException):
+        RetratoAlunosEOL.atualiza(escola_cei)
+    retrato.refresh_from_db()
+    assert retrato.alunos == [{"codigoAluno": 1}]
+
+
 def test_dia_suspensao_atividades_model(dia_suspensao_atividades):
     assert (
         dia_suspensao_atividades.__str__()
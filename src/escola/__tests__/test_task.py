@@ -7,6 +7,7 @@ import pytest
 from freezegun import freeze_time
 
 from src.dados_comuns.constants import StatusProcessamentoArquivo
+from src.dados_comuns.fluxo_status import transiciona_em_massa
 from src.dados_comuns.models import CentralDeDownload, LogSolicitacoesUsuario
 from src.escola.models import AlunosMatriculadosPeriodoEscola
 from src.escola.tasks import (
@@ -26,6 +27,7 @@ from src.escola.tasks import (
     registra_historico_matriculas_alunos,
 )
 from src.escola.utils import cria_arquivo_excel
+from src.kit_lanche.models import SolicitacaoKitLancheUnificada
 from src.relatorios.utils import extrair_texto_de_pdf
 
 pytestmark = pytest.mark.django_db
@@ -48,7 +50,17 @@ def test_atualiza_dados_escolas(mock_call_command):
 @patch("django.core.management.call_command")
 def test_atualiza_alunos_escolas(mock_call_command):
     atualiza_alunos_escolas()
-    mock_call_command.assert_called_once_with("atualiza_alunos_escolas", verbosity=0)
+    mock_call_command.assert_called_once_with(
+        "atualiza_alunos_escolas", verbosity=0, retomar=False
+    )
+
+
+@patch("django.core.management.call_command")
+def test_atualiza_alunos_escolas_retomada_apos_falha(mock_call_command):
+    atualiza_alunos_escolas.apply(retries=1)
+    mock_call_command.assert_called_once_with(
+        "atualiza_alunos_escolas", verbosity=0, retomar=True
+    )
 
 
 def test_atualiza_codigo_codae_das_escolas_task(codigo_codae_das_escolas, tmp_path):
@@ -173,6 +185,41 @@ def test_nega_solicitacoes_pendentes_autorizacao_vencidas(
     assert LogSolicitacoesUsuario.objects.count() == 4
 
 
+@freeze_time("2025-01-22")
+def test_nega_solicitacoes_vencidas_percorre_todos_os_modelos(solicitacoes_vencidas):
+    with patch(
+        "src.escola.tasks.transiciona_em_massa", wraps=transiciona_em_massa
+    ) as mock_em_massa:
+        nega_solicitacoes_vencidas()
+
+    modelos = [chamada.args[0].model for chamada in mock_em_massa.call_args_list]
+    # o kit lanche unificado parte da DRE e não tem dre_nao_valida
+    assert SolicitacaoKitLancheUnificada not in modelos
+    assert len(modelos) == 11
+    assert all("dre_nao_valida" in modelo.TRANSICOES_EM_MASSA for modelo in modelos)
+    assert (
+        LogSolicitacoesUsuario.objects.filter(
+            status_evento=LogSolicitacoesUsuario.DRE_NAO_VALIDOU
+        ).count()
+        == 1
+    )
+
+
+@freeze_time("2025-01-22")
+def test_nega_solicitacoes_pendentes_autorizacao_vencidas_percorre_todos_os_modelos(
+    solicitacoes_pendentes_autorizacao_vencidas,
+):
+    with patch(
+        "src.escola.tasks.transiciona_em_massa", wraps=transiciona_em_massa
+    ) as mock_em_massa:
+        nega_solicitacoes_pendentes_autorizacao_vencidas()
+
+    modelos = {chamada.args[0].model for chamada in mock_em_massa.call_args_list}
+    assert SolicitacaoKitLancheUnificada in modelos
+    assert len(modelos) == 9
+    assert mock_em_massa.call_count == 18
+
+
 @patch("django.core.management.call_command")
 def test_atualiza_cache_matriculados_por_faixa(mock_call_command):
     atualiza_cache_matriculados_por_faixa()
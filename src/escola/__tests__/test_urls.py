@@ -5,7 +5,12 @@ from django.core.files.uploadedfile import SimpleUploadedFile
 from model_bakery import baker
 from rest_framework import status
 
-from ..models import DiaSuspensaoAtividades, FaixaEtaria, MudancaFaixasEtarias
+from ..models import (
+    DiaSuspensaoAtividades,
+    FaixaEtaria,
+    MudancaFaixasEtarias,
+    RetratoAlunosEOL,
+)
 from ..services import NovoSGPServicoLogado, NovoSGPServicoLogadoException
 from .conftest import mocked_foto_aluno_novosgp, mocked_response
 
@@ -76,6 +81,7 @@ def test_url_endpoint_alunos_por_faixa_etaria(
     eolservicosgp_get_lista_alunos,
     faixas_etarias,
 ):
+    RetratoAlunosEOL.atualiza(escola_periodo_escolar.escola)
     url = f"/quantidade-alunos-por-periodo/{escola_periodo_escolar.uuid}/alunos-por-faixa-etaria/2020-10-20/"
     response = client_autenticado.get(url)
     assert response.status_code == status.HTTP_200_OK
@@ -23,6 +23,7 @@ from src.escola.services import NovoSGPServico
 from src.escola.utils import calendario_sgp
 
 from ..utils import (
+    ClassificadorFaixasEtarias,
     alunos_por_faixa_append,
     analise_alunos_dietas_somente_uma_data,
     create_update_objeto_escola_periodo_escolar,
@@ -185,6 +186,34 @@ def test_registra_quantidade_matriculados(dicionario_de_alunos_matriculados):
     assert LogAlunosMatriculadosPeriodoEscola.objects.count() == 8
 
 
+@freeze_time("2025-02-06")
+def test_registra_quantidade_matriculados_reexecucao(
+    dicionario_de_alunos_matriculados,
+):
+    ontem = datetime.date(2025, 2, 5)
+    registra_quantidade_matriculados(
+        dicionario_de_alunos_matriculados, ontem, "REGULAR"
+    )
+
+    dicionario_de_alunos_matriculados[-1]["turnos"][0]["quantidade"] = 41
+    registra_quantidade_matriculados(
+        dicionario_de_alunos_matriculados, ontem, "REGULAR"
+    )
+
+    assert AlunosMatriculadosPeriodoEscola.objects.count() == 9
+    assert LogAlunosMatriculadosPeriodoEscola.objects.count() == 8
+    codigo_eol = dicionario_de_alunos_matriculados[-1]["codigoEolEscola"]
+    log = LogAlunosMatriculadosPeriodoEscola.objects.get(escola__codigo_eol=codigo_eol)
+    assert log.quantidade_alunos == 41
+    assert log.criado_em.date() == ontem
+    assert (
+        EscolaPeriodoEscolar.objects.get(
+            escola__codigo_eol=codigo_eol
+        ).quantidade_alunos
+        == 41
+    )
+
+
 def test_create_update_objeto_escola_periodo_escolar(escola_cemei, periodo_escolar):
     quantidade_alunos = 100
 
@@ -410,6 +439,33 @@ def test_calendario_sgp_exception(mock_escolas):
                 mock_processa_dias_letivos.assert_not_called()
 
 
+def test_calendario_sgp_grava_dias_em_lote(mock_escolas, dias_letivos_mock):
+    escola = mock_escolas[0]
+    with patch("src.escola.models.Escola.objects.all", return_value=mock_escolas):
+        with patch.object(
+            NovoSGPServico, "dias_letivos", return_value=dias_letivos_mock
+        ):
+            resumo = calendario_sgp()
+            assert resumo["escolas"] == 1
+            assert resumo["dias_alterados"] == 9
+            assert (
+                DiaCalendario.objects.filter(
+                    escola=escola, periodo_escolar__isnull=True
+                ).count()
+                == 9
+            )
+
+            assert calendario_sgp()["dias_alterados"] == 0
+
+            dias_letivos_mock[0]["ehLetivo"] = False
+            assert calendario_sgp()["dias_alterados"] == 1
+
+    assert DiaCalendario.objects.filter(escola=escola).count() == 9
+    assert not DiaCalendario.objects.get(
+        escola=escola, data=datetime.date(2025, 1, 1)
+    ).dia_letivo
+
+
 def test_lotes_endpoint_filtrar_relatorio_alunos_matriculados(
     usuario_coordenador_codae, lote
 ):
@@ -859,3 +915,46 @@ class TestOrdenaFaixasPorIdade:
         periodos = [make_periodo("MANHA", [])]
         resultado = ordena_faixas_por_idade(periodos)
         assert resultado[0]["faixas"] == []
+
+
+def test_classificador_faixas_etarias_igual_a_data_pertence_a_faixa(
+    faixas_etarias_ativas,
+):
+    classificador = ClassificadorFaixasEtarias(faixas_etarias_ativas)
+    data_referencia = datetime.date(2024, 3, 31)
+    for dias in range(0, 80 * 31):
+        data_nascimento = data_referencia - datetime.timedelta(days=dias)
+        assert set(classificador.faixas_da_data(data_nascimento, data_referencia)) == {
+            faixa
+            for faixa in faixas_etarias_ativas
+            if faixa.data_pertence_a_faixa(data_nascimento, data_referencia)
+        }
+
+
+def test_classificador_faixas_etarias_conta_e_meses(faixas_etarias_ativas):
+    classificador = ClassificadorFaixasEtarias(faixas_etarias_ativas)
+    faixa_ultima = [f for f in faixas_etarias_ativas if f.inicio == 48][0]
+    faixa_bebe = [f for f in faixas_etarias_ativas if f.inicio == 0][0]
+    data_referencia = datetime.date(2024, 3, 10)
+    datas = [
+        datetime.date(2024, 3, 1),
+        datetime.date(2024, 2, 20),
+        datetime.date(2020, 3, 1),
+        datetime.date(2010, 1, 1),
+    ]
+
+    assert classificador.classifica(datas, data_referencia) == [
+        faixa_bebe.id,
+        faixa_bebe.id,
+        faixa_ultima.id,
+        None,
+    ]
+    assert classificador.conta(datas, data_referencia) == {
+        faixa_bebe.uuid: 2,
+        faixa_ultima.uuid: 1,
+    }
+    assert classificador.faixas_por_meses(47) == (
+        [f for f in faixas_etarias_ativas if f.inicio == 24][0],
+    )
+    assert classificador.faixas_por_meses(72) == ()
+    assert classificador.ultima_faixa == faixa_ultima
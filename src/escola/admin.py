@@ -33,6 +33,7 @@ from .models import (
     PlanilhaAtualizacaoTipoGestaoEscola,
     PlanilhaEscolaDeParaCodigoEolCodigoCoade,
     Responsavel,
+    RetratoAlunosEOL,
     Subprefeitura,
     TipoGestao,
     TipoUnidadeEscolar,
@@ -244,6 +245,15 @@ class LogErroAtualizaDadosAlunoAdmin(admin.ModelAdmin):
     search_fields = ("criado_em", "codigo_eol", "status", "msg_erro")
 
 
+@admin.register(RetratoAlunosEOL)
+class RetratoAlunosEOLAdmin(admin.ModelAdmin):
+    list_display = ("escola", "ano_letivo", "versao", "atualizado_em")
+    search_fields = ("escola__nome", "escola__codigo_eol")
+    list_filter = ("ano_letivo",)
+    raw_id_fields = ("escola",)
+    readonly_fields = ("alunos", "versao", "atualizado_em")
+
+
 @admin.register(LogAlunosMatriculadosPeriodoEscola)
 class LogAlunosMatriculadosPeriodoEscolaAdmin(admin.ModelAdmin):
     list_display = (
@@ -2,6 +2,7 @@ from datetime import datetime, timedelta
 
 from django_filters import rest_framework as filters
 
+from src.dados_comuns.api.filters import MesAnoFilterSet
 from src.escola.models import Aluno, HistoricoMatriculaAluno
 
 
@@ -59,9 +60,7 @@ class AlunoFilter(filters.FilterSet):
         return alunos_com_historico_na_escola
 
 
-class LogAlunosMatriculadosFaixaEtariaDiaFilter(filters.FilterSet):
+class LogAlunosMatriculadosFaixaEtariaDiaFilter(MesAnoFilterSet):
     escola_uuid = filters.UUIDFilter(field_name="escola__uuid")
     nome_periodo_escolar = filters.CharFilter(field_name="periodo_escolar__nome")
-    mes = filters.CharFilter(field_name="data__month", lookup_expr="exact")
-    ano = filters.CharFilter(field_name="data__year", lookup_expr="iexact")
     dias = filters.BaseInFilter(field_name="data__day", lookup_expr="in")
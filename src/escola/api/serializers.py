@@ -165,7 +165,7 @@ class LogAlunosMatriculadosPeriodoEscolaSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = LogAlunosMatriculadosPeriodoEscola
-        exclude = ("id", "uuid", "observacao")
+        exclude = ("id", "uuid", "observacao", "data")
 
 
 class PeriodoEscolarParaFiltroSerializer(serializers.ModelSerializer):
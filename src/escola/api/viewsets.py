@@ -31,6 +31,7 @@ from src.medicao_inicial.tasks import (
 )
 from src.terceirizada.models import Terceirizada
 
+from ...dados_comuns.intervalos import filtro_mes
 from ...dados_comuns.permissions import (
     UsuarioCODAEDietaEspecial,
     UsuarioCODAEGabinete,
@@ -637,9 +638,8 @@ class LogAlunosMatriculadosPeriodoEscolaViewSet(ModelViewSet):
         periodo_escolar = self.request.query_params.get("periodo_escolar", "")
 
         queryset = queryset.filter(
+            **filtro_mes("data", ano, mes),
             escola__uuid=escola_uuid,
-            criado_em__month=mes,
-            criado_em__year=ano,
             tipo_turma=tipo_turma,
         )
 
@@ -1402,7 +1402,7 @@ class RelatorioControleDeFrequenciaViewSet(ModelViewSet):
             )
         else:
             soma_quantidades_por_periodo = queryset.values(
-                "periodo_escolar__uuid", "criado_em__date"
+                "periodo_escolar__uuid", "data"
             ).annotate(soma_quantidade=Sum("quantidade_alunos"))
 
         for periodo_uuid in json.loads(periodos_uuids):
@@ -1462,7 +1462,8 @@ class RelatorioControleDeFrequenciaViewSet(ModelViewSet):
         return filtros
 
     def validar_datas(self, filtros, data_inicial, data_final, escola_eh_cei_ou_cemei):
-        nome_campo = "data" if escola_eh_cei_ou_cemei else "criado_em"
+        # os dois modelos de log têm o dia de referência em `data`
+        nome_campo = "data"
 
         ano, mes, dia_inicial = data_inicial.split("-")
         datetime_inicial = datetime.date(int(ano), int(mes), int(dia_inicial))
@@ -1520,11 +1521,13 @@ class RelatorioControleDeFrequenciaViewSet(ModelViewSet):
 
             if escola_eh_cei_ou_cemei:
                 log_alunos = escola.logs_alunos_matriculados_por_faixa_etaria.filter(
-                    quantidade__gte=1, criado_em__year=ano
+                    **filtro_mes("data", ano), quantidade__gte=1
                 )
             else:
                 log_alunos = escola.logs_alunos_matriculados_por_periodo.filter(
-                    tipo_turma="REGULAR", quantidade_alunos__gte=1, criado_em__year=ano
+                    **filtro_mes("data", ano),
+                    tipo_turma="REGULAR",
+                    quantidade_alunos__gte=1,
                 )
 
             periodos_ids = log_alunos.values_list("periodo_escolar", flat=True)
@@ -83,7 +83,7 @@ def _mock_api_response(codigos_ativos, status_code=200):
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestAlunoPermanenceAtivo:
     """Quando o aluno está ativo na API, o histórico NÃO deve ser encerrado."""
@@ -112,7 +112,7 @@ class TestAlunoPermanenceAtivo:
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestAlunoInativoEncerraHistorico:
     """Quando o aluno NÃO está ativo na API, o histórico deve ser encerrado."""
@@ -189,7 +189,7 @@ class TestAlunoInativoEncerraHistorico:
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestHistoricoJaEncerradoNaoEAlterado:
     """Históricos já com data_fim preenchida não devem ser tocados."""
@@ -217,7 +217,7 @@ class TestHistoricoJaEncerradoNaoEAlterado:
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestFalhaAPINaoAlteraHistoricos:
     """Se a API falha (retorna None), nenhum histórico deve ser alterado."""
@@ -237,8 +237,12 @@ class TestFalhaAPINaoAlteraHistoricos:
         assert historico_aluno_inativo.codigo_situacao == 1
 
 
-class TestCalculaDataFim:
-    """Testes unitários para o método _calcula_data_fim."""
+def _historicos_abertos(aluno):
+    return HistoricoMatriculaAluno.objects.filter(aluno=aluno, data_fim__isnull=True)
+
+
+class TestDataFimEntre:
+    """Testes unitários para o método _data_fim_entre."""
 
     def test_sem_proximo_historico_retorna_data_padrao(self, escola):
         aluno = baker.make("Aluno", codigo_eol="5000001")
@@ -251,7 +255,7 @@ class TestCalculaDataFim:
             codigo_situacao=1,
         )
 
-        resultado = Command()._calcula_data_fim(historico)
+        resultado = Command._data_fim_entre(historico, _historicos_abertos(aluno))
         assert resultado == DATA_FIM_PADRAO
 
     def test_com_proximo_historico_em_outra_escola(self, escola, outra_escola):
@@ -273,7 +277,7 @@ class TestCalculaDataFim:
             codigo_situacao=1,
         )
 
-        resultado = Command()._calcula_data_fim(historico)
+        resultado = Command._data_fim_entre(historico, _historicos_abertos(aluno))
         assert resultado == datetime.date(2025, 6, 30)
 
     def test_ignora_historico_com_data_fim_preenchida_em_outra_escola(
@@ -297,7 +301,7 @@ class TestCalculaDataFim:
             codigo_situacao=5,
         )
 
-        resultado = Command()._calcula_data_fim(historico)
+        resultado = Command._data_fim_entre(historico, _historicos_abertos(aluno))
         assert resultado == DATA_FIM_PADRAO
 
     def test_usa_proximo_historico_mais_antigo(self, escola, outra_escola):
@@ -329,12 +333,12 @@ class TestCalculaDataFim:
             codigo_situacao=1,
         )
 
-        resultado = Command()._calcula_data_fim(historico)
+        resultado = Command._data_fim_entre(historico, _historicos_abertos(aluno))
         assert resultado == datetime.date(2025, 4, 30)
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestEscolasSemHistoricos:
     """Escola sem históricos ativos não deve causar erro."""
@@ -350,7 +354,7 @@ class TestEscolasSemHistoricos:
 
 
 @mock.patch(
-    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.get"
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session.get"
 )
 class TestMistoAtivosInativos:
     """Cenário com alunos ativos e inativos na mesma escola."""
@@ -409,3 +413,15 @@ class TestMistoAtivosInativos:
         # aluno_c: ativo -> não encerrado
         assert h_c.data_fim is None
         assert h_c.codigo_situacao == 1
+
+
+@mock.patch(
+    "src.escola.management.commands.encerra_historicos_alunos_inativos.requests.Session"
+)
+def test_consultas_reaproveitam_a_mesma_sessao(mock_session, escola, outra_escola):
+    mock_session.return_value.get.return_value = _mock_api_response([])
+
+    call_command("encerra_historicos_alunos_inativos")
+
+    mock_session.assert_called_once()
+    assert mock_session.return_value.get.call_count == 2
@@ -2,9 +2,12 @@ from datetime import datetime
 from unittest import mock
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
+from model_bakery import baker
 
 from src.escola.management.commands.registra_historico_matriculas_alunos import (
+    CHAVE_CHECKPOINT,
     Command,
 )
 from src.escola.models import HistoricoMatriculaAluno
@@ -480,3 +483,46 @@ def test_argumento_ano_letivo():
     mocked.assert_called_once_with(2023)
 
     patcher.stop()
+
+
+@pytest.mark.django_db
+@mock.patch.object(
+    Command, "_obtem_matriculas_aluno", sgp_mock_lorena_2_escolas_ativas_1_concluida
+)
+def test_registro_do_historico_atualiza_historico_existente(
+    aluno_com_codigo_eol,
+    escola_lorena_1,
+    escola_lorena_2,
+    escola_lorena_3,
+):
+    historico_existente = baker.make(
+        "HistoricoMatriculaAluno",
+        aluno=aluno_com_codigo_eol,
+        escola=escola_lorena_3,
+        data_inicio=datetime(2023, 1, 1).date(),
+        data_fim=None,
+        codigo_situacao=1,
+        situacao="ATIVO",
+    )
+
+    call_command("registra_historico_matriculas_alunos")
+
+    assert HistoricoMatriculaAluno.objects.count() == 3
+    historico_existente.refresh_from_db()
+    assert historico_existente.data_inicio == datetime(2023, 6, 14).date()
+    assert historico_existente.data_fim == datetime(2023, 12, 29).date()
+    assert historico_existente.situacao == "CONCLUÍDO"
+
+
+@pytest.mark.django_db
+def test_retoma_a_partir_do_checkpoint(aluno_com_codigo_eol):
+    cache.set(CHAVE_CHECKPOINT, {"ano": 2023, "aluno_id": aluno_com_codigo_eol.id})
+    with mock.patch.object(
+        Command, "_obtem_matriculas_aluno", return_value=[]
+    ) as obtem_matriculas:
+        call_command("registra_historico_matriculas_alunos", "--ano=2023", "--retomar")
+
+    assert aluno_com_codigo_eol.codigo_eol not in [
+        chamada.args[0] for chamada in obtem_matriculas.call_args_list
+    ]
+    assert cache.get(CHAVE_CHECKPOINT) is None
@@ -1,10 +1,13 @@
 import datetime
+import itertools
 import logging
 import timeit
-from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import defaultdict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 
 import environ
 import requests
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
 from requests import ConnectionError
 from rest_framework import status
@@ -17,6 +20,7 @@ from src.dados_comuns.utils import bulk_create_safe, bulk_update_safe
 from src.escola.models import (
     Aluno,
     Escola,
+    HistoricoMatriculaAluno,
     LogAtualizaDadosAluno,
     LogRotinaDiariaAlunos,
     PeriodoEscolar,
@@ -26,6 +30,132 @@ env = environ.Env()
 
 logger = logging.getLogger("sigpae.cmd_atualiza_alunos_escolas")
 
+STATUS_MATRICULA_ATIVA = [1, 6, 10, 13]  # status para matrículas ativas
+
+CHAVE_CHECKPOINT = "atualiza_alunos_escolas:checkpoint"
+VALIDADE_CHECKPOINT = 60 * 60 * 48  # 48 horas
+
+
+def _chave_registro(registro):
+    return (
+        registro["codigoAluno"],
+        registro.get("anoLetivo"),
+        registro.get("dataSituacao"),
+        registro.get("codigoEolEscola"),
+    )
+
+
+class IndiceAlunos:
+    """
+    Alunos já cadastrados, indexados pelo código EOL, sem instanciar `Aluno`.
+
+    Guarda apenas o id, a escola e uma assinatura dos campos sincronizados com
+    o EOL, o suficiente para decidir entre criar, atualizar ou ignorar o aluno.
+    """
+
+    CAMPOS = (
+        "nome",
+        "data_nascimento",
+        "escola_id",
+        "periodo_escolar_id",
+        "nao_matriculado",
+        "serie",
+        "etapa",
+        "ciclo",
+        "desc_etapa",
+        "desc_ciclo",
+    )
+
+    def __init__(self, codigos_eol=None):
+        self._alunos = {}
+        alunos = Aluno.objects.filter(codigo_eol__isnull=False)
+        if codigos_eol is not None:
+            alunos = alunos.filter(codigo_eol__in=list(codigos_eol))
+        for codigo_eol, id_aluno, *valores in alunos.values_list(
+            "codigo_eol", "id", *self.CAMPOS
+        ).iterator(chunk_size=10000):
+            self.adiciona(codigo_eol, id_aluno, valores[2], self.assinatura(valores))
+
+    @staticmethod
+    def assinatura(valores) -> int:
+        return hash(tuple(str(valor) if valor is not None else "" for valor in valores))
+
+    @classmethod
+    def assinatura_aluno(cls, aluno: Aluno) -> int:
+        return cls.assinatura(getattr(aluno, campo) for campo in cls.CAMPOS)
+
+    def adiciona(self, codigo_eol, id_aluno, escola_id, assinatura):
+        self._alunos[str(codigo_eol)] = (id_aluno, escola_id, assinatura)
+
+    def get(self, codigo_eol):
+        """(id, escola_id, assinatura) do aluno ou None."""
+        return self._alunos.get(str(codigo_eol))
+
+    def ids(self):
+        return [aluno[0] for aluno in self._alunos.values()]
+
+    def __len__(self):
+        return len(self._alunos)
+
+
+class HistoricosAlunos:
+    """
+    Históricos de matrícula de um lote de alunos, alterados em memória e
+    gravados de uma vez em `salva`.
+    """
+
+    def __init__(self, alunos_ids=()):
+        self._por_aluno = defaultdict(list)
+        self._novos = []
+        self._alterados = {}
+        for historico in HistoricoMatriculaAluno.objects.filter(
+            aluno_id__in=list(alunos_ids)
+        ):
+            self._por_aluno[historico.aluno_id].append(historico)
+
+    def filtra(self, aluno_id, escola_id=None, aberto=None, codigo_situacao=None):
+        return [
+            historico
+            for historico in self._por_aluno[aluno_id]
+            if (escola_id is None or historico.escola_id == escola_id)
+            and (aberto is None or (historico.data_fim is None) == aberto)
+            and (
+                codigo_situacao is None or historico.codigo_situacao == codigo_situacao
+            )
+        ]
+
+    def cria(self, aluno_id, escola_id, codigo_situacao, situacao):
+        """Equivale a `Aluno.cria_historico`."""
+        hoje = datetime.date.today()
+        historico = HistoricoMatriculaAluno(
+            aluno_id=aluno_id,
+            escola_id=escola_id,
+            data_inicio=hoje,
+            codigo_situacao=codigo_situacao,
+            situacao=situacao,
+            data_fim=hoje if codigo_situacao not in STATUS_MATRICULA_ATIVA else None,
+        )
+        self._por_aluno[aluno_id].append(historico)
+        self._novos.append(historico)
+        return historico
+
+    def atualiza(self, historicos, **campos):
+        for historico in historicos:
+            for campo, valor in campos.items():
+                setattr(historico, campo, valor)
+            if historico.pk is not None:
+                self._alterados[historico.pk] = historico
+
+    def salva(self):
+        bulk_create_safe(HistoricoMatriculaAluno, self._novos)
+        bulk_update_safe(
+            HistoricoMatriculaAluno,
+            list(self._alterados.values()),
+            fields=["data_fim", "codigo_situacao", "situacao"],
+        )
+        self._novos = []
+        self._alterados = {}
+
 
 class Command(BaseCommand):
     help = "Atualiza os dados de alunos das Escolas baseados na api do SGP"
@@ -33,29 +163,38 @@ class Command(BaseCommand):
     timeout = 10
     contador_alunos = 0
     total_alunos = 0
-    status_matricula_ativa = [1, 6, 10, 13]  # status para matrículas ativas
+    status_matricula_ativa = STATUS_MATRICULA_ATIVA
     codigo_turma_regular = 1  # código da turma para matrículas do tipo REGULAR
+    tamanho_lote = 5000  # registros processados (e gravados) por vez
+    maximo_escolas_em_memoria = 20  # respostas do EOL aguardando processamento
 
-    def __init__(self):
+    def __init__(self, *args, **kwargs):
         """Atualiza os dados de alunos das Escolas baseados na api do SGP."""
-        super().__init__()
-        lista_tipo_turnos = list(
-            PeriodoEscolar.objects.filter(tipo_turno__isnull=False).values_list(
-                "tipo_turno", flat=True
-            )
-        )
-        dict_periodos_escolares_por_tipo_turno = {}
-        for tipo_turno in lista_tipo_turnos:
-            dict_periodos_escolares_por_tipo_turno[tipo_turno] = (
-                PeriodoEscolar.objects.get(tipo_turno=tipo_turno)
-            )
-        self.dict_periodos_escolares_por_tipo_turno = (
-            dict_periodos_escolares_por_tipo_turno
+        super().__init__(*args, **kwargs)
+        self.dict_periodos_escolares_por_tipo_turno = {
+            periodo.tipo_turno: periodo
+            for periodo in PeriodoEscolar.objects.filter(tipo_turno__isnull=False)
+        }
+        self.retomar = False
+        self.modo = None
+        self.checkpoint = {}
+        self.escolas_processadas = set()
+        self.escolas_ids_retomadas = set()
+        self.indice_alunos = None
+        self.historicos = None
+        self.inicio = timeit.default_timer()
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retomar",
+            action="store_true",
+            help="Continua a execução do dia a partir da última escola concluída.",
         )
 
     def handle(self, *args, **options):
         try:
             tic = timeit.default_timer()
+            self.inicio = tic
 
             quantidade_alunos_antes = Aluno.objects.all().count()
 
@@ -63,10 +202,14 @@ class Command(BaseCommand):
             ano = hoje.year
             ultimo_dia_setembro = datetime.date(ano, 10, 1) - datetime.timedelta(days=1)
 
+            self.retomar = options.get("retomar", False)
             if hoje > ultimo_dia_setembro:
+                self._carrega_checkpoint("d_menos_2")
                 self._atualiza_todas_as_escolas_d_menos_2()
             else:
+                self._carrega_checkpoint("d_menos_1")
                 self._atualiza_todas_as_escolas_d_menos_1()
+            cache.delete(CHAVE_CHECKPOINT)
 
             quantidade_alunos_atual = Aluno.objects.all().count()
 
@@ -81,6 +224,7 @@ class Command(BaseCommand):
                 logger.debug(f"Total time: {round(result // 60, 2)} min")
             else:
                 logger.debug(f"Total time: {round(result, 2)} s")
+            logger.info(self._mensagem_progresso())
 
         except MaxRetriesExceeded as e:
             logger.error(str(e))
@@ -88,6 +232,39 @@ class Command(BaseCommand):
                 self.style.ERROR("Execution stopped due to repeated failures.")
             )
 
+    def _carrega_checkpoint(self, modo):
+        """
+        Com --retomar, recupera o progresso salvo pela execução de hoje. O
+        checkpoint é descartado ao fim de uma execução completa.
+        """
+        self.modo = modo
+        self.checkpoint = {}
+        if not self.retomar:
+            return
+        checkpoint = cache.get(CHAVE_CHECKPOINT) or {}
+        if (
+            checkpoint.get("data") == datetime.date.today().isoformat()
+            and checkpoint.get("modo") == modo
+        ):
+            self.checkpoint = checkpoint
+            logger.info("Retomando a execução de hoje a partir do checkpoint salvo")
+
+    def _salva_checkpoint(self, **progresso):
+        self.checkpoint.update(
+            progresso, data=datetime.date.today().isoformat(), modo=self.modo
+        )
+        cache.set(CHAVE_CHECKPOINT, self.checkpoint, VALIDADE_CHECKPOINT)
+
+    def _mensagem_progresso(self):
+        tempo = max(timeit.default_timer() - self.inicio, 1e-6)
+        return (
+            f"{self.contador_alunos} registros processados "
+            f"({self.contador_alunos / tempo:.0f} registros/s)"
+        )
+
+    def _registra_progresso(self):
+        self.stdout.write(self.style.SUCCESS(self._mensagem_progresso()))
+
     def _salva_logs_requisicao(self, response, cod_eol_escola):
         if not response.status_code == status.HTTP_404_NOT_FOUND:
             msg_erro = "" if response.status_code == 200 else response.text
@@ -162,21 +339,6 @@ class Command(BaseCommand):
         )
         return obj_aluno
 
-    def _atualiza_aluno(self, aluno, registro, data_nascimento, escola):
-        aluno.nome = registro["nomeAluno"].strip()
-        aluno.codigo_eol = registro["codigoAluno"]
-        aluno.data_nascimento = data_nascimento
-        aluno.escola = escola
-        aluno.nao_matriculado = False
-        aluno.serie = registro["turmaNome"]
-        aluno.periodo_escolar = self.dict_periodos_escolares_por_tipo_turno[
-            registro["tipoTurno"]
-        ]
-        aluno.etapa = registro.get("etapaEnsino", None)
-        aluno.ciclo = registro.get("cicloEnsino", None)
-        aluno.desc_etapa = registro.get("descEtapaEnsino", "")
-        aluno.desc_ciclo = registro.get("descCicloEnsino", "")
-
     def _fetch_dados_escola(self, codigo_eol, proximo_ano, index, total):
         """Busca os dados da escola na API e adiciona o código EOL."""
         try:
@@ -199,48 +361,78 @@ class Command(BaseCommand):
             return []
 
     def _coleta_dados_em_paralelo(self, escolas, proximo_ano):
-        """Coleta os dados das escolas em paralelo usando threads."""
-        todos_os_registros = []
+        """
+        Coleta os dados das escolas em paralelo usando threads, entregando os
+        registros de cada escola, ordenados, assim que a resposta chega. No
+        máximo `maximo_escolas_em_memoria` escolas ficam em andamento por vez.
+        """
         total = len(escolas)
         logger.debug(f"Iniciando coleta de dados de {total} escolas...")
+        escolas_a_buscar = enumerate(escolas)
 
         with ThreadPoolExecutor(max_workers=10) as executor:
-            futures = [
-                executor.submit(
-                    self._fetch_dados_escola, codigo_eol, proximo_ano, i, total
+            em_andamento = set()
+            while True:
+                for i, codigo_eol in itertools.islice(
+                    escolas_a_buscar,
+                    self.maximo_escolas_em_memoria - len(em_andamento),
+                ):
+                    em_andamento.add(
+                        executor.submit(
+                            self._fetch_dados_escola, codigo_eol, proximo_ano, i, total
+                        )
+                    )
+                if not em_andamento:
+                    break
+                concluidos, em_andamento = wait(
+                    em_andamento, return_when=FIRST_COMPLETED
                 )
-                for i, codigo_eol in enumerate(escolas)
-            ]
-            for future in as_completed(futures):
-                try:
-                    registros = future.result()
-                    todos_os_registros.extend(registros)
-                except Exception as e:
-                    logger.exception(f"Erro ao processar futuro: {e}")
+                yield from self._registros_concluidos(concluidos)
 
-        return todos_os_registros
+        logger.debug("Finalizada coleta de dados das escolas.")
+
+    def _registros_concluidos(self, concluidos):
+        for future in concluidos:
+            try:
+                registros = future.result()
+            except Exception as e:
+                logger.exception(f"Erro ao processar futuro: {e}")
+                continue
+            registros.sort(key=_chave_registro)
+            yield registros
 
     def get_todos_os_registros(self):
-        """Busca e consolida registros de alunos de todas as escolas."""
+        """
+        Registros de alunos de todas as escolas, em fluxo. Os registros de uma
+        escola vêm juntos, ordenados por aluno, ano letivo e data da situação.
+        """
         escolas = list(
-            Escola.objects.exclude(tipo_unidade__iniciais="ESC.PART.").values_list(
-                "codigo_eol", flat=True
-            )
+            Escola.objects.exclude(tipo_unidade__iniciais="ESC.PART.")
+            .exclude(codigo_eol__in=self.escolas_processadas)
+            .values_list("codigo_eol", flat=True)
         )
         proximo_ano = datetime.date.today().year + 1
 
-        todos_os_registros = self._coleta_dados_em_paralelo(escolas, proximo_ano)
-        todos_os_registros.sort(
-            key=lambda x: (
-                x["codigoAluno"],
-                x.get("anoLetivo"),
-                x.get("dataSituacao"),
-                x.get("codigoEolEscola"),
-            )
+        return itertools.chain.from_iterable(
+            self._coleta_dados_em_paralelo(escolas, proximo_ano)
         )
 
-        logger.debug(f"Finalizada coleta: {len(todos_os_registros)} registros obtidos.")
-        return todos_os_registros
+    def _lotes_de_escolas(self, registros):
+        """
+        Agrupa o fluxo de registros em lotes de escolas inteiras, fechando o
+        lote ao atingir `tamanho_lote` registros.
+        """
+        codigos_eol, lote = [], []
+        for codigo_eol, registros_escola in itertools.groupby(
+            registros, key=lambda registro: registro["codigoEolEscola"]
+        ):
+            codigos_eol.append(codigo_eol)
+            lote.extend(registros_escola)
+            if len(lote) >= self.tamanho_lote:
+                yield codigos_eol, lote
+                codigos_eol, lote = [], []
+        if lote:
+            yield codigos_eol, lote
 
     def _processa_dados_alunos(self, dados_alunos, escola):
         if dados_alunos and isinstance(dados_alunos, list):
@@ -249,122 +441,136 @@ class Command(BaseCommand):
             return dados_alunos
         return []
 
-    def _atualiza_alunos_nao_matriculados(self, todos_os_registros):
-        alunos_ativos = {
-            r["codigoAluno"]
-            for r in todos_os_registros
-            if r["codigoSituacaoMatricula"] in self.status_matricula_ativa
-            and r["codigoTipoTurma"] == self.codigo_turma_regular
-        }
-        todos_alunos = {r["codigoAluno"] for r in todos_os_registros}
-        alunos_nao_matriculados = todos_alunos - alunos_ativos
-        Aluno.objects.filter(codigo_eol__in=alunos_nao_matriculados).update(
-            nao_matriculado=True,
-            escola=None,
-        )
+    def _atualiza_alunos_nao_matriculados(self, codigos_eol):
+        codigos_eol = sorted(codigos_eol)
+        for i in range(0, len(codigos_eol), self.tamanho_lote):
+            alunos = Aluno.objects.filter(
+                codigo_eol__in=codigos_eol[i : i + self.tamanho_lote]
+            )
+            if self.escolas_ids_retomadas:
+                # já atualizados pelas escolas concluídas antes da interrupção
+                alunos = alunos.exclude(escola_id__in=self.escolas_ids_retomadas)
+            alunos.update(nao_matriculado=True, escola=None)
 
     def _atualiza_todas_as_escolas_d_menos_2(self):
-        todos_os_registros = self.get_todos_os_registros()
-        self.total_alunos += len(todos_os_registros)
-        alunos_ativos = set()
-        novos_alunos = {}
-        alunos_para_atualizar = []
-        registros_alunos_novos = {}
-
+        """
+        Processa os registros em lotes, à medida que as respostas do EOL chegam.
+        Entre um lote e outro ficam em memória apenas o índice dos alunos e, por
+        aluno, o código EOL e a chave da matrícula ativa escolhida.
+        """
         logger.debug("iniciando... dict escolas")
         escolas = {
             e.codigo_eol: e
             for e in Escola.objects.exclude(tipo_unidade__iniciais="ESC.PART.")
         }
         logger.debug(f"finalizando dict escolas: {len(escolas)} escolas")
-        logger.debug("iniciando... dict alunos")
-        alunos = {a.codigo_eol: a for a in Aluno.objects.all()}
-        logger.debug(f"finalizando dict alunos: {len(alunos)} alunos")
+        logger.debug("iniciando... índice de alunos")
+        self.indice_alunos = IndiceAlunos()
+        logger.debug(f"finalizando índice de alunos: {len(self.indice_alunos)} alunos")
+
+        self.escolas_processadas = set(self.checkpoint.get("escolas", []))
+        self.escolas_ids_retomadas = {
+            escolas[codigo_eol].id
+            for codigo_eol in self.escolas_processadas
+            if codigo_eol in escolas
+        }
+        self.matriculas_ativas = {}  # código EOL -> chave do registro ativo escolhido
+        self.alunos_vistos = set()
+
+        for codigos_eol, registros in self._lotes_de_escolas(
+            self.get_todos_os_registros()
+        ):
+            self._processa_lote_d_menos_2(registros, escolas)
+            self.escolas_processadas.update(codigos_eol)
+            self._salva_checkpoint(escolas=sorted(self.escolas_processadas))
+            self._registra_progresso()
+
+        self.stdout.write(
+            self.style.SUCCESS("desmatriculando alunos sem escola... aguarde...")
+        )
+        self._atualiza_alunos_nao_matriculados(
+            self.alunos_vistos.difference(self.matriculas_ativas)
+        )
+
+    def _processa_lote_d_menos_2(self, registros, escolas):
+        codigos_eol = {str(registro["codigoAluno"]) for registro in registros}
+        self.historicos = HistoricosAlunos(
+            self.indice_alunos.get(codigo_eol)[0]
+            for codigo_eol in codigos_eol
+            if self.indice_alunos.get(codigo_eol)
+        )
+        novos_alunos = {}
+        registros_alunos_novos = {}
+        alunos_para_atualizar = {}
 
-        atualizados = []
-        for registro in todos_os_registros:
+        for registro in registros:
             self.contador_alunos += 1
-            if self.contador_alunos % 10 == 0:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"{self.contador_alunos} DE UM TOTAL DE {self.total_alunos} MATRICULAS"
-                    )
-                )
+            self.alunos_vistos.add(str(registro["codigoAluno"]))
             escola = escolas.get(registro["codigoEolEscola"])
             self._lida_com_matricula_aluno_existente_d_menos_2(registro, escola)
-            if registro["codigoAluno"] in alunos_ativos:
-                continue
             if registro["codigoTipoTurma"] != self.codigo_turma_regular:
                 continue
             self._trata_alunos_status_ativo_d_menos_2(
                 registro,
-                alunos_ativos,
                 alunos_para_atualizar,
                 novos_alunos,
                 registros_alunos_novos,
                 escola,
-                alunos,
-            )
-            self._atualiza_alunos_se_quantidade_1000(alunos_para_atualizar, atualizados)
-        self.stdout.write(
-            self.style.SUCCESS("desmatriculando alunos sem escola... aguarde...")
-        )
-        self._atualiza_alunos_nao_matriculados(todos_os_registros)
-        self.stdout.write(self.style.SUCCESS("criando alunos... aguarde..."))
-        bulk_create_safe(Aluno, list(novos_alunos.values()))
-        self.stdout.write(self.style.SUCCESS("atualizando alunos... aguarde..."))
-        if alunos_para_atualizar:
-            logger.info(
-                f"Atualizando batch de {len(alunos_para_atualizar)} novos alunos..."
             )
-            atualizados.extend(alunos_para_atualizar)
-            self._atualiza_alunos(alunos_para_atualizar)
-        self.stdout.write(self.style.SUCCESS("desvinculando alunos... aguarde..."))
-        self.stdout.write(
-            self.style.SUCCESS("Criando histórico de matrículas... aguarde...")
-        )
-        self._lida_com_matricula_alunos_novos(novos_alunos, registros_alunos_novos)
 
-    def _atualiza_alunos_se_quantidade_1000(self, alunos_para_atualizar, atualizados):
-        if len(alunos_para_atualizar) < 1000:
-            return
-        atualizados.extend(alunos_para_atualizar)
-        logger.info(
-            f"Atualizando batch de {len(alunos_para_atualizar)} novos alunos..."
-        )
-        self._atualiza_alunos(alunos_para_atualizar)
-        alunos_para_atualizar.clear()
+        self.historicos.salva()
+        self._cria_alunos(novos_alunos)
+        self._atualiza_alunos(list(alunos_para_atualizar.values()))
+        self._lida_com_matricula_alunos_novos(novos_alunos, registros_alunos_novos)
 
     def _trata_alunos_status_ativo_d_menos_2(
         self,
         registro,
-        alunos_ativos,
         alunos_para_atualizar,
         novos_alunos,
         registros_alunos_novos,
         escola,
-        alunos,
     ):
-        if registro["codigoSituacaoMatricula"] in self.status_matricula_ativa:
-            alunos_ativos.add(registro["codigoAluno"])
-            aluno = alunos.get(str(registro["codigoAluno"]))
+        if registro["codigoSituacaoMatricula"] not in self.status_matricula_ativa:
+            return
+        # vale a primeira matrícula ativa na ordem de ano letivo e data da
+        # situação, entre todas as escolas do aluno
+        codigo_eol = str(registro["codigoAluno"])
+        chave = _chave_registro(registro)
+        chave_escolhida = self.matriculas_ativas.get(codigo_eol)
+        if chave_escolhida is not None and chave_escolhida <= chave:
+            return
+        self.matriculas_ativas[codigo_eol] = chave
+
+        aluno_existente = self.indice_alunos.get(codigo_eol)
+        if aluno_existente:
+            if aluno_existente[1] in self.escolas_ids_retomadas:
+                return
+            self._agenda_atualizacao(alunos_para_atualizar, registro, escola)
+        else:
             data_nascimento = registro["dataNascimento"].split("T")[0]
-            if aluno:
-                self._atualiza_aluno(aluno, registro, data_nascimento, escola)
-                alunos_para_atualizar.append(aluno)
-            else:
-                novos_alunos[registro["codigoAluno"]] = self._monta_obj_aluno(
-                    registro, escola, data_nascimento
-                )
-                registros_alunos_novos[registro["codigoAluno"]] = registro
+            novos_alunos[codigo_eol] = self._monta_obj_aluno(
+                registro, escola, data_nascimento
+            )
+            registros_alunos_novos[codigo_eol] = registro
+
+    def _agenda_atualizacao(self, alunos_para_atualizar, registro, escola):
+        """Agenda a atualização do aluno cadastrado se algum campo mudou no EOL."""
+        codigo_eol = str(registro["codigoAluno"])
+        id_aluno, _, assinatura = self.indice_alunos.get(codigo_eol)
+        data_nascimento = registro["dataNascimento"].split("T")[0]
+        aluno = self._monta_obj_aluno(registro, escola, data_nascimento)
+        aluno.id = id_aluno
+        if IndiceAlunos.assinatura_aluno(aluno) == assinatura:
+            alunos_para_atualizar.pop(codigo_eol, None)
+        else:
+            alunos_para_atualizar[codigo_eol] = aluno
 
     def _desvincular_matriculas(self, alunos):
         alunos.update(nao_matriculado=True, escola=None)
 
-    def aluno_matriculado_prox_ano(self, dados, aluno_nome):
-        aluno_encontrado = next(
-            (aluno for aluno in dados if aluno["nomeAluno"] == aluno_nome), None
-        )
+    def aluno_matriculado_prox_ano(self, alunos_prox_ano_por_nome, aluno_nome):
+        aluno_encontrado = alunos_prox_ano_por_nome.get(aluno_nome)
         return (
             aluno_encontrado
             and aluno_encontrado["codigoSituacaoMatricula"]
@@ -372,94 +578,100 @@ class Command(BaseCommand):
         )
 
     def _trata_alunos_ativos_mais_de_um_resultado(
-        self, registro, escola, dados_alunos_escola
+        self, registro, escola, registros_regulares_por_aluno, alunos_para_atualizar
     ) -> bool:
-        aluno = Aluno.objects.filter(codigo_eol=registro["codigoAluno"]).first()
-        if not aluno:
+        codigo_eol = str(registro["codigoAluno"])
+        aluno_existente = self.indice_alunos.get(codigo_eol)
+        if not aluno_existente:
             return False
-        registros_aluno = [
-            registro_
-            for registro_ in dados_alunos_escola
-            if registro["codigoAluno"] == registro_["codigoAluno"]
-            and registro_["codigoTipoTurma"] == self.codigo_turma_regular
-        ]
+        registros_aluno = registros_regulares_por_aluno[codigo_eol]
         if len(registros_aluno) == 1:
             return False
         tem_registro_ativo = [
             registro_
             for registro_ in registros_aluno
             if registro_["codigoSituacaoMatricula"] in self.status_matricula_ativa
-            and registro_["codigoTipoTurma"] == self.codigo_turma_regular
         ]
         if not tem_registro_ativo:
             return False
+        aluno_id = aluno_existente[0]
         for registro_ in registros_aluno:
             codigo_situacao = registro_["codigoSituacaoMatricula"]
             situacao = registro_["situacaoMatricula"]
-            if not aluno.historico.filter(
-                escola=escola, codigo_situacao=codigo_situacao
-            ).exists():
-                aluno.cria_historico(codigo_situacao, situacao, escola)
-        registro_ativo = tem_registro_ativo[-1]
-        data_nascimento = registro_ativo["dataNascimento"].split("T")[0]
-        self._atualiza_aluno(aluno, registro_ativo, data_nascimento, escola)
-        aluno.save()
+            if not self.historicos.filtra(
+                aluno_id, escola.id, codigo_situacao=codigo_situacao
+            ):
+                self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
+        self._agenda_atualizacao(alunos_para_atualizar, tem_registro_ativo[-1], escola)
         return True
 
+    def _registros_regulares_por_aluno(self, dados_alunos_escola):
+        registros_regulares_por_aluno = defaultdict(list)
+        for registro in dados_alunos_escola:
+            if registro["codigoTipoTurma"] == self.codigo_turma_regular:
+                registros_regulares_por_aluno[str(registro["codigoAluno"])].append(
+                    registro
+                )
+        return registros_regulares_por_aluno
+
     def _atualiza_alunos_da_escola(
         self, escola, dados_alunos_escola, dados_alunos_escola_prox_ano
     ):
         novos_alunos = {}
         registros_alunos_novos = {}
         self.total_alunos += len(dados_alunos_escola)
-        codigos_consultados = []
-        alunos_para_atualizar = []
+        codigos_consultados = set()
+        alunos_para_atualizar = {}
+        registros_regulares_por_aluno = self._registros_regulares_por_aluno(
+            dados_alunos_escola
+        )
+        alunos_prox_ano_por_nome = {}
+        for registro in dados_alunos_escola_prox_ano or []:
+            alunos_prox_ano_por_nome.setdefault(registro["nomeAluno"], registro)
+
+        self.indice_alunos = IndiceAlunos(
+            str(registro["codigoAluno"]) for registro in dados_alunos_escola
+        )
+        self.historicos = HistoricosAlunos(self.indice_alunos.ids())
+
         for registro in dados_alunos_escola:
             self.contador_alunos += 1
-            if self.contador_alunos % 10 == 0:
-                self.stdout.write(
-                    self.style.SUCCESS(
-                        f"{self.contador_alunos} DE UM TOTAL DE {self.total_alunos} MATRICULAS"
-                    )
-                )
             if registro["codigoTipoTurma"] != self.codigo_turma_regular:
                 continue
             tem_mais_de_um_registro = self._trata_alunos_ativos_mais_de_um_resultado(
-                registro, escola, dados_alunos_escola
+                registro, escola, registros_regulares_por_aluno, alunos_para_atualizar
             )
             if tem_mais_de_um_registro:
-                codigos_consultados.append(registro["codigoAluno"])
+                codigos_consultados.add(str(registro["codigoAluno"]))
                 continue
             self._trata_aluno_status_ativo(
                 registro,
                 escola,
-                dados_alunos_escola_prox_ano,
+                alunos_prox_ano_por_nome,
                 codigos_consultados,
                 alunos_para_atualizar,
                 novos_alunos,
                 registros_alunos_novos,
             )
             self._trata_alunos_status_NAO_ativo(
-                registro, escola, dados_alunos_escola_prox_ano
+                registro, escola, alunos_prox_ano_por_nome
             )
 
+        self.historicos.salva()
         alunos_nao_consultados = Aluno.objects.filter(escola=escola).exclude(
             codigo_eol__in=codigos_consultados
         )
         self._desvincular_matriculas(alunos_nao_consultados)
-        bulk_create_safe(Aluno, list(novos_alunos.values()))
-        self.stdout.write(self.style.SUCCESS("atualizando alunos... aguarde..."))
-        self._atualiza_alunos(alunos_para_atualizar)
-        self.stdout.write(
-            self.style.SUCCESS("Criando histórico de matrículas... aguarde...")
-        )
+        self._cria_alunos(novos_alunos)
+        self._atualiza_alunos(list(alunos_para_atualizar.values()))
         self._lida_com_matricula_alunos_novos(novos_alunos, registros_alunos_novos)
+        self._registra_progresso()
 
     def _trata_aluno_status_ativo(
         self,
         registro,
         escola,
-        dados_alunos_escola_prox_ano,
+        alunos_prox_ano_por_nome,
         codigos_consultados,
         alunos_para_atualizar,
         novos_alunos,
@@ -468,44 +680,48 @@ class Command(BaseCommand):
         if registro[
             "codigoSituacaoMatricula"
         ] in self.status_matricula_ativa or self.aluno_matriculado_prox_ano(
-            dados_alunos_escola_prox_ano, registro["nomeAluno"]
+            alunos_prox_ano_por_nome, registro["nomeAluno"]
         ):
-            codigos_consultados.append(registro["codigoAluno"])
-            aluno = Aluno.objects.filter(codigo_eol=registro["codigoAluno"]).first()
-            data_nascimento = registro["dataNascimento"].split("T")[0]
-            if aluno:
-                self._atualiza_aluno(aluno, registro, data_nascimento, escola)
-                alunos_para_atualizar.append(aluno)
-                self._lida_com_matricula_aluno_existente(aluno, registro)
+            codigo_eol = str(registro["codigoAluno"])
+            codigos_consultados.add(codigo_eol)
+            aluno_existente = self.indice_alunos.get(codigo_eol)
+            if aluno_existente:
+                self._agenda_atualizacao(alunos_para_atualizar, registro, escola)
+                self._lida_com_matricula_aluno_existente(
+                    aluno_existente[0], registro, escola
+                )
             else:
-                novos_alunos[registro["codigoAluno"]] = self._monta_obj_aluno(
+                data_nascimento = registro["dataNascimento"].split("T")[0]
+                novos_alunos[codigo_eol] = self._monta_obj_aluno(
                     registro, escola, data_nascimento
                 )
-                registros_alunos_novos[registro["codigoAluno"]] = registro
+                registros_alunos_novos[codigo_eol] = registro
 
     def _trata_alunos_status_NAO_ativo(
-        self, registro, escola, dados_alunos_escola_prox_ano
+        self, registro, escola, alunos_prox_ano_por_nome
     ):
         if not (
             registro["codigoSituacaoMatricula"] in self.status_matricula_ativa
             or self.aluno_matriculado_prox_ano(
-                dados_alunos_escola_prox_ano, registro["nomeAluno"]
+                alunos_prox_ano_por_nome, registro["nomeAluno"]
             )
         ):
-            aluno = Aluno.objects.filter(codigo_eol=registro["codigoAluno"]).first()
-            if aluno:
+            aluno_existente = self.indice_alunos.get(registro["codigoAluno"])
+            if aluno_existente:
                 self._lida_com_matricula_aluno_existente_outra_escola(
-                    aluno, registro, escola
+                    aluno_existente[0], registro, escola
                 )
 
     def _atualiza_todas_as_escolas_d_menos_1(self):
-        escolas = Escola.objects.exclude(
-            tipo_unidade__iniciais="ESC.PART."
-        ).prefetch_related("aluno_set")
+        escolas = Escola.objects.exclude(tipo_unidade__iniciais="ESC.PART.").order_by(
+            "codigo_eol"
+        )
+        if self.checkpoint.get("ultima_escola"):
+            escolas = escolas.filter(codigo_eol__gt=self.checkpoint["ultima_escola"])
         proximo_ano = datetime.date.today().year + 1
 
         total = escolas.count()
-        for i, escola in enumerate(escolas):
+        for i, escola in enumerate(escolas.iterator()):
             logger.debug(f"{i + 1}/{total} - {escola}")
             dados_alunos_escola = self._obtem_alunos_escola(escola.codigo_eol)
             dados_alunos_escola_prox_ano = self._obtem_alunos_escola(
@@ -519,30 +735,32 @@ class Command(BaseCommand):
                 self._atualiza_alunos_da_escola(
                     escola, dados_alunos_escola, dados_alunos_escola_prox_ano
                 )
+            self._salva_checkpoint(ultima_escola=escola.codigo_eol)
 
-    def _lida_com_matricula_aluno_existente(self, aluno: Aluno, registro: dict):
+    def _lida_com_matricula_aluno_existente(
+        self, aluno_id: int, registro: dict, escola: Escola
+    ):
         codigo_situacao = registro["codigoSituacaoMatricula"]
         situacao = registro["situacaoMatricula"]
 
-        if not aluno.historico.exists():
-            aluno.cria_historico(codigo_situacao, situacao)
+        if not self.historicos.filtra(aluno_id):
+            self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
             return
 
-        if not aluno.historico.filter(escola=aluno.escola).exists():
-            aluno.cria_historico(codigo_situacao, situacao)
+        if not self.historicos.filtra(aluno_id, escola.id):
+            self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
         elif (
             codigo_situacao in self.status_matricula_ativa
-            and not aluno.historico.filter(
-                escola=aluno.escola, data_fim__isnull=True
-            ).exists()
+            and not self.historicos.filtra(aluno_id, escola.id, aberto=True)
         ):
             # Histórico existe mas está encerrado (data_fim != None) e o aluno
             # voltou a estar ativo na escola: cria um novo histórico ativo.
-            aluno.cria_historico(codigo_situacao, situacao)
+            self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
             return
 
         if codigo_situacao not in self.status_matricula_ativa:
-            aluno.historico.filter(escola=aluno.escola).update(
+            self.historicos.atualiza(
+                self.historicos.filtra(aluno_id, escola.id),
                 data_fim=datetime.date.today(),
                 codigo_situacao=codigo_situacao,
                 situacao=situacao,
@@ -551,25 +769,30 @@ class Command(BaseCommand):
     def _lida_com_matricula_alunos_novos(
         self, dict_alunos: dict[Aluno], registros_alunos_novos: dict
     ):
+        historicos = HistoricosAlunos()
         for codigo_eol, aluno in dict_alunos.items():
-            codigo_situacao = registros_alunos_novos[aluno.codigo_eol][
-                "codigoSituacaoMatricula"
-            ]
-            situacao = registros_alunos_novos[aluno.codigo_eol]["situacaoMatricula"]
-            aluno_obj = Aluno.objects.get(codigo_eol=aluno.codigo_eol)
-            aluno_obj.cria_historico(codigo_situacao, situacao)
+            if aluno.escola_id is None:
+                continue
+            historicos.cria(
+                aluno.id,
+                aluno.escola_id,
+                registros_alunos_novos[codigo_eol]["codigoSituacaoMatricula"],
+                registros_alunos_novos[codigo_eol]["situacaoMatricula"],
+            )
+        historicos.salva()
 
     def _lida_com_matricula_aluno_existente_outra_escola(
-        self, aluno: Aluno, registro: dict, escola: Escola
+        self, aluno_id: int, registro: dict, escola: Escola
     ):
         codigo_situacao = registro["codigoSituacaoMatricula"]
         situacao = registro["situacaoMatricula"]
 
-        if not aluno.historico.filter(escola=escola).exists():
-            aluno.cria_historico(codigo_situacao, situacao, escola)
+        if not self.historicos.filtra(aluno_id, escola.id):
+            self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
 
-        if aluno.historico.filter(escola=escola, data_fim=None).exists():
-            aluno.historico.filter(escola=escola).update(
+        if self.historicos.filtra(aluno_id, escola.id, aberto=True):
+            self.historicos.atualiza(
+                self.historicos.filtra(aluno_id, escola.id),
                 data_fim=datetime.date.today(),
                 codigo_situacao=codigo_situacao,
                 situacao=situacao,
@@ -578,37 +801,50 @@ class Command(BaseCommand):
     def _lida_com_matricula_aluno_existente_d_menos_2(
         self, registro: dict, escola: Escola
     ):
-        aluno = Aluno.objects.filter(codigo_eol=registro["codigoAluno"]).first()
+        aluno_existente = self.indice_alunos.get(registro["codigoAluno"])
 
-        if not aluno:
+        if not aluno_existente or escola is None:
             return
 
+        aluno_id = aluno_existente[0]
         codigo_situacao = registro["codigoSituacaoMatricula"]
         situacao = registro["situacaoMatricula"]
 
-        if not aluno.historico.filter(escola=escola).exists():
-            aluno.cria_historico(codigo_situacao, situacao, escola)
+        if not self.historicos.filtra(aluno_id, escola.id):
+            self.historicos.cria(aluno_id, escola.id, codigo_situacao, situacao)
 
         if (
-            aluno.historico.filter(escola=escola, data_fim__isnull=False).exists()
+            self.historicos.filtra(aluno_id, escola.id, aberto=False)
             and codigo_situacao in self.status_matricula_ativa
         ):
-            aluno.historico.filter(escola=escola).update(
+            self.historicos.atualiza(
+                self.historicos.filtra(aluno_id, escola.id),
                 data_fim=None,
                 codigo_situacao=codigo_situacao,
                 situacao=situacao,
             )
 
         if (
-            aluno.historico.filter(escola=escola, data_fim=None).exists()
+            self.historicos.filtra(aluno_id, escola.id, aberto=True)
             and codigo_situacao not in self.status_matricula_ativa
         ):
-            aluno.historico.filter(escola=escola).update(
+            self.historicos.atualiza(
+                self.historicos.filtra(aluno_id, escola.id),
                 data_fim=datetime.date.today(),
                 codigo_situacao=codigo_situacao,
                 situacao=situacao,
             )
 
+    def _cria_alunos(self, novos_alunos: dict[Aluno]):
+        bulk_create_safe(Aluno, list(novos_alunos.values()))
+        for aluno in novos_alunos.values():
+            self.indice_alunos.adiciona(
+                aluno.codigo_eol,
+                aluno.id,
+                aluno.escola_id,
+                IndiceAlunos.assinatura_aluno(aluno),
+            )
+
     def _atualiza_alunos(self, lista_alunos: list[Aluno]):
         fields_to_update = [
             "nome",
@@ -616,7 +852,6 @@ class Command(BaseCommand):
             "data_nascimento",
             "escola",
             "periodo_escolar",
-            "cpf",
             "nao_matriculado",
             "serie",
             "etapa",
@@ -625,6 +860,13 @@ class Command(BaseCommand):
             "desc_ciclo",
         ]
         bulk_update_safe(Aluno, lista_alunos, fields=fields_to_update)
+        for aluno in lista_alunos:
+            self.indice_alunos.adiciona(
+                aluno.codigo_eol,
+                aluno.id,
+                aluno.escola_id,
+                IndiceAlunos.assinatura_aluno(aluno),
+            )
 
 
 class MaxRetriesExceeded(Exception):
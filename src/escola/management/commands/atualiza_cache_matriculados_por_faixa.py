@@ -4,7 +4,7 @@ import environ
 import redis
 from django.core.management.base import BaseCommand
 
-from ....eol_servico.utils import EOLServicoSGP, dt_nascimento_from_api
+from ....eol_servico.utils import EOLException, dt_nascimento_from_api
 from ...models import (
     Aluno,
     Escola,
@@ -12,8 +12,9 @@ from ...models import (
     LogAlunoPorDia,
     LogAlunosMatriculadosFaixaEtariaDia,
     PeriodoEscolar,
+    RetratoAlunosEOL,
 )
-from ...utils import datas_para_gerar_logs
+from ...utils import ClassificadorFaixasEtarias, datas_para_gerar_logs
 
 env = environ.Env()
 
@@ -48,9 +49,17 @@ class Command(BaseCommand):
         ]
         escolas = Escola.objects.filter(tipo_unidade__iniciais__in=iniciais)
         for escola in escolas:
+            self._atualizar_retrato_alunos_eol(escola)
             self._criar_cache_matriculados_por_faixa(escola)
             self._salvar_matriculados_por_faixa_dia(escola)
 
+    def _atualizar_retrato_alunos_eol(self, escola):
+        # as contagens abaixo leem os alunos do retrato local
+        try:
+            RetratoAlunosEOL.atualiza(escola)
+        except EOLException as e:
+            self.stdout.write(self.style.ERROR(str(e)))
+
     def _criar_cache_matriculados_por_faixa(self, escola):
         try:
             msg = f"Atualizando cache para escola {escola.codigo_eol} - {escola.nome}"
@@ -125,21 +134,19 @@ class Command(BaseCommand):
     def get_lista_filtrada_alunos_eol(
         self, lista_alunos_eol, periodo_do_log, faixa_etaria_do_log
     ):
-        lista_filtrada_alunos_eol = []
-        for aluno in lista_alunos_eol:
-            if aluno["tipoTurno"] == periodo_do_log:
-                faixa = FaixaEtaria.objects.get(uuid=faixa_etaria_do_log.uuid)
-                aluno_data_nascimento = dt_nascimento_from_api(aluno["dataNascimento"])
-                if faixa.data_pertence_a_faixa(aluno_data_nascimento, date.today()):
-                    lista_filtrada_alunos_eol.append(aluno)
-        return lista_filtrada_alunos_eol
+        classificador = ClassificadorFaixasEtarias([faixa_etaria_do_log])
+        hoje = date.today()
+        return [
+            aluno
+            for aluno in lista_alunos_eol
+            if aluno["tipoTurno"] == periodo_do_log
+            and classificador.faixas_da_data(
+                dt_nascimento_from_api(aluno["dataNascimento"]), hoje
+            )
+        ]
 
     def _cria_log_aluno_por_dia(self, escola, log_alunos_matriculados_faixa_dia):
-        lista_alunos_eol = (
-            EOLServicoSGP.get_lista_alunos_por_escola_ano_corrente_ou_seguinte(
-                escola.codigo_eol
-            )
-        )
+        lista_alunos_eol = escola.lista_alunos_eol()
         if not log_alunos_matriculados_faixa_dia.periodo_escolar.nome == "PARCIAL":
             periodo_do_log = (
                 log_alunos_matriculados_faixa_dia.periodo_escolar.tipo_turno
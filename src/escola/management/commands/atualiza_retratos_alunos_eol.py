@@ -0,0 +1,43 @@
+import logging
+
+from django.core.management.base import BaseCommand
+
+from ....eol_servico.utils import EOLException
+from ...models import LISTA_TIPOS_UNIDADES, Escola, RetratoAlunosEOL
+
+logger = logging.getLogger("sigpae.cmd_atualiza_retratos_alunos_eol")
+
+TIPOS_UNIDADES_COM_FAIXA_ETARIA = LISTA_TIPOS_UNIDADES + ["CEU CEMEI", "CEMEI"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Atualiza o retrato local dos alunos do EOL (RetratoAlunosEOL) das escolas"
+        " CEI e CEMEI, usado nas contagens por faixa etária"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--codigos-eol",
+            nargs="+",
+            help="Atualiza apenas as escolas com estes códigos EOL",
+        )
+
+    def handle(self, *args, **options):
+        escolas = Escola.objects.filter(
+            tipo_unidade__iniciais__in=TIPOS_UNIDADES_COM_FAIXA_ETARIA
+        )
+        if options.get("codigos_eol"):
+            escolas = escolas.filter(codigo_eol__in=options["codigos_eol"])
+        atualizadas = 0
+        for escola in escolas:
+            try:
+                RetratoAlunosEOL.atualiza(escola)
+                atualizadas += 1
+            except EOLException as e:
+                msg = f"Retrato da escola {escola.codigo_eol} mantido: {e}"
+                logger.error(msg)
+                self.stdout.write(self.style.ERROR(msg))
+        self.stdout.write(
+            self.style.SUCCESS(f"{atualizadas} retrato(s) de alunos atualizado(s)")
+        )
@@ -0,0 +1,64 @@
+import random
+import time
+from collections import Counter
+from datetime import date, timedelta
+
+from django.core.management import BaseCommand, CommandError
+
+from ...models import FaixaEtaria
+from ...utils import ClassificadorFaixasEtarias
+
+
+def conta_por_faixa_a_faixa(faixas_etarias, datas_nascimento, data_referencia):
+    """Contagem testando cada data em cada faixa, como era feito antes do classificador."""
+    contagem = Counter()
+    for data_nascimento in datas_nascimento:
+        for faixa_etaria in faixas_etarias:
+            if faixa_etaria.data_pertence_a_faixa(data_nascimento, data_referencia):
+                contagem[faixa_etaria.uuid] += 1
+    return contagem
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara o tempo de classificação de datas de nascimento aleatórias nas "
+        "faixas etárias ativas faixa a faixa e com o ClassificadorFaixasEtarias."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--quantidade", type=int, default=100_000)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        faixas_etarias = list(FaixaEtaria.objects.filter(ativo=True))
+        if not faixas_etarias:
+            raise CommandError("Nenhuma faixa etária ativa cadastrada.")
+
+        data_referencia = date.today()
+        maior_idade_em_dias = max(faixa.fim for faixa in faixas_etarias) * 31 + 365
+        sorteio = random.Random(options["seed"])  # nosec B311
+        datas_nascimento = [
+            data_referencia - timedelta(days=sorteio.randint(0, maior_idade_em_dias))
+            for _ in range(options["quantidade"])
+        ]
+
+        inicio = time.perf_counter()
+        contagem_atual = conta_por_faixa_a_faixa(
+            faixas_etarias, datas_nascimento, data_referencia
+        )
+        tempo_atual = time.perf_counter() - inicio
+
+        inicio = time.perf_counter()
+        contagem_classificador = ClassificadorFaixasEtarias(faixas_etarias).conta(
+            datas_nascimento, data_referencia
+        )
+        tempo_classificador = time.perf_counter() - inicio
+
+        self.stdout.write(
+            f"{len(datas_nascimento)} alunos em {len(faixas_etarias)} faixas\n"
+            f"Faixa a faixa: {tempo_atual:.3f}s\n"
+            f"Classificador: {tempo_classificador:.3f}s"
+        )
+        if contagem_atual != contagem_classificador:
+            raise CommandError("As contagens divergem entre os dois caminhos.")
+        self.stdout.write(self.style.SUCCESS("Contagens idênticas."))
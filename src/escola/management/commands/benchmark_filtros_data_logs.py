@@ -0,0 +1,103 @@
+import datetime
+import time
+
+from django.core.management import BaseCommand
+from django.db.models import Count
+
+from ....dados_comuns.intervalos import filtro_mes
+from ....dieta_especial.logs_models.models import (
+    LogQuantidadeDietasAutorizadas,
+    LogQuantidadeDietasAutorizadasCEI,
+)
+from ...models import (
+    Escola,
+    LogAlunosMatriculadosFaixaEtariaDia,
+    LogAlunosMatriculadosPeriodoEscola,
+)
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara, com EXPLAIN ANALYZE, as consultas de um mês das tabelas de logs "
+        "com lookups __year/__month (EXTRACT) e com o intervalo semiaberto sobre a "
+        "coluna data (índices por escola e data)."
+    )
+
+    def add_arguments(self, parser):
+        hoje = datetime.date.today()
+        parser.add_argument("--mes", type=int, default=hoje.month)
+        parser.add_argument("--ano", type=int, default=hoje.year)
+        parser.add_argument(
+            "--escola",
+            help="Código EOL da escola; por padrão, a escola com mais logs de "
+            "alunos matriculados.",
+        )
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument(
+            "--explain", action="store_true", help="Exibe os planos completos."
+        )
+
+    def handle(self, *args, **options):
+        escola = self._escola(options["escola"])
+        mes, ano = options["mes"], options["ano"]
+        self.stdout.write(f"Escola {escola.nome} - {mes:02d}/{ano}")
+
+        consultas = (
+            (
+                LogAlunosMatriculadosPeriodoEscola,
+                dict(criado_em__year=ano, criado_em__month=mes),
+                "log_matriculados_escola_data",
+            ),
+            (
+                LogAlunosMatriculadosFaixaEtariaDia,
+                dict(data__year=ano, data__month=mes),
+                "log_faixa_etaria_escola_data",
+            ),
+            (
+                LogQuantidadeDietasAutorizadas,
+                dict(data__year=ano, data__month=mes),
+                "log_dietas_escola_data",
+            ),
+            (
+                LogQuantidadeDietasAutorizadasCEI,
+                dict(data__year=ano, data__month=mes),
+                "log_dietas_cei_escola_data",
+            ),
+        )
+        for modelo, filtro_legado, indice in consultas:
+            legado = modelo.objects.filter(escola=escola, **filtro_legado)
+            intervalo = modelo.objects.filter(
+                escola=escola, **filtro_mes("data", ano, mes)
+            )
+            tempo_legado = self._mede(legado, options["repeticoes"])
+            tempo_intervalo = self._mede(intervalo, options["repeticoes"])
+            plano_intervalo = intervalo.explain(analyze=True)
+            self.stdout.write(
+                f"{modelo.__name__}: {intervalo.count()} logs | "
+                f"__year/__month: {tempo_legado * 1000:.1f}ms | "
+                f"intervalo: {tempo_intervalo * 1000:.1f}ms "
+                f"({'com' if indice in plano_intervalo else 'sem'} {indice})"
+            )
+            if options["explain"]:
+                self.stdout.write("-- antes\n" + legado.explain(analyze=True))
+                self.stdout.write("-- depois\n" + plano_intervalo)
+
+    @staticmethod
+    def _escola(codigo_eol):
+        if codigo_eol:
+            return Escola.objects.get(codigo_eol=codigo_eol)
+        return (
+            Escola.objects.annotate(
+                quantidade_logs=Count("logs_alunos_matriculados_por_periodo")
+            )
+            .order_by("-quantidade_logs")
+            .first()
+        )
+
+    @staticmethod
+    def _mede(queryset, repeticoes):
+        """Tempo médio de uma consulta que lê os ids encontrados."""
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            list(queryset.values_list("id", flat=True))
+        return (time.perf_counter() - inicio) / repeticoes
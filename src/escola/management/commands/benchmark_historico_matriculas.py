@@ -0,0 +1,96 @@
+import json
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+from django.core.management import BaseCommand
+
+from ...models import Aluno
+from .registra_historico_matriculas_alunos import Command as RegistraHistoricoCommand
+
+
+def cria_stub_sgp(latencia):
+    """Servidor local que responde como a consulta de matrículas do aluno no SGP."""
+
+    class StubSGP(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_GET(self):
+            time.sleep(latencia)
+            codigo_aluno = self.path.split("/")[2]
+            corpo = json.dumps(
+                [
+                    {
+                        "codigoAluno": codigo_aluno,
+                        "codigoSituacaoMatricula": 1,
+                        "situacaoMatricula": "Ativo",
+                        "dataSituacao": "2024-02-05T08:00:00",
+                        "codigoEscola": "000000",
+                    }
+                ]
+            ).encode()
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(corpo)))
+            self.end_headers()
+            self.wfile.write(corpo)
+
+        def log_message(self, *args):
+            pass
+
+    return ThreadingHTTPServer(("127.0.0.1", 0), StubSGP)
+
+
+class Command(BaseCommand):
+    help = (
+        "Mede, contra um stub local do SGP com latência configurável, a consulta "
+        "de matrículas aluno a aluno (requests.get em série, como antes) e a do "
+        "registra_historico_matriculas_alunos (sessão com conexões reaproveitadas "
+        "e consultas simultâneas), estimando o tempo para todos os alunos."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--alunos", type=int, default=2000)
+        parser.add_argument("--alunos-em-serie", type=int, default=100)
+        parser.add_argument("--latencia-ms", type=int, default=50)
+        parser.add_argument("--consultas-simultaneas", type=int, default=16)
+
+    def handle(self, *args, **options):
+        servidor = cria_stub_sgp(options["latencia_ms"] / 1000)
+        threading.Thread(target=servidor.serve_forever, daemon=True).start()
+        url_stub = f"http://127.0.0.1:{servidor.server_port}"
+        codigos = [str(1000000 + i) for i in range(options["alunos"])]
+        total_alunos = Aluno.objects.exclude(codigo_eol__isnull=True).count()
+
+        try:
+            inicio = time.perf_counter()
+            for codigo in codigos[: options["alunos_em_serie"]]:
+                requests.get(
+                    f"{url_stub}/alunos/{codigo}/turmas/anosLetivos/2024", timeout=120
+                ).json()
+            por_segundo_serie = options["alunos_em_serie"] / (
+                time.perf_counter() - inicio
+            )
+
+            registra = RegistraHistoricoCommand()
+            registra.url_sgp = url_stub
+            registra.consultas_simultaneas = options["consultas_simultaneas"]
+            alunos = list(enumerate(codigos))
+            inicio = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=registra.consultas_simultaneas) as ex:
+                respostas = list(registra._busca_matriculas(ex, alunos, 2024))
+            por_segundo_lote = len(respostas) / (time.perf_counter() - inicio)
+        finally:
+            servidor.shutdown()
+
+        self.stdout.write(
+            f"Em série: {por_segundo_serie:.1f} alunos/s "
+            f"(~{total_alunos / por_segundo_serie / 3600:.1f}h para "
+            f"{total_alunos} alunos)\n"
+            f"Em lotes ({registra.consultas_simultaneas} simultâneas): "
+            f"{por_segundo_lote:.1f} alunos/s "
+            f"(~{total_alunos / por_segundo_lote / 60:.1f}min para "
+            f"{total_alunos} alunos)"
+        )
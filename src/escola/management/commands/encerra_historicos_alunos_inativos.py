@@ -1,9 +1,16 @@
 import datetime
 import logging
+import timeit
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
+from django.db import transaction
 from requests import ConnectionError
+from requests.adapters import HTTPAdapter
 from rest_framework import status
 
 from src.dados_comuns.constants import (
@@ -24,8 +31,20 @@ SITUACAO_CONCLUIDA = "Concluído"
 STATUS_MATRICULA_ATIVA = [1, 6, 10, 13]
 CODIGO_TURMA_REGULAR = 1
 
+CHAVE_CHECKPOINT = "encerra_historicos_alunos_inativos:checkpoint"
+VALIDADE_CHECKPOINT = 60 * 60 * 24  # 24 horas
+
 
 class Command(BaseCommand):
+    """
+    As escolas são consultadas no EOL em lotes de `escolas_por_lote`, com até
+    `HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS` consultas simultâneas numa
+    sessão com conexões reaproveitadas. Os históricos ativos do lote são
+    carregados de uma vez e os encerrados são gravados com um `bulk_update`, na
+    mesma ordem (escola por escola) em que eram salvos um a um. O último código
+    EOL concluído fica salvo como checkpoint para `--retomar`.
+    """
+
     help = (
         "Encerra históricos de matrícula ativos de alunos que não estão mais ativos "
         "na escola. data_fim = 31/12/2025 se não há outro histórico ativo em outra "
@@ -33,140 +52,265 @@ class Command(BaseCommand):
     )
 
     headers = {"x-api-eol-key": f"{DJANGO_EOL_SGP_API_TOKEN}"}
+    escolas_por_lote = 50
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._sessao = None
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retomar",
+            action="store_true",
+            help="Continua a execução de hoje a partir da última escola concluída.",
+        )
 
     def handle(self, *args, **options):
+        inicio = timeit.default_timer()
         escolas = Escola.objects.all()
-        total = escolas.count()
+        ultima_escola = self._carrega_checkpoint(options.get("retomar", False))
+        if ultima_escola:
+            escolas = escolas.filter(codigo_eol__gt=ultima_escola)
+        escolas = list(escolas.values_list("id", "codigo_eol"))
+        total = len(escolas)
         self.stdout.write(f"Processando {total} escolas...")
 
-        for i, escola in enumerate(escolas):
-            self.stdout.write(f"{i + 1}/{total} - {escola} (EOL: {escola.codigo_eol})")
-            try:
-                self._processa_escola(escola)
-            except Exception as e:
-                logger.error(f"Erro ao processar escola {escola.codigo_eol}: {e}")
+        processadas = encerrados = 0
+        lotes = iter(escolas)
+        self.sessao()  # criada antes das threads, que a compartilham
+        with ThreadPoolExecutor(
+            max_workers=settings.HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS
+        ) as executor:
+            while lote := list(islice(lotes, self.escolas_por_lote)):
+                consultas = list(
+                    executor.map(self._consulta_escola, [codigo for _, codigo in lote])
+                )
+                LogAtualizaDadosAluno.objects.bulk_create(
+                    [log for _, logs in consultas for log in logs]
+                )
+                encerrados += self._encerra_historicos_do_lote(
+                    [
+                        (escola_id, codigo_eol, codigos_ativos)
+                        for (escola_id, codigo_eol), (codigos_ativos, _) in zip(
+                            lote, consultas
+                        )
+                    ]
+                )
+                processadas += len(lote)
+                cache.set(
+                    CHAVE_CHECKPOINT,
+                    self._checkpoint(lote[-1][1]),
+                    VALIDADE_CHECKPOINT,
+                )
+                tempo = max(timeit.default_timer() - inicio, 1e-6)
                 self.stdout.write(
-                    self.style.ERROR(
-                        f"Erro ao processar escola {escola.codigo_eol}: {e}"
-                    )
+                    f"{processadas}/{total} escolas ({processadas / tempo:.1f} "
+                    f"escolas/s), {encerrados} histórico(s) encerrado(s)"
                 )
 
+        cache.delete(CHAVE_CHECKPOINT)
         self.stdout.write(self.style.SUCCESS("Processamento concluído."))
 
-    def _obtem_alunos_ativos_escola(self, cod_eol_escola):
+    def sessao(self) -> requests.Session:
+        """Sessão usada pelas threads, com uma conexão por consulta simultânea."""
+        if self._sessao is None:
+            adapter = HTTPAdapter(
+                pool_maxsize=settings.HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS
+            )
+            self._sessao = requests.Session()
+            self._sessao.headers.update(self.headers)
+            self._sessao.mount("http://", adapter)
+            self._sessao.mount("https://", adapter)
+        return self._sessao
+
+    @staticmethod
+    def _checkpoint(codigo_eol):
+        return {"data": datetime.date.today().isoformat(), "codigo_eol": codigo_eol}
+
+    def _carrega_checkpoint(self, retomar):
+        """Código EOL da última escola concluída pela execução de hoje."""
+        if not retomar:
+            return None
+        checkpoint = cache.get(CHAVE_CHECKPOINT) or {}
+        if checkpoint.get("data") != datetime.date.today().isoformat():
+            return None
+        logger.info(f"Retomando após a escola {checkpoint['codigo_eol']}")
+        return checkpoint["codigo_eol"]
+
+    def _consulta_escola(self, cod_eol_escola):
+        """
+        Executada nas threads: só consulta o EOL. Devolve os códigos dos alunos
+        ativos (None se a consulta falhou) e os logs das requisições, gravados
+        depois pela thread principal.
+        """
+        logs = []
+        try:
+            return self._obtem_alunos_ativos_escola(cod_eol_escola, logs), logs
+        except Exception as e:
+            logger.error(f"Erro ao processar escola {cod_eol_escola}: {e}")
+            return None, logs
+
+    def _obtem_alunos_ativos_escola(self, cod_eol_escola, logs):
         """Consulta a API e retorna os códigos EOL dos alunos ativos na escola."""
-        tentativas = 0
         max_tentativas = 10
         ano = datetime.date.today().year
 
-        while tentativas < max_tentativas:
+        for tentativa in range(1, max_tentativas + 1):
             try:
-                response = requests.get(
+                response = self.sessao().get(
                     f"{DJANGO_EOL_SGP_API_URL}/alunos/ues/{cod_eol_escola}/anosLetivos/{ano}",
-                    headers=self.headers,
                     timeout=10,
                 )
-                self._salva_log_requisicao(response, cod_eol_escola)
-
-                if response.status_code == status.HTTP_200_OK:
-                    dados = response.json()
-                    return {
-                        str(r["codigoAluno"])
-                        for r in dados
-                        if r.get("codigoSituacaoMatricula") in STATUS_MATRICULA_ATIVA
-                        and r.get("codigoTipoTurma") == CODIGO_TURMA_REGULAR
-                    }
-                elif response.status_code == status.HTTP_404_NOT_FOUND:
-                    return set()
-
-                tentativas += 1
-                logger.warning(
-                    f"Tentativa {tentativas}/{max_tentativas} para escola "
-                    f"{cod_eol_escola}: Status {response.status_code}"
-                )
-
             except ConnectionError as e:
-                tentativas += 1
-                msg = f"Erro de conexão para escola {cod_eol_escola}: {e}"
-                LogAtualizaDadosAluno(
-                    status=502,
-                    codigo_eol=cod_eol_escola,
-                    criado_em=datetime.date.today(),
-                    msg_erro=msg,
-                ).save()
-                logger.error(msg)
+                logs.append(self._log_erro_conexao(e, cod_eol_escola))
+                continue
+
+            log = self._log_requisicao(response, cod_eol_escola)
+            if log:
+                logs.append(log)
+            if response.status_code in (
+                status.HTTP_200_OK,
+                status.HTTP_404_NOT_FOUND,
+            ):
+                return self._codigos_alunos_ativos(response)
+
+            logger.warning(
+                f"Tentativa {tentativa}/{max_tentativas} para escola "
+                f"{cod_eol_escola}: Status {response.status_code}"
+            )
 
         logger.error(
             f"Máximo de tentativas alcançado para a escola {cod_eol_escola}. Pulando."
         )
         return None
 
-    def _salva_log_requisicao(self, response, cod_eol_escola):
+    @staticmethod
+    def _codigos_alunos_ativos(response):
+        if response.status_code == status.HTTP_404_NOT_FOUND:
+            return set()
+        return {
+            str(r["codigoAluno"])
+            for r in response.json()
+            if r.get("codigoSituacaoMatricula") in STATUS_MATRICULA_ATIVA
+            and r.get("codigoTipoTurma") == CODIGO_TURMA_REGULAR
+        }
+
+    @staticmethod
+    def _log_erro_conexao(erro, cod_eol_escola):
+        msg = f"Erro de conexão para escola {cod_eol_escola}: {erro}"
+        logger.error(msg)
+        return LogAtualizaDadosAluno(
+            status=502,
+            codigo_eol=cod_eol_escola,
+            criado_em=datetime.date.today(),
+            msg_erro=msg,
+        )
+
+    def _log_requisicao(self, response, cod_eol_escola):
         if response.status_code != status.HTTP_404_NOT_FOUND:
             msg_erro = "" if response.status_code == 200 else response.text
-            LogAtualizaDadosAluno(
+            return LogAtualizaDadosAluno(
                 status=response.status_code,
                 codigo_eol=cod_eol_escola,
                 criado_em=datetime.date.today(),
                 msg_erro=msg_erro,
-            ).save()
+            )
+        return None
+
+    def _encerra_historicos_do_lote(self, escolas) -> int:
+        """
+        `escolas`: (id, código EOL, códigos dos alunos ativos ou None), na ordem
+        de processamento. Devolve quantos históricos foram encerrados.
+        """
+        a_encerrar = self._historicos_a_encerrar(escolas)
+        if not a_encerrar:
+            return 0
+
+        codigos_eol = {escola_id: codigo_eol for escola_id, codigo_eol, _ in escolas}
+        encerrados_por_escola = self._encerra_historicos(a_encerrar, codigos_eol)
+
+        with transaction.atomic():
+            HistoricoMatriculaAluno.objects.bulk_update(
+                a_encerrar,
+                ["data_fim", "codigo_situacao", "situacao"],
+                batch_size=1000,
+            )
 
-    def _processa_escola(self, escola):
-        codigos_ativos = self._obtem_alunos_ativos_escola(escola.codigo_eol)
-        if codigos_ativos is None:
+        for codigo_eol, encerrados in encerrados_por_escola.items():
             self.stdout.write(
-                self.style.WARNING(
-                    f"  Escola {escola.codigo_eol}: falha na API, pulando."
+                self.style.SUCCESS(
+                    f"  {encerrados} histórico(s) encerrado(s) na escola {codigo_eol}."
                 )
             )
-            return
-
-        historicos_ativos = HistoricoMatriculaAluno.objects.filter(
-            escola=escola,
-            data_fim__isnull=True,
-        ).select_related("aluno")
+        return len(a_encerrar)
 
-        encerrados = 0
-        for historico in historicos_ativos:
-            codigo_eol_aluno = str(historico.aluno.codigo_eol)
-            if codigo_eol_aluno in codigos_ativos:
+    def _historicos_a_encerrar(self, escolas):
+        """Históricos ativos de alunos que não estão mais ativos, na ordem das escolas."""
+        ativos_por_escola = {}
+        for escola_id, codigo_eol, codigos_ativos in escolas:
+            if codigos_ativos is None:
+                self.stdout.write(
+                    self.style.WARNING(f"  Escola {codigo_eol}: falha na API, pulando.")
+                )
                 continue
+            ativos_por_escola[escola_id] = codigos_ativos
+
+        ordem_escolas = {escola_id: i for i, (escola_id, _, _) in enumerate(escolas)}
+        return sorted(
+            (
+                historico
+                for historico in HistoricoMatriculaAluno.objects.filter(
+                    escola_id__in=list(ativos_por_escola), data_fim__isnull=True
+                ).select_related("aluno")
+                if str(historico.aluno.codigo_eol)
+                not in ativos_por_escola[historico.escola_id]
+            ),
+            key=lambda historico: (ordem_escolas[historico.escola_id], historico.id),
+        )
+
+    def _encerra_historicos(self, a_encerrar, codigos_eol):
+        """Preenche data_fim e situação; devolve {código EOL: encerrados}."""
+        abertos_por_aluno = {}
+        for historico in HistoricoMatriculaAluno.objects.filter(
+            aluno_id__in={historico.aluno_id for historico in a_encerrar},
+            data_fim__isnull=True,
+        ).only("id", "aluno_id", "escola_id", "data_inicio"):
+            abertos_por_aluno.setdefault(historico.aluno_id, {})[
+                historico.id
+            ] = historico
 
-            data_fim = self._calcula_data_fim(historico)
+        encerrados_por_escola = {}
+        for historico in a_encerrar:
+            abertos = abertos_por_aluno[historico.aluno_id]
+            data_fim = self._data_fim_entre(historico, abertos.values())
             historico.data_fim = data_fim
             historico.codigo_situacao = CODIGO_SITUACAO_CONCLUIDO
             historico.situacao = SITUACAO_CONCLUIDA
-            historico.save()
-            encerrados += 1
-            logger.debug(
-                f"  Histórico encerrado: aluno {codigo_eol_aluno} na escola "
-                f"{escola.codigo_eol} -> data_fim={data_fim}"
+            # encerrado, deixa de contar como histórico ativo do aluno
+            abertos.pop(historico.id, None)
+            codigo_eol = codigos_eol[historico.escola_id]
+            encerrados_por_escola[codigo_eol] = (
+                encerrados_por_escola.get(codigo_eol, 0) + 1
             )
-
-        if encerrados:
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"  {encerrados} histórico(s) encerrado(s) na escola {escola.codigo_eol}."
-                )
+            logger.debug(
+                f"  Histórico encerrado: aluno {historico.aluno.codigo_eol} na "
+                f"escola {codigo_eol} -> data_fim={data_fim}"
             )
+        return encerrados_por_escola
 
-    def _calcula_data_fim(self, historico: HistoricoMatriculaAluno) -> datetime.date:
+    @staticmethod
+    def _data_fim_entre(historico, historicos_abertos) -> datetime.date:
         """
-        Retorna a data_fim para encerramento do histórico:
+        Retorna a data_fim para encerramento do histórico, dados os históricos
+        ativos do aluno:
         - 31/12/2025 se não há outro histórico ativo em outra escola
         - data_inicio do próximo histórico ativo (em outra escola) - 1 dia, caso exista
         """
-        proximo_historico = (
-            HistoricoMatriculaAluno.objects.filter(
-                aluno=historico.aluno,
-                data_fim__isnull=True,
-            )
-            .exclude(escola=historico.escola)
-            .order_by("data_inicio")
-            .first()
-        )
-
-        if proximo_historico:
-            return proximo_historico.data_inicio - datetime.timedelta(days=1)
-
+        proximos = [
+            aberto.data_inicio
+            for aberto in historicos_abertos
+            if aberto.escola_id != historico.escola_id
+        ]
+        if proximos:
+            return min(proximos) - datetime.timedelta(days=1)
         return DATA_FIM_PADRAO
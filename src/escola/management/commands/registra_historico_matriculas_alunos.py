@@ -1,24 +1,54 @@
 import logging
 import timeit
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from itertools import islice
 
 import requests
+from django.conf import settings
+from django.core.cache import cache
 from django.core.management.base import BaseCommand, CommandParser
-from requests import ConnectionError
+from django.db import transaction
+from requests import RequestException
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from ....dados_comuns.constants import DJANGO_EOL_SGP_API_TOKEN, DJANGO_EOL_SGP_API_URL
 from ...models import Aluno, Escola, HistoricoMatriculaAluno
 
 logger = logging.getLogger("sigpae.cmd_registra_historico_matriculas_alunos")
 
+CHAVE_CHECKPOINT = "registra_historico_matriculas_alunos:checkpoint"
+VALIDADE_CHECKPOINT = 60 * 60 * 24 * 7  # 7 dias
+
+CAMPOS_HISTORICO = ("data_inicio", "data_fim", "codigo_situacao", "situacao")
+
 
 class Command(BaseCommand):
+    """
+    Consulta as matrículas de cada aluno no SGP em lotes de
+    `HISTORICO_MATRICULAS_ALUNOS_POR_LOTE` alunos, com até
+    `HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS` consultas simultâneas numa
+    sessão com conexões reaproveitadas. Os históricos de cada lote são
+    comparados aos já gravados e criados/atualizados com `bulk_create` e
+    `bulk_update`; ao fim do lote o último aluno processado é salvo como
+    checkpoint, usado por `--retomar`.
+    """
+
     help = "Registra o historico de matriculas dos alunos baseados na api do SGP"
     headers = {"x-api-eol-key": f"{DJANGO_EOL_SGP_API_TOKEN}"}
+    url_sgp = DJANGO_EOL_SGP_API_URL
+    timeout = 120
 
-    def __init__(self):
-        super().__init__()
-        self.alunos = Aluno.objects.all().exclude(codigo_eol__isnull=True)
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.retomar = False
+        self.consultas_simultaneas = settings.HISTORICO_MATRICULAS_CONSULTAS_SIMULTANEAS
+        self.tamanho_lote = settings.HISTORICO_MATRICULAS_ALUNOS_POR_LOTE
+        self._sessao = None
+        self.escolas_por_codigo = {}
+        self.contadores = {"alunos": 0, "criados": 0, "atualizados": 0}
+        self.inicio = timeit.default_timer()
 
     def add_arguments(self, parser: CommandParser) -> None:
         parser.add_argument(
@@ -26,6 +56,13 @@ class Command(BaseCommand):
             help="Especifica o ano vigente que sera usado como base na consulta ao SGP",
             type=int,
         )
+        parser.add_argument(
+            "--retomar",
+            action="store_true",
+            help="Continua a partir do último lote concluído para o mesmo ano.",
+        )
+        parser.add_argument("--consultas-simultaneas", type=int)
+        parser.add_argument("--tamanho-lote", type=int)
 
     def _get_ano_atual(self):
         return datetime.today().year
@@ -34,6 +71,11 @@ class Command(BaseCommand):
         tic = timeit.default_timer()
 
         ano_letivo = options.get("ano") or self._get_ano_atual()
+        self.retomar = options.get("retomar", False)
+        self.consultas_simultaneas = (
+            options.get("consultas_simultaneas") or self.consultas_simultaneas
+        )
+        self.tamanho_lote = options.get("tamanho_lote") or self.tamanho_lote
 
         self._gera_historico_matriculas_alunos(ano_letivo)
 
@@ -45,16 +87,35 @@ class Command(BaseCommand):
         else:
             logger.debug(f"Total time: {round(result, 2)} s")
 
+    def sessao(self) -> requests.Session:
+        """Sessão usada pelas threads, com uma conexão por consulta simultânea."""
+        if self._sessao is None:
+            adapter = HTTPAdapter(
+                max_retries=Retry(
+                    total=3,
+                    backoff_factor=0.5,
+                    status_forcelist=(429, 500, 502, 503, 504),
+                    allowed_methods=frozenset({"GET"}),
+                    raise_on_status=False,
+                ),
+                pool_maxsize=self.consultas_simultaneas,
+            )
+            self._sessao = requests.Session()
+            self._sessao.headers.update(self.headers)
+            self._sessao.mount("http://", adapter)
+            self._sessao.mount("https://", adapter)
+        return self._sessao
+
     def _obtem_matriculas_aluno(self, cod_eol_aluno, ano_letivo):
         try:
-            url = f"{DJANGO_EOL_SGP_API_URL}/alunos/{cod_eol_aluno}/turmas/anosLetivos/{ano_letivo}/matriculaTurma/true/tipoTurma/true"
-            r = requests.get(url=url, headers=self.headers, timeout=120)
+            url = f"{self.url_sgp}/alunos/{cod_eol_aluno}/turmas/anosLetivos/{ano_letivo}/matriculaTurma/true/tipoTurma/true"
+            r = self.sessao().get(url=url, timeout=self.timeout)
             if r.status_code == 200:
                 json = r.json()
                 return json
             else:
                 return []
-        except ConnectionError as e:
+        except RequestException as e:
             msg = f"Erro de conexão na api do EOL: {e}"
             logger.error(msg)
             self.stdout.write(self.style.ERROR(msg))
@@ -70,70 +131,171 @@ class Command(BaseCommand):
                 matriculas_agrupadas_por_escola[codigo_eol_escola].append(matricula)
         return matriculas_agrupadas_por_escola
 
-    def _gera_historico_das_matriculas_da_escola(
-        self, aluno, codigo_eol_escola, matriculas
-    ):
-        try:
-            data_inicio = None
-            data_fim = None
-            codigo_situacao = None
-            situacao = None
-
-            for matricula in matriculas:
-                codigo_situacao_matricula = matricula.get("codigoSituacaoMatricula")
-                situacao_matricula = matricula.get("situacaoMatricula").upper()
-                data_situacao = matricula.get("dataSituacao", "").split("T")[0]
-                data_situacao = datetime.strptime(data_situacao, "%Y-%m-%d")
-
-                if situacao_matricula == "ATIVO" and (
-                    data_inicio is None or data_situacao < data_inicio
-                ):
-                    data_inicio = data_situacao
-                    codigo_situacao = codigo_situacao_matricula
-                    situacao = situacao_matricula
-                elif situacao_matricula == "CONCLUÍDO":
-                    data_fim = data_situacao
-                    codigo_situacao = codigo_situacao_matricula
-                    situacao = situacao_matricula
-
-            escola = Escola.objects.get(codigo_eol=codigo_eol_escola)
-
-            _, criado = HistoricoMatriculaAluno.objects.update_or_create(
-                aluno=aluno,
-                escola=escola,
-                defaults={
-                    "data_inicio": data_inicio,
-                    "data_fim": data_fim,
-                    "codigo_situacao": codigo_situacao,
-                    "situacao": situacao,
-                },
-            )
+    def _resume_matriculas_da_escola(self, matriculas):
+        """
+        Campos do histórico do aluno na escola: início na primeira matrícula
+        ativa, fim na conclusão.
+        """
+        data_inicio = None
+        data_fim = None
+        codigo_situacao = None
+        situacao = None
+
+        for matricula in matriculas:
+            codigo_situacao_matricula = matricula.get("codigoSituacaoMatricula")
+            situacao_matricula = matricula.get("situacaoMatricula").upper()
+            data_situacao = matricula.get("dataSituacao", "").split("T")[0]
+            data_situacao = datetime.strptime(data_situacao, "%Y-%m-%d").date()
 
-            self.stdout.write(
-                self.style.SUCCESS(
-                    f"ESCOLA {escola}: HISTORICO {'CRIADO' if criado else 'ATUALIZADO'} COM SUCESSO"
+            if situacao_matricula == "ATIVO" and (
+                data_inicio is None or data_situacao < data_inicio
+            ):
+                data_inicio = data_situacao
+                codigo_situacao = codigo_situacao_matricula
+                situacao = situacao_matricula
+            elif situacao_matricula == "CONCLUÍDO":
+                data_fim = data_situacao
+                codigo_situacao = codigo_situacao_matricula
+                situacao = situacao_matricula
+
+        if data_inicio is None or codigo_situacao is None:
+            raise ValueError("nenhuma matrícula ativa")
+        return {
+            "data_inicio": data_inicio,
+            "data_fim": data_fim,
+            "codigo_situacao": codigo_situacao,
+            "situacao": situacao,
+        }
+
+    def _historicos_do_aluno(self, aluno_id, codigo_eol_aluno, matriculas):
+        """{(aluno_id, escola_id): campos} das escolas em que o aluno tem matrícula."""
+        historicos = {}
+        for (
+            codigo_eol_escola,
+            matriculas_escola,
+        ) in self._agrupa_matriculas_por_escola(matriculas).items():
+            try:
+                escola_id = self.escolas_por_codigo.get(codigo_eol_escola)
+                if escola_id is None:
+                    raise Escola.DoesNotExist("Escola não cadastrada")
+                historicos[(aluno_id, escola_id)] = self._resume_matriculas_da_escola(
+                    matriculas_escola
                 )
+            except Exception as err:
+                logger.warning(
+                    f"Nao foi possivel gerar o historico de matriculas do aluno {codigo_eol_aluno} da escola {codigo_eol_escola}: {err}"
+                )
+        return historicos
+
+    def _busca_matriculas(self, executor, alunos, ano_letivo):
+        """Matrículas de cada aluno do lote, na ordem do lote."""
+        return executor.map(
+            lambda aluno: self._obtem_matriculas_aluno(aluno[1], ano_letivo), alunos
+        )
+
+    def _grava_historicos(self, historicos):
+        """
+        Cria os históricos novos e atualiza os alterados, de uma vez. Sem
+        restrição de unicidade em (aluno, escola), históricos duplicados são
+        todos atualizados.
+        """
+        existentes = self._historicos_existentes(historicos)
+        novos, alterados = [], []
+        for (aluno_id, escola_id), campos in historicos.items():
+            if (aluno_id, escola_id) not in existentes:
+                novos.append(
+                    HistoricoMatriculaAluno(
+                        aluno_id=aluno_id, escola_id=escola_id, **campos
+                    )
+                )
+                continue
+            alterados.extend(
+                historico
+                for historico in existentes[(aluno_id, escola_id)]
+                if self._atualiza_campos(historico, campos)
+            )
+
+        with transaction.atomic():
+            HistoricoMatriculaAluno.objects.bulk_create(novos, batch_size=1000)
+            HistoricoMatriculaAluno.objects.bulk_update(
+                alterados, CAMPOS_HISTORICO, batch_size=1000
             )
-        except Exception as err:
-            logger.warning(
-                f"Nao foi possivel gerar o historico de matriculas do aluno {aluno} da escola {codigo_eol_escola}: {err}"
+        self.contadores["criados"] += len(novos)
+        self.contadores["atualizados"] += len(alterados)
+
+    @staticmethod
+    def _historicos_existentes(historicos):
+        """{(aluno_id, escola_id): [históricos]} já gravados para os alunos do lote."""
+        existentes = {}
+        for historico in HistoricoMatriculaAluno.objects.filter(
+            aluno_id__in={aluno_id for aluno_id, _ in historicos}
+        ).only("id", "aluno_id", "escola_id", *CAMPOS_HISTORICO):
+            existentes.setdefault((historico.aluno_id, historico.escola_id), []).append(
+                historico
             )
+        return existentes
+
+    @staticmethod
+    def _atualiza_campos(historico, campos) -> bool:
+        """Aplica `campos` ao histórico; devolve se algum valor mudou."""
+        if all(getattr(historico, campo) == valor for campo, valor in campos.items()):
+            return False
+        for campo, valor in campos.items():
+            setattr(historico, campo, valor)
+        return True
+
+    def _carrega_checkpoint(self, ano_letivo):
+        """Id do último aluno concluído pela execução interrompida do mesmo ano."""
+        if not self.retomar:
+            return 0
+        checkpoint = cache.get(CHAVE_CHECKPOINT) or {}
+        if checkpoint.get("ano") != ano_letivo:
+            return 0
+        logger.info(f"Retomando a partir do aluno de id {checkpoint['aluno_id']}")
+        return checkpoint["aluno_id"]
+
+    def _salva_checkpoint(self, ano_letivo, aluno_id):
+        cache.set(
+            CHAVE_CHECKPOINT,
+            {"ano": ano_letivo, "aluno_id": aluno_id},
+            VALIDADE_CHECKPOINT,
+        )
+
+    def _mensagem_progresso(self):
+        tempo = max(timeit.default_timer() - self.inicio, 1e-6)
+        return (
+            f"{self.contadores['alunos']} alunos consultados "
+            f"({self.contadores['alunos'] / tempo:.1f} alunos/s): "
+            f"{self.contadores['criados']} históricos criados, "
+            f"{self.contadores['atualizados']} atualizados"
+        )
 
     def _gera_historico_matriculas_alunos(self, ano_letivo: int):
         logger.debug(f"Ano de referencia: {ano_letivo}")
-        total = len(self.alunos)
-        for i, aluno in enumerate(self.alunos):
-            logger.debug(f"{i + 1}/{total} - {aluno}")
-            matriculas = self._obtem_matriculas_aluno(aluno.codigo_eol, ano_letivo)
+        self.inicio = timeit.default_timer()
+        self.escolas_por_codigo = dict(Escola.objects.values_list("codigo_eol", "id"))
+        ultimo_aluno_id = self._carrega_checkpoint(ano_letivo)
+        alunos = iter(
+            Aluno.objects.exclude(codigo_eol__isnull=True)
+            .filter(id__gt=ultimo_aluno_id)
+            .order_by("id")
+            .values_list("id", "codigo_eol")
+            .iterator(chunk_size=self.tamanho_lote)
+        )
 
-            matriculas_agrupadas_por_escola = self._agrupa_matriculas_por_escola(
-                matriculas
-            )
+        with ThreadPoolExecutor(max_workers=self.consultas_simultaneas) as executor:
+            while lote := list(islice(alunos, self.tamanho_lote)):
+                historicos = {}
+                for (aluno_id, codigo_eol), matriculas in zip(
+                    lote, self._busca_matriculas(executor, lote, ano_letivo)
+                ):
+                    historicos.update(
+                        self._historicos_do_aluno(aluno_id, codigo_eol, matriculas)
+                    )
+                self._grava_historicos(historicos)
+                self.contadores["alunos"] += len(lote)
+                self._salva_checkpoint(ano_letivo, lote[-1][0])
+                self.stdout.write(self.style.SUCCESS(self._mensagem_progresso()))
 
-            for (
-                codigo_eol_escola,
-                matriculas,
-            ) in matriculas_agrupadas_por_escola.items():
-                self._gera_historico_das_matriculas_da_escola(
-                    aluno, codigo_eol_escola, matriculas
-                )
+        cache.delete(CHAVE_CHECKPOINT)
+        logger.info(self._mensagem_progresso())
@@ -0,0 +1,67 @@
+# Generated by Django 5.2.15 on 2026-10-18 15:12
+
+import uuid
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("escola", "0084_alter_escola_acesso_desde"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="RetratoAlunosEOL",
+            fields=[
+                (
+                    "id",
+                    models.AutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                (
+                    "uuid",
+                    models.UUIDField(default=uuid.uuid4, editable=False, unique=True),
+                ),
+                (
+                    "criado_em",
+                    models.DateTimeField(auto_now_add=True, verbose_name="Criado em"),
+                ),
+                (
+                    "ano_letivo",
+                    models.PositiveSmallIntegerField(verbose_name="Ano letivo"),
+                ),
+                (
+                    "alunos",
+                    models.JSONField(default=list, verbose_name="Alunos"),
+                ),
+                (
+                    "versao",
+                    models.PositiveIntegerField(default=1, verbose_name="Versão"),
+                ),
+                (
+                    "atualizado_em",
+                    models.DateTimeField(verbose_name="Atualizado em"),
+                ),
+                (
+                    "escola",
+                    models.ForeignKey(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        related_name="retratos_alunos_eol",
+                        to="escola.escola",
+                    ),
+                ),
+            ],
+            options={
+                "verbose_name": "Retrato de alunos do EOL",
+                "verbose_name_plural": "Retratos de alunos do EOL",
+                "unique_together": {("escola", "ano_letivo")},
+            },
+        ),
+    ]
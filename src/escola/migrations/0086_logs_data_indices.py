@@ -0,0 +1,46 @@
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+    # índices criados sem bloquear a escrita nas tabelas de logs
+    atomic = False
+
+    dependencies = [
+        ("escola", "0085_retratoalunoseol"),
+    ]
+
+    operations = [
+        # coluna comum preenchida pelo save(); uma coluna gerada com
+        # criado_em::date não é aceita, pois o cast de timestamptz depende do
+        # TimeZone da sessão
+        migrations.AddField(
+            model_name="logalunosmatriculadosperiodoescola",
+            name="data",
+            field=models.DateField(editable=False, null=True, verbose_name="Data"),
+        ),
+        migrations.RunSQL(
+            "UPDATE escola_logalunosmatriculadosperiodoescola "
+            "SET data = criado_em::date WHERE data IS NULL",
+            reverse_sql=migrations.RunSQL.noop,
+        ),
+        migrations.AlterField(
+            model_name="logalunosmatriculadosperiodoescola",
+            name="data",
+            field=models.DateField(editable=False, verbose_name="Data"),
+        ),
+        AddIndexConcurrently(
+            model_name="logalunosmatriculadosperiodoescola",
+            index=models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_matriculados_escola_data",
+            ),
+        ),
+        AddIndexConcurrently(
+            model_name="logalunosmatriculadosfaixaetariadia",
+            index=models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_faixa_etaria_escola_data",
+            ),
+        ),
+    ]
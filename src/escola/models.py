@@ -7,11 +7,13 @@ from collections import Counter
 from copy import deepcopy
 from datetime import date
 from enum import Enum
+from typing import NamedTuple
 
 import environ
 import redis
 import unidecode
 from dateutil.relativedelta import relativedelta
+from django.conf import settings
 from django.core.exceptions import MultipleObjectsReturned, ObjectDoesNotExist
 from django.core.validators import (
     MaxValueValidator,
@@ -59,6 +61,7 @@ from ..dados_comuns.fluxo_status import (
     FluxoInformativoPartindoDaEscola,
     SolicitacaoMedicaoInicialWorkflow,
 )
+from ..dados_comuns.intervalos import filtro_mes
 from ..dados_comuns.utils import (
     clonar_objeto,
     copiar_logs,
@@ -71,7 +74,7 @@ from ..dados_comuns.utils import (
     queryset_por_data,
     subtrai_meses_de_data,
 )
-from ..eol_servico.utils import EOLServicoSGP, dt_nascimento_from_api
+from ..eol_servico.utils import EOLException, EOLServicoSGP, dt_nascimento_from_api
 from ..escola.constants import PERIODOS_ESPECIAIS_CEI_CEU_CCI
 from ..inclusao_alimentacao.models import (
     GrupoInclusaoAlimentacaoNormal,
@@ -87,7 +90,11 @@ from ..kit_lanche.models import (
 )
 from .constants import CEI_OU_EMEI, PERIODOS_ESPECIAIS_CEMEI
 from .services import NovoSGPServicoLogado
-from .utils import deletar_alunos_periodo_parcial_outras_escolas, faixa_to_string
+from .utils import (
+    ClassificadorFaixasEtarias,
+    deletar_alunos_periodo_parcial_outras_escolas,
+    faixa_to_string,
+)
 
 env = environ.Env()
 REDIS_HOST = env("REDIS_HOST")
@@ -748,12 +755,10 @@ class Escola(
                 ).distinct()
             else:
                 filtro_logs = self.logs_alunos_matriculados_por_periodo.filter(
+                    **filtro_mes("data", ano, mes),
                     tipo_turma="REGULAR",
                     quantidade_alunos__gte=1,
-                    criado_em__year=ano,
                 )
-                if mes is not None:
-                    filtro_logs = filtro_logs.filter(criado_em__month=mes)
                 periodos = PeriodoEscolar.objects.filter(
                     id__in=filtro_logs.values_list(
                         "periodo_escolar", flat=True
@@ -1062,44 +1067,69 @@ class Escola(
         return faixas_etarias
 
     def contar_alunos_por_faixa(
-        self, aluno_data_nascimento, data_referencia, faixas_etarias, seis_anos_atras
+        self, datas_nascimento, data_referencia, classificador_faixas
     ):
-        count = Counter()
-        for faixa_etaria in faixas_etarias:
-            if faixa_etaria.data_pertence_a_faixa(
-                aluno_data_nascimento, data_referencia
-            ):
-                count[str(faixa_etaria.uuid)] += 1
-            elif aluno_data_nascimento < seis_anos_atras and faixa_etaria.fim == 73:
-                count[str(faixa_etaria.uuid)] += 1
-        return count
+        """
+        Quantidade de alunos por faixa etária (chave: uuid da faixa como str).
+        Alunos com mais de seis anos também contam na faixa que termina em 73 meses.
+        """
+        seis_anos_atras = datetime.date.today() - relativedelta(years=6)
+        contagem = classificador_faixas.conta(
+            datas_nascimento, data_referencia, nascidos_antes_de=seis_anos_atras
+        )
+        return Counter(
+            {str(uuid_faixa): total for uuid_faixa, total in contagem.items()}
+        )
+
+    def retrato_alunos_eol(self) -> RetratoAlunos:
+        """
+        Alunos da escola no EOL, lidos do retrato local (`RetratoAlunosEOL`),
+        sem consultar o EOL. O retrato é atualizado pela task
+        `atualiza_retratos_alunos_eol`; `desatualizado` indica que a última
+        atualização passou da validade ou que a escola ainda não tem retrato.
+        """
+        return RetratoAlunosEOL.consulta(self)
+
+    def lista_alunos_eol(self) -> list:
+        retrato = self.retrato_alunos_eol()
+        if retrato.ano_letivo is None:
+            # escola ainda sem retrato: consulta o EOL agora, gravando o retrato
+            try:
+                return RetratoAlunosEOL.atualiza(self).alunos
+            except EOLException as e:
+                logger.error(f"Sem retrato de alunos do EOL: {e}")
+                return []
+        if retrato.desatualizado:
+            logger.warning(
+                f"Retrato de alunos do EOL desatualizado para a escola"
+                f" {self.codigo_eol} (atualizado em {retrato.atualizado_em})"
+            )
+        return retrato.alunos
 
     def alunos_por_periodo_e_faixa_etaria(
         self, data_referencia=None, faixas_etarias=None
     ):
         data_referencia = self.obter_data_referencia(data_referencia)
-        faixas_etarias = self.obter_faixas_etarias(faixas_etarias)
-
-        lista_alunos = (
-            EOLServicoSGP.get_lista_alunos_por_escola_ano_corrente_ou_seguinte(
-                self.codigo_eol
-            )
+        classificador = ClassificadorFaixasEtarias(
+            self.obter_faixas_etarias(faixas_etarias)
         )
 
-        seis_anos_atras = datetime.date.today() - relativedelta(years=6)
+        lista_alunos = self.lista_alunos_eol()
+
         dict_periodos = dict(PeriodoEscolar.objects.values_list("tipo_turno", "nome"))
 
-        resultados = {}
+        datas_por_periodo = {}
         for aluno in lista_alunos:
-            tipo_turno = aluno.get("tipoTurno")
-            nome_periodo = dict_periodos[tipo_turno]
-            data_nascimento = dt_nascimento_from_api(aluno["dataNascimento"])
-            if nome_periodo not in resultados:
-                resultados[nome_periodo] = Counter()
-            resultados[nome_periodo] += self.contar_alunos_por_faixa(
-                data_nascimento, data_referencia, faixas_etarias, seis_anos_atras
+            nome_periodo = dict_periodos[aluno.get("tipoTurno")]
+            datas_por_periodo.setdefault(nome_periodo, []).append(
+                dt_nascimento_from_api(aluno["dataNascimento"])
+            )
+        return {
+            nome_periodo: self.contar_alunos_por_faixa(
+                datas, data_referencia, classificador
             )
-        return resultados
+            for nome_periodo, datas in datas_por_periodo.items()
+        }
 
     def alunos_periodo_parcial_e_faixa_etaria(
         self, data_referencia=None, faixas_etarias=None
@@ -1107,7 +1137,9 @@ class Escola(
         if not self.eh_cei and not self.eh_cemei:
             return {}
         data_referencia = self.obter_data_referencia(data_referencia)
-        faixas_etarias = self.obter_faixas_etarias(faixas_etarias)
+        classificador = ClassificadorFaixasEtarias(
+            self.obter_faixas_etarias(faixas_etarias)
+        )
         deletar_alunos_periodo_parcial_outras_escolas(self, data_referencia)
         alunos_periodo_parcial = (
             AlunoPeriodoParcial.objects.filter(
@@ -1121,66 +1153,53 @@ class Escola(
             )
             .values_list("aluno__codigo_eol", flat=True)
         )
-        lista_alunos = (
-            EOLServicoSGP.get_lista_alunos_por_escola_ano_corrente_ou_seguinte(
-                self.codigo_eol
-            )
-        )
+        lista_alunos = self.lista_alunos_eol()
         alunos_periodo_parcial_set = set(alunos_periodo_parcial)
-        seis_anos_atras = datetime.date.today() - relativedelta(years=6)
-        resultados = {}
-        for aluno in lista_alunos:
-            if str(aluno["codigoAluno"]) not in alunos_periodo_parcial_set:
-                continue
-            periodo = "PARCIAL"
-            data_nascimento = dt_nascimento_from_api(aluno["dataNascimento"])
-            if periodo not in resultados:
-                resultados[periodo] = Counter()
-            resultados[periodo] += self.contar_alunos_por_faixa(
-                data_nascimento, data_referencia, faixas_etarias, seis_anos_atras
+        datas_nascimento = [
+            dt_nascimento_from_api(aluno["dataNascimento"])
+            for aluno in lista_alunos
+            if str(aluno["codigoAluno"]) in alunos_periodo_parcial_set
+        ]
+        if not datas_nascimento:
+            return {}
+        return {
+            "PARCIAL": self.contar_alunos_por_faixa(
+                datas_nascimento, data_referencia, classificador
             )
-        return resultados
+        }
 
     def alunos_por_periodo_e_faixa_etaria_objetos_alunos(
         self, data_referencia=None, faixas_etarias=None
     ):
         data_referencia = self.obter_data_referencia(data_referencia)
-        faixas_etarias = self.obter_faixas_etarias(faixas_etarias)
+        classificador = ClassificadorFaixasEtarias(
+            self.obter_faixas_etarias(faixas_etarias)
+        )
 
         lista_alunos = Aluno.objects.filter(
             escola__codigo_eol=self.codigo_eol, ciclo=Aluno.CICLO_ALUNO_CEI
-        )
-        seis_anos_atras = datetime.date.today() - relativedelta(years=6)
-        resultados = {}
-        for aluno in lista_alunos:
-            periodo = aluno.periodo_escolar.nome
-            data_nascimento = aluno.data_nascimento
-            if periodo not in resultados:
-                resultados[periodo] = Counter()
-            resultados[periodo] += self.contar_alunos_por_faixa(
-                data_nascimento, data_referencia, faixas_etarias, seis_anos_atras
-            )
-        return resultados
+        ).values_list("periodo_escolar__nome", "data_nascimento")
+        datas_por_periodo = {}
+        for periodo, data_nascimento in lista_alunos:
+            datas_por_periodo.setdefault(periodo, []).append(data_nascimento)
+        return {
+            periodo: self.contar_alunos_por_faixa(datas, data_referencia, classificador)
+            for periodo, datas in datas_por_periodo.items()
+        }
 
     def alunos_por_faixa_etaria(self, data_referencia=None, faixas_etarias=None):
         data_referencia = self.obter_data_referencia(data_referencia)
-        faixas_etarias = self.obter_faixas_etarias(faixas_etarias)
-
-        lista_alunos = (
-            EOLServicoSGP.get_lista_alunos_por_escola_ano_corrente_ou_seguinte(
-                self.codigo_eol
-            )
+        classificador = ClassificadorFaixasEtarias(
+            self.obter_faixas_etarias(faixas_etarias)
         )
 
-        seis_anos_atras = datetime.date.today() - relativedelta(years=6)
+        lista_alunos = self.lista_alunos_eol()
 
-        resultados = Counter()
-        for aluno in lista_alunos:
-            data_nascimento = dt_nascimento_from_api(aluno["dataNascimento"])
-            resultados += self.contar_alunos_por_faixa(
-                data_nascimento, data_referencia, faixas_etarias, seis_anos_atras
-            )
-        return resultados
+        return self.contar_alunos_por_faixa(
+            [dt_nascimento_from_api(aluno["dataNascimento"]) for aluno in lista_alunos],
+            data_referencia,
+            classificador,
+        )
 
     def get_lista_medicoes_kit_lanche_avulso_autorizado_no_mes(
         self, mes: int, ano: int, lista_medicoes: list
@@ -1685,30 +1704,30 @@ class EscolaPeriodoEscolar(
             'zxcv-4567': 16
         }
         """
-        faixas_etarias = FaixaEtaria.objects.filter(ativo=True)
-        if faixas_etarias.count() == 0:
+        classificador = ClassificadorFaixasEtarias.das_faixas_ativas()
+        if not classificador:
             raise ObjectDoesNotExist()
-        lista_alunos = (
-            EOLServicoSGP.get_lista_alunos_por_escola_ano_corrente_ou_seguinte(
-                self.escola.codigo_eol
-            )
+        faixa_a_partir_de_73_meses = next(
+            (
+                faixa
+                for faixa in classificador.faixas
+                if faixa.inicio == 48 and faixa.fim == 73
+            ),
+            None,
         )
+        lista_alunos = self.escola.lista_alunos_eol()
 
         faixa_alunos = Counter()
         for aluno in lista_alunos:
             if aluno["tipoTurno"] == self.periodo_escolar.tipo_turno:
                 data_nascimento = dt_nascimento_from_api(aluno["dataNascimento"])
-                meses = (data_nascimento.year - data_referencia.year) * 12
-                meses = meses + (data_nascimento.month - data_referencia.month)
-                meses = meses * (-1)
+                meses = (data_referencia.year - data_nascimento.year) * 12
+                meses = meses + (data_referencia.month - data_nascimento.month)
                 if meses >= 73:
-                    faixa_etaria = FaixaEtaria.objects.filter(
-                        inicio=48, fim=73, ativo=True
-                    ).first()
+                    faixa_etaria = faixa_a_partir_de_73_meses
                 else:
-                    faixa_etaria = FaixaEtaria.objects.filter(
-                        inicio__lte=int(meses), fim__gt=int(meses), ativo=True
-                    ).first()
+                    faixas = classificador.faixas_por_meses(meses)
+                    faixa_etaria = faixas[0] if faixas else None
                 if faixa_etaria:
                     faixa_alunos[faixa_etaria.uuid] += 1
         return faixa_alunos
@@ -2712,16 +2731,28 @@ class Aluno(TemChaveExterna):
             return f"{self.nome} - Não Matriculado"
         return f"{self.nome} - {self.codigo_eol}"
 
-    def faixa_etaria(self, data_comparacao=date.today()) -> FaixaEtaria:
+    def faixa_etaria(
+        self, data_comparacao=date.today(), classificador_faixas=None
+    ) -> FaixaEtaria:
+        """
+        Faixa etária ativa do aluno na data. Para várias consultas seguidas,
+        informe `classificador_faixas` (`ClassificadorFaixasEtarias.das_faixas_ativas()`)
+        para não consultar as faixas a cada chamada.
+        """
+        if classificador_faixas is None:
+            classificador_faixas = ClassificadorFaixasEtarias.das_faixas_ativas()
         meses = quantidade_meses(data_comparacao, self.data_nascimento)
-        ultima_faixa = FaixaEtaria.objects.filter(ativo=True).order_by("fim").last()
+        ultima_faixa = classificador_faixas.ultima_faixa
         if meses >= ultima_faixa.fim:
-            faixa = ultima_faixa
-        else:
-            faixa = FaixaEtaria.objects.get(
-                ativo=True, inicio__lte=meses, fim__gt=meses
+            return ultima_faixa
+        faixas = classificador_faixas.faixas_por_meses(meses)
+        if not faixas:
+            raise FaixaEtaria.DoesNotExist("FaixaEtaria matching query does not exist.")
+        if len(faixas) > 1:
+            raise FaixaEtaria.MultipleObjectsReturned(
+                f"get() returned more than one FaixaEtaria -- it returned {len(faixas)}!"
             )
-        return faixa
+        return faixas[0]
 
     @property
     def possui_dieta_especial_ativa(self):
@@ -2964,6 +2995,19 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
     infantil_ou_fundamental = models.CharField(
         max_length=11, choices=INFANTIL_OU_FUNDAMENTAL, default="N/A"
     )
+    # dia de referência do log, mantido igual ao dia de criado_em pelo save();
+    # quem grava sem save() (bulk_create, update) preenche os dois
+    data = models.DateField("Data", editable=False)
+
+    def save(self, *args, **kwargs):
+        # criado_em continua sendo ajustado para registrar logs de dias anteriores
+        self.data = self._meta.get_field("data").to_python(
+            self.criado_em or datetime.datetime.now()
+        )
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "criado_em" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "data"}
+        super().save(*args, **kwargs)
 
     def cria_logs_emei_em_cemei(self):
         if (
@@ -2976,9 +3020,7 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
         if not LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=self.escola,
             periodo_escolar=self.periodo_escolar,
-            criado_em__year=self.criado_em.year,
-            criado_em__month=self.criado_em.month,
-            criado_em__day=self.criado_em.day,
+            data=self.criado_em,
             tipo_turma=self.tipo_turma,
             cei_ou_emei=EMEI,
         ).exists():
@@ -3005,9 +3047,7 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
         if not LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=self.escola,
             periodo_escolar=self.periodo_escolar,
-            criado_em__year=self.criado_em.year,
-            criado_em__month=self.criado_em.month,
-            criado_em__day=self.criado_em.day,
+            data=self.criado_em,
             tipo_turma=self.tipo_turma,
             cei_ou_emei="CEI",
         ).exists():
@@ -3032,9 +3072,7 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
         if not LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=self.escola,
             periodo_escolar=self.periodo_escolar,
-            criado_em__year=self.criado_em.year,
-            criado_em__month=self.criado_em.month,
-            criado_em__day=self.criado_em.day,
+            data=self.criado_em,
             tipo_turma=self.tipo_turma,
             infantil_ou_fundamental=infantil_ou_fundamental,
         ).exists():
@@ -3056,9 +3094,7 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
             log = cls.objects.get(
                 escola=escola,
                 periodo_escolar=periodo_escolar,
-                criado_em__year=data.year,
-                criado_em__month=data.month,
-                criado_em__day=data.day,
+                data=data,
                 tipo_turma=tipo_turma,
                 cei_ou_emei="N/A",
                 infantil_ou_fundamental="N/A",
@@ -3091,6 +3127,12 @@ class LogAlunosMatriculadosPeriodoEscola(TemChaveExterna, CriadoEm, TemObservaca
             "Logs de Alteração quantidade de alunos regulares e de programas"
         )
         ordering = ("-criado_em",)
+        indexes = [
+            models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_matriculados_escola_data",
+            ),
+        ]
 
 
 class DiaCalendario(CriadoEm, TemAlteradoEm, TemData, TemChaveExterna):
@@ -3186,6 +3228,104 @@ class LogAtualizaDadosAluno(models.Model):
         return retorno
 
 
+class RetratoAlunos(NamedTuple):
+    alunos: list
+    ano_letivo: int | None
+    versao: int
+    atualizado_em: datetime.datetime | None
+    desatualizado: bool
+
+
+class RetratoAlunosEOL(TemChaveExterna, CriadoEm):
+    """
+    Cópia local dos alunos da escola no EOL em um ano letivo.
+
+    Guarda apenas os campos usados nas contagens por período e faixa etária
+    (código do aluno, turno, data de nascimento e situação da matrícula), para
+    que as requisições não dependam do EOL.
+    """
+
+    CAMPOS_ALUNO = (
+        "codigoAluno",
+        "tipoTurno",
+        "dataNascimento",
+        "codigoSituacaoMatricula",
+    )
+
+    escola = models.ForeignKey(
+        Escola, related_name="retratos_alunos_eol", on_delete=models.CASCADE
+    )
+    ano_letivo = models.PositiveSmallIntegerField("Ano letivo")
+    alunos = models.JSONField("Alunos", default=list)
+    versao = models.PositiveIntegerField("Versão", default=1)
+    atualizado_em = models.DateTimeField("Atualizado em")
+
+    def __str__(self):
+        return (
+            f"{self.escola.codigo_eol} - {self.ano_letivo} (v{self.versao}):"
+            f" {len(self.alunos)} aluno(s)"
+        )
+
+    @classmethod
+    def consulta(cls, escola) -> RetratoAlunos:
+        """Retrato do ano corrente ou, se vazio, do ano seguinte."""
+        ano_corrente = datetime.date.today().year
+        retratos = list(
+            cls.objects.filter(
+                escola=escola, ano_letivo__in=[ano_corrente, ano_corrente + 1]
+            ).order_by("ano_letivo")
+        )
+        retrato = next((r for r in retratos if r.alunos), None) or next(
+            iter(retratos), None
+        )
+        if retrato is None:
+            return RetratoAlunos([], None, 0, None, True)
+        validade = datetime.timedelta(hours=settings.RETRATO_ALUNOS_EOL_VALIDADE_HORAS)
+        return RetratoAlunos(
+            retrato.alunos,
+            retrato.ano_letivo,
+            retrato.versao,
+            retrato.atualizado_em,
+            retrato.atualizado_em < datetime.datetime.now() - validade,
+        )
+
+    @classmethod
+    def atualiza(cls, escola) -> RetratoAlunosEOL:
+        """
+        Consulta o EOL e grava o retrato da escola. Se o EOL falhar, o retrato
+        anterior é mantido e EOLException é levantada.
+        """
+        ano_letivo, lista_alunos = (
+            EOLServicoSGP.get_lista_alunos_e_ano_letivo_por_escola(escola.codigo_eol)
+        )
+        if lista_alunos is None:
+            raise EOLException(
+                f"Não foi possível consultar os alunos da escola {escola.codigo_eol}"
+            )
+        alunos = [
+            {campo: aluno.get(campo) for campo in cls.CAMPOS_ALUNO}
+            for aluno in lista_alunos
+        ]
+        agora = datetime.datetime.now()
+        retrato, criado = cls.objects.get_or_create(
+            escola=escola,
+            ano_letivo=ano_letivo,
+            defaults={"alunos": alunos, "atualizado_em": agora},
+        )
+        if not criado:
+            if retrato.alunos != alunos:
+                retrato.alunos = alunos
+                retrato.versao += 1
+            retrato.atualizado_em = agora
+            retrato.save(update_fields=["alunos", "versao", "atualizado_em"])
+        return retrato
+
+    class Meta:
+        verbose_name = "Retrato de alunos do EOL"
+        verbose_name_plural = "Retratos de alunos do EOL"
+        unique_together = [["escola", "ano_letivo"]]
+
+
 class LogAlunosMatriculadosFaixaEtariaDia(
     TemChaveExterna, CriadoEm, TemData, TemFaixaEtariaEQuantidade
 ):
@@ -3214,6 +3354,12 @@ class LogAlunosMatriculadosFaixaEtariaDia(
             "Logs quantidades de alunos por faixas etárias, dias e períodos"
         )
         ordering = ("criado_em",)
+        indexes = [
+            models.Index(
+                fields=["escola", "data", "periodo_escolar"],
+                name="log_faixa_etaria_escola_data",
+            ),
+        ]
 
 
 class LogAlunoPorDia(TemChaveExterna, CriadoEm):
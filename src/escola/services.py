@@ -1,8 +1,13 @@
+import threading
+
 import requests
 import sentry_sdk
+from django.conf import settings
 from django.core.cache import cache
 from django_redis import get_redis_connection
+from requests.adapters import HTTPAdapter
 from rest_framework import status
+from urllib3.util.retry import Retry
 
 from ..dados_comuns.constants import (
     DJANGO_NOVO_SGP_API_LOGIN,
@@ -15,6 +20,35 @@ from ..dados_comuns.constants import (
 class NovoSGPServico:
     HEADER = {"x-sgp-api-key": f"{DJANGO_NOVO_SGP_API_TOKEN}"}
     TIMEOUT = 10
+    TENTATIVAS = 3
+
+    _sessao = None
+    _sessao_lock = threading.Lock()
+
+    @classmethod
+    def sessao(cls) -> requests.Session:
+        """Sessão compartilhada pelas consultas, inclusive entre threads.
+
+        Reaproveita as conexões com o SGP e repete com backoff as respostas de
+        indisponibilidade (429/5xx) e as falhas de conexão.
+        """
+        with cls._sessao_lock:
+            if cls._sessao is None:
+                adapter = HTTPAdapter(
+                    max_retries=Retry(
+                        total=cls.TENTATIVAS,
+                        backoff_factor=0.5,
+                        status_forcelist=(429, 500, 502, 503, 504),
+                        allowed_methods=frozenset({"GET"}),
+                        raise_on_status=False,
+                    ),
+                    pool_maxsize=settings.CALENDARIO_SGP_CONSULTAS_SIMULTANEAS,
+                )
+                sessao = requests.Session()
+                sessao.mount("http://", adapter)
+                sessao.mount("https://", adapter)
+                cls._sessao = sessao
+        return cls._sessao
 
     @classmethod
     def dias_letivos(
@@ -30,7 +64,7 @@ class NovoSGPServico:
             5 Noite
             6 Integral
         """
-        response = requests.get(
+        response = cls.sessao().get(
             f"{DJANGO_NOVO_SGP_API_URL}/v1/calendario/integracoes/ues/dias-letivos/",
             headers=cls.HEADER,
             timeout=cls.TIMEOUT,
@@ -26,6 +26,7 @@ from ..cardapio.inversao_dia_cardapio.models import InversaoCardapio
 from ..dados_comuns.fluxo_status import (
     PedidoAPartirDaDiretoriaRegionalWorkflow,
     PedidoAPartirDaEscolaWorkflow,
+    transiciona_em_massa,
 )
 from ..dados_comuns.models import LogSolicitacoesUsuario
 from ..escola.models import AlunosMatriculadosPeriodoEscola, FaixaEtaria, TipoTurma
@@ -79,6 +80,18 @@ def atualiza_dados_escolas():
     management.call_command("atualiza_dados_escolas", verbosity=0)
 
 
+@shared_task(
+    autoretry_for=(ConnectionError,),
+    retry_backoff=5,
+    retry_kwargs={"max_retries": 2},
+)
+def atualiza_retratos_alunos_eol():
+    logger.debug(
+        f"Iniciando task atualiza_retratos_alunos_eol às {datetime.datetime.now()}"
+    )
+    management.call_command("atualiza_retratos_alunos_eol", verbosity=0)
+
+
 @shared_task(
     bind=True,
     autoretry_for=(ConnectionError, Timeout),
@@ -87,7 +100,9 @@ def atualiza_dados_escolas():
 )
 def atualiza_alunos_escolas(self):
     logger.debug(f"Iniciando task às {datetime.datetime.now()}")
-    management.call_command("atualiza_alunos_escolas", verbosity=0)
+    management.call_command(
+        "atualiza_alunos_escolas", verbosity=0, retomar=self.request.retries > 0
+    )
 
 
 def task_on_failure(self, exc, task_id, args, kwargs, einfo):
@@ -152,6 +167,27 @@ def atualiza_tipo_gestao_das_escolas_task(path_planilha, id_planilha):
     atualiza_tipo_gestao_das_escolas(path_planilha, id_planilha)
 
 
+def _transiciona_solicitacoes(solicitacoes, transicao, usuario, justificativa):
+    """
+    Em massa quando o fluxo do modelo declara `transicao` em
+    TRANSICOES_EM_MASSA; senão objeto a objeto, pulando os que não estão num
+    status de origem (ex.: o kit lanche unificado não tem dre_nao_valida).
+    """
+    if transicao in getattr(solicitacoes.model, "TRANSICOES_EM_MASSA", {}):
+        transiciona_em_massa(
+            solicitacoes,
+            transicao,
+            usuario=usuario,
+            justificativa=justificativa,
+            ignora_invalidos=True,
+        )
+        return
+    for solicitacao in solicitacoes:
+        acao = getattr(solicitacao, transicao, None)
+        if acao is not None and acao.is_available():
+            acao(user=usuario, justificativa=justificativa)
+
+
 @shared_task(
     autoretry_for=(ConnectionError,), retry_backoff=2, retry_kwargs={"max_retries": 3}
 )
@@ -192,17 +228,16 @@ def nega_solicitacoes_vencidas():
         InversaoCardapio,
     ]
 
+    usuario = Usuario.objects.filter(email="system@admin.com").first()
     for classe_solicitacao in classes_solicitacoes:
         solicitacoes = classe_solicitacao.objects.filter(
             uuid__in=uuids_solicitacoes_dre_a_validar
         )
         if classe_solicitacao == AlteracaoCardapio:
             solicitacoes = solicitacoes.exclude(motivo__nome="Lanche Emergencial")
-        for solicitacao in solicitacoes.all():
-            usuario = Usuario.objects.filter(email="system@admin.com").first()
-            solicitacao.dre_nao_valida(
-                user=usuario if usuario else None, justificativa=justificativa
-            )
+        _transiciona_solicitacoes(
+            solicitacoes, "dre_nao_valida", usuario, justificativa
+        )
 
 
 @shared_task(
@@ -246,26 +281,17 @@ def nega_solicitacoes_pendentes_autorizacao_vencidas():
         InversaoCardapio,
     ]
 
+    usuario = Usuario.objects.filter(email="system@admin.com").first()
     for classe_solicitacao in classes_solicitacoes:
         solicitacoes = classe_solicitacao.objects.filter(
             uuid__in=uuids_solicitacoes_dre_a_validar
         )
         if classe_solicitacao == AlteracaoCardapio:
             solicitacoes = solicitacoes.exclude(motivo__nome="Lanche Emergencial")
-        for solicitacao in solicitacoes.all():
-            usuario = Usuario.objects.filter(email="system@admin.com").first()
-            if solicitacao.status in [
-                PedidoAPartirDaEscolaWorkflow.DRE_VALIDADO,
-                PedidoAPartirDaEscolaWorkflow.CODAE_QUESTIONADO,
-                PedidoAPartirDaDiretoriaRegionalWorkflow.CODAE_A_AUTORIZAR,
-            ]:
-                solicitacao.codae_nega(
-                    user=usuario if usuario else None, justificativa=justificativa
-                )
-            else:
-                solicitacao.codae_nega_questionamento(
-                    user=usuario if usuario else None, justificativa=justificativa
-                )
+        # codae_nega parte de DRE_VALIDADO/CODAE_A_AUTORIZAR e CODAE_QUESTIONADO,
+        # codae_nega_questionamento de TERCEIRIZADA_RESPONDEU_QUESTIONAMENTO
+        for transicao in ("codae_nega", "codae_nega_questionamento"):
+            _transiciona_solicitacoes(solicitacoes, transicao, usuario, justificativa)
 
 
 @shared_task(
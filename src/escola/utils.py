@@ -1,17 +1,25 @@
 import logging
 import re
+import time
+from bisect import bisect_right
 from calendar import monthrange
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from contextlib import contextmanager
+from contextvars import ContextVar
 from datetime import date, datetime, timedelta
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 
+from django.conf import settings
+from django.db import transaction
 from django.db.models import Case, Q, Value, When
 from openpyxl import Workbook
 from rest_framework.pagination import PageNumberPagination
 
 from src.eol_servico.utils import EOLServicoSGP
 
-from ..dados_comuns.utils import get_ultimo_dia_mes
+from ..dados_comuns.utils import get_ultimo_dia_mes, subtrai_meses_de_data
 from ..escola import models
 
 logger = logging.getLogger("sigpae.taskEscola")
@@ -90,6 +98,99 @@ def string_to_meses(str_meses):
     return total_meses
 
 
+class ClassificadorFaixasEtarias:
+    """
+    Classifica idades nas faixas etárias informadas, montado uma única vez.
+
+    Os limites (`inicio` e `fim`, em meses) das faixas são ordenados e cada
+    intervalo entre dois limites consecutivos guarda as faixas que o cobrem;
+    classificar uma idade é uma busca binária nesses limites. Para datas de
+    nascimento, os limites são convertidos em datas a partir da data de
+    referência, com a mesma regra de `FaixaEtaria.data_pertence_a_faixa`.
+    """
+
+    def __init__(self, faixas_etarias):
+        self.faixas = sorted(faixas_etarias, key=lambda faixa: faixa.id)
+        self._limites = sorted(
+            {faixa.inicio for faixa in self.faixas}
+            | {faixa.fim for faixa in self.faixas}
+        )
+        posicao = {limite: i for i, limite in enumerate(self._limites)}
+        self._faixas_por_intervalo = [
+            tuple(
+                faixa
+                for faixa in self.faixas
+                if posicao[faixa.inicio] < intervalo <= posicao[faixa.fim]
+            )
+            for intervalo in range(len(self._limites) + 1)
+        ]
+        self._limites_em_datas = {}
+
+    @classmethod
+    def das_faixas_ativas(cls) -> "ClassificadorFaixasEtarias":
+        from src.escola.models import FaixaEtaria
+
+        return cls(FaixaEtaria.objects.filter(ativo=True))
+
+    def __bool__(self):
+        return bool(self.faixas)
+
+    @property
+    def ultima_faixa(self):
+        """Faixa de maior `fim`, como `order_by("fim").last()`."""
+        return max(self.faixas, key=lambda faixa: faixa.fim) if self.faixas else None
+
+    def faixas_por_meses(self, meses: int) -> tuple:
+        """Faixas com `inicio <= meses < fim`."""
+        return self._faixas_por_intervalo[bisect_right(self._limites, meses)]
+
+    def _datas_dos_limites(self, data_referencia: date) -> list:
+        if data_referencia not in self._limites_em_datas:
+            # limites em ordem crescente de meses são datas decrescentes
+            self._limites_em_datas[data_referencia] = [
+                subtrai_meses_de_data(limite, data_referencia)
+                for limite in reversed(self._limites)
+            ]
+        return self._limites_em_datas[data_referencia]
+
+    def faixas_da_data(self, data_nascimento: date, data_referencia: date) -> tuple:
+        """Faixas a que a data de nascimento pertence na data de referência."""
+        datas = self._datas_dos_limites(data_referencia)
+        intervalo = len(datas) - bisect_right(datas, data_nascimento)
+        return self._faixas_por_intervalo[intervalo]
+
+    def classifica(self, datas_nascimento, data_referencia: date) -> list:
+        """Id da (primeira) faixa de cada data de nascimento, ou None."""
+        return [
+            faixas[0].id if faixas else None
+            for faixas in (
+                self.faixas_da_data(data_nascimento, data_referencia)
+                for data_nascimento in datas_nascimento
+            )
+        ]
+
+    def conta(
+        self, datas_nascimento, data_referencia: date, nascidos_antes_de=None
+    ) -> Counter:
+        """
+        Quantidade de datas de nascimento por faixa (chave: `uuid` da faixa).
+
+        Com `nascidos_antes_de`, quem nasceu antes dessa data também é contado nas
+        faixas que terminam em 73 meses, caso ainda não pertença a elas.
+        """
+        faixas_finais = [faixa for faixa in self.faixas if faixa.fim == 73]
+        contagem = Counter()
+        for data_nascimento in datas_nascimento:
+            faixas = self.faixas_da_data(data_nascimento, data_referencia)
+            for faixa in faixas:
+                contagem[faixa.uuid] += 1
+            if nascidos_antes_de and data_nascimento < nascidos_antes_de:
+                for faixa in faixas_finais:
+                    if faixa not in faixas:
+                        contagem[faixa.uuid] += 1
+        return contagem
+
+
 def remove_acentos(texto):
     resultado = re.sub("[àáâãäå]", "a", texto)
     resultado = re.sub("[èéêë]", "e", resultado)
@@ -103,71 +204,188 @@ def update_datetime_LogAlunosMatriculadosPeriodoEscola(data_referencia=None):
     data_referencia = _normaliza_data_referencia_matriculados(data_referencia)
     hoje = date.today()
     deslocamento = hoje - data_referencia
-    logs_hoje = LogAlunosMatriculadosPeriodoEscola.objects.filter(criado_em__date=hoje)
+    logs_hoje = LogAlunosMatriculadosPeriodoEscola.objects.filter(data=hoje)
 
     for log in logs_hoje:
         log.criado_em = log.criado_em - deslocamento
         log.save()
 
 
-def registra_quantidade_matriculados(matriculas, ontem, tipo_turma):  # noqa C901
-    import ast
-
-    import pandas as pd
-
-    from src.escola.models import (
-        AlunosMatriculadosPeriodoEscola,
-        Escola,
-        LogAlunosMatriculadosPeriodoEscola,
-        PeriodoEscolar,
-    )
-
-    objs = []
-    matriculas = (
-        pd.DataFrame(matriculas).astype(str).drop_duplicates().to_dict("records")
-    )
+def _quantidades_por_escola_e_periodo(matriculas, escolas, periodos):
+    """
+    {escola: {periodo: quantidade}} a partir da resposta do SGP. Escolas e turnos
+    sem cadastro são ignorados; repetições ficam com a última quantidade.
+    """
+    quantidades = {}
     for matricula in matriculas:
-        escola = Escola.objects.filter(codigo_eol=matricula["codigoEolEscola"]).first()
-        turnos = ast.literal_eval(matricula["turnos"])
-        periodos = []
-        for turno_resp in turnos:
-            turno = remove_acentos(turno_resp["turno"])
-            periodo = PeriodoEscolar.objects.filter(nome=turno.upper()).first()
+        escola = escolas.get(str(matricula["codigoEolEscola"]))
+        if escola is None:
+            logger.debug(
+                f'Escola {matricula["codigoEolEscola"]} não encontrada na tabela de Escolas'
+            )
+            continue
+        por_periodo = quantidades.setdefault(escola, {})
+        for turno_resp in matricula["turnos"]:
+            periodo = periodos.get(remove_acentos(turno_resp["turno"]).upper())
             if not periodo:
                 logger.debug(
                     f'Periodo {turno_resp["turno"]} não encontrado na tabela de Períodos'
                 )
                 continue
-            periodos.append(periodo)
-            if tipo_turma == "REGULAR":
-                create_update_objeto_escola_periodo_escolar(
-                    escola, periodo, turno_resp["quantidade"]
-                )
-            matricula_sigpae = AlunosMatriculadosPeriodoEscola.objects.filter(
-                tipo_turma=tipo_turma, escola=escola, periodo_escolar=periodo
-            ).first()
-            if matricula_sigpae:
-                matricula_sigpae.quantidade_alunos = turno_resp["quantidade"]
-                objs.append(matricula_sigpae)
-            else:
-                AlunosMatriculadosPeriodoEscola.criar(
-                    escola=escola,
-                    periodo_escolar=periodo,
-                    quantidade_alunos=turno_resp["quantidade"],
-                    tipo_turma=tipo_turma,
-                )
-            LogAlunosMatriculadosPeriodoEscola.criar(
-                escola=escola,
-                periodo_escolar=periodo,
-                quantidade_alunos=turno_resp["quantidade"],
-                data=ontem,
-                tipo_turma=tipo_turma,
+            por_periodo[periodo] = int(turno_resp["quantidade"])
+    return quantidades
+
+
+def _grava_escolas_periodos_escolares(quantidades):
+    from src.escola.models import EscolaPeriodoEscolar
+
+    EscolaPeriodoEscolar.objects.bulk_create(
+        [
+            EscolaPeriodoEscolar(
+                escola=escola, periodo_escolar=periodo, quantidade_alunos=quantidade
             )
+            for escola, por_periodo in quantidades.items()
+            for periodo, quantidade in por_periodo.items()
+        ],
+        batch_size=1000,
+        update_conflicts=True,
+        unique_fields=["periodo_escolar", "escola"],
+        update_fields=["quantidade_alunos"],
+    )
+
 
+def _compara_quantidades(quantidades, existentes, novo):
+    """
+    Confronta `quantidades` (escola -> período -> quantidade) com os registros
+    `existentes` por (escola_id, periodo_escolar_id). Retorna todos os
+    registros, os que precisam ser criados (montados por `novo`) e os que
+    tiveram a quantidade alterada.
+    """
+    registros, novos, alterados = [], [], []
+    for escola, por_periodo in quantidades.items():
+        for periodo, quantidade in por_periodo.items():
+            registro = existentes.get((escola.id, periodo.id))
+            if registro is None:
+                registro = novo()
+                registro.quantidade_alunos = quantidade
+                novos.append(registro)
+            elif registro.quantidade_alunos != quantidade:
+                registro.quantidade_alunos = quantidade
+                alterados.append(registro)
+            registro.escola = escola
+            registro.periodo_escolar = periodo
+            registros.append(registro)
+    return registros, novos, alterados
+
+
+def _grava_alunos_matriculados(quantidades, tipo_turma):
+    from src.escola.models import AlunosMatriculadosPeriodoEscola
+
+    periodos_por_escola = {
+        escola.id: {periodo.id for periodo in por_periodo}
+        for escola, por_periodo in quantidades.items()
+    }
+    existentes = {}
+    ids_para_remover = []
+    for matriculados in (
         AlunosMatriculadosPeriodoEscola.objects.filter(
-            tipo_turma=tipo_turma, escola=escola
-        ).exclude(periodo_escolar__in=periodos).delete()
-    AlunosMatriculadosPeriodoEscola.objects.bulk_update(objs, ["quantidade_alunos"])
+            tipo_turma=tipo_turma, escola__in=list(quantidades)
+        )
+        .only("id", "escola_id", "periodo_escolar_id", "quantidade_alunos")
+        .order_by("id")
+    ):
+        if (
+            matriculados.periodo_escolar_id
+            not in periodos_por_escola[matriculados.escola_id]
+        ):
+            ids_para_remover.append(matriculados.id)
+            continue
+        existentes.setdefault(
+            (matriculados.escola_id, matriculados.periodo_escolar_id), matriculados
+        )
+
+    _, novos, alterados = _compara_quantidades(
+        quantidades,
+        existentes,
+        lambda: AlunosMatriculadosPeriodoEscola(tipo_turma=tipo_turma),
+    )
+    AlunosMatriculadosPeriodoEscola.objects.filter(id__in=ids_para_remover).delete()
+    AlunosMatriculadosPeriodoEscola.objects.bulk_create(novos, batch_size=1000)
+    AlunosMatriculadosPeriodoEscola.objects.bulk_update(
+        alterados, ["quantidade_alunos"], batch_size=1000
+    )
+
+
+def _grava_logs_alunos_matriculados(quantidades, ontem, tipo_turma):
+    from src.escola.models import LogAlunosMatriculadosPeriodoEscola
+
+    existentes = {}
+    for log in LogAlunosMatriculadosPeriodoEscola.objects.filter(
+        escola__in=list(quantidades),
+        tipo_turma=tipo_turma,
+        cei_ou_emei="N/A",
+        infantil_ou_fundamental="N/A",
+        data=ontem,
+    ).order_by("id"):
+        existentes.setdefault((log.escola_id, log.periodo_escolar_id), log)
+
+    logs, novos, alterados = _compara_quantidades(
+        quantidades,
+        existentes,
+        lambda: LogAlunosMatriculadosPeriodoEscola(
+            tipo_turma=tipo_turma,
+            cei_ou_emei="N/A",
+            infantil_ou_fundamental="N/A",
+            data=ontem,
+        ),
+    )
+    LogAlunosMatriculadosPeriodoEscola.objects.bulk_create(novos, batch_size=1000)
+    # criado_em (auto_now_add) recebe o momento da inserção; o log é do dia de
+    # referência, já gravado em `data`
+    LogAlunosMatriculadosPeriodoEscola.objects.filter(
+        id__in=[log.id for log in novos]
+    ).update(criado_em=ontem)
+    for log in novos:
+        log.criado_em = ontem
+    LogAlunosMatriculadosPeriodoEscola.objects.bulk_update(
+        alterados, ["quantidade_alunos"], batch_size=1000
+    )
+    return logs
+
+
+def registra_quantidade_matriculados(matriculas, ontem, tipo_turma):
+    """
+    Grava a quantidade de alunos matriculados por escola e período de uma DRE.
+
+    Escolas e períodos são carregados de uma vez e as diferenças em relação ao
+    que já está gravado são aplicadas em lote, pela chave natural (escola,
+    período, tipo de turma e, nos logs, o dia de referência). Reexecutar para o
+    mesmo dia atualiza as quantidades sem duplicar registros.
+    """
+    from src.escola.models import Escola, PeriodoEscolar
+
+    escolas = {
+        escola.codigo_eol: escola
+        for escola in Escola.objects.filter(
+            codigo_eol__in={str(m["codigoEolEscola"]) for m in matriculas}
+        ).select_related("tipo_unidade")
+    }
+    periodos = {}
+    for periodo in PeriodoEscolar.objects.all():
+        periodos.setdefault(periodo.nome, periodo)
+
+    quantidades = _quantidades_por_escola_e_periodo(matriculas, escolas, periodos)
+    with transaction.atomic():
+        if tipo_turma == "REGULAR":
+            _grava_escolas_periodos_escolares(quantidades)
+        _grava_alunos_matriculados(quantidades, tipo_turma)
+        logs = _grava_logs_alunos_matriculados(quantidades, ontem, tipo_turma)
+        for log in logs:
+            if log.escola.eh_cemei or log.escola.eh_emebs:
+                log.cria_logs_emei_em_cemei()
+                log.cria_logs_cei_em_cemei()
+                log.cria_logs_emebs("INFANTIL")
+                log.cria_logs_emebs("FUNDAMENTAL")
     update_datetime_LogAlunosMatriculadosPeriodoEscola(ontem)
 
 
@@ -189,7 +407,7 @@ def duplica_dia_anterior(dre, dois_dias_atras, ontem, tipo_turma_name):
 
     logs = LogAlunosMatriculadosPeriodoEscola.objects.filter(
         escola__diretoria_regional=dre,
-        criado_em__date=dois_dias_atras,
+        data=dois_dias_atras,
         tipo_turma=tipo_turma_name,
     )
     for log in logs:
@@ -212,30 +430,148 @@ def registro_quantidade_alunos_matriculados_por_escola_periodo(
     hoje = ontem + timedelta(days=1)
     dres = DiretoriaRegional.objects.all()
     total = len(dres)
-    cont = 1
-    for dre in dres:
-        logger.debug(f"Processando {cont} de {total}")
-        logger.debug(
-            f"""Consultando matriculados da dre com Nome: {dre.nome}
-        e código eol: {dre.codigo_eol}, data: {hoje.strftime('%Y-%m-%d')} para o tipo turma {tipo_turma.name}"""
-        )
-        try:
-            resposta = EOLServicoSGP.matricula_por_escola(
+    # as consultas ao SGP rodam em paralelo; a gravação, uma DRE por vez, nesta thread
+    with ThreadPoolExecutor(
+        max_workers=settings.MATRICULADOS_CONSULTAS_SIMULTANEAS_DRE
+    ) as executor:
+        consultas = {}
+        for dre in dres:
+            logger.debug(
+                f"""Consultando matriculados da dre com Nome: {dre.nome}
+            e código eol: {dre.codigo_eol}, data: {hoje.strftime('%Y-%m-%d')} para o tipo turma {tipo_turma.name}"""
+            )
+            consulta = executor.submit(
+                EOLServicoSGP.matricula_por_escola,
                 codigo_eol=dre.codigo_eol,
                 data=hoje.strftime("%Y-%m-%d"),
                 tipo_turma=tipo_turma.value,
             )
-            logger.debug(resposta)
-
-            registra_quantidade_matriculados(resposta, ontem, tipo_turma.name)
-        except Exception as e:
-            dois_dias_atras = ontem - timedelta(days=1)
-            duplica_dia_anterior(dre, dois_dias_atras, ontem, tipo_turma.name)
-            logger.error(
-                f"Houve um erro inesperado ao consultar a Diretoria Regional {dre} : {str(e)}; "
-                "as quantidades de alunos foram duplicadas do dia anterior"
+            consultas[consulta] = dre
+        for cont, consulta in enumerate(as_completed(consultas), start=1):
+            dre = consultas[consulta]
+            logger.debug(f"Processando {cont} de {total}")
+            try:
+                resposta = consulta.result()
+                logger.debug(resposta)
+
+                registra_quantidade_matriculados(resposta, ontem, tipo_turma.name)
+            except Exception as e:
+                dois_dias_atras = ontem - timedelta(days=1)
+                duplica_dia_anterior(dre, dois_dias_atras, ontem, tipo_turma.name)
+                logger.error(
+                    f"Houve um erro inesperado ao consultar a Diretoria Regional {dre} : {str(e)}; "
+                    "as quantidades de alunos foram duplicadas do dia anterior"
+                )
+
+
+def _altera_dia_letivo(dias_calendario, eh_letivo, agora) -> list:
+    alterados = []
+    for dia_calendario in dias_calendario:
+        if dia_calendario.dia_letivo != eh_letivo:
+            dia_calendario.dia_letivo = eh_letivo
+            dia_calendario.alterado_em = agora
+            alterados.append(dia_calendario)
+    return alterados
+
+
+class LoteDiasCalendario:
+    """
+    Dias letivos de várias escolas acumulados para serem gravados de uma vez em
+    `DiaCalendario`, pela chave (escola, período escolar, data).
+
+    Escolas da mesma rede costumam receber do SGP o mesmo calendário; cada
+    resposta distinta é convertida uma única vez e reaproveitada.
+    """
+
+    def __init__(self):
+        self._dias = {}
+        self._respostas = {}
+
+    def _dias_da_resposta(self, lista_dias_letivos: list[dict]) -> dict:
+        chave = tuple((dia["data"], dia["ehLetivo"]) for dia in lista_dias_letivos)
+        if chave not in self._respostas:
+            self._respostas[chave] = {
+                datetime.strptime(data, "%Y-%m-%dT00:00:00").date(): eh_letivo
+                for data, eh_letivo in chave
+            }
+        return self._respostas[chave]
+
+    def adiciona(self, lista_dias_letivos: list[dict], escola, periodo_escolar=None):
+        periodo_escolar_id = periodo_escolar.id if periodo_escolar else None
+        self._dias.setdefault((escola.id, periodo_escolar_id), {}).update(
+            self._dias_da_resposta(lista_dias_letivos)
+        )
+
+    def _dias_existentes(self) -> dict:
+        """DiaCalendario já gravados por (escola_id, periodo_escolar_id, data)."""
+        from src.escola.models import DiaCalendario
+
+        datas = {data for dias in self._dias.values() for data in dias}
+        existentes = {}
+        for dia in DiaCalendario.objects.filter(
+            escola_id__in={escola_id for escola_id, _ in self._dias},
+            data__range=(min(datas), max(datas)),
+        ).only("id", "escola_id", "periodo_escolar_id", "data", "dia_letivo"):
+            existentes.setdefault(
+                (dia.escola_id, dia.periodo_escolar_id, dia.data), []
+            ).append(dia)
+        return existentes
+
+    def salva(self) -> int:
+        """
+        Cria os dias que ainda não existem e atualiza `dia_letivo` dos que
+        mudaram, com uma consulta e uma escrita em lote. Retorna a quantidade de
+        dias criados ou alterados.
+        """
+        from src.escola.models import DiaCalendario
+
+        if not self._dias:
+            return 0
+
+        existentes = self._dias_existentes()
+        agora = datetime.now()
+        novos, alterados = [], []
+        for (escola_id, periodo_escolar_id), dias in self._dias.items():
+            for data, eh_letivo in dias.items():
+                registros = existentes.get((escola_id, periodo_escolar_id, data))
+                if registros is None:
+                    novos.append(
+                        DiaCalendario(
+                            escola_id=escola_id,
+                            periodo_escolar_id=periodo_escolar_id,
+                            data=data,
+                            dia_letivo=eh_letivo,
+                        )
+                    )
+                    continue
+                alterados += _altera_dia_letivo(registros, eh_letivo, agora)
+
+        with transaction.atomic():
+            DiaCalendario.objects.bulk_create(novos, batch_size=1000)
+            DiaCalendario.objects.bulk_update(
+                alterados, ["dia_letivo", "alterado_em"], batch_size=1000
             )
-        cont += 1
+        self._dias = {}
+        return len(novos) + len(alterados)
+
+
+_lote_dias_calendario_ativo: ContextVar[Optional[LoteDiasCalendario]] = ContextVar(
+    "lote_dias_calendario", default=None
+)
+
+
+@contextmanager
+def lote_dias_calendario():
+    """
+    Enquanto ativo, `processa_dias_letivos` apenas acumula os dias no lote
+    retornado; a gravação acontece em `LoteDiasCalendario.salva`.
+    """
+    lote = LoteDiasCalendario()
+    token = _lote_dias_calendario_ativo.set(lote)
+    try:
+        yield lote
+    finally:
+        _lote_dias_calendario_ativo.reset(token)
 
 
 def processa_dias_letivos(
@@ -245,12 +581,10 @@ def processa_dias_letivos(
     Cria ou atualiza registros de `DiaCalendario` a partir da lista de dias letivos
     retornados pelo SGP.
 
-    Para cada item da lista, a função:
-      1. Converte a data (string) para `datetime`.
-      2. Verifica se já existe um `DiaCalendario` correspondente à escola,
-         data e período escolar.
-      3. Se existir, atualiza o campo `dia_letivo`.
-      4. Se não existir, cria um novo registro.
+    Os dias são comparados, pela escola, data e período escolar, com os já
+    gravados: os que não existem são criados e os existentes têm `dia_letivo`
+    atualizado. Dentro de `lote_dias_calendario` os dias são apenas acumulados
+    para a gravação do lote.
 
     O parâmetro `periodo_escolar` permite diferenciar dias letivos por turno
     (ex.: NOITE). Quando `None`, os dias são tratados como período geral.
@@ -263,27 +597,53 @@ def processa_dias_letivos(
         periodo_escolar (models.PeriodoEscolar, optional): Período escolar ao qual os dias pertencem.
             Quando None, representa período geral. Default: None.
     """
-    from src.escola.models import DiaCalendario
+    lote = _lote_dias_calendario_ativo.get()
+    if lote is not None:
+        lote.adiciona(lista_dias_letivos, escola, periodo_escolar)
+        return
 
-    for dia_dict in lista_dias_letivos:
-        data = datetime.strptime(dia_dict["data"], "%Y-%m-%dT00:00:00")
-        dia_calendario: DiaCalendario = DiaCalendario.objects.filter(
-            escola=escola,
-            data__year=data.year,
-            data__month=data.month,
-            data__day=data.day,
-            periodo_escolar=periodo_escolar,
-        ).first()
-        if not dia_calendario:
-            dia_calendario = DiaCalendario.objects.create(
-                escola=escola,
-                data=data,
-                dia_letivo=dia_dict["ehLetivo"],
-                periodo_escolar=periodo_escolar,
-            )
-        else:
-            dia_calendario.dia_letivo = dia_dict["ehLetivo"]
-            dia_calendario.save()
+    lote = LoteDiasCalendario()
+    lote.adiciona(lista_dias_letivos, escola, periodo_escolar)
+    lote.salva()
+
+
+def _consulta_dias_letivos_gerais(escola, inicio: str, fim: str):
+    from src.escola.services import NovoSGPServico
+
+    try:
+        return NovoSGPServico.dias_letivos(
+            codigo_eol=escola.codigo_eol,
+            data_inicio=inicio,
+            data_fim=fim,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao buscar por turno MANHA para escola {escola} : {str(e)}")
+        logger.debug("Tentando buscar dias letivos no novo sgp para turno da tarde")
+    try:
+        return NovoSGPServico.dias_letivos(
+            codigo_eol=escola.codigo_eol,
+            data_inicio=inicio,
+            data_fim=fim,
+            tipo_turno=3,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao buscar por turno TARDE para escola {escola} : {str(e)}")
+    return None
+
+
+def _consulta_dias_letivos_noturno(escola, inicio: str, fim: str):
+    from src.escola.services import NovoSGPServico
+
+    try:
+        return NovoSGPServico.dias_letivos(
+            codigo_eol=escola.codigo_eol,
+            data_inicio=inicio,
+            data_fim=fim,
+            tipo_turno=5,
+        )
+    except Exception as e:
+        logger.error(f"Erro ao buscar por turno NOITE para escola {escola} : {str(e)}")
+    return None
 
 
 def dias_letivos_gerais(escola, inicio: str, fim: str) -> None:
@@ -291,38 +651,18 @@ def dias_letivos_gerais(escola, inicio: str, fim: str) -> None:
     Consulta e processa os dias letivos gerais (turno da manhã como padrão) para uma escola.
 
     Esta função consulta o NovoSGPServico para obter os dias letivos no intervalo
-    fornecido, considerando período específico (uso padrão 1 - MANHA). Em seguida,
-    envia o resultado para o processador de dias letivos.
+    fornecido, considerando período específico (uso padrão 1 - MANHA, com o turno
+    da tarde como alternativa). Em seguida, envia o resultado para o processador
+    de dias letivos.
 
     Args:
         escola (models.Escola): Instância da escola para a qual os dias letivos serão consultados.
         inicio (str): Data inicial do intervalo no formato "YYYY-MM-DD".
         fim (str): Data final do intervalo no formato "YYYY-MM-DD".
     """
-    from src.escola.services import NovoSGPServico
-
-    try:
-        geral = NovoSGPServico.dias_letivos(
-            codigo_eol=escola.codigo_eol,
-            data_inicio=inicio,
-            data_fim=fim,
-        )
-        processa_dias_letivos(geral, escola)
-    except Exception as e:
-        logger.error(f"Erro ao buscar por turno MANHA para escola {escola} : {str(e)}")
-        logger.debug("Tentando buscar dias letivos no novo sgp para turno da tarde")
-        try:
-            resposta = NovoSGPServico.dias_letivos(
-                codigo_eol=escola.codigo_eol,
-                data_inicio=inicio,
-                data_fim=fim,
-                tipo_turno=3,
-            )
-            processa_dias_letivos(resposta, escola)
-        except Exception as e:
-            logger.error(
-                f"Erro ao buscar por turno TARDE para escola {escola} : {str(e)}"
-            )
+    resposta = _consulta_dias_letivos_gerais(escola, inicio, fim)
+    if resposta is not None:
+        processa_dias_letivos(resposta, escola)
 
 
 def dias_letivos_noturno(escola, inicio: str, fim: str, periodo_noite):
@@ -342,60 +682,130 @@ def dias_letivos_noturno(escola, inicio: str, fim: str, periodo_noite):
         periodo_noite (models.PeriodoEscolar): Objeto do período "NOITE" previamente consultado.
     """
     from src.escola.models import AlunosMatriculadosPeriodoEscola
-    from src.escola.services import NovoSGPServico
 
     try:
         aluno_noite = AlunosMatriculadosPeriodoEscola.objects.get(
             escola=escola, periodo_escolar=periodo_noite, tipo_turma="REGULAR"
         )
-
-        if aluno_noite.quantidade_alunos == 0:
-            logger.debug("Escola possui período NOITE, mas sem alunos.")
-            return
-
-        periodo = NovoSGPServico.dias_letivos(
-            codigo_eol=escola.codigo_eol,
-            data_inicio=inicio,
-            data_fim=fim,
-            tipo_turno=5,
-        )
-        processa_dias_letivos(periodo, escola, periodo_escolar=periodo_noite)
-
     except AlunosMatriculadosPeriodoEscola.DoesNotExist:
         logger.debug("Escola sem período NOITE cadastrado.")
+        return
     except Exception as e:
         logger.error(f"Erro ao buscar por turno NOITE para escola {escola} : {str(e)}")
+        return
+
+    if aluno_noite.quantidade_alunos == 0:
+        logger.debug("Escola possui período NOITE, mas sem alunos.")
+        return
+
+    resposta = _consulta_dias_letivos_noturno(escola, inicio, fim)
+    if resposta is not None:
+        processa_dias_letivos(resposta, escola, periodo_escolar=periodo_noite)
+
+
+def _consulta_calendario_escola(escola, inicio: str, fim: str, consulta_noite: bool):
+    """Respostas do SGP (geral e noturno) de uma escola; roda fora da thread principal."""
+    geral = _consulta_dias_letivos_gerais(escola, inicio, fim)
+    noturno = (
+        _consulta_dias_letivos_noturno(escola, inicio, fim) if consulta_noite else None
+    )
+    return geral, noturno
+
 
+def _grava_calendario_lote(escolas, respostas, periodo_noite) -> int:
+    """Processa as respostas do SGP das escolas do lote e grava os dias de uma vez."""
+    with lote_dias_calendario() as lote:
+        for escola, (geral, noturno) in zip(escolas, respostas):
+            try:
+                if geral is not None:
+                    processa_dias_letivos(geral, escola)
+                if noturno is not None:
+                    processa_dias_letivos(
+                        noturno, escola, periodo_escolar=periodo_noite
+                    )
+            except Exception as e:
+                logger.error(f"Erro ao buscar dados para escola {escola} : {str(e)}")
+        return lote.salva()
+
+
+def calendario_sgp(data_inicio=None, lista_escolas=None) -> dict:
+    """
+    Sincroniza o calendário (`DiaCalendario`) das escolas com o SGP para os três
+    meses a partir de `data_inicio` (hoje, por padrão).
 
-def calendario_sgp(data_inicio=date.today(), lista_escolas=None):
+    As escolas são processadas em lotes de `CALENDARIO_SGP_ESCOLAS_POR_LOTE`: as
+    consultas ao SGP de cada lote rodam em paralelo
+    (`CALENDARIO_SGP_CONSULTAS_SIMULTANEAS`) e os dias retornados são gravados
+    de uma vez ao fim do lote. O período NOITE só é consultado para escolas com
+    alunos matriculados nele.
 
+    Retorna o resumo da execução: escolas, dias criados ou alterados e segundos.
+    """
     import pandas as pd
 
-    from src.escola.models import Escola, PeriodoEscolar
+    from src.escola.models import (
+        AlunosMatriculadosPeriodoEscola,
+        Escola,
+        PeriodoEscolar,
+    )
 
-    escolas = (
+    inicio_execucao = time.monotonic()
+    data_inicio = data_inicio or date.today()
+    escolas = list(
         Escola.objects.filter(nome__in=lista_escolas)
         if lista_escolas
         else Escola.objects.all()
     )
 
     total = len(escolas)
-    data_fim = None
     data_inicio_formatada = data_inicio.strftime("%Y-%m-%d")
+    data_fim = (data_inicio + pd.DateOffset(months=3)).date().strftime("%Y-%m-%d")
     periodo_noite = PeriodoEscolar.objects.get(nome="NOITE")
-    for cont, escola in enumerate(escolas, 1):
-        logger.debug(f"Processando {cont} de {total}")
-        logger.debug(f"""Consultando dias letivos da escola com Nome: {escola.nome}
-        e código eol: {escola.codigo_eol}, data: {data_inicio_formatada}""")
-        try:
-            data_final = (data_inicio + pd.DateOffset(months=3)).date()
-            data_fim = data_final.strftime("%Y-%m-%d")
+    escolas_com_alunos_noite = set(
+        AlunosMatriculadosPeriodoEscola.objects.filter(
+            periodo_escolar=periodo_noite,
+            tipo_turma="REGULAR",
+            quantidade_alunos__gt=0,
+        ).values_list("escola_id", flat=True)
+    )
+
+    def consulta(escola):
+        return _consulta_calendario_escola(
+            escola,
+            data_inicio_formatada,
+            data_fim,
+            escola.id in escolas_com_alunos_noite,
+        )
 
-            dias_letivos_gerais(escola, data_inicio_formatada, data_fim)
-            dias_letivos_noturno(escola, data_inicio_formatada, data_fim, periodo_noite)
+    dias_alterados = 0
+    tamanho_lote = settings.CALENDARIO_SGP_ESCOLAS_POR_LOTE
+    with ThreadPoolExecutor(
+        max_workers=settings.CALENDARIO_SGP_CONSULTAS_SIMULTANEAS
+    ) as executor:
+        for posicao in range(0, total, tamanho_lote):
+            escolas_lote = escolas[posicao : posicao + tamanho_lote]
+            try:
+                dias_alterados += _grava_calendario_lote(
+                    escolas_lote, executor.map(consulta, escolas_lote), periodo_noite
+                )
+            except Exception as e:
+                logger.error(
+                    f"Erro ao gravar o calendário das escolas {posicao + 1} a "
+                    f"{posicao + len(escolas_lote)} : {str(e)}"
+                )
+            logger.debug(f"Processadas {posicao + len(escolas_lote)} de {total}")
 
-        except Exception as e:
-            logger.error(f"Erro ao buscar dados para escola {escola} : {str(e)}")
+    resumo = {
+        "escolas": total,
+        "dias_alterados": dias_alterados,
+        "segundos": round(time.monotonic() - inicio_execucao, 1),
+    }
+    logger.info(
+        f"Calendário SGP sincronizado: {resumo['escolas']} escolas, "
+        f"{resumo['dias_alterados']} dias criados ou alterados em "
+        f"{resumo['segundos']}s"
+    )
+    return resumo
 
 
 class EscolaSimplissimaPagination(PageNumberPagination):
@@ -982,7 +1392,7 @@ def duplica_logs_ultimo_dia_letivo(tipo_turma, data_referencia=None):
         if hoje != escola.ultimo_dia_letivo:
             continue
         logs_da_escola = escola.logs_alunos_matriculados_por_periodo.filter(
-            criado_em__date=ontem, tipo_turma=tipo_turma.name
+            data=ontem, tipo_turma=tipo_turma.name
         )
         for log in logs_da_escola:
             novo_log = LogAlunosMatriculadosPeriodoEscola.objects.create(
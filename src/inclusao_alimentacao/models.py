@@ -180,13 +180,15 @@ class InclusaoAlimentacaoContinua(
     def inclusoes(self):
         return self.quantidades_por_periodo
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CONTINUA
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CONTINUA,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -429,13 +431,15 @@ class GrupoInclusaoAlimentacaoNormal(
             ).values_list("observacao", flat=True)
         )
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_NORMAL
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_NORMAL,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -685,13 +689,15 @@ class InclusaoAlimentacaoDaCEI(
         )
         return alimentacao_normal
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CEI
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CEI,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -962,13 +968,15 @@ class InclusaoDeAlimentacaoCEMEI(
     def inclusoes(self):
         return self.dias_motivos_da_inclusao_cemei
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CEMEI
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.INCLUSAO_ALIMENTACAO_CEMEI,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -4,6 +4,8 @@ from django.utils.functional import SimpleLazyObject
 from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken
 
+from src.perfil.identidade import identidades_do_request, usuario_do_request
+
 
 class JWTAuthenticationMiddleware:
     def __init__(self, get_response):
@@ -12,7 +14,9 @@ class JWTAuthenticationMiddleware:
 
     def __call__(self, request):
         request.user = SimpleLazyObject(lambda: self.get_jwt_user(request))
-        return self.get_response(request)
+        # vinculo_atual/tipo_usuario são resolvidos uma única vez por request
+        with identidades_do_request(), usuario_do_request(request.user):
+            return self.get_response(request)
 
     def get_jwt_user(self, request):
         user = get_user(request)
@@ -6,6 +6,10 @@ from model_bakery import baker
 from xworkflows import InvalidTransitionError
 
 from ...dados_comuns.behaviors import TempoPasseio
+from ...dados_comuns.calendario_prioridade import (
+    calcula_limites,
+    calendario_prioridade,
+)
 
 pytestmark = pytest.mark.django_db
 
@@ -310,6 +314,22 @@ def test_tageamento_prioridade_caso2(kits_avulsos_parametros2, escola):
     assert kit_lanche_avulso.prioridade == esperado
 
 
+@freeze_time("2019-12-20")
+def test_tageamento_prioridade_com_calendario(kits_avulsos_parametros2, escola):
+    data_tupla, esperado = kits_avulsos_parametros2
+    kit_lanche_base = baker.make("SolicitacaoKitLanche", data=data_tupla)
+    kit_lanche_avulso = baker.make(
+        "SolicitacaoKitLancheAvulsa",
+        escola=escola,
+        solicitacao_kit_lanche=kit_lanche_base,
+    )
+    with calendario_prioridade() as calendario:
+        assert kit_lanche_avulso.prioridade == esperado
+        assert calendario.limites(kit_lanche_avulso) == calcula_limites(
+            calendario.hoje, kit_lanche_avulso.get_dias_suspensao_por_prioridade()
+        )
+
+
 def test_escola_quantidade(escola_quantidade):
     kit_lanche_personalizado = bool(escola_quantidade.kits.count())
     tempo_passeio = escola_quantidade.get_tempo_passeio_display()
@@ -150,13 +150,15 @@ class SolicitacaoKitLancheAvulsaBase(
     def data(self):
         return self.solicitacao_kit_lanche.data
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_AVULSA
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_AVULSA,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -464,13 +466,15 @@ class SolicitacaoKitLancheUnificada(
         )
         return solicitacoes_unificadas
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_UNIFICADA
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_UNIFICADA,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -745,13 +749,15 @@ class SolicitacaoKitLancheCEMEI(
     def quantidade_alimentacoes(self):
         return self.total_kits
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_CEMEI
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.SOLICITACAO_KIT_LANCHE_CEMEI,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -22,8 +22,10 @@ from src.dados_comuns.fluxo_status import (
     GuiaRemessaWorkFlow,
     NotificacaoOcorrenciaWorkflow,
     SolicitacaoRemessaWorkFlow,
+    transiciona_em_massa,
 )
 from src.dados_comuns.models import LogSolicitacoesUsuario
+from src.dados_comuns.outbox import registra_chamada_papa
 from src.dados_comuns.parser_xml import ListXMLParser
 from src.dados_comuns.permissions import (
     PermissaoParaCriarNotificacaoDeGuiasComOcorrencias,
@@ -38,7 +40,6 @@ from src.dados_comuns.permissions import (
     UsuarioEscolaAbastecimento,
     ViewSetActionPermissionMixin,
 )
-from src.eol_servico.utils import EOLPapaService
 from src.logistica.api.serializers.serializer_create import (
     ConferenciaComOcorrenciaCreateSerializer,
     ConferenciaDaGuiaCreateSerializer,
@@ -135,14 +136,15 @@ class SolicitacaoEnvioEmMassaModelViewSet(viewsets.ModelViewSet):
         solicitacoes = SolicitacaoRemessa.objects.filter(
             uuid__in=solicitacoes, status=SolicitacaoRemessaWorkFlow.AGUARDANDO_ENVIO
         )
-        for solicitacao in solicitacoes:
-            try:
-                solicitacao.inicia_fluxo(user=usuario)
-            except InvalidTransitionError as e:
-                return Response(
-                    dict(detail=f"Erro de transição de estado: {e}"),
-                    status=HTTP_400_BAD_REQUEST,
-                )
+        try:
+            solicitacoes = transiciona_em_massa(
+                solicitacoes, "inicia_fluxo", usuario=usuario
+            )
+        except InvalidTransitionError as e:
+            return Response(
+                dict(detail=f"Erro de transição de estado: {e}"),
+                status=HTTP_400_BAD_REQUEST,
+            )
         serializer = SolicitacaoRemessaSerializer(solicitacoes, many=True)
         return Response(serializer.data)
 
@@ -549,7 +551,8 @@ class SolicitacaoModelViewSet(viewsets.ModelViewSet):
             )
             serializer = SolicitacaoRemessaSerializer(solicitacao)
             if settings.DEBUG is not True:
-                EOLPapaService.confirmacao_de_envio(
+                registra_chamada_papa(
+                    "confirmacao_de_envio",
                     cnpj=solicitacao.cnpj,
                     numero_solicitacao=solicitacao.numero_solicitacao,
                     sequencia_envio=solicitacao.sequencia_envio,
@@ -581,7 +584,8 @@ class SolicitacaoModelViewSet(viewsets.ModelViewSet):
                     user=usuario,
                 )
                 if settings.DEBUG is not True:
-                    EOLPapaService.confirmacao_de_envio(
+                    registra_chamada_papa(
+                        "confirmacao_de_envio",
                         cnpj=solicitacao.cnpj,
                         numero_solicitacao=solicitacao.numero_solicitacao,
                         sequencia_envio=solicitacao.sequencia_envio,
@@ -139,13 +139,15 @@ class Guia(ModeloBase, FluxoGuiaRemessa):
     def as_dict(self):
         return dict((f.name, getattr(self, f.name)) for f in self._meta.fields)
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.SOLICITACAO_REMESSA_PAPA
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         log_transicao = LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.SOLICITACAO_REMESSA_PAPA,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -61,13 +61,15 @@ class SolicitacaoRemessa(
 
     objects = SolicitacaoRemessaManager()
 
+    TIPO_SOLICITACAO_LOG = LogSolicitacoesUsuario.SOLICITACAO_REMESSA_PAPA
+
     def salvar_log_transicao(self, status_evento, usuario, **kwargs):
         justificativa = kwargs.get("justificativa", "")
         resposta_sim_nao = kwargs.get("resposta_sim_nao", False)
         log_transicao = LogSolicitacoesUsuario.objects.create(
             descricao=str(self),
             status_evento=status_evento,
-            solicitacao_tipo=LogSolicitacoesUsuario.SOLICITACAO_REMESSA_PAPA,
+            solicitacao_tipo=self.TIPO_SOLICITACAO_LOG,
             usuario=usuario,
             uuid_original=self.uuid,
             justificativa=justificativa,
@@ -8,10 +8,11 @@ from xworkflows.base import InvalidTransitionError
 
 from src.dados_comuns.fluxo_status import GuiaRemessaWorkFlow as GuiaStatus
 from src.dados_comuns.fluxo_status import SolicitacaoRemessaWorkFlow as Solicitacaotatus
-from src.eol_servico.utils import EOLPapaService
+from src.dados_comuns.fluxo_status import transiciona_em_massa
 from src.logistica.models import Guia, SolicitacaoRemessa
 
 from ..dados_comuns.models import LogSolicitacoesUsuario
+from ..dados_comuns.outbox import registra_chamada_papa
 
 
 def inativa_tipos_de_embabalagem(queryset):
@@ -25,8 +26,7 @@ def confirma_guias(solicitacao, user):
         solicitacao=solicitacao, status=GuiaStatus.AGUARDANDO_CONFIRMACAO
     )
     try:
-        for guia in guias:
-            guia.distribuidor_confirma_guia(user=user)
+        transiciona_em_massa(guias, "distribuidor_confirma_guia", usuario=user)
     except InvalidTransitionError as e:
         return Response(
             dict(detail=f"Erro de transição de estado: {e}"),
@@ -131,7 +131,8 @@ def confirma_cancelamento(numero_requisicao, guias, user):  # noqa C901
         # Envia confirmação para o papa
         if not settings.DEBUG:
             for solicitacao in solicitacoes_de_cancelamento:
-                EOLPapaService.confirmacao_de_cancelamento(
+                registra_chamada_papa(
+                    "confirmacao_de_cancelamento",
                     cnpj=solicitacao.requisicao.cnpj,
                     numero_solicitacao=solicitacao.requisicao.numero_solicitacao,
                     sequencia_envio=solicitacao.sequencia_envio,
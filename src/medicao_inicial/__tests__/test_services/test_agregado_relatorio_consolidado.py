@@ -0,0 +1,91 @@
+import pytest
+
+from src.medicao_inicial.services import (
+    relatorio_consolidado_cei,
+    relatorio_consolidado_cemei,
+    relatorio_consolidado_emebs,
+    relatorio_consolidado_emei_emef,
+    relatorio_consolidado_recreio_emei_emef,
+)
+from src.medicao_inicial.services.agregado_relatorio_consolidado import (
+    agregado_relatorio_consolidado,
+    get_agregado_relatorio_consolidado,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def _linhas_com_e_sem_agregado(modulo, solicitacoes, *parametros, query_params=None):
+    colunas = modulo.get_alimentacoes_por_periodo(
+        solicitacoes, query_params=query_params
+    )
+    sem_agregado = modulo.get_valores_tabela(
+        solicitacoes, colunas, *parametros, query_params=query_params
+    )
+    with agregado_relatorio_consolidado(solicitacoes, query_params):
+        com_agregado = modulo.get_valores_tabela(
+            solicitacoes, colunas, *parametros, query_params=query_params
+        )
+    return sem_agregado, com_agregado
+
+
+def test_agregado_emef_igual_as_consultas(relatorio_consolidado_xlsx_emef):
+    sem_agregado, com_agregado = _linhas_com_e_sem_agregado(
+        relatorio_consolidado_emei_emef, [relatorio_consolidado_xlsx_emef], ["EMEF"]
+    )
+    assert com_agregado == sem_agregado
+
+
+def test_agregado_emef_com_intervalo_de_dias(relatorio_consolidado_xlsx_emef):
+    query_params = {
+        "data_inicial": f"{relatorio_consolidado_xlsx_emef.ano}-"
+        f"{relatorio_consolidado_xlsx_emef.mes}-02",
+        "data_final": f"{relatorio_consolidado_xlsx_emef.ano}-"
+        f"{relatorio_consolidado_xlsx_emef.mes}-04",
+    }
+    sem_agregado, com_agregado = _linhas_com_e_sem_agregado(
+        relatorio_consolidado_emei_emef,
+        [relatorio_consolidado_xlsx_emef],
+        ["EMEF"],
+        query_params=query_params,
+    )
+    assert com_agregado == sem_agregado
+
+
+def test_agregado_cei_cemei_emebs_iguais_as_consultas(
+    relatorio_consolidado_xlsx_cei,
+    relatorio_consolidado_xlsx_cemei,
+    relatorio_consolidado_xlsx_emebs,
+):
+    for modulo, solicitacao, parametros in [
+        (relatorio_consolidado_cei, relatorio_consolidado_xlsx_cei, [["CEI"]]),
+        (relatorio_consolidado_cemei, relatorio_consolidado_xlsx_cemei, []),
+        (relatorio_consolidado_emebs, relatorio_consolidado_xlsx_emebs, []),
+    ]:
+        sem_agregado, com_agregado = _linhas_com_e_sem_agregado(
+            modulo, [solicitacao], *parametros
+        )
+        assert com_agregado == sem_agregado
+
+
+def test_agregado_recreio_emef_igual_as_consultas(solicitacao_recreio_emef):
+    sem_agregado, com_agregado = _linhas_com_e_sem_agregado(
+        relatorio_consolidado_recreio_emei_emef,
+        [solicitacao_recreio_emef],
+        ["EMEF"],
+        query_params={},
+    )
+    assert com_agregado == sem_agregado
+
+
+def test_agregado_consultas_nao_dependem_das_colunas(
+    relatorio_consolidado_xlsx_emei, django_assert_max_num_queries
+):
+    solicitacoes = [relatorio_consolidado_xlsx_emei]
+    colunas = relatorio_consolidado_emei_emef.get_alimentacoes_por_periodo(solicitacoes)
+    with agregado_relatorio_consolidado(solicitacoes):
+        with django_assert_max_num_queries(20):
+            relatorio_consolidado_emei_emef.get_valores_tabela(
+                solicitacoes, colunas * 5, ["EMEI"]
+            )
+    assert get_agregado_relatorio_consolidado() is None
@@ -0,0 +1,76 @@
+import pytest
+
+from src.medicao_inicial.management.commands.benchmark_validacao_medicao import (
+    executa_validadores,
+)
+from src.medicao_inicial.services.contexto_validacao_medicao import (
+    contexto_validacao_medicao,
+    get_contexto_validacao_medicao,
+)
+from src.medicao_inicial.validators import (
+    validate_lancamento_alimentacoes_medicao,
+    validate_lancamento_alimentacoes_medicao_emebs,
+    validate_lancamento_inclusoes,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_contexto_validacao_medicao_ativo_apenas_no_contexto(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    assert get_contexto_validacao_medicao(solicitacao) is None
+    with contexto_validacao_medicao(solicitacao) as contexto:
+        assert get_contexto_validacao_medicao(solicitacao) is contexto
+        with contexto_validacao_medicao(solicitacao) as contexto_aninhado:
+            assert contexto_aninhado is contexto
+    assert get_contexto_validacao_medicao(solicitacao) is None
+
+
+def test_contexto_validacao_medicao_valores_medicao_campos(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    medicao = solicitacao.medicoes.first()
+    campos = ("nome_campo", "categoria_medicao")
+    esperado = set(medicao.valores_medicao.values_list(*campos))
+    with contexto_validacao_medicao(solicitacao) as contexto:
+        obtido = contexto.valores_medicao_campos(
+            medicao.id, ("nome_campo", "categoria_medicao_id")
+        )
+    assert set(obtido) == esperado
+
+
+def test_validadores_com_contexto_iguais_aos_sem_contexto(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    sem_contexto = validate_lancamento_inclusoes(
+        solicitacao, validate_lancamento_alimentacoes_medicao(solicitacao, [])
+    )
+    with contexto_validacao_medicao(solicitacao):
+        com_contexto = validate_lancamento_inclusoes(
+            solicitacao, validate_lancamento_alimentacoes_medicao(solicitacao, [])
+        )
+    assert com_contexto == sem_contexto
+
+
+def test_validadores_emebs_com_contexto_iguais_aos_sem_contexto(
+    solicitacao_medicao_inicial_varios_valores_emebs,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores_emebs
+    sem_contexto = validate_lancamento_alimentacoes_medicao_emebs(solicitacao, [])
+    with contexto_validacao_medicao(solicitacao):
+        com_contexto = validate_lancamento_alimentacoes_medicao_emebs(solicitacao, [])
+    assert com_contexto == sem_contexto
+
+
+def test_executa_validadores_com_contexto_igual_ao_sem_contexto(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    sem_contexto = executa_validadores(solicitacao)
+    with contexto_validacao_medicao(solicitacao):
+        com_contexto = executa_validadores(solicitacao)
+    assert com_contexto == sem_contexto
@@ -0,0 +1,93 @@
+import copy
+
+import pytest
+
+from src.medicao_inicial.services.indice_relatorio_medicao import (
+    get_indice_relatorio_medicao,
+    indice_relatorio_medicao,
+)
+from src.medicao_inicial.utils import (
+    build_headers_tabelas,
+    build_headers_tabelas_emebs,
+    build_tabelas_relatorio_medicao,
+    popula_tabelas,
+    popula_tabelas_emebs,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def test_indice_relatorio_medicao_ativo_apenas_no_contexto(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    assert get_indice_relatorio_medicao(solicitacao) is None
+    with indice_relatorio_medicao(solicitacao) as indice:
+        assert get_indice_relatorio_medicao(solicitacao) is indice
+        with indice_relatorio_medicao(solicitacao) as indice_aninhado:
+            assert indice_aninhado is indice
+    assert get_indice_relatorio_medicao(solicitacao) is None
+
+
+def test_indice_relatorio_medicao_valores(solicitacao_medicao_inicial_varios_valores):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    with indice_relatorio_medicao(solicitacao) as indice:
+        medicao = indice.medicao_por_periodo("MANHA")
+        valores = indice.valores(medicao, "ALIMENTAÇÃO", "lanche", dia=1)
+        esperados = medicao.valores_medicao.filter(
+            dia="01", categoria_medicao__nome="ALIMENTAÇÃO", nome_campo="lanche"
+        ).order_by("id")
+        assert [v["valor"] for v in valores] == [v.valor for v in esperados]
+
+
+def test_indice_relatorio_medicao_valores_do_dia_todas_categorias(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    with indice_relatorio_medicao(solicitacao) as indice:
+        medicao = indice.medicao_por_periodo("MANHA")
+        valores = indice.valores_do_dia_todas_categorias(medicao, "lanche", 1)
+        esperados = medicao.valores_medicao.filter(
+            dia="01", nome_campo="lanche"
+        ).order_by("id")
+        assert [v["id"] for v in valores] == [v.id for v in esperados]
+
+
+def test_popula_tabelas_com_indice_igual_ao_sem_indice(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    headers = build_headers_tabelas(solicitacao)
+    sem_indice = popula_tabelas(solicitacao, copy.deepcopy(headers))
+    with indice_relatorio_medicao(solicitacao):
+        com_indice = popula_tabelas(solicitacao, copy.deepcopy(headers))
+    assert com_indice == sem_indice
+
+
+def test_popula_tabelas_emebs_com_indice_igual_ao_sem_indice(
+    solicitacao_medicao_inicial_varios_valores_emebs,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores_emebs
+    headers = build_headers_tabelas_emebs(solicitacao)
+    sem_indice = popula_tabelas_emebs(solicitacao, copy.deepcopy(headers))
+    with indice_relatorio_medicao(solicitacao):
+        com_indice = popula_tabelas_emebs(solicitacao, copy.deepcopy(headers))
+    assert com_indice == sem_indice
+
+
+def test_popula_tabelas_com_indice_numero_de_consultas_fixo(
+    solicitacao_medicao_inicial_varios_valores, django_assert_max_num_queries
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    headers = build_headers_tabelas(solicitacao)
+    with django_assert_max_num_queries(30):
+        with indice_relatorio_medicao(solicitacao):
+            popula_tabelas(solicitacao, headers)
+
+
+def test_build_tabelas_relatorio_medicao_remove_indice(
+    solicitacao_medicao_inicial_varios_valores,
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    build_tabelas_relatorio_medicao(solicitacao)
+    assert get_indice_relatorio_medicao(solicitacao) is None
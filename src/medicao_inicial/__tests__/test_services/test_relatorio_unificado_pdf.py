@@ -0,0 +1,90 @@
+from io import BytesIO
+
+import pytest
+from django.core.files.storage import default_storage
+from model_bakery import baker
+from pypdf import PdfReader, PdfWriter
+
+from src.dados_comuns.models import CentralDeDownload
+from src.medicao_inicial.services.relatorio_unificado_pdf import (
+    copia_pdfs_parciais,
+    cria_prefixo_parciais,
+    grava_pdf_parcial,
+    mescla_pdfs,
+    remove_pdfs_parciais,
+)
+from src.medicao_inicial.tasks import gera_pdf_relatorio_unificado_async
+
+
+def _pdf(largura):
+    buffer = BytesIO()
+    writer = PdfWriter()
+    writer.add_blank_page(width=largura, height=100)
+    writer.write(buffer)
+    return buffer.getvalue()
+
+
+@pytest.fixture
+def media_root(settings, tmp_path):
+    settings.MEDIA_ROOT = str(tmp_path / "media")
+    return settings.MEDIA_ROOT
+
+
+@pytest.mark.parametrize("tamanho_lote", [50, 2])
+def test_mescla_pdfs_preserva_ordem(media_root, tmp_path, tamanho_lote):
+    prefixo = cria_prefixo_parciais()
+    parciais = [
+        grava_pdf_parcial(prefixo, posicao, _pdf(100 + posicao)) for posicao in range(5)
+    ]
+    caminhos = copia_pdfs_parciais(parciais, str(tmp_path))
+    destino = f"{tmp_path}/final.pdf"
+
+    mescla_pdfs(caminhos, destino, tamanho_lote=tamanho_lote)
+
+    paginas = PdfReader(destino).pages
+    assert [int(pagina.mediabox.width) for pagina in paginas] == [
+        100,
+        101,
+        102,
+        103,
+        104,
+    ]
+
+
+def test_pdfs_parciais_gravados_no_storage(media_root, tmp_path):
+    prefixo = cria_prefixo_parciais()
+    parciais = [grava_pdf_parcial(prefixo, posicao, _pdf(100)) for posicao in range(2)]
+
+    assert all(default_storage.exists(nome) for nome in parciais)
+    assert all(nome.startswith(f"{prefixo}/") for nome in parciais)
+
+    remove_pdfs_parciais(parciais)
+
+    assert not any(default_storage.exists(nome) for nome in parciais)
+
+
+@pytest.mark.django_db
+def test_gera_pdf_relatorio_unificado_async_registra_progresso(
+    solicitacoes_cei_relatorio_unificado, usuario, pdf_real_monkeypatch
+):
+    ids = [s.uuid for s in solicitacoes_cei_relatorio_unificado]
+    tipos = ["CCI", "CCI/CIPS", "CEI", "CEI CEU", "CEI DIRET", "CEU CEI"]
+
+    gera_pdf_relatorio_unificado_async(
+        user=usuario.get_username(),
+        nome_arquivo="relatorio_unificado.pdf",
+        ids_solicitacoes=ids,
+        tipos_de_unidade=tipos,
+    )
+
+    registro = CentralDeDownload.objects.get(identificador="relatorio_unificado.pdf")
+    assert registro.status == CentralDeDownload.STATUS_CONCLUIDO
+    assert registro.etapas_total == len(ids) + 1
+    assert registro.progresso == 100
+    assert len(PdfReader(registro.arquivo.open("rb")).pages) == len(ids)
+
+
+def test_progresso_central_download():
+    central = baker.prepare(CentralDeDownload, etapas_total=4, etapas_concluidas=1)
+    assert central.progresso == 25
+    assert baker.prepare(CentralDeDownload).progresso is None
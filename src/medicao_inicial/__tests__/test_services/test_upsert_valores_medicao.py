@@ -0,0 +1,94 @@
+import pytest
+
+from src.medicao_inicial.models import ValorMedicao
+from src.medicao_inicial.services.upsert_valores_medicao import (
+    insere_valores_medicao_ausentes,
+    salva_valores_medicao,
+)
+
+pytestmark = pytest.mark.django_db
+
+
+def _valor_medicao(medicao, categoria, dia, valor, nome_campo="lanche_4h"):
+    return ValorMedicao(
+        medicao=medicao,
+        categoria_medicao=categoria,
+        dia=dia,
+        nome_campo=nome_campo,
+        valor=valor,
+    )
+
+
+def test_salva_valores_medicao_insere_e_atualiza(
+    solicitacao_medicao_inicial_varios_valores, categoria_medicao
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    medicao = solicitacao.medicoes.first()
+
+    salva_valores_medicao(
+        solicitacao,
+        [
+            _valor_medicao(medicao, categoria_medicao, "01", "5"),
+            _valor_medicao(medicao, categoria_medicao, "02", "7"),
+        ],
+    )
+    salva_valores_medicao(
+        solicitacao, [_valor_medicao(medicao, categoria_medicao, "01", "9")]
+    )
+
+    valores = medicao.valores_medicao.filter(nome_campo="lanche_4h").order_by("dia")
+    assert [(v.dia, v.valor) for v in valores] == [("01", "9"), ("02", "7")]
+    assert valores[0].semana == str(
+        ValorMedicao.get_week_of_month(int(solicitacao.ano), int(solicitacao.mes), 1)
+    )
+
+
+def test_salva_valores_medicao_ultima_ocorrencia_prevalece(
+    solicitacao_medicao_inicial_varios_valores, categoria_medicao
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    medicao = solicitacao.medicoes.first()
+
+    salva_valores_medicao(
+        solicitacao,
+        [
+            _valor_medicao(medicao, categoria_medicao, "03", "1"),
+            _valor_medicao(medicao, categoria_medicao, "03", "2"),
+        ],
+    )
+
+    valores = medicao.valores_medicao.filter(nome_campo="lanche_4h", dia="03")
+    assert valores.count() == 1
+    assert valores.get().valor == "2"
+
+
+def test_insere_valores_medicao_ausentes_mantem_existentes(
+    solicitacao_medicao_inicial_varios_valores, categoria_medicao
+):
+    solicitacao = solicitacao_medicao_inicial_varios_valores
+    medicao = solicitacao.medicoes.first()
+    existente = medicao.valores_medicao.get(
+        categoria_medicao=categoria_medicao, dia="01", nome_campo="lanche"
+    )
+
+    insere_valores_medicao_ausentes(
+        solicitacao,
+        [
+            _valor_medicao(medicao, categoria_medicao, "01", "99", "lanche"),
+            _valor_medicao(medicao, categoria_medicao, "06", "99", "lanche"),
+        ],
+    )
+
+    existente.refresh_from_db()
+    assert existente.valor == "10"
+    novo = medicao.valores_medicao.get(
+        categoria_medicao=categoria_medicao, dia="06", nome_campo="lanche"
+    )
+    assert novo.valor == "99"
+
+
+def test_get_weeks_of_month_igual_a_get_week_of_month():
+    semanas = ValorMedicao.get_weeks_of_month(2023, 12)
+    assert len(semanas) == 31
+    for dia, semana in semanas.items():
+        assert semana == str(ValorMedicao.get_week_of_month(2023, 12, dia))
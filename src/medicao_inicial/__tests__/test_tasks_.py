@@ -8,7 +8,7 @@ from django.http import QueryDict
 from django.test import TestCase
 from freezegun import freeze_time
 from model_bakery import baker
-from pypdf import PdfWriter
+from pypdf import PdfReader, PdfWriter
 
 from src.dados_comuns.models import CentralDeDownload, LogSolicitacoesUsuario
 from src.escola.models import (
@@ -19,6 +19,9 @@ from src.escola.models import (
 )
 from src.medicao_inicial.models import Responsavel, SolicitacaoMedicaoInicial
 from src.medicao_inicial.services.relatorio_adesao import obtem_resultados
+from src.medicao_inicial.services.relatorio_unificado_pdf import (
+    cria_prefixo_parciais,
+)
 from src.medicao_inicial.tasks import (
     buscar_solicitacao_mes_anterior,
     copiar_alunos_periodo_parcial,
@@ -30,10 +33,11 @@ from src.medicao_inicial.tasks import (
     exporta_relatorio_consolidado_xlsx,
     exporta_relatorio_controle_frequencia_para_pdf,
     exporta_relatorio_historico_correcoes_pdf,
+    finaliza_pdf_relatorio_unificado_async,
+    gera_pdf_parcial_relatorio_unificado_async,
     gera_pdf_relatorio_financeiro_consolidado_async,
     gera_pdf_relatorio_solicitacao_medicao_por_escola_async,
     gera_pdf_relatorio_unificado_async,
-    processa_relatorio_lançamentos,
     solicitacao_medicao_atual_existe,
 )
 from src.perfil.models.usuario import Usuario
@@ -552,36 +556,57 @@ def test_gera_pdf_relatorio_unificado_async_cei_exception(
     assert registro.arquivo is not None
 
 
+def _gera_relatorio_unificado_em_partes(ids, tipos, central, contem_recreio=False):
+    prefixo = cria_prefixo_parciais()
+    parciais = [
+        gera_pdf_parcial_relatorio_unificado_async(
+            str(uuid), tipos, contem_recreio, prefixo, posicao, central.id
+        )
+        for posicao, uuid in enumerate(ids)
+    ]
+    finaliza_pdf_relatorio_unificado_async(
+        parciais, central.id, "relatorio_unificado.pdf"
+    )
+    central.refresh_from_db()
+    return PdfReader(central.arquivo.open("rb")).pages
+
+
 @pytest.mark.django_db
-def test_processa_relatorio_lancamentos(
+def test_gera_pdf_parcial_relatorio_unificado_async(
     solicitacoes_cei_relatorio_unificado, pdf_real_monkeypatch
 ):
     from model_bakery import baker
 
-    merger = PdfWriter()
     central = baker.make(CentralDeDownload)
 
     ids = [s.uuid for s in solicitacoes_cei_relatorio_unificado]
     tipos = ["CCI", "CCI/CIPS", "CEI", "CEI CEU", "CEI DIRET", "CEU CEI"]
 
-    processa_relatorio_lançamentos(ids, tipos, merger, central)
+    paginas = _gera_relatorio_unificado_em_partes(ids, tipos, central)
 
-    assert len(merger.pages) == len(solicitacoes_cei_relatorio_unificado)
+    assert len(paginas) == len(solicitacoes_cei_relatorio_unificado)
+    assert central.status == CentralDeDownload.STATUS_CONCLUIDO
 
 
 @pytest.mark.django_db
-def test_processa_relatorio_lancamentos_exception(
+def test_gera_pdf_parcial_relatorio_unificado_async_exception(
     solicitacoes_cei_relatorio_unificado, pdf_real_monkeypatch
 ):
     from model_bakery import baker
 
-    merger = PdfWriter()
     central = baker.make(CentralDeDownload)
 
-    ids = [s.uuid for s in solicitacoes_cei_relatorio_unificado]
+    solicitacao = solicitacoes_cei_relatorio_unificado[0]
     tipos = ["Não", "Existe"]
-    with pytest.raises(ValueError, match="Unidades inválidas"):
-        processa_relatorio_lançamentos(ids, tipos, merger, central)
+    parcial = gera_pdf_parcial_relatorio_unificado_async(
+        str(solicitacao.uuid), tipos, False, cria_prefixo_parciais(), 0, central.id
+    )
+
+    central.refresh_from_db()
+    assert parcial is None
+    assert central.status == CentralDeDownload.STATUS_ERRO
+    assert "Unidades inválidas" in central.msg_erro
+    assert central.etapas_concluidas == 1
 
 
 class CriaSolicitacaoMedicaoInicialMesAtualUsuarioAdmin(TestCase):
@@ -947,7 +972,7 @@ def test_gerar_pdf_relatorio_financeiro_async(
 
 
 @pytest.mark.django_db
-def test_processa_relatorio_lancamentos_com_recreio(
+def test_gera_pdf_parcial_relatorio_unificado_async_com_recreio(
     solicitacao_recreio_nas_ferias, monkeypatch
 ):
     from io import BytesIO
@@ -961,7 +986,6 @@ def test_processa_relatorio_lancamentos_com_recreio(
         writer.write(buffer)
         return buffer.getvalue()
 
-    merger = PdfWriter()
     central = baker.make(CentralDeDownload)
     ids = [solicitacao_recreio_nas_ferias.uuid]
     tipos = ["EMEF"]
@@ -971,13 +995,15 @@ def test_processa_relatorio_lancamentos_com_recreio(
         gerar_pdf_fake,
     )
 
-    processa_relatorio_lançamentos(ids, tipos, merger, central, contem_recreio=True)
+    paginas = _gera_relatorio_unificado_em_partes(
+        ids, tipos, central, contem_recreio=True
+    )
 
-    assert len(merger.pages) == 1
+    assert len(paginas) == 1
 
 
 @pytest.mark.django_db
-def test_processa_relatorio_lancamentos_com_recreio_cemei(
+def test_gera_pdf_parcial_relatorio_unificado_async_com_recreio_cemei(
     solicitacao_recreio_cemei, monkeypatch
 ):
     from io import BytesIO
@@ -991,7 +1017,6 @@ def test_processa_relatorio_lancamentos_com_recreio_cemei(
         writer.write(buffer)
         return buffer.getvalue()
 
-    merger = PdfWriter()
     central = baker.make(CentralDeDownload)
     ids = [solicitacao_recreio_cemei.uuid]
     tipos = ["CEMEI"]
@@ -1001,25 +1026,26 @@ def test_processa_relatorio_lancamentos_com_recreio_cemei(
         gerar_pdf_fake,
     )
 
-    processa_relatorio_lançamentos(ids, tipos, merger, central, contem_recreio=True)
+    paginas = _gera_relatorio_unificado_em_partes(
+        ids, tipos, central, contem_recreio=True
+    )
 
-    assert len(merger.pages) == 1
+    assert len(paginas) == 1
 
 
 @pytest.mark.django_db
-def test_processa_relatorio_lancamentos_sem_recreio(
+def test_gera_pdf_parcial_relatorio_unificado_async_sem_recreio(
     solicitacao_recreio_nas_ferias, pdf_real_monkeypatch
 ):
     from model_bakery import baker
 
-    merger = PdfWriter()
     central = baker.make(CentralDeDownload)
     ids = [solicitacao_recreio_nas_ferias.uuid]
     tipos = ["EMEF"]
 
-    processa_relatorio_lançamentos(ids, tipos, merger, central)
+    paginas = _gera_relatorio_unificado_em_partes(ids, tipos, central)
 
-    assert len(merger.pages) == 1
+    assert len(paginas) == 1
 
 
 @pytest.mark.django_db
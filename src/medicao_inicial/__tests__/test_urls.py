@@ -1571,6 +1571,52 @@ def test_url_medicao_escola_corrige_pfom_nao_recebe_403(
     assert response.data["status"] == "MEDICAO_CORRIGIDA_PELA_UE"
 
 
+def test_url_medicao_escola_corrige_reenvio_atualiza_valor_existente(
+    client_autenticado_adm_da_escola,
+    escola,
+    log_alunos_regulares,
+    medicao_status_inicial,
+    monkeypatch,
+):
+    _configura_escola_pfom(escola, TIPOS_UNIDADE_PFOM[0])
+    monkeypatch.setattr(
+        "src.medicao_inicial.api.viewsets.log_alteracoes_escola_corrige_periodo",
+        lambda *args, **kwargs: None,
+    )
+    valor_medicao = medicao_status_inicial.valores_medicao.first()
+    # semana divergente não cria um segundo valor para a mesma chave natural
+    ValorMedicao.objects.filter(id=valor_medicao.id).update(semana="9")
+    quantidade_valores = medicao_status_inicial.valores_medicao.count()
+
+    for valor in ("11", "12"):
+        medicao_status_inicial.status = (
+            medicao_status_inicial.workflow_class.MEDICAO_CORRECAO_SOLICITADA
+        )
+        medicao_status_inicial.save(update_fields=["status"])
+        data = [
+            {
+                "dia": valor_medicao.dia,
+                "nome_campo": valor_medicao.nome_campo,
+                "valor": valor,
+                "categoria_medicao": valor_medicao.categoria_medicao.id,
+                "tipo_alimentacao": str(valor_medicao.tipo_alimentacao.uuid),
+            }
+        ]
+        response = client_autenticado_adm_da_escola.patch(
+            f"/medicao-inicial/medicao/{medicao_status_inicial.uuid}"
+            "/escola-corrige-medicao/",
+            content_type="application/json",
+            data=json.dumps(data),
+        )
+        assert response.status_code == status.HTTP_200_OK
+
+    assert medicao_status_inicial.valores_medicao.count() == quantidade_valores
+    valor_medicao.refresh_from_db()
+    assert valor_medicao.valor == "12"
+    assert valor_medicao.habilitado_correcao is True
+    assert valor_medicao.semana != "9"
+
+
 def test_url_ceu_gestao_frequencias_dietas(
     client_autenticado_da_escola, solicitacao_medicao_inicial_com_grupo
 ):
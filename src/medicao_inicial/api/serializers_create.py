@@ -10,6 +10,7 @@ from rest_framework import serializers
 from rest_framework.exceptions import PermissionDenied
 
 from src.dados_comuns.api.serializers import LogSolicitacoesUsuarioSerializer
+from src.dados_comuns.intervalos import filtro_mes
 from src.dados_comuns.utils import (
     convert_base64_to_contentfile,
     update_instance_from_dict,
@@ -70,6 +71,16 @@ from src.medicao_inicial.recreio_nas_ferias.validators.recreio_emef_emei_ceu_ges
     validate_lancamento_alimentacoes_medicao_recreio,
     validate_lancamento_dietas_medicao_recreio,
 )
+from src.medicao_inicial.services.contexto_validacao_medicao import (
+    contexto_validacao_medicao,
+)
+from src.medicao_inicial.services.indice_relatorio_medicao import (
+    IndiceLogsMatriculados,
+)
+from src.medicao_inicial.services.upsert_valores_medicao import (
+    insere_valores_medicao_ausentes,
+    salva_valores_medicao,
+)
 from src.medicao_inicial.utils import process_anexos_from_request
 from src.perfil.models import Usuario
 from src.terceirizada.models import Contrato, Edital
@@ -468,8 +479,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         escola = instance.escola
         valores_medicao_a_criar = []
         logs_do_mes = escola.logs_alunos_matriculados_por_periodo.filter(
-            criado_em__month=instance.mes,
-            criado_em__year=instance.ano,
+            **filtro_mes("data", instance.ano, instance.mes),
             tipo_turma="REGULAR",
         )
         categoria = CategoriaMedicao.objects.get(nome="ALIMENTAÇÃO")
@@ -479,30 +489,35 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         periodos_escolares = escola.periodos_escolares(
             ano=instance.ano, mes=instance.mes
         ).values_list("nome", flat=True)
+        medicoes = {
+            periodo_escolar: Medicao.objects.get_or_create(
+                solicitacao_medicao_inicial=instance,
+                periodo_escolar=PeriodoEscolar.objects.get(nome=periodo_escolar),
+            )[0]
+            for periodo_escolar in periodos_escolares
+        }
+        dias_existentes = set(
+            ValorMedicao.objects.filter(
+                medicao__in=medicoes.values(),
+                categoria_medicao=categoria,
+                nome_campo="matriculados",
+            ).values_list("medicao_id", "dia")
+        )
+        logs_indexados = IndiceLogsMatriculados(logs_do_mes)
         for dia in range(1, quantidade_dias_mes + 1):
-            for periodo_escolar in periodos_escolares:
-                medicao, _ = Medicao.objects.get_or_create(
-                    solicitacao_medicao_inicial=instance,
-                    periodo_escolar=PeriodoEscolar.objects.get(nome=periodo_escolar),
-                )
-                if not medicao.valores_medicao.filter(
-                    categoria_medicao=categoria,
-                    dia=f"{dia:02d}",
-                    nome_campo="matriculados",
-                ).exists():
-                    log = logs_do_mes.filter(
-                        periodo_escolar__nome=periodo_escolar, criado_em__day=dia
-                    ).first()
+            for periodo_escolar, medicao in medicoes.items():
+                if (medicao.id, f"{dia:02d}") not in dias_existentes:
+                    quantidade = logs_indexados.quantidade(periodo_escolar, dia)
                     valor_medicao = ValorMedicao(
                         medicao=medicao,
                         categoria_medicao=categoria,
                         dia=f"{dia:02d}",
                         nome_campo="matriculados",
-                        valor=log.quantidade_alunos if log else 0,
+                        valor=quantidade if quantidade is not None else 0,
                     )
                     valores_medicao_a_criar.append(valor_medicao)
 
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def analisa_periodos_por_dia_matriculados(
         self,
@@ -539,8 +554,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         escola = instance.escola
         valores_medicao_a_criar = []
         logs_do_mes = escola.logs_alunos_matriculados_por_faixa_etaria.filter(
-            data__month=instance.mes,
-            data__year=instance.ano,
+            **filtro_mes("data", instance.ano, instance.mes),
         )
         categoria = CategoriaMedicao.objects.get(nome="ALIMENTAÇÃO")
         quantidade_dias_mes = calendar.monthrange(int(instance.ano), int(instance.mes))[
@@ -568,7 +582,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
                     valores_medicao_a_criar,
                 )
 
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def checa_se_existe_ao_menos_um_log_quantidade_maior_que_0(
         self, categoria: CategoriaMedicao, logs_do_mes: QuerySet, periodo_escolar: str
@@ -642,7 +656,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         escola = instance.escola
         valores_medicao_a_criar = []
         logs_do_mes = escola.logs_dietas_autorizadas.filter(
-            data__month=instance.mes, data__year=instance.ano
+            **filtro_mes("data", instance.ano, instance.mes)
         )
         categorias = CategoriaMedicao.objects.filter(nome__icontains="dieta")
         quantidade_dias_mes = calendar.monthrange(int(instance.ano), int(instance.mes))[
@@ -677,7 +691,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
                             valor=valor,
                         )
                         valores_medicao_a_criar.append(valor_medicao)
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def logs_filtrados_cei(self, categoria, logs_do_mes, dia, periodo_escolar):
         if categoria == CategoriaMedicao.objects.get(nome="DIETA ESPECIAL - TIPO A"):
@@ -776,8 +790,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         escola = instance.escola
         valores_medicao_a_criar = []
         logs_do_mes = escola.logs_dietas_autorizadas_cei.filter(
-            data__month=instance.mes,
-            data__year=instance.ano,
+            **filtro_mes("data", instance.ano, instance.mes),
             faixa_etaria__isnull=False,
         )
         categorias = CategoriaMedicao.objects.filter(
@@ -805,7 +818,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
                         valores_medicao_a_criar,
                     )
                 )
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def retorna_medicao_por_nome_grupo(
         self, instance: SolicitacaoMedicaoInicial, nome_grupo: str
@@ -879,7 +892,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
                 "numero_de_alunos",
                 valores_medicao_a_criar,
             )
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def cria_valores_medicao_logs_numero_alunos_inclusoes_continuas_emef_emei(
         self, instance: SolicitacaoMedicaoInicial
@@ -950,7 +963,7 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
                 "kit_lanche",
                 valores_medicao_a_criar,
             )
-        ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+        insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
     def cria_valores_medicao_logs_kit_lanche_lanches_emergenciais_emef_emei(
         self, instance: SolicitacaoMedicaoInicial
@@ -1176,12 +1189,13 @@ class SolicitacaoMedicaoInicialCreateSerializer(serializers.ModelSerializer):
         ):
             self.cria_valores_medicao_logs_emef_emei(instance)
             self.cria_valores_medicao_logs_cei(instance)
-            self.valida_finalizar_medicao_ultimo_dia_mes(instance)
-            self.valida_finalizar_medicao_emef_emei(instance)
-            self.valida_finalizar_medicao_cemei(instance)
-            self.valida_finalizar_medicao_cei(instance)
-            self.valida_finalizar_medicao_escola_sem_alunos_regulares(instance)
-            self.valida_finalizar_medicao_emebs(instance)
+            with contexto_validacao_medicao(instance):
+                self.valida_finalizar_medicao_ultimo_dia_mes(instance)
+                self.valida_finalizar_medicao_emef_emei(instance)
+                self.valida_finalizar_medicao_cemei(instance)
+                self.valida_finalizar_medicao_cei(instance)
+                self.valida_finalizar_medicao_escola_sem_alunos_regulares(instance)
+                self.valida_finalizar_medicao_emebs(instance)
             instance.ue_envia(user=self.context["request"].user)
             anexos = self._process_anexos(instance)
             if hasattr(instance, "ocorrencia"):
@@ -1462,6 +1476,23 @@ class MedicaoCreateUpdateSerializer(serializers.ModelSerializer):
     valores_medicao = ValorMedicaoCreateUpdateSerializer(many=True, required=False)
     infantil_ou_fundamental = serializers.CharField(required=False)
 
+    def _build_valores_medicao(
+        self, medicao: Medicao, valores_medicao_dict: list, infantil_ou_fundamental: str
+    ) -> list:
+        return [
+            ValorMedicao(
+                medicao=medicao,
+                dia=valor_medicao.get("dia", ""),
+                nome_campo=valor_medicao.get("nome_campo", ""),
+                categoria_medicao=valor_medicao.get("categoria_medicao", ""),
+                tipo_alimentacao=valor_medicao.get("tipo_alimentacao", None),
+                faixa_etaria=valor_medicao.get("faixa_etaria", None),
+                infantil_ou_fundamental=infantil_ou_fundamental,
+                valor=valor_medicao.get("valor", ""),
+            )
+            for valor_medicao in valores_medicao_dict
+        ]
+
     def create(self, validated_data):
         usuario = self.context["request"].user
         validated_data["criado_por"] = usuario
@@ -1502,24 +1533,12 @@ class MedicaoCreateUpdateSerializer(serializers.ModelSerializer):
 
         infantil_ou_fundamental = validated_data.pop("infantil_ou_fundamental", "N/A")
 
-        for valor_medicao in valores_medicao_dict:
-            dia = int(valor_medicao.get("dia", ""))
-            mes = int(medicao.solicitacao_medicao_inicial.mes)
-            ano = int(medicao.solicitacao_medicao_inicial.ano)
-            semana = ValorMedicao.get_week_of_month(ano, mes, dia)
-            ValorMedicao.objects.update_or_create(
-                medicao=medicao,
-                dia=valor_medicao.get("dia", ""),
-                semana=semana,
-                nome_campo=valor_medicao.get("nome_campo", ""),
-                categoria_medicao=valor_medicao.get("categoria_medicao", ""),
-                tipo_alimentacao=valor_medicao.get("tipo_alimentacao", None),
-                faixa_etaria=valor_medicao.get("faixa_etaria", None),
-                infantil_ou_fundamental=infantil_ou_fundamental,
-                defaults={
-                    "valor": valor_medicao.get("valor", ""),
-                },
-            )
+        salva_valores_medicao(
+            medicao.solicitacao_medicao_inicial,
+            self._build_valores_medicao(
+                medicao, valores_medicao_dict, infantil_ou_fundamental
+            ),
+        )
 
         return medicao
 
@@ -1537,49 +1556,12 @@ class MedicaoCreateUpdateSerializer(serializers.ModelSerializer):
         infantil_ou_fundamental = validated_data.pop("infantil_ou_fundamental", "N/A")
 
         if valores_medicao_dict:
-            for valor_medicao in valores_medicao_dict:
-                dia = int(valor_medicao.get("dia", ""))
-                mes = int(instance.solicitacao_medicao_inicial.mes)
-                ano = int(instance.solicitacao_medicao_inicial.ano)
-                semana = ValorMedicao.get_week_of_month(ano, mes, dia)
-                try:
-                    ValorMedicao.objects.update_or_create(
-                        medicao=instance,
-                        dia=valor_medicao.get("dia", ""),
-                        semana=semana,
-                        nome_campo=valor_medicao.get("nome_campo", ""),
-                        categoria_medicao=valor_medicao.get("categoria_medicao", ""),
-                        tipo_alimentacao=valor_medicao.get("tipo_alimentacao", None),
-                        faixa_etaria=valor_medicao.get("faixa_etaria", None),
-                        infantil_ou_fundamental=infantil_ou_fundamental,
-                        defaults={
-                            "valor": valor_medicao.get("valor", ""),
-                        },
-                    )
-                except ValorMedicao.MultipleObjectsReturned:
-                    ValorMedicao.objects.filter(
-                        medicao=instance,
-                        dia=valor_medicao.get("dia", ""),
-                        semana=semana,
-                        nome_campo=valor_medicao.get("nome_campo", ""),
-                        categoria_medicao=valor_medicao.get("categoria_medicao", ""),
-                        tipo_alimentacao=valor_medicao.get("tipo_alimentacao", None),
-                        faixa_etaria=valor_medicao.get("faixa_etaria", None),
-                        infantil_ou_fundamental=infantil_ou_fundamental,
-                    ).delete()
-                    ValorMedicao.objects.update_or_create(
-                        medicao=instance,
-                        dia=valor_medicao.get("dia", ""),
-                        semana=semana,
-                        nome_campo=valor_medicao.get("nome_campo", ""),
-                        categoria_medicao=valor_medicao.get("categoria_medicao", ""),
-                        tipo_alimentacao=valor_medicao.get("tipo_alimentacao", None),
-                        faixa_etaria=valor_medicao.get("faixa_etaria", None),
-                        infantil_ou_fundamental=infantil_ou_fundamental,
-                        defaults={
-                            "valor": valor_medicao.get("valor", ""),
-                        },
-                    )
+            salva_valores_medicao(
+                instance.solicitacao_medicao_inicial,
+                self._build_valores_medicao(
+                    instance, valores_medicao_dict, infantil_ou_fundamental
+                ),
+            )
         eh_observacao = self.context["request"].data.get(
             "eh_observacao",
         )
@@ -25,12 +25,14 @@ from src.medicao_inicial.services.relatorio_adesao import (
     obtem_resultados,
     valida_parametros_periodo_lancamento,
 )
+from src.medicao_inicial.services.upsert_valores_medicao import salva_valores_medicao
 from src.medicao_inicial.utils import process_anexos_from_request
 
 from ...cardapio.base.models import TipoAlimentacao
 from ...dados_comuns import constants
 from ...dados_comuns.api.serializers import LogSolicitacoesUsuarioSerializer
 from ...dados_comuns.constants import TRADUCOES_FERIADOS
+from ...dados_comuns.intervalos import filtro_mes
 from ...dados_comuns.models import LogSolicitacoesUsuario
 from ...dados_comuns.permissions import (
     UsuarioAdministradorEmpresaTerceirizada,
@@ -1032,8 +1034,7 @@ class SolicitacaoMedicaoInicialViewSet(
         if escola.eh_cemei_data(data_referencia):
             logs = LogAlunosMatriculadosPeriodoEscola.objects.filter(
                 escola=escola,
-                criado_em__year=ano,
-                criado_em__month=mes,
+                **filtro_mes("data", ano, mes),
                 tipo_turma=TipoTurma.REGULAR.name,
                 quantidade_alunos__gt=0,
             )
@@ -1758,43 +1759,32 @@ class MedicaoViewSet(
             log_alteracoes_escola_corrige_periodo(
                 request.user, medicao, acao, request.data
             )
+            valores_medicao = []
             for valor_medicao in request.data:
                 if not valor_medicao:
                     continue
-                dia = int(valor_medicao.get("dia", ""))
-                mes = int(medicao.solicitacao_medicao_inicial.mes)
-                ano = int(medicao.solicitacao_medicao_inicial.ano)
-                semana = ValorMedicao.get_week_of_month(ano, mes, dia)
-                categoria_medicao_qs = CategoriaMedicao.objects.filter(
-                    id=valor_medicao.get("categoria_medicao", None)
-                )
-                tipo_alimentacao = self.get_tipo_alimentacao(valor_medicao)
-                faixa_etaria = self.get_faixa_etaria(valor_medicao)
-                infantil_ou_fundamental = valor_medicao.get(
-                    "infantil_ou_fundamental", "N/A"
-                )
-                ValorMedicao.objects.update_or_create(
-                    medicao=medicao,
-                    dia=valor_medicao.get("dia", ""),
-                    semana=semana,
-                    nome_campo=valor_medicao.get("nome_campo", ""),
-                    categoria_medicao=categoria_medicao_qs.first(),
-                    tipo_alimentacao=tipo_alimentacao,
-                    faixa_etaria=faixa_etaria,
-                    infantil_ou_fundamental=infantil_ou_fundamental,
-                    defaults={
-                        "medicao": medicao,
-                        "dia": valor_medicao.get("dia", ""),
-                        "semana": semana,
-                        "valor": valor_medicao.get("valor", ""),
-                        "nome_campo": valor_medicao.get("nome_campo", ""),
-                        "categoria_medicao": categoria_medicao_qs.first(),
-                        "tipo_alimentacao": tipo_alimentacao,
-                        "faixa_etaria": faixa_etaria,
-                        "habilitado_correcao": True,
-                        "infantil_ou_fundamental": infantil_ou_fundamental,
-                    },
+                valores_medicao.append(
+                    ValorMedicao(
+                        medicao=medicao,
+                        dia=valor_medicao.get("dia", ""),
+                        valor=valor_medicao.get("valor", ""),
+                        nome_campo=valor_medicao.get("nome_campo", ""),
+                        categoria_medicao_id=valor_medicao.get(
+                            "categoria_medicao", None
+                        ),
+                        tipo_alimentacao=self.get_tipo_alimentacao(valor_medicao),
+                        faixa_etaria=self.get_faixa_etaria(valor_medicao),
+                        habilitado_correcao=True,
+                        infantil_ou_fundamental=valor_medicao.get(
+                            "infantil_ou_fundamental", "N/A"
+                        ),
+                    )
                 )
+            salva_valores_medicao(
+                medicao.solicitacao_medicao_inicial,
+                valores_medicao,
+                campos_atualizados=("valor", "semana", "habilitado_correcao"),
+            )
             medicao.valores_medicao.filter(valor=-1).delete()
             if medicao.status in status_codae:
                 medicao.ue_corrige_periodo_grupo_para_codae(user=request.user)
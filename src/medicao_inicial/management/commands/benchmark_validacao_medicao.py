@@ -0,0 +1,106 @@
+import logging
+import time
+
+from django.core.management import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.test.utils import CaptureQueriesContext
+
+from src.medicao_inicial.models import SolicitacaoMedicaoInicial
+from src.medicao_inicial.services.contexto_validacao_medicao import (
+    contexto_validacao_medicao,
+)
+from src.medicao_inicial.validators import (
+    valida_medicoes_inexistentes_cei,
+    valida_medicoes_inexistentes_emebs,
+    validate_lancamento_alimentacoes_medicao,
+    validate_lancamento_alimentacoes_medicao_cei,
+    validate_lancamento_alimentacoes_medicao_emebs,
+    validate_lancamento_dietas_cei,
+    validate_lancamento_dietas_emebs,
+    validate_lancamento_dietas_emef,
+    validate_lancamento_inclusoes,
+    validate_lancamento_inclusoes_cei,
+    validate_lancamento_inclusoes_dietas_cei,
+    validate_lancamento_inclusoes_dietas_emef_emebs,
+    validate_medicao_cemei,
+    validate_ultimo_dia_mes_letivo,
+)
+
+logger = logging.getLogger("sigpae.cmd_benchmark_validacao_medicao")
+
+
+def _validadores(solicitacao):
+    escola = solicitacao.escola
+    if escola.eh_cemei:
+        return [lambda s, erros: validate_medicao_cemei(s)]
+    if escola.eh_cei:
+        return [
+            valida_medicoes_inexistentes_cei,
+            validate_lancamento_alimentacoes_medicao_cei,
+            validate_lancamento_inclusoes_cei,
+            validate_lancamento_dietas_cei,
+            validate_lancamento_inclusoes_dietas_cei,
+        ]
+    if escola.eh_emebs:
+        return [
+            valida_medicoes_inexistentes_emebs,
+            validate_lancamento_alimentacoes_medicao_emebs,
+            lambda s, erros: validate_lancamento_inclusoes(s, erros, True),
+            validate_lancamento_dietas_emebs,
+            lambda s, erros: validate_lancamento_inclusoes_dietas_emef_emebs(
+                s, erros, True
+            ),
+        ]
+    return [
+        validate_lancamento_alimentacoes_medicao,
+        validate_lancamento_inclusoes,
+        validate_lancamento_dietas_emef,
+        validate_lancamento_inclusoes_dietas_emef_emebs,
+    ]
+
+
+def executa_validadores(solicitacao):
+    lista_erros = validate_ultimo_dia_mes_letivo(solicitacao, [])
+    for validador in _validadores(solicitacao):
+        lista_erros = validador(solicitacao, lista_erros)
+    return lista_erros
+
+
+class Command(BaseCommand):
+    help = (
+        "Compara número de consultas e tempo de execução da validação de envio "
+        "da medição inicial com e sem o contexto de validação pré-carregado."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("uuid", help="UUID da SolicitacaoMedicaoInicial")
+
+    def _mede(self, solicitacao, com_contexto):
+        with CaptureQueriesContext(connection) as consultas:
+            inicio = time.perf_counter()
+            if com_contexto:
+                with contexto_validacao_medicao(solicitacao):
+                    lista_erros = executa_validadores(solicitacao)
+            else:
+                lista_erros = executa_validadores(solicitacao)
+            tempo = time.perf_counter() - inicio
+        return lista_erros, len(consultas), tempo
+
+    def handle(self, *args, **options):
+        try:
+            solicitacao = SolicitacaoMedicaoInicial.objects.get(uuid=options["uuid"])
+        except SolicitacaoMedicaoInicial.DoesNotExist:
+            raise CommandError("Solicitação de medição inicial não encontrada.")
+
+        with transaction.atomic():
+            erros_atual, consultas_atual, tempo_atual = self._mede(solicitacao, False)
+            erros_ctx, consultas_ctx, tempo_ctx = self._mede(solicitacao, True)
+            transaction.set_rollback(True)
+
+        self.stdout.write(
+            f"Atual: {consultas_atual} consultas em {tempo_atual:.3f}s\n"
+            f"Com contexto: {consultas_ctx} consultas em {tempo_ctx:.3f}s"
+        )
+        if sorted(map(str, erros_atual)) != sorted(map(str, erros_ctx)):
+            raise CommandError("As listas de erros divergem entre os dois caminhos.")
+        self.stdout.write(self.style.SUCCESS("Listas de erros idênticas."))
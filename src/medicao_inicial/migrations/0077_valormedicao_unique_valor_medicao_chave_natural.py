@@ -0,0 +1,58 @@
+# Generated by Django 5.2.15 on 2026-10-18 10:12
+
+import django.db.models.functions.comparison
+from django.db import migrations, models
+
+# Mantém apenas o registro mais recente (maior id) de cada chave natural. Os
+# duplicados surgiam de update_or_create com semana divergente e de criações
+# concorrentes; o valor mais recente é o que a UE enviou por último.
+REMOVE_DUPLICADOS_SQL = """
+DELETE FROM medicao_inicial_valormedicao
+WHERE id IN (
+    SELECT id FROM (
+        SELECT
+            id,
+            ROW_NUMBER() OVER (
+                PARTITION BY
+                    medicao_id,
+                    dia,
+                    nome_campo,
+                    categoria_medicao_id,
+                    COALESCE(tipo_alimentacao_id, 0),
+                    COALESCE(faixa_etaria_id, 0),
+                    infantil_ou_fundamental
+                ORDER BY id DESC
+            ) AS posicao
+        FROM medicao_inicial_valormedicao
+    ) AS valores
+    WHERE valores.posicao > 1
+);
+"""
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("medicao_inicial", "0076_descontofinanceiro_infantil_ou_fundamental"),
+    ]
+
+    operations = [
+        migrations.RunSQL(REMOVE_DUPLICADOS_SQL, migrations.RunSQL.noop),
+        migrations.AddConstraint(
+            model_name="valormedicao",
+            constraint=models.UniqueConstraint(
+                models.F("medicao"),
+                models.F("dia"),
+                models.F("nome_campo"),
+                models.F("categoria_medicao"),
+                django.db.models.functions.comparison.Coalesce(
+                    "tipo_alimentacao", models.Value(0)
+                ),
+                django.db.models.functions.comparison.Coalesce(
+                    "faixa_etaria", models.Value(0)
+                ),
+                models.F("infantil_ou_fundamental"),
+                name="unique_valor_medicao_chave_natural",
+            ),
+        ),
+    ]
@@ -7,6 +7,7 @@ from calendar import monthcalendar, setfirstweekday
 import numpy
 from django.db import models
 from django.db.models import Q
+from django.db.models.functions import Coalesce
 
 from ..dados_comuns.behaviors import (
     Ativavel,
@@ -738,6 +739,17 @@ class ValorMedicao(
         week_of_month = numpy.where(x == day)[0][0] + 1
         return week_of_month
 
+    @classmethod
+    def get_weeks_of_month(cls, year, month):
+        """Mapeia cada dia do mês para a sua semana, com o mesmo critério de get_week_of_month."""
+        setfirstweekday(0)
+        return {
+            day: str(week_index + 1)
+            for week_index, week in enumerate(monthcalendar(year, month))
+            for day in week
+            if day
+        }
+
     def __str__(self):
         categoria = f"{self.categoria_medicao.nome}"
         nome_campo = f"{self.nome_campo}"
@@ -748,6 +760,18 @@ class ValorMedicao(
     class Meta:
         verbose_name = "Valor da Medição"
         verbose_name_plural = "Valores das Medições"
+        constraints = [
+            models.UniqueConstraint(
+                models.F("medicao"),
+                models.F("dia"),
+                models.F("nome_campo"),
+                models.F("categoria_medicao"),
+                Coalesce("tipo_alimentacao", models.Value(0)),
+                Coalesce("faixa_etaria", models.Value(0)),
+                models.F("infantil_ou_fundamental"),
+                name="unique_valor_medicao_chave_natural",
+            ),
+        ]
 
 
 class AlimentacaoLancamentoEspecial(Nomeavel, Ativavel, TemChaveExterna, Posicao):
@@ -22,6 +22,9 @@ from src.medicao_inicial.recreio_nas_ferias.validators.recreio_common import (
     get_tipos_alimentacao_recreio,
     valida_campo_participantes,
 )
+from src.medicao_inicial.services.upsert_valores_medicao import (
+    insere_valores_medicao_ausentes,
+)
 from src.medicao_inicial.validators import erros_unicos, lista_erros_com_periodo
 
 CATEGORIA_ALIMENTACAO_NOME = "ALIMENTAÇÃO"
@@ -811,4 +814,4 @@ def cria_valores_medicao_dietas_autorizadas_do_recreio_cei(
                     )
                 )
 
-    ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+    insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
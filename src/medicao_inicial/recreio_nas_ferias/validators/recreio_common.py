@@ -14,6 +14,9 @@ from src.medicao_inicial.models import (
 from src.medicao_inicial.recreio_nas_ferias.models import (
     RecreioNasFeriasUnidadeParticipante,
 )
+from src.medicao_inicial.services.upsert_valores_medicao import (
+    insere_valores_medicao_ausentes,
+)
 from src.medicao_inicial.utils import get_name_campo
 
 
@@ -112,7 +115,7 @@ def valida_campo_participantes(
                     )
                 )
 
-    ValorMedicao.objects.bulk_create(valores_medicao_a_criar)
+    insere_valores_medicao_ausentes(instance, valores_medicao_a_criar)
 
 
 def get_linhas_da_tabela_alimentacoes_recreio(alimentacoes: list[str]) -> list[str]:
@@ -0,0 +1,246 @@
+"""
+Valores do relatório consolidado carregados de uma vez.
+
+Os módulos `relatorio_consolidado_*` calculam cada célula da planilha com
+consultas próprias: a medição do período, a soma dos valores do campo e, nos
+totais de pagamento, um valor por dia. Enquanto um `AgregadoRelatorioConsolidado`
+estiver ativo (`agregado_relatorio_consolidado`), essas consultas são
+respondidas em memória a partir de:
+
+- as medições de todas as solicitações do relatório, em uma consulta;
+- as somas de `ValorMedicao.valor` agrupadas por medição, categoria, campo,
+  faixa etária e turma, já com o recorte de dias, em uma consulta;
+- os valores por dia de cada campo usado nos totais de pagamento, em uma
+  consulta por campo, feita sob demanda.
+
+Fora desse contexto as funções de `utils` continuam consultando o banco.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Optional
+
+from django.db.models import Case, Count, FloatField, Q, Sum, When
+from django.db.models.functions import Cast
+
+from src.medicao_inicial.models import Medicao, ValorMedicao
+
+_agregado_ativo: ContextVar[Optional["AgregadoRelatorioConsolidado"]] = ContextVar(
+    "agregado_relatorio_consolidado", default=None
+)
+
+# valores aceitos pelo cast de texto para float do Postgres
+REGEX_VALOR_NUMERICO = r"^\s*[-+]?([0-9]+(\.[0-9]*)?|\.[0-9]+)([eE][-+]?[0-9]+)?\s*$"
+
+CAMPOS_AGRUPAMENTO = (
+    "medicao_id",
+    "categoria_medicao__nome",
+    "nome_campo",
+    "faixa_etaria_id",
+    "infantil_ou_fundamental",
+)
+
+LOOKUPS = ("exact", "in", "isnull", "contains")
+
+
+def _compara(valor, lookup: str, esperado) -> bool:
+    if lookup == "isnull":
+        return (valor is None) == esperado
+    if esperado is None and lookup == "exact":
+        return valor is None
+    if valor is None:
+        return False
+    if lookup == "in":
+        return valor in esperado
+    if lookup == "contains":
+        return esperado in valor
+    return valor == esperado
+
+
+def _atende(obter_valor: Callable[[str], object], condicao) -> bool:
+    """Avalia em memória um filtro do ORM (`Q` ou par campo/valor)."""
+    if isinstance(condicao, Q):
+        resultados = (_atende(obter_valor, filho) for filho in condicao.children)
+        resultado = all(resultados) if condicao.connector == Q.AND else any(resultados)
+        return not resultado if condicao.negated else resultado
+    caminho, esperado = condicao
+    partes = caminho.split("__")
+    lookup = partes.pop() if partes[-1] in LOOKUPS and len(partes) > 1 else "exact"
+    return _compara(obter_valor("__".join(partes)), lookup, esperado)
+
+
+def _atributo(objeto, caminho: str):
+    for atributo in caminho.split("__"):
+        if objeto is None:
+            return None
+        objeto = getattr(objeto, atributo)
+    return objeto
+
+
+class AgregadoRelatorioConsolidado:
+    def __init__(self, solicitacoes, query_params: dict | None = None):
+        self.solicitacoes = solicitacoes
+        self.query_params = query_params
+        self._medicoes = None
+        self._grupos = None
+        self._valores_por_dia = {}
+
+    def _valores_das_solicitacoes(self):
+        return ValorMedicao.objects.filter(
+            medicao__solicitacao_medicao_inicial__in=self.solicitacoes
+        )
+
+    def _carrega_medicoes(self) -> dict:
+        if self._medicoes is None:
+            self._medicoes = {}
+            for medicao in (
+                Medicao.objects.filter(
+                    solicitacao_medicao_inicial__in=self.solicitacoes
+                )
+                .select_related("periodo_escolar", "grupo")
+                .order_by("id")
+            ):
+                self._medicoes.setdefault(
+                    medicao.solicitacao_medicao_inicial_id, []
+                ).append(medicao)
+        return self._medicoes
+
+    def _carrega_grupos(self) -> dict:
+        # utils consulta o agregado ativo; importado aqui para evitar o ciclo
+        from src.medicao_inicial.services.utils import (
+            filtra_queryset_pelo_intervalo_de_dias,
+        )
+
+        if self._grupos is None:
+            numerico = Q(valor__regex=REGEX_VALOR_NUMERICO)
+            self._grupos = {}
+            for grupo in (
+                filtra_queryset_pelo_intervalo_de_dias(
+                    self._valores_das_solicitacoes(), self.query_params
+                )
+                .values(*CAMPOS_AGRUPAMENTO)
+                .annotate(
+                    total=Sum(
+                        Case(
+                            When(numerico, then=Cast("valor", FloatField())),
+                            output_field=FloatField(),
+                        )
+                    ),
+                    invalidos=Count("id", filter=~numerico),
+                    quantidade=Count("id"),
+                )
+                .order_by()
+            ):
+                self._grupos.setdefault(grupo["medicao_id"], []).append(grupo)
+        return self._grupos
+
+    def medicoes(self, solicitacao, *condicoes, **filtros) -> list[Medicao]:
+        """Equivale a `solicitacao.medicoes.filter(*condicoes, **filtros)`."""
+        condicao = Q(*condicoes, **filtros)
+        medicoes = [
+            medicao
+            for medicao in self._carrega_medicoes().get(solicitacao.id, [])
+            if _atende(lambda caminho: _atributo(medicao, caminho), condicao)
+        ]
+        for medicao in medicoes:
+            medicao.solicitacao_medicao_inicial = solicitacao
+        return medicoes
+
+    def medicao(self, solicitacao, **filtros) -> Medicao:
+        """Equivale a `solicitacao.medicoes.get(**filtros)`."""
+        medicoes = self.medicoes(solicitacao, **filtros)
+        if not medicoes:
+            raise Medicao.DoesNotExist("Medicao matching query does not exist.")
+        if len(medicoes) > 1:
+            raise Medicao.MultipleObjectsReturned(
+                f"get() returned more than one Medicao -- it returned {len(medicoes)}!"
+            )
+        return medicoes[0]
+
+    def _grupos_da_medicao(self, medicao_id, filtros: dict) -> list[dict]:
+        condicao = Q(**filtros)
+        return [
+            grupo
+            for grupo in self._carrega_grupos().get(medicao_id, [])
+            if _atende(grupo.get, condicao)
+        ]
+
+    def soma(self, medicao_id, **filtros) -> float | None:
+        """
+        Soma de `valor` como float dos registros da medição que atendem aos
+        filtros, no recorte de dias do relatório. None quando não há registros.
+        Com algum valor não numérico, levanta ValueError, assim como o cast da
+        consulta original falharia.
+        """
+        grupos = self._grupos_da_medicao(medicao_id, filtros)
+        if not grupos:
+            return None
+        if any(grupo["invalidos"] for grupo in grupos):
+            raise ValueError(f"Valor não numérico na medição {medicao_id}")
+        return sum(grupo["total"] for grupo in grupos)
+
+    def quantidade(self, medicao_id, **filtros) -> int:
+        return sum(
+            grupo["quantidade"]
+            for grupo in self._grupos_da_medicao(medicao_id, filtros)
+        )
+
+    def sem_lancamentos(self, solicitacao) -> bool:
+        return all(
+            medicao.status == "MEDICAO_SEM_LANCAMENTOS"
+            for medicao in self._carrega_medicoes().get(solicitacao.id, [])
+        )
+
+    def valor_do_dia(
+        self, medicao_id, nome_campo: str, dia: int, categoria=None, turma=None
+    ) -> str | None:
+        """`valor` do primeiro registro (por id) do campo no dia da medição."""
+        if nome_campo not in self._valores_por_dia:
+            valores = {}
+            for id_medicao, dia_valor, nome_categoria, turma_valor, valor in (
+                self._valores_das_solicitacoes()
+                .filter(nome_campo=nome_campo)
+                .order_by("id")
+                .values_list(
+                    "medicao_id",
+                    "dia",
+                    "categoria_medicao__nome",
+                    "infantil_ou_fundamental",
+                    "valor",
+                )
+            ):
+                valores.setdefault((id_medicao, dia_valor), []).append(
+                    (nome_categoria, turma_valor, valor)
+                )
+            self._valores_por_dia[nome_campo] = valores
+        for nome_categoria, turma_valor, valor in self._valores_por_dia[nome_campo].get(
+            (medicao_id, f"{dia:02d}"), []
+        ):
+            if categoria is not None and nome_categoria != categoria:
+                continue
+            if turma is not None and turma_valor != turma:
+                continue
+            return valor
+        return None
+
+
+def get_agregado_relatorio_consolidado() -> Optional[AgregadoRelatorioConsolidado]:
+    return _agregado_ativo.get()
+
+
+@contextmanager
+def agregado_relatorio_consolidado(solicitacoes, query_params: dict | None = None):
+    """
+    Ativa o agregado das solicitações no contexto corrente. Chamadas aninhadas
+    reaproveitam o agregado já ativo.
+    """
+    if _agregado_ativo.get() is not None:
+        yield _agregado_ativo.get()
+        return
+    token = _agregado_ativo.set(
+        AgregadoRelatorioConsolidado(solicitacoes, query_params)
+    )
+    try:
+        yield _agregado_ativo.get()
+    finally:
+        _agregado_ativo.reset(token)
@@ -0,0 +1,189 @@
+import calendar
+import datetime
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from django.db.models import Q
+
+from src.dados_comuns.intervalos import filtro_mes
+from src.escola.models import LogAlunosMatriculadosPeriodoEscola
+from src.medicao_inicial.models import (
+    PermissaoLancamentoEspecial,
+    SolicitacaoMedicaoInicial,
+    ValorMedicao,
+)
+
+ATRIBUTO_CONTEXTO = "_contexto_validacao_medicao"
+
+
+class ContextoValidacaoMedicao:
+    """
+    Dados da solicitação carregados uma única vez para a validação do envio
+    ("Enviar") da medição inicial.
+
+    Os validadores de `src.medicao_inicial.validators` consultam este contexto,
+    quando ativo, no lugar de executar `ValorMedicao.objects.filter(...)` dentro
+    dos laços por campo e por dia. Os filtros reproduzem os mesmos critérios das
+    consultas originais, de modo que a lista de erros não se altera.
+    """
+
+    def __init__(self, solicitacao: SolicitacaoMedicaoInicial):
+        self.solicitacao = solicitacao
+        self.escola = solicitacao.escola
+        self.mes = int(solicitacao.mes)
+        self.ano = int(solicitacao.ano)
+        self._permissoes_especiais = {}
+        self._permissoes_agrupadas = {}
+        self._tipos_alunos_emebs = None
+        self._carrega_valores()
+
+    def _carrega_valores(self):
+        self._valores = defaultdict(list)
+        self._valores_por_medicao = defaultdict(list)
+        valores = (
+            ValorMedicao.objects.filter(
+                medicao__solicitacao_medicao_inicial=self.solicitacao
+            )
+            .order_by("id")
+            .values(
+                "medicao_id",
+                "medicao__periodo_escolar_id",
+                "medicao__periodo_escolar__nome",
+                "categoria_medicao_id",
+                "faixa_etaria_id",
+                "nome_campo",
+                "dia",
+                "infantil_ou_fundamental",
+                "valor",
+            )
+        )
+        for valor in valores:
+            self._valores[(valor["nome_campo"], valor["dia"])].append(valor)
+            self._valores_por_medicao[valor["medicao_id"]].append(valor)
+
+    def valores(
+        self,
+        nome_campo: str,
+        dia: str,
+        categoria_id: int,
+        medicao_id: Optional[int] = None,
+        periodo_escolar_id: Optional[int] = None,
+        periodo_escolar_nome: Optional[str] = None,
+        infantil_ou_fundamental: Optional[str] = None,
+    ) -> list:
+        """Valores (dicts) que atendem aos filtros, incluindo os de valor nulo."""
+        return [
+            valor
+            for valor in self._valores.get((nome_campo, dia), [])
+            if valor["categoria_medicao_id"] == categoria_id
+            and (medicao_id is None or valor["medicao_id"] == medicao_id)
+            and (
+                periodo_escolar_id is None
+                or valor["medicao__periodo_escolar_id"] == periodo_escolar_id
+            )
+            and (
+                periodo_escolar_nome is None
+                or valor["medicao__periodo_escolar__nome"] == periodo_escolar_nome
+            )
+            and (
+                infantil_ou_fundamental is None
+                or valor["infantil_ou_fundamental"] == infantil_ou_fundamental
+            )
+        ]
+
+    def tem_valor(
+        self, nome_campo: str, dia: str, categoria_id: int, **filtros
+    ) -> bool:
+        """Equivale a `.filter(...).exclude(valor=None).exists()`."""
+        return any(
+            valor["valor"] is not None
+            for valor in self.valores(nome_campo, dia, categoria_id, **filtros)
+        )
+
+    def dias_preenchidos(
+        self, nome_campo: str, dias: list, categoria_id: int, **filtros
+    ) -> set:
+        return {
+            dia
+            for dia in dias
+            if self.tem_valor(nome_campo, dia, categoria_id, **filtros)
+        }
+
+    def valores_medicao_campos(self, medicao_id: int, campos: tuple) -> list:
+        """Equivale a `list(set(medicao.valores_medicao.values_list(*campos)))`."""
+        return list(
+            {
+                tuple(valor[campo] for campo in campos)
+                for valor in self._valores_por_medicao.get(medicao_id, [])
+            }
+        )
+
+    def permissoes_especiais(self, escola, periodo_escolar):
+        """
+        Queryset memoizado das permissões de lançamento especial do mês; por ser
+        a mesma instância, é avaliado uma única vez.
+        """
+        chave = (escola.id, periodo_escolar.id if periodo_escolar else None)
+        if chave not in self._permissoes_especiais:
+            inicio_mes = datetime.date(self.ano, self.mes, 1)
+            fim_mes = datetime.date(
+                self.ano, self.mes, calendar.monthrange(self.ano, self.mes)[1]
+            )
+            self._permissoes_especiais[chave] = (
+                PermissaoLancamentoEspecial.objects.filter(
+                    escola=escola,
+                    periodo_escolar=periodo_escolar,
+                    data_inicial__lte=fim_mes,
+                )
+                .filter(Q(data_final__isnull=True) | Q(data_final__gte=inicio_mes))
+                .select_related("periodo_escolar")
+                .prefetch_related("alimentacoes_lancamento_especial")
+            )
+        return self._permissoes_especiais[chave]
+
+    def permissoes_especiais_agrupadas_por_dia(self, periodo_escolar, agrupador):
+        chave = periodo_escolar.id if periodo_escolar else None
+        if chave not in self._permissoes_agrupadas:
+            self._permissoes_agrupadas[chave] = agrupador(
+                self.permissoes_especiais(self.escola, periodo_escolar),
+                self.mes,
+                self.ano,
+            )
+        return self._permissoes_agrupadas[chave]
+
+    def tipos_alunos_emebs(self, periodo_escolar_nome: str) -> list:
+        """Tipos de turma (INFANTIL/FUNDAMENTAL) com alunos no período, no mês."""
+        if self._tipos_alunos_emebs is None:
+            self._tipos_alunos_emebs = defaultdict(set)
+            for nome, tipo in (
+                LogAlunosMatriculadosPeriodoEscola.objects.filter(
+                    escola=self.escola,
+                    **filtro_mes("data", self.ano, self.mes),
+                )
+                .exclude(Q(quantidade_alunos=0) | Q(infantil_ou_fundamental="N/A"))
+                .values_list("periodo_escolar__nome", "infantil_ou_fundamental")
+            ):
+                self._tipos_alunos_emebs[nome].add(tipo)
+        return list(self._tipos_alunos_emebs.get(periodo_escolar_nome, set()))
+
+
+def get_contexto_validacao_medicao(solicitacao) -> Optional[ContextoValidacaoMedicao]:
+    return getattr(solicitacao, ATRIBUTO_CONTEXTO, None)
+
+
+@contextmanager
+def contexto_validacao_medicao(solicitacao: SolicitacaoMedicaoInicial):
+    """
+    Ativa o contexto de validação para a solicitação. Chamadas aninhadas
+    reaproveitam o contexto já ativo.
+    """
+    if get_contexto_validacao_medicao(solicitacao) is not None:
+        yield get_contexto_validacao_medicao(solicitacao)
+        return
+    contexto = ContextoValidacaoMedicao(solicitacao)
+    setattr(solicitacao, ATRIBUTO_CONTEXTO, contexto)
+    try:
+        yield contexto
+    finally:
+        delattr(solicitacao, ATRIBUTO_CONTEXTO)
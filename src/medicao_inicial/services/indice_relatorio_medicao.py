@@ -0,0 +1,297 @@
+import datetime
+from collections import defaultdict
+from contextlib import contextmanager
+from typing import Optional
+
+from src.escola.dias_letivos.models import DiaLetivoSIGPAE
+from src.escola.models import DiaCalendario, FaixaEtaria
+from src.medicao_inicial.models import Medicao, SolicitacaoMedicaoInicial, ValorMedicao
+from src.terceirizada.models import Edital
+
+ATRIBUTO_INDICE = "_indice_relatorio_medicao"
+
+
+class IndiceLogsMatriculados:
+    """
+    Índice em memória de um queryset de LogAlunosMatriculadosPeriodoEscola.
+
+    Preserva a semântica de `.filter(periodo_escolar__nome=..., criado_em__day=...).first()`
+    sobre o queryset original, avaliando-o uma única vez.
+    """
+
+    def __init__(self, queryset):
+        self._quantidades = {}
+        for periodo_nome, criado_em, quantidade in queryset.values_list(
+            "periodo_escolar__nome", "criado_em", "quantidade_alunos"
+        ):
+            self._quantidades.setdefault((periodo_nome, criado_em.day), quantidade)
+
+    def quantidade(self, periodo: str, dia: int) -> Optional[int]:
+        return self._quantidades.get((periodo, int(dia)))
+
+
+class IndiceLogsDietas:
+    """
+    Índice em memória de um queryset de logs de quantidade de dietas autorizadas.
+
+    Funciona para LogQuantidadeDietasAutorizadas e suas variantes CEI e Recreio nas Férias,
+    que nem sempre possuem período escolar ou faixa etária.
+    """
+
+    SEM_PERIODO = object()
+
+    def __init__(self, queryset):
+        campos_modelo = {field.name for field in queryset.model._meta.fields}
+        self.tem_periodo = "periodo_escolar" in campos_modelo
+        self.tem_faixa = "faixa_etaria" in campos_modelo
+        campos = ["data", "classificacao__nome", "quantidade"]
+        if self.tem_periodo:
+            campos.append("periodo_escolar__nome")
+        if self.tem_faixa:
+            campos.append("faixa_etaria_id")
+
+        self._logs_por_data = defaultdict(list)
+        for log in queryset.order_by().values(*campos):
+            self._logs_por_data[log["data"]].append(log)
+
+    def soma(
+        self,
+        data: datetime.date,
+        classificacoes: list,
+        periodo=SEM_PERIODO,
+        faixa_id=None,
+    ) -> int:
+        """
+        Soma a quantidade de dietas de uma data.
+
+        Args:
+            data (datetime.date): data dos logs.
+            classificacoes (list): nomes das classificações consideradas.
+            periodo: nome do período escolar; None filtra logs sem período e
+                SEM_PERIODO não aplica filtro algum.
+            faixa_id (int, optional): id da faixa etária dos logs CEI.
+
+        Returns:
+            int: soma das quantidades encontradas.
+        """
+        total = 0
+        for log in self._logs_por_data.get(data, []):
+            if log["classificacao__nome"] not in classificacoes:
+                continue
+            if periodo is not self.SEM_PERIODO and (
+                log.get("periodo_escolar__nome") != periodo
+            ):
+                continue
+            if faixa_id is not None and log.get("faixa_etaria_id") != faixa_id:
+                continue
+            total += log["quantidade"]
+        return total
+
+
+class IndiceRelatorioMedicao:
+    """
+    Carrega em poucas consultas todos os dados usados para montar as tabelas
+    do relatório de medição inicial de uma solicitação e os indexa em memória
+    por (medição, categoria, nome do campo, dia).
+
+    Com o índice ativo (ver `indice_relatorio_medicao`), os helpers de
+    `src.medicao_inicial.utils` leem as células daqui em vez de executar uma
+    consulta por dia e por campo.
+    """
+
+    def __init__(self, solicitacao: SolicitacaoMedicaoInicial):
+        self.solicitacao = solicitacao
+        self.escola = solicitacao.escola
+        self.mes = int(solicitacao.mes)
+        self.ano = int(solicitacao.ano)
+        data_referencia = solicitacao.data_referencia
+        self.eh_emebs = self.escola.eh_emebs_data(data_referencia)
+        self.eh_emei = self.escola.eh_emei_data(data_referencia)
+        self.eh_cemei = self.escola.eh_cemei_data(data_referencia)
+        self._tem_edital_imr = None
+        self._logs_indexados = {}
+        self._carrega_medicoes()
+        self._carrega_valores()
+        self._carrega_dias_letivos()
+        self._faixas_etarias = {
+            (inicio, fim): id_
+            for id_, inicio, fim in FaixaEtaria.objects.filter(ativo=True)
+            .order_by("id")
+            .values_list("id", "inicio", "fim")
+        }
+
+    def _carrega_medicoes(self):
+        self.medicoes = list(
+            self.solicitacao.medicoes.select_related("grupo", "periodo_escolar")
+        )
+
+    def _carrega_valores(self):
+        self._valores = defaultdict(list)
+        self._valores_sem_dia = defaultdict(list)
+        self._valores_todas_categorias = defaultdict(list)
+        valores = (
+            ValorMedicao.objects.filter(medicao__in=[m.id for m in self.medicoes])
+            .order_by("id")
+            .values(
+                "id",
+                "uuid",
+                "medicao_id",
+                "categoria_medicao__nome",
+                "nome_campo",
+                "dia",
+                "faixa_etaria_id",
+                "infantil_ou_fundamental",
+                "valor",
+            )
+        )
+        for valor in valores:
+            chave = (
+                valor["medicao_id"],
+                valor["categoria_medicao__nome"],
+                valor["nome_campo"],
+            )
+            self._valores[chave + (valor["dia"],)].append(valor)
+            self._valores_sem_dia[chave].append(valor)
+            self._valores_todas_categorias[
+                (valor["medicao_id"], valor["nome_campo"], valor["dia"])
+            ].append(valor)
+
+    def _carrega_dias_letivos(self):
+        self._dias_letivos_sigpae = {
+            (data.day, periodo_nome.lower())
+            for data, periodo_nome in DiaLetivoSIGPAE.objects.filter(
+                escolas=self.escola,
+                data__month=self.mes,
+                data__year=self.ano,
+                periodos_escolares__isnull=False,
+            ).values_list("data", "periodos_escolares__nome")
+        }
+        self._dias_calendario = defaultdict(list)
+        for data, dia_letivo in DiaCalendario.objects.filter(
+            escola=self.escola, data__month=self.mes, data__year=self.ano
+        ).values_list("data", "dia_letivo"):
+            self._dias_calendario[data.day].append(dia_letivo)
+
+    @property
+    def tem_edital_imr(self) -> bool:
+        if self._tem_edital_imr is None:
+            self._tem_edital_imr = Edital.objects.filter(
+                uuid__in=self.escola.editais, eh_imr=True
+            ).exists()
+        return self._tem_edital_imr
+
+    def logs_indexados(self, queryset, classe_indice):
+        """Avalia o queryset de logs uma única vez por combinação de filtros."""
+        chave = (classe_indice, str(queryset.query))
+        if chave not in self._logs_indexados:
+            self._logs_indexados[chave] = classe_indice(queryset)
+        return self._logs_indexados[chave]
+
+    def _medicao_unica(self, medicoes: list) -> Medicao:
+        if not medicoes:
+            raise Medicao.DoesNotExist("Medição não encontrada.")
+        if len(medicoes) > 1:
+            raise Medicao.MultipleObjectsReturned("Mais de uma medição encontrada.")
+        return medicoes[0]
+
+    def medicao_por_grupo(self, nome_grupo: str) -> Medicao:
+        return self._medicao_unica(
+            [m for m in self.medicoes if m.grupo and m.grupo.nome == nome_grupo]
+        )
+
+    def medicao_por_grupo_contendo(self, trecho: str) -> Medicao:
+        return self._medicao_unica(
+            [
+                m
+                for m in self.medicoes
+                if m.grupo and trecho.lower() in m.grupo.nome.lower()
+            ]
+        )
+
+    def medicao_por_periodo(self, periodo: str) -> Medicao:
+        if periodo.startswith("Colaboradores") or periodo.startswith(
+            "Recreio nas Férias"
+        ):
+            return self.medicao_por_grupo(periodo)
+        return self._medicao_unica(
+            [
+                m
+                for m in self.medicoes
+                if m.grupo is None
+                and m.periodo_escolar
+                and m.periodo_escolar.nome == periodo
+            ]
+        )
+
+    def valores(
+        self,
+        medicao: Medicao,
+        categoria: str,
+        nome_campo: str,
+        dia=None,
+        faixa_id=None,
+        infantil_ou_fundamental=None,
+    ) -> list:
+        """
+        Retorna os valores de medição (dicts) na ordem de criação, com os mesmos
+        critérios dos filtros usados nos helpers do relatório.
+        """
+        if dia is None:
+            valores = self._valores_sem_dia.get((medicao.id, categoria, nome_campo), [])
+        else:
+            valores = self._valores.get(
+                (medicao.id, categoria, nome_campo, f"{int(dia):02d}"), []
+            )
+        return [
+            valor
+            for valor in valores
+            if (faixa_id is None or valor["faixa_etaria_id"] == faixa_id)
+            and (
+                infantil_ou_fundamental is None
+                or valor["infantil_ou_fundamental"] == infantil_ou_fundamental
+            )
+        ]
+
+    def valores_do_dia_todas_categorias(
+        self, medicao: Medicao, nome_campo: str, dia
+    ) -> list:
+        return list(
+            self._valores_todas_categorias.get(
+                (medicao.id, nome_campo, f"{int(dia):02d}"), []
+            )
+        )
+
+    def faixa_etaria_id(self, inicio: int, fim: int) -> int:
+        try:
+            return self._faixas_etarias[(inicio, fim)]
+        except KeyError:
+            raise FaixaEtaria.DoesNotExist("Faixa etária não encontrada.")
+
+    def tem_dia_letivo_sigpae(self, dia: int, periodo: str) -> bool:
+        return (int(dia), periodo.lower()) in self._dias_letivos_sigpae
+
+    def dia_letivo_calendario(self, dia: int) -> bool:
+        dias = self._dias_calendario.get(int(dia), [])
+        return dias[0] if len(dias) == 1 else False
+
+
+def get_indice_relatorio_medicao(solicitacao) -> Optional[IndiceRelatorioMedicao]:
+    return getattr(solicitacao, ATRIBUTO_INDICE, None)
+
+
+@contextmanager
+def indice_relatorio_medicao(solicitacao: SolicitacaoMedicaoInicial):
+    """
+    Ativa o índice em memória para a solicitação durante a montagem do relatório.
+
+    Chamadas aninhadas reaproveitam o índice já ativo.
+    """
+    if get_indice_relatorio_medicao(solicitacao) is not None:
+        yield get_indice_relatorio_medicao(solicitacao)
+        return
+    indice = IndiceRelatorioMedicao(solicitacao)
+    setattr(solicitacao, ATRIBUTO_INDICE, indice)
+    try:
+        yield indice
+    finally:
+        delattr(solicitacao, ATRIBUTO_INDICE)
@@ -2,8 +2,6 @@ import math
 
 import pandas as pd
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import FloatField, Sum
-from django.db.models.functions import Cast
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -15,12 +13,15 @@ from src.escola.models import FaixaEtaria
 from src.medicao_inicial.models import Medicao, SolicitacaoMedicaoInicial
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     generate_columns,
     gera_colunas_alimentacao,
     get_categorias_dietas,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     todas_medicoes_sem_lancamentos,
     update_dietas_alimentacoes,
     update_periodos_alimentacoes,
@@ -214,8 +215,8 @@ def processa_dieta_especial(
     periodo: str,
     query_params: dict | None = None,
 ) -> float | str:
-    medicoes = solicitacao.medicoes.filter(**filtros)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, **filtros)
+    if not medicoes:
         return "-"
 
     total = 0.0
@@ -236,7 +237,7 @@ def processa_periodo_regular(
     query_params: dict | None = None,
 ) -> float | str:
     try:
-        medicao = solicitacao.medicoes.get(**filtros)
+        medicao = busca_medicao(solicitacao, **filtros)
     except ObjectDoesNotExist:
         return "-"
 
@@ -254,15 +255,12 @@ def _calcula_soma_medicao(
     categoria: str,
     query_params: dict | None = None,
 ) -> float | None:
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo="frequencia",
-            faixa_etaria_id=faixa_etaria,
-            categoria_medicao__nome=categoria,
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo="frequencia",
+        faixa_etaria_id=faixa_etaria,
+        categoria_medicao__nome=categoria,
     )
 
 
@@ -1,8 +1,7 @@
 import math
 
 import pandas as pd
-from django.db.models import FloatField, Q, Sum
-from django.db.models.functions import Cast
+from django.db.models import Q
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -20,12 +19,15 @@ from src.medicao_inicial.models import (
 from src.medicao_inicial.services import relatorio_consolidado_emei_emef
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     generate_columns,
     gera_colunas_alimentacao,
     get_categorias_dietas,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     todas_medicoes_sem_lancamentos,
     update_dietas_alimentacoes,
     update_periodos_alimentacoes,
@@ -401,8 +403,8 @@ def processa_dieta_especial(
     for filtro, valor in filtros.items():
         condicoes = condicoes | Q(**{filtro: valor})
 
-    medicoes = solicitacao.medicoes.filter(condicoes)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, condicoes)
+    if not medicoes:
         return "-"
 
     categorias = (
@@ -444,7 +446,7 @@ def processa_periodo_regular(
     Returns:
         float | str: Valor calculado do campo especificado, ou "-" se o valor for None ou não existir.
     """
-    medicao = solicitacao.medicoes.get(**filtros)
+    medicao = busca_medicao(solicitacao, **filtros)
 
     if campo in ["total_refeicoes_pagamento", "total_sobremesas_pagamento"]:
         return relatorio_consolidado_emei_emef._total_pagamento_emef(
@@ -478,11 +480,8 @@ def _calcula_soma_medicao(
     Returns:
         float: Soma total dos valores do campo especificado, ou None se não houver valores que atendam aos critérios.
     """
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(nome_campo=campo, categoria_medicao__nome__in=categorias)
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao, query_params, nome_campo=campo, categoria_medicao__nome__in=categorias
     )
 
 
@@ -1,8 +1,7 @@
 import logging
 import math
 
-from django.db.models import FloatField, Q, Sum
-from django.db.models.functions import Cast
+from django.db.models import Q
 
 from src.dados_comuns.constants import (
     NOMES_CAMPOS,
@@ -13,12 +12,17 @@ from src.escola.models import PeriodoEscolar
 from src.medicao_inicial.models import CategoriaMedicao
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    conta_valores_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     gera_colunas_alimentacao,
     get_lista_dias_periodo,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     todas_medicoes_sem_lancamentos,
+    valor_do_dia,
 )
 
 logger = logging.getLogger(__name__)
@@ -369,8 +373,8 @@ def processa_dieta_especial(
     for filtro, valor in filtros.items():
         condicoes = condicoes | Q(**{filtro: valor})
 
-    medicoes = solicitacao.medicoes.filter(condicoes)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, condicoes)
+    if not medicoes:
         return "-"
 
     categorias = (
@@ -393,7 +397,7 @@ def processa_dieta_especial(
 def processa_periodo_regular(
     solicitacao, filtros, campo, periodo, turma, query_params=None
 ):
-    medicao = solicitacao.medicoes.get(**filtros)
+    medicao = busca_medicao(solicitacao, **filtros)
 
     if campo in ["total_refeicoes_pagamento", "total_sobremesas_pagamento"]:
         return _get_total_pagamento(medicao, campo, turma, query_params)
@@ -410,26 +414,19 @@ def processa_periodo_regular(
 
 
 def _calcula_soma_medicao(medicao, campo, categorias, turma, query_params=None):
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo=campo,
-            categoria_medicao__nome__in=categorias,
-            infantil_ou_fundamental__in=turma,
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo=campo,
+        categoria_medicao__nome__in=categorias,
+        infantil_ou_fundamental__in=turma,
     )
 
 
 def _get_total_pagamento(medicao, nome_campo, turma, query_params=None):
     if turma == "INFANTIL":
-        total_valores = (
-            filtra_queryset_pelo_intervalo_de_dias(
-                medicao.valores_medicao, query_params
-            )
-            .filter(infantil_ou_fundamental=turma)
-            .count()
+        total_valores = conta_valores_medicao(
+            medicao, query_params, infantil_ou_fundamental=turma
         )
         if (
             total_valores > 0
@@ -461,71 +458,48 @@ def _total_pagamento_infantil(medicao, nome_campo, valor_padrao, query_params=No
         else campos_sobremesas
     )
 
-    total_pagamento = (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo__in=lista_campos,
-            categoria_medicao__nome="ALIMENTAÇÃO",
-            infantil_ou_fundamental="INFANTIL",
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))
+    total = soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo__in=lista_campos,
+        categoria_medicao__nome="ALIMENTAÇÃO",
+        infantil_ou_fundamental="INFANTIL",
     )
-    total = total_pagamento["total"]
     return total if total is not None else valor_padrao
 
 
 def calcula_totais_pagamento_emebs_fundamental(
     primeira_oferta, repeticao_primeira, segunda_oferta, repeticao_segunda, medicao, dia
 ):
-    matriculados = medicao.valores_medicao.filter(
-        nome_campo="matriculados",
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
-    numero_de_alunos = medicao.valores_medicao.filter(
-        nome_campo="numero_de_alunos",
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
+    turma = "FUNDAMENTAL"
+    matriculados = valor_do_dia(medicao, "matriculados", dia, turma=turma)
+    numero_de_alunos = valor_do_dia(medicao, "numero_de_alunos", dia, turma=turma)
 
     valor_comparativo = (
-        matriculados.valor
-        if matriculados
-        else numero_de_alunos.valor if numero_de_alunos else 0
+        matriculados
+        if matriculados is not None
+        else numero_de_alunos if numero_de_alunos is not None else 0
     )
 
-    refeicao = medicao.valores_medicao.filter(
-        nome_campo=primeira_oferta,
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
-    repeticao_refeicao = medicao.valores_medicao.filter(
-        nome_campo=repeticao_primeira,
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
+    refeicao = valor_do_dia(medicao, primeira_oferta, dia, turma=turma)
+    repeticao_refeicao = valor_do_dia(medicao, repeticao_primeira, dia, turma=turma)
 
-    valor_refeicao = refeicao.valor if refeicao else 0
-    valor_repeticao_refeicao = repeticao_refeicao.valor if repeticao_refeicao else 0
+    valor_refeicao = refeicao if refeicao is not None else 0
+    valor_repeticao_refeicao = (
+        repeticao_refeicao if repeticao_refeicao is not None else 0
+    )
 
     total_refeicao = int(valor_refeicao) + int(valor_repeticao_refeicao)
     total_refeicao = min(int(total_refeicao), int(valor_comparativo))
 
-    segunda_refeicao = medicao.valores_medicao.filter(
-        nome_campo=segunda_oferta,
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
-    repeticao_segunda_refeicao = medicao.valores_medicao.filter(
-        nome_campo=repeticao_segunda,
-        dia=f"{dia:02d}",
-        infantil_ou_fundamental="FUNDAMENTAL",
-    ).first()
-
-    valor_segunda_refeicao = segunda_refeicao.valor if segunda_refeicao else 0
+    segunda_refeicao = valor_do_dia(medicao, segunda_oferta, dia, turma=turma)
+    repeticao_segunda_refeicao = valor_do_dia(
+        medicao, repeticao_segunda, dia, turma=turma
+    )
+
+    valor_segunda_refeicao = segunda_refeicao if segunda_refeicao is not None else 0
     valor_repeticao_segunda_refeicao = (
-        repeticao_segunda_refeicao.valor if repeticao_segunda_refeicao else 0
+        repeticao_segunda_refeicao if repeticao_segunda_refeicao is not None else 0
     )
 
     total_segunda_refeicao = int(valor_segunda_refeicao) + int(
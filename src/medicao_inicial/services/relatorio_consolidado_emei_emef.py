@@ -1,7 +1,6 @@
 import math
 
-from django.db.models import FloatField, Q, Sum
-from django.db.models.functions import Cast
+from django.db.models import Q
 
 from src.dados_comuns.constants import (
     NOMES_CAMPOS,
@@ -13,6 +12,8 @@ from src.dados_comuns.constants import (
 from src.escola.models import PeriodoEscolar
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     generate_columns,
     gera_colunas_alimentacao,
@@ -20,9 +21,11 @@ from src.medicao_inicial.services.utils import (
     get_lista_dias_periodo,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     todas_medicoes_sem_lancamentos,
     update_dietas_alimentacoes,
     update_periodos_alimentacoes,
+    valor_do_dia,
 )
 
 from ..models import CategoriaMedicao
@@ -235,8 +238,8 @@ def processa_dieta_especial(solicitacao, filtros, campo, periodo, query_params=N
     for filtro, valor in filtros.items():
         condicoes = condicoes | Q(**{filtro: valor})
 
-    medicoes = solicitacao.medicoes.filter(condicoes)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, condicoes)
+    if not medicoes:
         return "-"
 
     categorias = (
@@ -259,7 +262,7 @@ def processa_dieta_especial(solicitacao, filtros, campo, periodo, query_params=N
 def processa_periodo_regular(
     solicitacao, filtros, campo, periodo, query_params=None, tipo_unidade=None
 ):
-    medicao = solicitacao.medicoes.get(**filtros)
+    medicao = busca_medicao(solicitacao, **filtros)
 
     iniciais = (
         solicitacao.escola.tipo_unidade.iniciais
@@ -279,11 +282,8 @@ def processa_periodo_regular(
 
 
 def _calcula_soma_medicao(medicao, campo, categorias, query_params=None):
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(nome_campo=campo, categoria_medicao__nome__in=categorias)
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao, query_params, nome_campo=campo, categoria_medicao__nome__in=categorias
     )
 
 
@@ -299,50 +299,36 @@ def calcula_totais_pagamento_emef(
 ):
     categoria = MEDICAO_CATEGORIA_ALIMENTACAO
     if medicao.solicitacao_medicao_inicial.recreio_nas_ferias is None:
-        matriculados = medicao.valores_medicao.filter(
-            nome_campo="matriculados", dia=f"{dia:02d}"
-        ).first()
-        numero_de_alunos = medicao.valores_medicao.filter(
-            nome_campo="numero_de_alunos", dia=f"{dia:02d}"
-        ).first()
+        matriculados = valor_do_dia(medicao, "matriculados", dia)
+        numero_de_alunos = valor_do_dia(medicao, "numero_de_alunos", dia)
         valor_comparativo = (
-            matriculados.valor
-            if matriculados
-            else numero_de_alunos.valor if numero_de_alunos else 0
+            matriculados
+            if matriculados is not None
+            else numero_de_alunos if numero_de_alunos is not None else 0
         )
     else:
-        participantes = medicao.valores_medicao.filter(
-            nome_campo="participantes", dia=f"{dia:02d}"
-        ).first()
-        valor_comparativo = participantes.valor if participantes else 0
-
-    refeicao = medicao.valores_medicao.filter(
-        nome_campo=primeira_oferta, dia=f"{dia:02d}", categoria_medicao__nome=categoria
-    ).first()
-    repeticao_refeicao = medicao.valores_medicao.filter(
-        nome_campo=repeticao_primeira,
-        dia=f"{dia:02d}",
-        categoria_medicao__nome=categoria,
-    ).first()
-
-    valor_refeicao = refeicao.valor if refeicao else 0
-    valor_repeticao_refeicao = repeticao_refeicao.valor if repeticao_refeicao else 0
+        participantes = valor_do_dia(medicao, "participantes", dia)
+        valor_comparativo = participantes if participantes is not None else 0
+
+    refeicao = valor_do_dia(medicao, primeira_oferta, dia, categoria)
+    repeticao_refeicao = valor_do_dia(medicao, repeticao_primeira, dia, categoria)
+
+    valor_refeicao = refeicao if refeicao is not None else 0
+    valor_repeticao_refeicao = (
+        repeticao_refeicao if repeticao_refeicao is not None else 0
+    )
 
     total_refeicao = int(valor_refeicao) + int(valor_repeticao_refeicao)
     total_refeicao = min(int(total_refeicao), int(valor_comparativo))
 
-    segunda_refeicao = medicao.valores_medicao.filter(
-        nome_campo=segunda_oferta, dia=f"{dia:02d}", categoria_medicao__nome=categoria
-    ).first()
-    repeticao_segunda_refeicao = medicao.valores_medicao.filter(
-        nome_campo=repeticao_segunda,
-        dia=f"{dia:02d}",
-        categoria_medicao__nome=categoria,
-    ).first()
+    segunda_refeicao = valor_do_dia(medicao, segunda_oferta, dia, categoria)
+    repeticao_segunda_refeicao = valor_do_dia(
+        medicao, repeticao_segunda, dia, categoria
+    )
 
-    valor_segunda_refeicao = segunda_refeicao.valor if segunda_refeicao else 0
+    valor_segunda_refeicao = segunda_refeicao if segunda_refeicao is not None else 0
     valor_repeticao_segunda_refeicao = (
-        repeticao_segunda_refeicao.valor if repeticao_segunda_refeicao else 0
+        repeticao_segunda_refeicao if repeticao_segunda_refeicao is not None else 0
     )
 
     total_segunda_refeicao = int(valor_segunda_refeicao) + int(
@@ -402,18 +388,13 @@ def _total_pagamento_emei(medicao, nome_campo, query_params=None):
         else campos_sobremesas
     )
 
-    total_pagamento = (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo__in=lista_campos,
-            categoria_medicao__nome=MEDICAO_CATEGORIA_ALIMENTACAO,
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))
+    return soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo__in=lista_campos,
+        categoria_medicao__nome=MEDICAO_CATEGORIA_ALIMENTACAO,
     )
 
-    return total_pagamento["total"]
-
 
 def insere_tabela_periodos_na_planilha(aba, colunas, linhas, writer):
     df = gera_colunas_alimentacao(aba, colunas, linhas, writer, NOMES_CAMPOS)
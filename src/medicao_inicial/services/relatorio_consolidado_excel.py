@@ -26,6 +26,9 @@ from src.medicao_inicial.services import (
     relatorio_consolidado_recreio_cemei,
     relatorio_consolidado_recreio_emei_emef,
 )
+from src.medicao_inicial.services.agregado_relatorio_consolidado import (
+    agregado_relatorio_consolidado,
+)
 
 from ..models import SolicitacaoMedicaoInicial
 
@@ -59,17 +62,12 @@ def gera_relatorio_consolidado_xlsx(
             modulo_da_unidade, parametros = _obter_modulo_da_unidade_recreio(
                 tipos_de_unidade
             )
-            colunas = modulo_da_unidade.get_alimentacoes_por_periodo(
-                solicitacoes, query_params=query_params
-            )
-            linhas = modulo_da_unidade.get_valores_tabela(
-                solicitacoes, colunas, *parametros, query_params=query_params
-            )
         else:
             modulo_da_unidade, parametros = _obter_modulo_da_unidade(tipos_de_unidade)
-            colunas = modulo_da_unidade.get_alimentacoes_por_periodo(
-                solicitacoes, query_params=query_params
-            )
+        colunas = modulo_da_unidade.get_alimentacoes_por_periodo(
+            solicitacoes, query_params=query_params
+        )
+        with agregado_relatorio_consolidado(solicitacoes, query_params):
             linhas = modulo_da_unidade.get_valores_tabela(
                 solicitacoes, colunas, *parametros, query_params=query_params
             )
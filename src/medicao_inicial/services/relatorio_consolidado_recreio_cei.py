@@ -2,8 +2,7 @@ import math
 
 import pandas as pd
 from django.core.exceptions import ObjectDoesNotExist
-from django.db.models import FloatField, Q, Sum
-from django.db.models.functions import Cast
+from django.db.models import Q
 from openpyxl.workbook import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -16,12 +15,15 @@ from src.escola.models import FaixaEtaria
 from src.medicao_inicial.models import Medicao, SolicitacaoMedicaoInicial
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     generate_columns,
     gera_colunas_alimentacao,
     get_categorias_dietas,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     total_pagamento_colaboradores,
     update_dietas_alimentacoes,
     update_periodos_alimentacoes,
@@ -359,8 +361,8 @@ def processa_dieta_especial(
         float | str: Soma dos valores encontrados ou "-" quando não houver registros
             válidos.
     """
-    medicoes = solicitacao.medicoes.filter(**filtros)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, **filtros)
+    if not medicoes:
         return "-"
 
     total = 0.0
@@ -401,15 +403,12 @@ def _calcula_soma_medicao(
         float | None: Soma dos valores encontrados ou ``None`` quando não existirem
             registros correspondentes.
     """
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo=nome_campo,
-            faixa_etaria_id=faixa_etaria,
-            categoria_medicao__nome__contains=categoria,
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo=nome_campo,
+        faixa_etaria_id=faixa_etaria,
+        categoria_medicao__nome__contains=categoria,
     )
 
 
@@ -442,7 +441,7 @@ def processa_grupos_recreio(
     """
 
     try:
-        medicao = solicitacao.medicoes.get(**filtros)
+        medicao = busca_medicao(solicitacao, **filtros)
     except ObjectDoesNotExist:
         return "-"
 
@@ -1,8 +1,7 @@
 import math
 
 import pandas as pd
-from django.db.models import FloatField, Q, Sum
-from django.db.models.functions import Cast
+from django.db.models import Q
 from openpyxl import Workbook
 from openpyxl.worksheet.worksheet import Worksheet
 
@@ -24,6 +23,8 @@ from src.medicao_inicial.services.relatorio_consolidado_emei_emef import (
     calcula_totais_pagamento_emef,
 )
 from src.medicao_inicial.services.utils import (
+    busca_medicao,
+    filtra_medicoes,
     filtra_queryset_pelo_intervalo_de_dias,
     generate_columns,
     gera_colunas_alimentacao,
@@ -31,6 +32,7 @@ from src.medicao_inicial.services.utils import (
     get_filtros_intervalo_dias,
     get_nome_periodo,
     get_valores_iniciais,
+    soma_valores_medicao,
     total_pagamento_colaboradores,
     update_dietas_alimentacoes,
     update_periodos_alimentacoes,
@@ -453,8 +455,8 @@ def processa_dieta_especial(
     for filtro, valor in filtros.items():
         condicoes = condicoes | Q(**{filtro: valor})
 
-    medicoes = solicitacao.medicoes.filter(condicoes)
-    if not medicoes.exists():
+    medicoes = filtra_medicoes(solicitacao, condicoes)
+    if not medicoes:
         return "-"
 
     categorias = (
@@ -493,11 +495,8 @@ def _calcula_soma_medicao(
     Returns:
         float: Soma dos valores encontrados ou None quando não houver registros.
     """
-    return (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(nome_campo=campo, categoria_medicao__nome__in=categorias)
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))["total"]
+    return soma_valores_medicao(
+        medicao, query_params, nome_campo=campo, categoria_medicao__nome__in=categorias
     )
 
 
@@ -529,7 +528,7 @@ def processa_grupos_recreio(
     Returns:
         str | float: Valor total calculado para o campo informado ou "-" quando não existirem registros compatíveis.
     """
-    medicao = solicitacao.medicoes.get(**filtros)
+    medicao = busca_medicao(solicitacao, **filtros)
 
     iniciais = (
         solicitacao.escola.tipo_unidade.iniciais
@@ -2,10 +2,8 @@ import datetime
 import io
 from calendar import monthrange
 
-from django.contrib.staticfiles.storage import staticfiles_storage
 from django.template.loader import render_to_string
 from pypdf import PdfReader, PdfWriter
-from weasyprint import HTML
 
 from src.dados_comuns.utils import converte_numero_em_mes
 from src.escola.models import Escola
@@ -20,6 +18,7 @@ from src.medicao_inicial.utils import (
     get_queryset_filtrado,
     queryset_alunos_matriculados,
 )
+from src.relatorios.renderizador_pdf import renderiza_pdf
 
 
 def _total_matriculados(periodos):
@@ -131,13 +130,10 @@ def gera_relatorio_controle_frequencia_pdf(query_params, escola_uuid):
         },
     )
 
-    html_pdf_cabecalho_relatorio_controle_frequencia = HTML(
-        string=html_string_cabecalho_relatorio_controle_frequencia,
-        base_url=staticfiles_storage.location,
-    ).write_pdf()
-    html_pdf_relatorio_controle_frequencia = HTML(
-        string=html_string, base_url=staticfiles_storage.location
-    ).write_pdf()
+    html_pdf_cabecalho_relatorio_controle_frequencia = renderiza_pdf(
+        html_string_cabecalho_relatorio_controle_frequencia
+    )
+    html_pdf_relatorio_controle_frequencia = renderiza_pdf(html_string)
 
     arquivo_final = io.BytesIO()
     pdf_cabecalho_relatorio_controle_frequencia = PdfReader(
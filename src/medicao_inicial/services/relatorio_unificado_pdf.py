@@ -0,0 +1,87 @@
+import os
+import shutil
+import uuid
+from contextlib import ExitStack
+from typing import Iterable
+
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from pikepdf import Pdf
+
+DIRETORIO_PARCIAIS = "relatorios_unificados_parciais"
+TAMANHO_LOTE_MESCLAGEM = 50
+
+
+def cria_prefixo_parciais() -> str:
+    """
+    Prefixo, no `default_storage`, dos PDFs parciais de um relatório unificado.
+    O storage é o ponto compartilhado entre os workers que geram os parciais e
+    o que os mescla; o disco local de cada worker não é.
+    """
+    return f"{DIRETORIO_PARCIAIS}/{uuid.uuid4().hex}"
+
+
+def grava_pdf_parcial(prefixo: str, posicao: int, conteudo: bytes) -> str:
+    """Grava o parcial no `default_storage` e retorna o nome gravado."""
+    return default_storage.save(f"{prefixo}/{posicao:05d}.pdf", ContentFile(conteudo))
+
+
+def copia_pdfs_parciais(nomes: Iterable[str], diretorio: str) -> list:
+    """
+    Copia os parciais do `default_storage` para `diretorio`, no disco local do
+    worker, onde são mesclados. Retorna os caminhos locais na ordem recebida.
+    """
+    caminhos = []
+    for posicao, nome in enumerate(nomes):
+        caminho = os.path.join(diretorio, f"{posicao:05d}.pdf")
+        with default_storage.open(nome, "rb") as origem, open(caminho, "wb") as destino:
+            shutil.copyfileobj(origem, destino)
+        caminhos.append(caminho)
+    return caminhos
+
+
+def remove_pdfs_parciais(nomes: Iterable[str]) -> None:
+    for nome in nomes:
+        default_storage.delete(nome)
+
+
+def _mescla_lote(caminhos: list, destino: str) -> None:
+    # o pikepdf lê as páginas de origem sob demanda ao salvar, por isso os
+    # arquivos do lote ficam abertos até o save
+    with ExitStack() as pilha:
+        pdf_final = pilha.enter_context(Pdf.new())
+        for caminho in caminhos:
+            pdf_final.pages.extend(pilha.enter_context(Pdf.open(caminho)).pages)
+        pdf_final.save(destino)
+
+
+def mescla_pdfs(
+    caminhos: Iterable[str], destino: str, tamanho_lote: int = TAMANHO_LOTE_MESCLAGEM
+) -> None:
+    """
+    Mescla os PDFs em disco, na ordem recebida, gravando o resultado em `destino`.
+
+    Com mais de `tamanho_lote` arquivos, mescla por lotes em arquivos
+    intermediários e depois mescla os intermediários, limitando a quantidade de
+    arquivos abertos ao mesmo tempo. As páginas não são mantidas em memória.
+
+    Args:
+        caminhos (Iterable[str]): PDFs de origem.
+        destino (str): caminho do PDF final.
+        tamanho_lote (int, optional): quantidade de arquivos por mesclagem.
+    """
+    caminhos = list(caminhos)
+    if len(caminhos) <= tamanho_lote:
+        _mescla_lote(caminhos, destino)
+        return
+
+    intermediarios = []
+    for indice, inicio in enumerate(range(0, len(caminhos), tamanho_lote)):
+        intermediario = f"{destino}.parte{indice:05d}.pdf"
+        _mescla_lote(caminhos[inicio : inicio + tamanho_lote], intermediario)
+        intermediarios.append(intermediario)
+    try:
+        mescla_pdfs(intermediarios, destino, tamanho_lote)
+    finally:
+        for intermediario in intermediarios:
+            os.remove(intermediario)
@@ -0,0 +1,129 @@
+import uuid
+from datetime import datetime
+from typing import Iterable, Optional
+
+from django.db import connection
+
+from src.medicao_inicial.models import SolicitacaoMedicaoInicial, ValorMedicao
+
+TAMANHO_LOTE = 1000
+
+COLUNAS = (
+    "uuid",
+    "criado_em",
+    "medicao_id",
+    "dia",
+    "semana",
+    "nome_campo",
+    "categoria_medicao_id",
+    "tipo_alimentacao_id",
+    "faixa_etaria_id",
+    "infantil_ou_fundamental",
+    "valor",
+    "habilitado_correcao",
+)
+
+# Deve reproduzir exatamente as expressões de unique_valor_medicao_chave_natural
+# para que o Postgres infira o índice único no ON CONFLICT.
+ALVO_CONFLITO = (
+    "(medicao_id, dia, nome_campo, categoria_medicao_id, "
+    "COALESCE(tipo_alimentacao_id, 0), COALESCE(faixa_etaria_id, 0), "
+    "infantil_ou_fundamental)"
+)
+
+
+def chave_natural(valor_medicao: ValorMedicao) -> tuple:
+    return (
+        valor_medicao.medicao_id,
+        valor_medicao.dia,
+        valor_medicao.nome_campo,
+        valor_medicao.categoria_medicao_id,
+        valor_medicao.tipo_alimentacao_id,
+        valor_medicao.faixa_etaria_id,
+        valor_medicao.infantil_ou_fundamental,
+    )
+
+
+def _linha(valor_medicao: ValorMedicao, semanas: dict, criado_em: datetime) -> list:
+    return [
+        valor_medicao.uuid or uuid.uuid4(),
+        criado_em,
+        valor_medicao.medicao_id,
+        valor_medicao.dia,
+        valor_medicao.semana or semanas.get(int(valor_medicao.dia), ""),
+        valor_medicao.nome_campo,
+        valor_medicao.categoria_medicao_id,
+        valor_medicao.tipo_alimentacao_id,
+        valor_medicao.faixa_etaria_id,
+        valor_medicao.infantil_ou_fundamental,
+        str(valor_medicao.valor),
+        valor_medicao.habilitado_correcao,
+    ]
+
+
+def _executa_lote(linhas: list, acao_conflito: str) -> int:
+    placeholders = "(" + ", ".join(["%s"] * len(COLUNAS)) + ")"
+    sql = (
+        f"INSERT INTO {ValorMedicao._meta.db_table} ({', '.join(COLUNAS)}) "
+        f"VALUES {', '.join([placeholders] * len(linhas))} "
+        f"ON CONFLICT {ALVO_CONFLITO} {acao_conflito}"
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(sql, [campo for linha in linhas for campo in linha])
+        return cursor.rowcount
+
+
+def salva_valores_medicao(
+    solicitacao: SolicitacaoMedicaoInicial,
+    valores_medicao: Iterable[ValorMedicao],
+    campos_atualizados: Optional[tuple] = ("valor", "semana"),
+    tamanho_lote: int = TAMANHO_LOTE,
+) -> int:
+    """
+    Grava em lote valores de medição de uma solicitação com um único
+    `INSERT ... ON CONFLICT` por lote, usando a chave natural de ValorMedicao.
+
+    Args:
+        solicitacao (SolicitacaoMedicaoInicial): solicitação dos valores; define
+            o mês usado para calcular a semana de cada dia.
+        valores_medicao (Iterable[ValorMedicao]): instâncias não salvas. Quando a
+            mesma chave natural aparece mais de uma vez, prevalece a última.
+        campos_atualizados (tuple, optional): campos sobrescritos quando a chave
+            já existe. Com None, os registros existentes são mantidos
+            (`ON CONFLICT DO NOTHING`).
+        tamanho_lote (int, optional): quantidade de linhas por comando.
+
+    Returns:
+        int: quantidade de linhas inseridas ou atualizadas.
+    """
+    por_chave = {}
+    for valor_medicao in valores_medicao:
+        por_chave[chave_natural(valor_medicao)] = valor_medicao
+    if not por_chave:
+        return 0
+
+    semanas = ValorMedicao.get_weeks_of_month(
+        int(solicitacao.ano), int(solicitacao.mes)
+    )
+    criado_em = datetime.now()
+    linhas = [_linha(valor, semanas, criado_em) for valor in por_chave.values()]
+
+    if campos_atualizados:
+        atribuicoes = ", ".join(
+            f"{campo} = EXCLUDED.{campo}" for campo in campos_atualizados
+        )
+        acao_conflito = f"DO UPDATE SET {atribuicoes}"
+    else:
+        acao_conflito = "DO NOTHING"
+
+    total = 0
+    for inicio in range(0, len(linhas), tamanho_lote):
+        total += _executa_lote(linhas[inicio : inicio + tamanho_lote], acao_conflito)
+    return total
+
+
+def insere_valores_medicao_ausentes(
+    solicitacao: SolicitacaoMedicaoInicial, valores_medicao: Iterable[ValorMedicao]
+) -> int:
+    """Insere apenas os valores cuja chave natural ainda não existe."""
+    return salva_valores_medicao(solicitacao, valores_medicao, campos_atualizados=None)
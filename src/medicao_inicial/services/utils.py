@@ -6,6 +6,9 @@ from django.db.models import FloatField, Sum
 from django.db.models.functions import Cast
 
 from src.medicao_inicial.models import Medicao, SolicitacaoMedicaoInicial
+from src.medicao_inicial.services.agregado_relatorio_consolidado import (
+    get_agregado_relatorio_consolidado,
+)
 
 
 def get_nome_periodo(medicao: Medicao) -> str:
@@ -186,6 +189,70 @@ def filtra_queryset_pelo_intervalo_de_dias(queryset, query_params: dict | None):
     return queryset.filter(**filtros_dias) if filtros_dias else queryset
 
 
+def soma_valores_medicao(
+    medicao: Medicao, query_params: dict | None = None, **filtros
+) -> float | None:
+    """
+    Soma, como float, os valores da medição que atendem aos filtros, no recorte
+    de dias informado. Retorna None quando não há registros.
+    """
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.soma(medicao.id, **filtros)
+    return (
+        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
+        .filter(**filtros)
+        .annotate(valor_float=Cast("valor", output_field=FloatField()))
+        .aggregate(total=Sum("valor_float"))["total"]
+    )
+
+
+def conta_valores_medicao(
+    medicao: Medicao, query_params: dict | None = None, **filtros
+) -> int:
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.quantidade(medicao.id, **filtros)
+    return (
+        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
+        .filter(**filtros)
+        .count()
+    )
+
+
+def valor_do_dia(
+    medicao: Medicao, nome_campo: str, dia: int, categoria=None, turma=None
+) -> str | None:
+    """
+    Valor do primeiro registro do campo no dia, opcionalmente restrito à
+    categoria e à turma (infantil ou fundamental). None quando não há registro.
+    """
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.valor_do_dia(medicao.id, nome_campo, dia, categoria, turma)
+    filtros = {"nome_campo": nome_campo, "dia": f"{dia:02d}"}
+    if categoria is not None:
+        filtros["categoria_medicao__nome"] = categoria
+    if turma is not None:
+        filtros["infantil_ou_fundamental"] = turma
+    valor_medicao = medicao.valores_medicao.filter(**filtros).first()
+    return valor_medicao.valor if valor_medicao else None
+
+
+def busca_medicao(solicitacao: SolicitacaoMedicaoInicial, **filtros) -> Medicao:
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.medicao(solicitacao, **filtros)
+    return solicitacao.medicoes.get(**filtros)
+
+
+def filtra_medicoes(solicitacao: SolicitacaoMedicaoInicial, *condicoes, **filtros):
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.medicoes(solicitacao, *condicoes, **filtros)
+    return solicitacao.medicoes.filter(*condicoes, **filtros)
+
+
 def get_lista_dias_periodo(
     mes: str | int, ano: str | int, query_params: dict | None = None
 ) -> range:
@@ -299,20 +366,19 @@ def total_pagamento_colaboradores(
         else campos_sobremesas
     )
 
-    resposta = (
-        filtra_queryset_pelo_intervalo_de_dias(medicao.valores_medicao, query_params)
-        .filter(
-            nome_campo__in=lista_campos,
-            categoria_medicao__nome="ALIMENTAÇÃO",
-        )
-        .annotate(valor_float=Cast("valor", output_field=FloatField()))
-        .aggregate(total=Sum("valor_float"))
+    total_pagamento = soma_valores_medicao(
+        medicao,
+        query_params,
+        nome_campo__in=lista_campos,
+        categoria_medicao__nome="ALIMENTAÇÃO",
     )
-    total_pagamento = resposta["total"]
     return 0 if total_pagamento is None else total_pagamento
 
 
 def todas_medicoes_sem_lancamentos(solicitacao):
+    agregado = get_agregado_relatorio_consolidado()
+    if agregado:
+        return agregado.sem_lancamentos(solicitacao)
     total_medicoes = solicitacao.medicoes.count()
     sem_lancamentos = solicitacao.medicoes.filter(
         status="MEDICAO_SEM_LANCAMENTOS"
@@ -1,14 +1,15 @@
 import calendar
 import datetime
 import logging
-from io import BytesIO
+import os
+import tempfile
+from typing import Callable, Optional
 from uuid import UUID
 
-from celery import shared_task
+from celery import chord, shared_task
 from dateutil.relativedelta import relativedelta
 from django.db.models import Q
 from django.db import transaction
-from pypdf import PdfWriter
 
 from src.dados_comuns.models import CentralDeDownload, LogSolicitacoesUsuario
 from src.medicao_inicial.services.ordenacao_unidades import ordenar_unidades
@@ -27,12 +28,21 @@ from src.medicao_inicial.services.relatorio_controle_frequencia_pdf import (
 from src.medicao_inicial.services.relatorio_historio_correcoes_pdf import (
     gera_relatorio_historico_correcoes_pdf,
 )
+from src.medicao_inicial.services.relatorio_unificado_pdf import (
+    copia_pdfs_parciais,
+    cria_prefixo_parciais,
+    grava_pdf_parcial,
+    mescla_pdfs,
+    remove_pdfs_parciais,
+)
 from src.perfil.models.usuario import Usuario
 
 from ..dados_comuns.utils import (
     atualiza_central_download,
     atualiza_central_download_com_erro,
+    atualiza_central_download_de_arquivo,
     gera_objeto_na_central_download,
+    registra_etapa_central_download,
 )
 from ..escola.models import AlunoPeriodoParcial, Escola
 from ..relatorios.relatorios import (
@@ -293,9 +303,11 @@ def gera_pdf_relatorio_unificado_async(
     """
     Gera um PDF unificado contendo os relatórios das solicitações informadas.
 
-    A função cria um registro na Central de Download, processa cada solicitação
-    gerando seus respectivos PDFs e, ao final, unifica todos os arquivos em um
-    único PDF final.
+    A função cria um registro na Central de Download e distribui a geração do
+    PDF de cada solicitação em uma subtask (`gera_pdf_parcial_relatorio_unificado_async`),
+    que grava o parcial no `default_storage`. Ao final de todas, um chord executa
+    `finaliza_pdf_relatorio_unificado_async`, que mescla os parciais em disco
+    com o pikepdf. O progresso é registrado na Central de Download.
 
     Args:
         user (str): Usuário responsável pela solicitação de geração.
@@ -306,7 +318,7 @@ def gera_pdf_relatorio_unificado_async(
         contem_recreio (bool): Se True, utiliza os templates de recreio nas férias.
 
     Raises:
-        Exception: Qualquer erro interno durante o processo de merge ou geração
+        Exception: Qualquer erro interno durante a distribuição das subtasks
             é capturado e registrado na Central de Download.
     """
     logger.info(f"x-x-x-x Iniciando a geração do arquivo {nome_arquivo} x-x-x-x")
@@ -314,101 +326,145 @@ def gera_pdf_relatorio_unificado_async(
         user=user, identificador=nome_arquivo
     )
     try:
-        merger_lancamentos = PdfWriter()
-        merger_arquivo_final = PdfWriter()
-
-        processa_relatorio_lançamentos(
-            ids_solicitacoes,
-            tipos_de_unidade,
-            merger_lancamentos,
-            obj_central_download,
-            contem_recreio,
+        # valida os tipos de unidade antes de distribuir as subtasks
+        obter_relatorio_da_unidade(tipos_de_unidade)
+        solicitacoes = ordenar_unidades(
+            SolicitacaoMedicaoInicial.objects.filter(uuid__in=ids_solicitacoes)
         )
-
-        output_final = cria_merge_pdfs(merger_lancamentos, merger_arquivo_final)
-
-        atualiza_central_download(obj_central_download, nome_arquivo, output_final)
+        prefixo = cria_prefixo_parciais()
+
+        # uma etapa por solicitação e uma para a mesclagem
+        obj_central_download.etapas_total = len(solicitacoes) + 1
+        obj_central_download.save(update_fields=["etapas_total"])
+
+        parciais = [
+            gera_pdf_parcial_relatorio_unificado_async.s(
+                str(solicitacao.uuid),
+                tipos_de_unidade,
+                contem_recreio,
+                prefixo,
+                posicao,
+                obj_central_download.id,
+            )
+            for posicao, solicitacao in enumerate(solicitacoes)
+        ]
+        finalizacao = finaliza_pdf_relatorio_unificado_async.s(
+            obj_central_download.id, nome_arquivo
+        )
+        if parciais:
+            chord(parciais)(finalizacao)
+        else:
+            finalizacao.delay([])
 
     except Exception as e:
         atualiza_central_download_com_erro(obj_central_download, str(e))
         logger.error(f"Erro ao gerar relatório unificado: {e}")
 
-    logger.info(f"x-x-x-x Finaliza a geração do arquivo {nome_arquivo} x-x-x-x")
-
 
-def processa_relatorio_lançamentos(
-    ids_solicitacoes: list[UUID],
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+    time_limit=600,
+    soft_time_limit=540,
+)
+def gera_pdf_parcial_relatorio_unificado_async(
+    uuid_solicitacao: str,
     tipos_de_unidade: list[str],
-    merger_lancamentos: PdfWriter,
-    obj_central_download: CentralDeDownload,
-    contem_recreio: bool = False,
-) -> None:
+    contem_recreio: bool,
+    prefixo: str,
+    posicao: int,
+    id_central_download: int,
+) -> Optional[str]:
     """
-    Processa cada solicitação gerando seu PDF individual e adicionando ao merger.
+    Gera o PDF de uma solicitação do relatório unificado e o grava no
+    `default_storage`, sob `prefixo`.
 
-    Args:
-        ids_solicitacoes (list[UUID]): Lista de UUIDs das solicitações.
-        tipos_de_unidade (list[str]): Tipos de unidade para definir o módulo
-            gerador de relatórios.
-        merger_lancamentos (PdfWriter): Instância usada para acumular os PDFs.
-        obj_central_download (CentralDeDownload): Objeto de controle na Central
-            de Download para registrar erros e status.
-        contem_recreio (bool): Se True, utiliza o dispatcher de recreio para
-            cada solicitação individualmente.
+    Returns:
+        Optional[str]: Nome do PDF parcial no storage, ou None se a geração falhar. A
+            falha é registrada na Central de Download sem interromper as demais
+            solicitações.
+    """
+    try:
+        solicitacao = SolicitacaoMedicaoInicial.objects.get(uuid=uuid_solicitacao)
+        arquivo_lancamentos = gera_pdf_solicitacao(
+            solicitacao, obter_relatorio_da_unidade(tipos_de_unidade), contem_recreio
+        )
+        return grava_pdf_parcial(prefixo, posicao, arquivo_lancamentos)
+    except Exception as e:
+        # update direto para não sobrescrever o progresso das outras subtasks
+        CentralDeDownload.objects.filter(id=id_central_download).update(
+            status=CentralDeDownload.STATUS_ERRO, msg_erro=str(e)[:300]
+        )
+        logger.error(
+            f"Erro ao gerar arquivo para a solicitação {uuid_solicitacao}: {e}"
+        )
+        return None
+    finally:
+        registra_etapa_central_download(id_central_download)
 
-    Raises:
-        Exception: Erros individuais de processamento são capturados e
-            registrados, sem interromper o processamento das demais solicitações.
+
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+    time_limit=3000,
+    soft_time_limit=3000,
+)
+def finaliza_pdf_relatorio_unificado_async(
+    parciais: list[Optional[str]],
+    id_central_download: int,
+    nome_arquivo: str,
+) -> None:
     """
+    Copia os PDFs parciais do `default_storage` para um diretório temporário,
+    mescla-os em disco, na ordem das solicitações, e anexa o resultado à
+    Central de Download. Os parciais são removidos do storage ao final.
 
-    solicitacoes = SolicitacaoMedicaoInicial.objects.filter(uuid__in=ids_solicitacoes)
-    modulo_da_unidade = obter_relatorio_da_unidade(tipos_de_unidade)
-    for solicitacao in ordenar_unidades(solicitacoes):
-        try:
-            if contem_recreio:
-                relatorio_fn = get_relatorio_solicitacao_medicao_por_escola(solicitacao)
-                arquivo_lancamentos = relatorio_fn(solicitacao)
-            else:
-                arquivo_lancamentos = modulo_da_unidade(solicitacao)
-            arquivo_lancamentos_io = BytesIO(arquivo_lancamentos)
-            merger_lancamentos.append(arquivo_lancamentos_io)
-        except Exception as e:
-            atualiza_central_download_com_erro(obj_central_download, str(e))
-            logger.error(
-                f"Erro ao mesclar arquivo para a solicitação {solicitacao.id}: {e}"
+    Args:
+        parciais (list[Optional[str]]): Resultados das subtasks de geração, na
+            ordem das solicitações; None indica solicitação com erro.
+        id_central_download (int): Registro da Central de Download.
+        nome_arquivo (str): Nome do arquivo final.
+    """
+    obj_central_download = CentralDeDownload.objects.get(id=id_central_download)
+    parciais = [nome for nome in parciais if nome]
+    try:
+        with tempfile.TemporaryDirectory() as diretorio:
+            destino = os.path.join(diretorio, "relatorio_unificado.pdf")
+            mescla_pdfs(copia_pdfs_parciais(parciais, diretorio), destino)
+            atualiza_central_download_de_arquivo(
+                obj_central_download, nome_arquivo, destino
             )
 
+    except Exception as e:
+        atualiza_central_download_com_erro(obj_central_download, str(e))
+        logger.error(f"Erro ao gerar relatório unificado: {e}")
+
+    finally:
+        remove_pdfs_parciais(parciais)
+
+    logger.info(f"x-x-x-x Finaliza a geração do arquivo {nome_arquivo} x-x-x-x")
 
-def cria_merge_pdfs(
-    merger_lancamentos: PdfWriter, merger_arquivo_final: PdfWriter
+
+def gera_pdf_solicitacao(
+    solicitacao: SolicitacaoMedicaoInicial,
+    modulo_da_unidade: Callable,
+    contem_recreio: bool = False,
 ) -> bytes:
     """
-    Realiza o merge dos PDFs individuais em um único arquivo final.
+    Gera o PDF de lançamentos de uma solicitação do relatório unificado.
 
     Args:
-        merger_lancamentos (PdfWriter): Writer contendo os PDFs das solicitações.
-        merger_arquivo_final (PdfWriter): Writer responsável por gerar o PDF final.
+        solicitacao (SolicitacaoMedicaoInicial): Solicitação a ser impressa.
+        modulo_da_unidade (Callable): Gerador obtido por obter_relatorio_da_unidade.
+        contem_recreio (bool): Se True, utiliza o dispatcher de recreio.
 
     Returns:
-        bytes: Conteúdo final do PDF unificado.
-
-    Raises:
-        Exception: Caso ocorra falha ao gerar ou escrever os arquivos PDF.
+        bytes: Conteúdo do PDF.
     """
-
-    output_lancamentos = BytesIO()
-    merger_lancamentos.write(output_lancamentos)
-    output_lancamentos.seek(0)
-    merger_arquivo_final.append(output_lancamentos)
-
-    output_final = BytesIO()
-    merger_arquivo_final.write(output_final)
-    output_final.seek(0)
-
-    merger_lancamentos.close()
-    merger_arquivo_final.close()
-
-    return output_final.getvalue()
+    if contem_recreio:
+        relatorio_fn = get_relatorio_solicitacao_medicao_por_escola(solicitacao)
+        return relatorio_fn(solicitacao)
+    return modulo_da_unidade(solicitacao)
 
 
 @shared_task(
@@ -33,6 +33,8 @@ from src.dados_comuns.constants import (
     ORDEM_UNIDADES_GRUPO_EMEI,
     TIPOS_TURMAS_EMEBS,
 )
+from src.dados_comuns.intervalos import filtro_mes
+from src.dados_comuns.models import ArquivoEmPartes
 from src.dados_comuns.utils import (
     convert_base64_to_contentfile,
     convert_image_to_base64,
@@ -58,7 +60,7 @@ from src.escola.models import (
     Lote,
     PeriodoEscolar,
 )
-from src.escola.utils import string_to_faixa
+from src.escola.utils import ClassificadorFaixasEtarias, string_to_faixa
 from src.inclusao_alimentacao.models import (
     GrupoInclusaoAlimentacaoNormal,
     InclusaoAlimentacaoNormal,
@@ -72,6 +74,12 @@ from src.medicao_inicial.models import (
     SolicitacaoMedicaoInicial,
     ValorMedicao,
 )
+from src.medicao_inicial.services.indice_relatorio_medicao import (
+    IndiceLogsDietas,
+    IndiceLogsMatriculados,
+    get_indice_relatorio_medicao,
+    indice_relatorio_medicao,
+)
 from src.medicao_inicial.services.relatorio_consolidado_emebs import (
     _get_total_pagamento as _get_total_pagamento_emebs,
 )
@@ -94,6 +102,16 @@ CHAVE_ALIMENTACAO_REGULAR = "ALIMENTAÇÃO"
 TURMAS_EMEBS = ["INFANTIL", "FUNDAMENTAL"]
 
 
+def _abre_anexo(base64_str, usuario):
+    """
+    Arquivo do anexo para leitura. Um token de upload é apenas lido, sem ser
+    marcado como utilizado: se a assinatura falhar o anexo segue com o token.
+    """
+    if ArquivoEmPartes.eh_token(base64_str):
+        return ArquivoEmPartes.do_token(base64_str, usuario).abre()
+    return convert_base64_to_contentfile(base64_str)
+
+
 def process_single_anexo(anexo, usuario):
     anexo_proc = dict(anexo)
     nome = anexo_proc.get("nome", "")
@@ -103,7 +121,6 @@ def process_single_anexo(anexo, usuario):
         return anexo_proc
 
     try:
-        arquivo = convert_base64_to_contentfile(base64_str)
         logo_sipae = convert_image_to_base64(
             "src/relatorios/static/images/logo-sigpae.png", "png"
         )
@@ -115,9 +132,10 @@ def process_single_anexo(anexo, usuario):
                 "time": timezone.now(),
             },
         )
-        arquivo_com_assinatura_base64 = merge_pdf_com_rodape_assinatura(
-            arquivo, string_pdf_rodape
-        )
+        with _abre_anexo(base64_str, usuario) as arquivo:
+            arquivo_com_assinatura_base64 = merge_pdf_com_rodape_assinatura(
+                arquivo, string_pdf_rodape
+            )
         anexo_proc["base64"] = arquivo_com_assinatura_base64
     except Exception as e:
         # mantém o anexo original para que a lógica de negócio prossiga
@@ -129,6 +147,8 @@ def process_single_anexo(anexo, usuario):
 def should_process_pdf(nome, base64_str):
     if ".pdf" not in nome.lower() or not base64_str:
         return False
+    if ArquivoEmPartes.eh_token(base64_str):
+        return True
 
     parts = base64_str.split(",", 1)
     has_payload = len(parts) == 2 and parts[1].strip() != ""
@@ -768,18 +788,19 @@ def add_periodo_to_table(  # noqa: C901
         ]
 
 
+def _cei_rnf_indexa_valores(valores):
+    """Indexa os valores da medição em memória: uma consulta para a tabela inteira."""
+    indexados = {}
+    for dia, nome_campo, faixa_id, cat_id, valor in valores.order_by("id").values_list(
+        "dia", "nome_campo", "faixa_etaria_id", "categoria_medicao_id", "valor"
+    ):
+        indexados.setdefault((dia, nome_campo, faixa_id, cat_id), valor)
+        indexados.setdefault((dia, nome_campo), valor)
+    return indexados
+
+
 def _cei_rnf_get_valor(valores, dia_str, nome_campo, faixa_id, cat_id):
-    return int(
-        valores.filter(
-            dia=dia_str,
-            nome_campo=nome_campo,
-            faixa_etaria_id=faixa_id,
-            categoria_medicao_id=cat_id,
-        )
-        .values_list("valor", flat=True)
-        .first()
-        or 0
-    )
+    return int(valores.get((dia_str, nome_campo, faixa_id, cat_id)) or 0)
 
 
 def _cei_rnf_calcular_dietas_dia(valores, dia_str, dietas_estrutura, totais):
@@ -825,15 +846,11 @@ def _cei_rnf_calcular_dados_dias(valores, dias_no_mes, faixas_alim, dietas_estru
         "geral": 0,
     }
     dados_dias = {}
+    valores = _cei_rnf_indexa_valores(valores)
 
     for dia in dias_no_mes:
         dia_str = f"{dia:02d}"
-        participantes = (
-            valores.filter(dia=dia_str, nome_campo="participantes")
-            .values_list("valor", flat=True)
-            .first()
-            or "0"
-        )
+        participantes = valores.get((dia_str, "participantes")) or "0"
         freq_alim = {}
         for fid, _ in faixas_alim:
             v = _cei_rnf_get_valor(valores, dia_str, "frequencia", fid, 1)
@@ -1513,6 +1530,10 @@ def popula_campo_matriculados(
         try:
             periodo = get_nome_periodo(periodo_corrente)
 
+            if isinstance(logs_alunos_matriculados, IndiceLogsMatriculados):
+                quantidade = logs_alunos_matriculados.quantidade(periodo, dia)
+                valores_dia += [quantidade if quantidade is not None else "0"]
+                return
             log = logs_alunos_matriculados.filter(
                 periodo_escolar__nome=periodo, criado_em__day=dia
             ).first()
@@ -1598,8 +1619,18 @@ def popula_campo_matriculados_cei(
     solicitacao, tabela, faixa_id, dia, indice_periodo, categoria_corrente, valores_dia
 ):
     periodo = tabela["periodos"][indice_periodo]
-    medicoes = solicitacao.medicoes.all()
-    medicao = _get_medicao_por_periodo(medicoes, periodo)
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        medicao = indice.medicao_por_periodo(periodo)
+        valores = indice.valores(
+            medicao, categoria_corrente, "matriculados", dia=dia, faixa_id=faixa_id
+        )
+        if len(valores) <= 1:
+            valores_dia += [valores[0]["valor"] if valores else "0"]
+            return
+    else:
+        medicoes = solicitacao.medicoes.all()
+        medicao = _get_medicao_por_periodo(medicoes, periodo)
     try:
         valores_dia += [
             medicao.valores_medicao.get(
@@ -1647,6 +1678,31 @@ def get_nomes_classificacoes(categoria_corrente):
     return classificacoes_nomes
 
 
+def _soma_logs_dietas_indexados(
+    solicitacao, dia, logs_dietas, classificacoes_nomes, periodo
+):
+    data = datetime.date(int(solicitacao.ano), int(solicitacao.mes), int(dia))
+    if periodo in ["Programas e Projetos", "ETEC"]:
+        return logs_dietas.soma(data, classificacoes_nomes, periodo=None)
+    if periodo in ["Recreio nas Férias", "Colaboradores"]:
+        return logs_dietas.soma(data, classificacoes_nomes)
+    return logs_dietas.soma(data, classificacoes_nomes, periodo=periodo)
+
+
+def _soma_logs_dietas_queryset(
+    solicitacao, dia, logs_dietas, classificacoes_nomes, periodo
+):
+    logs_dietas = logs_dietas.filter(
+        data=datetime.date(int(solicitacao.ano), int(solicitacao.mes), int(dia)),
+        classificacao__nome__in=classificacoes_nomes,
+    )
+    if periodo in ["Programas e Projetos", "ETEC"]:
+        logs_dietas = logs_dietas.filter(periodo_escolar=None)
+    elif periodo not in ["Recreio nas Férias", "Colaboradores"]:
+        logs_dietas = logs_dietas.filter(periodo_escolar__nome=periodo)
+    return logs_dietas.aggregate(Sum("quantidade")).get("quantidade__sum")
+
+
 def popula_campo_aprovadas(
     solicitacao,
     dia,
@@ -1656,26 +1712,54 @@ def popula_campo_aprovadas(
     logs_dietas,
     periodo_corrente,
 ):
-    if campo == "aprovadas":
-        try:
-            periodo = get_nome_periodo(periodo_corrente)
-            classificacoes_nomes = get_nomes_classificacoes(categoria_corrente)
-            logs_dietas = logs_dietas.filter(
-                data__day=dia,
-                data__month=solicitacao.mes,
-                data__year=solicitacao.ano,
-                classificacao__nome__in=classificacoes_nomes,
-            )
-            if periodo in ["Programas e Projetos", "ETEC"]:
-                logs_dietas = logs_dietas.filter(periodo_escolar=None)
-            elif periodo in ["Recreio nas Férias", "Colaboradores"]:
-                pass
-            else:
-                logs_dietas = logs_dietas.filter(periodo_escolar__nome=periodo)
-            quantidade = logs_dietas.aggregate(Sum("quantidade")).get("quantidade__sum")
-            valores_dia += [quantidade or "0"]
-        except LogQuantidadeDietasAutorizadas.DoesNotExist:
-            valores_dia += ["0"]
+    if campo != "aprovadas":
+        return
+    try:
+        periodo = get_nome_periodo(periodo_corrente)
+        classificacoes_nomes = get_nomes_classificacoes(categoria_corrente)
+        if isinstance(logs_dietas, IndiceLogsDietas):
+            soma = _soma_logs_dietas_indexados
+        else:
+            soma = _soma_logs_dietas_queryset
+        quantidade = soma(solicitacao, dia, logs_dietas, classificacoes_nomes, periodo)
+        valores_dia += [quantidade or "0"]
+    except LogQuantidadeDietasAutorizadas.DoesNotExist:
+        valores_dia += ["0"]
+
+
+def _nomes_classificacoes_cei(categoria_corrente):
+    if "TIPO A" in categoria_corrente.upper():
+        return [
+            "Tipo A",
+            "Tipo A RESTRIÇÃO DE AMINOÁCIDOS",
+            "Tipo A ENTERAL",
+        ]
+    return ["Tipo B"]
+
+
+def _soma_logs_dietas_cei(
+    solicitacao, faixa_id, dia, nomes_classificacoes, logs_dietas, periodo, recreio
+):
+    data = datetime.date(int(solicitacao.ano), int(solicitacao.mes), int(dia))
+    if isinstance(logs_dietas, IndiceLogsDietas):
+        if recreio:
+            return logs_dietas.soma(data, nomes_classificacoes, faixa_id=faixa_id)
+        return logs_dietas.soma(
+            data, nomes_classificacoes, periodo=periodo, faixa_id=faixa_id
+        )
+
+    filtros = dict(
+        data=data,
+        faixa_etaria=faixa_id,
+        classificacao__nome__in=nomes_classificacoes,
+    )
+    if not recreio:
+        filtros["periodo_escolar__nome"] = periodo
+    return (
+        logs_dietas.filter(**filtros)
+        .aggregate(Sum("quantidade"))
+        .get("quantidade__sum")
+    )
 
 
 def popula_campo_aprovadas_cei(
@@ -1690,51 +1774,66 @@ def popula_campo_aprovadas_cei(
     recreio: bool = False,
 ):
     try:
-        periodo = tabela["periodos"][indice_periodo]
-        if "TIPO A" in categoria_corrente.upper():
-            nomes_classificacoes = [
-                "Tipo A",
-                "Tipo A RESTRIÇÃO DE AMINOÁCIDOS",
-                "Tipo A ENTERAL",
-            ]
-        else:
-            nomes_classificacoes = ["Tipo B"]
-
-        filtros = dict(
-            data__day=dia,
-            data__month=solicitacao.mes,
-            data__year=solicitacao.ano,
-            faixa_etaria=faixa_id,
-            classificacao__nome__in=nomes_classificacoes,
-        )
-        if not recreio:
-            filtros["periodo_escolar__nome"] = periodo
-
-        quantidade = (
-            logs_dietas.filter(**filtros)
-            .aggregate(Sum("quantidade"))
-            .get("quantidade__sum")
+        quantidade = _soma_logs_dietas_cei(
+            solicitacao,
+            faixa_id,
+            dia,
+            _nomes_classificacoes_cei(categoria_corrente),
+            logs_dietas,
+            tabela["periodos"][indice_periodo],
+            recreio,
         )
         valores_dia += [quantidade or "0"]
     except LogQuantidadeDietasAutorizadasCEI.DoesNotExist:
         valores_dia += ["0"]
 
 
+def _valor_preenchido_pela_escola_indexado(
+    indice, periodo, categoria_corrente, campo, dia, tipo_turma
+):
+    if periodo in [
+        "ETEC",
+        "Solicitações de Alimentação",
+        "Programas e Projetos",
+        "Infantil INTEGRAL",
+        "Infantil MANHA",
+        "Infantil TARDE",
+        "Colaboradores",
+    ] or periodo.startswith("Recreio nas Férias"):
+        medicao = indice.medicao_por_grupo(periodo)
+    else:
+        medicao = indice.medicao_por_periodo(periodo)
+    valores = indice.valores(
+        medicao,
+        categoria_corrente,
+        campo,
+        dia=dia,
+        infantil_ou_fundamental=tipo_turma,
+    )
+    return valores[0]["valor"] if valores else "0"
+
+
 def popula_campos_preenchidos_pela_escola(
     solicitacao, tabela, campo, dia, indice_periodo, categoria_corrente, valores_dia
 ):
     try:
+        indice = get_indice_relatorio_medicao(solicitacao)
         periodo_corrente = tabela["periodos"][indice_periodo]
-        periodo = (
-            get_nome_periodo(periodo_corrente)
-            if solicitacao.escola.eh_emebs_data(solicitacao.data_referencia)
-            else periodo_corrente
-        )
-        tipo_turma = (
-            periodo_corrente.split(" - ")[1]
-            if solicitacao.escola.eh_emebs_data(solicitacao.data_referencia)
-            else "N/A"
+        eh_emebs = (
+            indice.eh_emebs
+            if indice
+            else solicitacao.escola.eh_emebs_data(solicitacao.data_referencia)
         )
+        periodo = get_nome_periodo(periodo_corrente) if eh_emebs else periodo_corrente
+        tipo_turma = periodo_corrente.split(" - ")[1] if eh_emebs else "N/A"
+
+        if indice:
+            valores_dia += [
+                _valor_preenchido_pela_escola_indexado(
+                    indice, periodo, categoria_corrente, campo, dia, tipo_turma
+                )
+            ]
+            return
 
         medicoes = solicitacao.medicoes.all()
         if periodo in [
@@ -1767,6 +1866,17 @@ def popula_campos_preenchidos_pela_escola_cei(
 ):
     try:
         periodo = tabela["periodos"][indice_periodo]
+        indice = get_indice_relatorio_medicao(solicitacao)
+        if indice:
+            valores = indice.valores(
+                indice.medicao_por_periodo(periodo),
+                categoria_corrente,
+                "frequencia",
+                dia=dia,
+                faixa_id=faixa_id,
+            )
+            valores_dia += [valores[0]["valor"] if valores else "0"]
+            return
         medicoes = solicitacao.medicoes.all()
         medicao = _get_medicao_por_periodo(medicoes, periodo)
         quantidade = (
@@ -1784,9 +1894,39 @@ def popula_campos_preenchidos_pela_escola_cei(
         valores_dia += ["0"]
 
 
+def _soma_valores_indexados(valores):
+    return sum(int(valor["valor"]) for valor in valores)
+
+
+def _contador_frequencia_diaria_cei_indexado(indice, periodo, dia, categoria_corrente):
+    try:
+        if periodo in [
+            "ETEC",
+            "Solicitações de Alimentação",
+            "Programas e Projetos",
+            "Infantil INTEGRAL",
+            "Infantil MANHA",
+            "Infantil TARDE",
+            "Colaboradores",
+        ] or periodo.startswith("Recreio nas Férias"):
+            medicao = indice.medicao_por_grupo(periodo)
+        else:
+            medicao = indice.medicao_por_periodo(periodo)
+    except Medicao.DoesNotExist:
+        return 0
+    return _soma_valores_indexados(
+        indice.valores(medicao, categoria_corrente, "frequencia", dia=dia)
+    )
+
+
 def contador_frequencia_diaria_cei(
     solicitacao, tabela, dia, indice_periodo, categoria_corrente
 ):
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        return _contador_frequencia_diaria_cei_indexado(
+            indice, tabela["periodos"][indice_periodo], dia, categoria_corrente
+        )
     try:
         periodo = tabela["periodos"][indice_periodo]
         medicoes = solicitacao.medicoes.all()
@@ -1823,6 +1963,12 @@ def contador_frequencia_diaria_cei(
 def contador_frequencia_total_cei(
     solicitacao, tabela, faixa_id, indice_periodo, categoria_corrente
 ):
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        medicao = indice.medicao_por_periodo(tabela["periodos"][indice_periodo])
+        return _soma_valores_indexados(
+            indice.valores(medicao, categoria_corrente, "frequencia", faixa_id=faixa_id)
+        )
     try:
         periodo = tabela["periodos"][indice_periodo]
         medicoes = solicitacao.medicoes.all()
@@ -1847,12 +1993,20 @@ def popula_campo_consumido_solicitacoes_alimentacao(
 ):
     if campo == "consumido":
         try:
-            medicao = solicitacao.medicoes.get(grupo__nome__icontains="Solicitações")
+            indice = get_indice_relatorio_medicao(solicitacao)
             nome_campo = (
                 "lanche_emergencial"
                 if categoria_corrente == "LANCHE EMERGENCIAL"
                 else "kit_lanche"
             )
+            if indice:
+                medicao = indice.medicao_por_grupo_contendo("Solicitações")
+                (valor,) = indice.valores_do_dia_todas_categorias(
+                    medicao, nome_campo, dia
+                )
+                valores_dia += [valor["valor"]]
+                return
+            medicao = solicitacao.medicoes.get(grupo__nome__icontains="Solicitações")
             valores_dia += [
                 medicao.valores_medicao.get(
                     dia=f"{dia:02d}", nome_campo=nome_campo
@@ -1981,15 +2135,18 @@ def _calcular_total_pagamento(
 
 
 def _eh_emei_ou_cemei_ou_infantil(solicitacao, tabela, indice_periodo):
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        eh_emebs, eh_emei, eh_cemei = indice.eh_emebs, indice.eh_emei, indice.eh_cemei
+    else:
+        data_referencia = solicitacao.data_referencia
+        eh_emebs = solicitacao.escola.eh_emebs_data(data_referencia)
+        eh_emei = solicitacao.escola.eh_emei_data(data_referencia)
+        eh_cemei = solicitacao.escola.eh_cemei_data(data_referencia)
     eh_emebs_infantil = (
-        solicitacao.escola.eh_emebs_data(solicitacao.data_referencia)
-        and tabela["periodos"][indice_periodo].split(" - ")[1] == "INFANTIL"
-    )
-    return (
-        solicitacao.escola.eh_emei_data(solicitacao.data_referencia)
-        or solicitacao.escola.eh_cemei_data(solicitacao.data_referencia)
-        or eh_emebs_infantil
+        eh_emebs and tabela["periodos"][indice_periodo].split(" - ")[1] == "INFANTIL"
     )
+    return eh_emei or eh_cemei or eh_emebs_infantil
 
 
 def popula_campo_total_refeicoes_pagamento(
@@ -2080,13 +2237,18 @@ def get_valor_total_emei_cemei(
     valor_numero_de_alunos,
     valor_participantes,
 ):
-    editais = Edital.objects.filter(uuid__in=solicitacao.escola.editais)
-    tem_edital_imr = editais.filter(eh_imr=True).exists()
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        tem_edital_imr = indice.tem_edital_imr
+        eh_emei_ou_cemei = indice.eh_emei or indice.eh_cemei
+    else:
+        editais = Edital.objects.filter(uuid__in=solicitacao.escola.editais)
+        tem_edital_imr = editais.filter(eh_imr=True).exists()
+        eh_emei_ou_cemei = solicitacao.escola.eh_emei_data(
+            solicitacao.data_referencia
+        ) or solicitacao.escola.eh_cemei_data(solicitacao.data_referencia)
 
-    if tem_edital_imr and (
-        solicitacao.escola.eh_emei_data(solicitacao.data_referencia)
-        or solicitacao.escola.eh_cemei_data(solicitacao.data_referencia)
-    ):
+    if tem_edital_imr and eh_emei_ou_cemei:
         valor_comparativo = (
             valor_matriculados
             if int(valor_matriculados) > 0
@@ -2335,6 +2497,9 @@ def _tem_dia_letivo_sigpae(dia, solicitacao, periodo_escolar):
         return False
 
     periodo_tratado = periodo_escolar.split()[-1]
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        return indice.tem_dia_letivo_sigpae(dia, periodo_tratado)
     return DiaLetivoSIGPAE.objects.filter(
         escolas=solicitacao.escola,
         data__day=dia,
@@ -2344,24 +2509,15 @@ def _tem_dia_letivo_sigpae(dia, solicitacao, periodo_escolar):
     ).exists()
 
 
-def get_eh_dia_letivo(dia, solicitacao, periodo_escolar=None):
-    if dia == "Total":
-        return False
+def _eh_dia_util_recreio(dia, recreio):
+    data = datetime.date(recreio.data_inicio.year, recreio.data_inicio.month, dia)
+    return data.weekday() < 5
 
-    eh_recreio = (
-        hasattr(solicitacao, "recreio_nas_ferias") and solicitacao.recreio_nas_ferias
-    )
-
-    if eh_recreio:
-        recreio = solicitacao.recreio_nas_ferias
-        mes = recreio.data_inicio.month
-        ano = recreio.data_inicio.year
-        data = datetime.date(ano, mes, dia)
-        return data.weekday() < 5
-
-    if _tem_dia_letivo_sigpae(dia, solicitacao, periodo_escolar):
-        return True
 
+def _eh_dia_letivo_calendario(dia, solicitacao):
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        return indice.dia_letivo_calendario(dia)
     try:
         return DiaCalendario.objects.get(
             escola=solicitacao.escola,
@@ -2373,6 +2529,20 @@ def get_eh_dia_letivo(dia, solicitacao, periodo_escolar=None):
         return False
 
 
+def get_eh_dia_letivo(dia, solicitacao, periodo_escolar=None):
+    if dia == "Total":
+        return False
+
+    recreio = getattr(solicitacao, "recreio_nas_ferias", None)
+    if recreio:
+        return _eh_dia_util_recreio(dia, recreio)
+
+    if _tem_dia_letivo_sigpae(dia, solicitacao, periodo_escolar):
+        return True
+
+    return _eh_dia_letivo_calendario(dia, solicitacao)
+
+
 def popula_campos(
     solicitacao,
     tabela,
@@ -2626,8 +2796,7 @@ def popula_tabelas(solicitacao, tabelas):
 
     logs_alunos_matriculados = LogAlunosMatriculadosPeriodoEscola.objects.filter(
         escola=solicitacao.escola,
-        criado_em__month=solicitacao.mes,
-        criado_em__year=solicitacao.ano,
+        **filtro_mes("data", solicitacao.ano, solicitacao.mes),
         tipo_turma="REGULAR",
     )
     if recreio:
@@ -2638,9 +2807,14 @@ def popula_tabelas(solicitacao, tabelas):
     else:
         logs_dietas = LogQuantidadeDietasAutorizadas.objects.filter(
             escola=solicitacao.escola,
-            data__month=solicitacao.mes,
-            data__year=solicitacao.ano,
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
+        )
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        logs_alunos_matriculados = indice.logs_indexados(
+            logs_alunos_matriculados, IndiceLogsMatriculados
         )
+        logs_dietas = indice.logs_indexados(logs_dietas, IndiceLogsDietas)
     alteracoes_lanche_emergencial = get_alteracoes_lanche_emergencial(solicitacao)
     kits_lanches = get_kit_lanche(solicitacao)
     indice_periodo = 0
@@ -2841,18 +3015,23 @@ def get_logs_emebs(solicitacao, tipo_log, periodo_corrente):
     if tipo_log == "dietas":
         logs = LogQuantidadeDietasAutorizadas.objects.filter(
             escola=solicitacao.escola,
-            data__month=solicitacao.mes,
-            data__year=solicitacao.ano,
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
             infantil_ou_fundamental=tipo_turma,
         )
     elif tipo_log == "alunos_matriculados":
         logs = LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=solicitacao.escola,
-            criado_em__month=solicitacao.mes,
-            criado_em__year=solicitacao.ano,
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
             tipo_turma="REGULAR",
             infantil_ou_fundamental=tipo_turma,
         )
+
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice and logs is not None:
+        classe_indice = (
+            IndiceLogsDietas if tipo_log == "dietas" else IndiceLogsMatriculados
+        )
+        return indice.logs_indexados(logs, classe_indice)
     return logs
 
 
@@ -2881,9 +3060,11 @@ def popula_tabelas_cei(solicitacao, tabelas):
     )
     logs_dietas = LogQuantidadeDietasAutorizadasCEI.objects.filter(
         escola=solicitacao.escola,
-        data__month=solicitacao.mes,
-        data__year=solicitacao.ano,
+        **filtro_mes("data", solicitacao.ano, solicitacao.mes),
     )
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        logs_dietas = indice.logs_indexados(logs_dietas, IndiceLogsDietas)
 
     indice_periodo = 0
     quantidade_tabelas = range(0, len(tabelas))
@@ -2933,10 +3114,14 @@ def popula_tabelas_cemei(solicitacao, tabelas, recreio: bool = False):
         )
     logs_alunos_matriculados = LogAlunosMatriculadosPeriodoEscola.objects.filter(
         escola=solicitacao.escola,
-        criado_em__month=solicitacao.mes,
-        criado_em__year=solicitacao.ano,
+        **filtro_mes("data", solicitacao.ano, solicitacao.mes),
         tipo_turma="REGULAR",
     )
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        logs_alunos_matriculados = indice.logs_indexados(
+            logs_alunos_matriculados, IndiceLogsMatriculados
+        )
 
     alteracoes_lanche_emergencial = get_alteracoes_lanche_emergencial(solicitacao)
     kits_lanches = get_kit_lanche(solicitacao)
@@ -2998,9 +3183,11 @@ def popula_campos_cemei(
 
     logs_dietas = modelo.objects.filter(
         escola=solicitacao.escola,
-        data__month=solicitacao.mes,
-        data__year=solicitacao.ano,
+        **filtro_mes("data", solicitacao.ano, solicitacao.mes),
     )
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        logs_dietas = indice.logs_indexados(logs_dietas, IndiceLogsDietas)
 
     if len(faixas_etarias):
         (
@@ -3450,7 +3637,12 @@ def popula_faixas_dias(
     if not faixa:
         return
     inicio, fim = string_to_faixa(faixa)
-    faixa_id = FaixaEtaria.objects.get(inicio=inicio, fim=fim, ativo=True).id
+    indice = get_indice_relatorio_medicao(solicitacao)
+    faixa_id = (
+        indice.faixa_etaria_id(inicio, fim)
+        if indice
+        else FaixaEtaria.objects.get(inicio=inicio, fim=fim, ativo=True).id
+    )
 
     if dia == "Total":
         _popula_faixas_dias_total(
@@ -3490,6 +3682,11 @@ def popula_faixas_dias(
 
 def _get_participantes_recreio_cei(solicitacao, tabela, indice_periodo, dia):
     periodo = tabela["periodos"][indice_periodo]
+    indice = get_indice_relatorio_medicao(solicitacao)
+    if indice:
+        medicao = indice.medicao_por_periodo(periodo)
+        valores = indice.valores_do_dia_todas_categorias(medicao, "participantes", dia)
+        return valores[0]["valor"] if valores else "0"
     medicao = _get_medicao_por_periodo(solicitacao.medicoes.all(), periodo)
     if medicao is None:
         return "0"
@@ -3506,13 +3703,15 @@ def _get_participantes_recreio_cei(solicitacao, tabela, indice_periodo, dia):
 
 def build_tabelas_relatorio_medicao(solicitacao, ordem_periodos=None):
     tabelas_com_headers = build_headers_tabelas(solicitacao, ordem_periodos)
-    tabelas_populadas = popula_tabelas(solicitacao, tabelas_com_headers)
+    with indice_relatorio_medicao(solicitacao):
+        tabelas_populadas = popula_tabelas(solicitacao, tabelas_com_headers)
     return tabelas_populadas
 
 
 def build_tabelas_relatorio_medicao_cei(solicitacao):
     tabelas_com_headers = build_headers_tabelas_cei(solicitacao)
-    tabelas_populadas = popula_tabelas_cei(solicitacao, tabelas_com_headers)
+    with indice_relatorio_medicao(solicitacao):
+        tabelas_populadas = popula_tabelas_cei(solicitacao, tabelas_com_headers)
 
     return tabelas_populadas
 
@@ -3523,12 +3722,15 @@ def build_tabelas_relatorio_medicao_cei_recreio_nas_ferias(solicitacao):
         grupo__nome="Colaboradores"
     ).first()
 
-    tabela_recreio = build_tabela_recreio_nas_ferias_cei(solicitacao, medicao_recreio)
-    tabela_colaboradores = (
-        build_tabela_colaboradores_cei(solicitacao, medicao_colaboradores)
-        if medicao_colaboradores
-        else None
-    )
+    with indice_relatorio_medicao(solicitacao):
+        tabela_recreio = build_tabela_recreio_nas_ferias_cei(
+            solicitacao, medicao_recreio
+        )
+        tabela_colaboradores = (
+            build_tabela_colaboradores_cei(solicitacao, medicao_colaboradores)
+            if medicao_colaboradores
+            else None
+        )
 
     recreio = solicitacao.recreio_nas_ferias
     dias_letivos = [
@@ -3542,15 +3744,17 @@ def build_tabelas_relatorio_medicao_cei_recreio_nas_ferias(solicitacao):
 def build_tabelas_relatorio_medicao_cemei(solicitacao):
     tabelas_com_headers = build_headers_tabelas_cemei(solicitacao)
     recreio = bool(getattr(solicitacao, "recreio_nas_ferias", False))
-    tabelas_populadas = popula_tabelas_cemei(
-        solicitacao, tabelas_com_headers, recreio=recreio
-    )
+    with indice_relatorio_medicao(solicitacao):
+        tabelas_populadas = popula_tabelas_cemei(
+            solicitacao, tabelas_com_headers, recreio=recreio
+        )
     return tabelas_populadas
 
 
 def build_tabelas_relatorio_medicao_emebs(solicitacao):
     tabelas_com_headers = build_headers_tabelas_emebs(solicitacao)
-    tabelas_populadas = popula_tabelas_emebs(solicitacao, tabelas_com_headers)
+    with indice_relatorio_medicao(solicitacao):
+        tabelas_populadas = popula_tabelas_emebs(solicitacao, tabelas_com_headers)
     return tabelas_populadas
 
 
@@ -6005,8 +6209,7 @@ def get_total_dietas(solicitacao, classificacoes):
     try:
         logs_dietas = LogQuantidadeDietasAutorizadas.objects.filter(
             escola=solicitacao.escola,
-            data__month=solicitacao.mes,
-            data__year=solicitacao.ano,
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
             classificacao__nome__in=classificacoes,
         )
         quantidade = logs_dietas.aggregate(Sum("quantidade")).get("quantidade__sum")
@@ -6376,8 +6579,9 @@ def _atualiza_logs_diferenca_periodo_parcial(solicitacao, aluno, datas, operacao
     delta_parcial = 1 if operacao == "adicionar" else -1
     delta_integral = -1 if operacao == "adicionar" else 1
 
+    classificador_faixas = ClassificadorFaixasEtarias.das_faixas_ativas()
     for data in sorted(datas):
-        faixa_etaria = aluno.faixa_etaria(data)
+        faixa_etaria = aluno.faixa_etaria(data, classificador_faixas)
         _ajusta_quantidade_log_aluno_periodo_parcial(
             solicitacao, periodo_parcial, faixa_etaria, data, delta_parcial
         )
@@ -6432,8 +6636,9 @@ def _atualiza_logs_dietas_periodo_parcial(solicitacao, aluno, datas, operacao):
     periodo_parcial = PeriodoEscolar.objects.get(nome="PARCIAL")
     delta = 1 if operacao == "adicionar" else -1
 
+    classificador_faixas = ClassificadorFaixasEtarias.das_faixas_ativas()
     for data in sorted(datas):
-        faixa_etaria = aluno.faixa_etaria(data)
+        faixa_etaria = aluno.faixa_etaria(data, classificador_faixas)
         for dieta in dietas_autorizadas:
             _ajusta_quantidade_log_dieta_periodo_parcial(
                 solicitacao,
@@ -7263,8 +7468,7 @@ def _verifica_dietas_consumidas(
     dados_agregados = (
         LogQuantidadeDietasAutorizadas.objects.filter(
             escola=solicitacao.escola,
-            data__year=int(solicitacao.ano),
-            data__month=int(solicitacao.mes),
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
             periodo_escolar__isnull=False,
         )
         .exclude(classificacao__nome__icontains="Tipo C")
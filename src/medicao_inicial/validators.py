@@ -6,6 +6,7 @@ from typing import Dict, List, Optional, Set, Tuple
 from django.db.models import Q, QuerySet
 from workalendar.america import BrazilSaoPauloCity
 
+from src.dados_comuns.intervalos import filtro_mes
 from src.dados_comuns.utils import filtrar_dias_letivos, get_ultimo_dia_mes
 from src.dieta_especial.logs_models.models import (
     LogQuantidadeDietasAutorizadas,
@@ -40,6 +41,7 @@ from .models import (
     ValorMedicao,
 )
 from .recreio_nas_ferias.models import RecreioNasFeriasUnidadeParticipante
+from .services.contexto_validacao_medicao import get_contexto_validacao_medicao
 from .utils import (
     agrupa_permissoes_especiais_por_dia,
     get_linhas_da_tabela,
@@ -72,8 +74,7 @@ def get_lista_dias_letivos(solicitacao, escola, periodo_escolar=None):
     dias_com_log = set(
         LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=escola,
-            criado_em__year=ano,
-            criado_em__month=mes,
+            **filtro_mes("data", ano, mes),
             tipo_turma="REGULAR",
             quantidade_alunos__gt=0,
             periodo_escolar=periodo_escolar,
@@ -113,6 +114,34 @@ def get_dias_com_suspensao(solicitacao: SolicitacaoMedicaoInicial) -> list[str]:
     return [f"{dia:02d}" for dia in dias]
 
 
+def _contexto_da_medicao(medicao):
+    campo_solicitacao = Medicao._meta.get_field("solicitacao_medicao_inicial")
+    if not campo_solicitacao.is_cached(medicao):
+        return None
+    return get_contexto_validacao_medicao(medicao.solicitacao_medicao_inicial)
+
+
+def _valores_medicao_campos(medicao, *campos):
+    contexto = _contexto_da_medicao(medicao)
+    if contexto:
+        return contexto.valores_medicao_campos(medicao.id, campos)
+    return list(set(medicao.valores_medicao.values_list(*campos)))
+
+
+def _permissoes_especiais_agrupadas_por_dia(solicitacao, periodo_escolar):
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    if contexto:
+        return contexto.permissoes_especiais_agrupadas_por_dia(
+            periodo_escolar, agrupa_permissoes_especiais_por_dia
+        )
+    permissoes_especiais = get_permissoes_especiais_da_solicitacao(
+        solicitacao, solicitacao.escola, periodo_escolar
+    )
+    return agrupa_permissoes_especiais_por_dia(
+        permissoes_especiais, solicitacao.mes, solicitacao.ano
+    )
+
+
 def erros_unicos(lista_erros):
     return list(map(dict, set(tuple(sorted(erro.items())) for erro in lista_erros)))
 
@@ -157,6 +186,79 @@ def validate_ultimo_dia_mes_letivo(
     return erros_unicos(lista_erros)
 
 
+def _filtros_valores_periodo(
+    solicitacao, periodo_escolar, categoria_medicao, tipo_aluno
+):
+    filtros = dict(
+        medicao__solicitacao_medicao_inicial=solicitacao,
+        medicao__periodo_escolar=periodo_escolar,
+        categoria_medicao=categoria_medicao,
+    )
+    if tipo_aluno is not None:
+        filtros["infantil_ou_fundamental"] = tipo_aluno
+    return filtros
+
+
+def _dias_preenchidos_periodo(
+    contexto,
+    solicitacao,
+    periodo_escolar,
+    nome_campo,
+    dias_letivos,
+    categoria_medicao,
+    tipo_aluno=None,
+):
+    if contexto:
+        return contexto.dias_preenchidos(
+            nome_campo,
+            dias_letivos,
+            categoria_medicao.id,
+            periodo_escolar_id=periodo_escolar.id,
+            infantil_ou_fundamental=tipo_aluno,
+        )
+    return set(
+        ValorMedicao.objects.filter(
+            nome_campo=nome_campo,
+            dia__in=dias_letivos,
+            **_filtros_valores_periodo(
+                solicitacao, periodo_escolar, categoria_medicao, tipo_aluno
+            ),
+        )
+        .exclude(valor=None)
+        .values_list("dia", flat=True)
+    )
+
+
+def _tem_observacao_periodo(
+    contexto, solicitacao, periodo_escolar, dia, categoria_medicao, tipo_aluno=None
+):
+    if contexto:
+        return contexto.tem_valor(
+            "observacao",
+            dia,
+            categoria_medicao.id,
+            periodo_escolar_id=periodo_escolar.id,
+            infantil_ou_fundamental=tipo_aluno,
+        )
+    return (
+        ValorMedicao.objects.filter(
+            nome_campo="observacao",
+            dia=dia,
+            **_filtros_valores_periodo(
+                solicitacao, periodo_escolar, categoria_medicao, tipo_aluno
+            ),
+        )
+        .exclude(valor=None)
+        .exists()
+    )
+
+
+def _dia_dispensado_lancamento_especial(nome_campo, dia, permissoes_por_dia):
+    return nome_campo in ALIMENTACOES_LANCAMENTOS_ESPECIAIS and (
+        not permissoes_por_dia.get(dia)
+    )
+
+
 def buscar_valores_lancamento_alimentacoes(
     linhas_da_tabela,
     solicitacao,
@@ -166,55 +268,55 @@ def buscar_valores_lancamento_alimentacoes(
     lista_erros,
 ):
     periodo_com_erro = False
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    permissoes_especiais_agrupadas_por_dia = _permissoes_especiais_agrupadas_por_dia(
+        solicitacao, periodo_escolar
+    )
     for nome_campo in linhas_da_tabela:
-        valores_da_medicao = (
-            ValorMedicao.objects.filter(
-                medicao__solicitacao_medicao_inicial=solicitacao,
-                nome_campo=nome_campo,
-                medicao__periodo_escolar=periodo_escolar,
-                dia__in=dias_letivos,
-                categoria_medicao=categoria_medicao,
-            )
-            .exclude(valor=None)
-            .values_list("dia", flat=True)
+        valores_da_medicao = _dias_preenchidos_periodo(
+            contexto,
+            solicitacao,
+            periodo_escolar,
+            nome_campo,
+            dias_letivos,
+            categoria_medicao,
         )
+        for dia_sem_preenchimento in set(dias_letivos) - valores_da_medicao:
+            if _dia_dispensado_lancamento_especial(
+                nome_campo,
+                dia_sem_preenchimento,
+                permissoes_especiais_agrupadas_por_dia,
+            ):
+                continue
+            periodo_com_erro = checa_valor_observacao(
+                _tem_observacao_periodo(
+                    contexto,
+                    solicitacao,
+                    periodo_escolar,
+                    dia_sem_preenchimento,
+                    categoria_medicao,
+                ),
+                periodo_com_erro,
+            )
+    return checa_periodo_com_erro(periodo_com_erro, lista_erros, periodo_escolar)
 
-        permissoes_especiais = get_permissoes_especiais_da_solicitacao(
-            solicitacao, solicitacao.escola, periodo_escolar
-        )
-        permissoes_especiais_agrupadas_por_dia = agrupa_permissoes_especiais_por_dia(
-            permissoes_especiais, solicitacao.mes, solicitacao.ano
+
+def _tem_valor_medicao(medicao, nome_campo, dia, categoria_medicao):
+    contexto = _contexto_da_medicao(medicao)
+    if contexto:
+        return contexto.tem_valor(
+            nome_campo, dia, categoria_medicao.id, medicao_id=medicao.id
         )
-        valores_da_medicao = list(set(valores_da_medicao))
-        if len(valores_da_medicao) != len(dias_letivos):
-            diferenca = list(set(dias_letivos) - set(valores_da_medicao))
-            for dia_sem_preenchimento in diferenca:
-                if nome_campo in ALIMENTACOES_LANCAMENTOS_ESPECIAIS and (
-                    (
-                        not permissoes_especiais_agrupadas_por_dia.get(
-                            dia_sem_preenchimento
-                        )
-                    )
-                ):
-                    continue
-                valor_observacao = ValorMedicao.objects.filter(
-                    medicao__solicitacao_medicao_inicial=solicitacao,
-                    nome_campo="observacao",
-                    medicao__periodo_escolar=periodo_escolar,
-                    dia=dia_sem_preenchimento,
-                    categoria_medicao=categoria_medicao,
-                ).exclude(valor=None)
-                periodo_com_erro = checa_valor_observacao(
-                    valor_observacao, periodo_com_erro
-                )
-    if periodo_com_erro:
-        lista_erros.append(
-            {
-                "periodo_escolar": periodo_escolar.nome,
-                "erro": "Restam dias a serem lançados nas alimentações.",
-            }
+    return (
+        ValorMedicao.objects.filter(
+            medicao=medicao,
+            nome_campo=nome_campo,
+            dia=dia,
+            categoria_medicao=categoria_medicao,
         )
-    return lista_erros
+        .exclude(valor=None)
+        .exists()
+    )
 
 
 def buscar_valores_lancamento_alimentacoes_emei_cemei(
@@ -240,20 +342,10 @@ def buscar_valores_lancamento_alimentacoes_emei_cemei(
         alimentacoes = alimentacoes_vinculadas + alimentacoes_permitidas_no_dia
         linhas_da_tabela = get_linhas_da_tabela(alimentacoes)
         for nome_campo in linhas_da_tabela:
-            valor_da_medicao = ValorMedicao.objects.filter(
-                medicao=medicao,
-                nome_campo=nome_campo,
-                dia=dia,
-                categoria_medicao=categoria_medicao,
-            ).exclude(valor=None)
-            if not valor_da_medicao.exists():
-                valor_observacao = ValorMedicao.objects.filter(
-                    medicao=medicao,
-                    nome_campo="observacao",
-                    dia=dia,
-                    categoria_medicao=categoria_medicao,
-                ).exclude(valor=None)
-                if not valor_observacao.exists():
+            if not _tem_valor_medicao(medicao, nome_campo, dia, categoria_medicao):
+                if not _tem_valor_medicao(
+                    medicao, "observacao", dia, categoria_medicao
+                ):
                     periodo_com_erro = True
     if periodo_com_erro:
         lista_erros.append(
@@ -364,9 +456,7 @@ def get_quantidade_dietas_autorizadas(medicao, ano, mes, dia, faixa_etaria):
     quantidade_dietas_autorizadas = sum(
         LogQuantidadeDietasAutorizadasCEI.objects.filter(
             escola=escola,
-            data__month=mes,
-            data__year=ano,
-            data__day=dia,
+            data=datetime.date(int(ano), int(mes), int(dia)),
             periodo_escolar=periodo,
             faixa_etaria=faixa_etaria,
         )
@@ -616,8 +706,7 @@ def validate_lancamento_alimentacoes_inclusoes_emebs_dietas(
     tipos_alunos = (
         LogQuantidadeDietasAutorizadas.objects.filter(
             escola=escola,
-            data__year=ano,
-            data__month=mes,
+            **filtro_mes("data", ano, mes),
             periodo_escolar=medicao.periodo_escolar,
         )
         .exclude(Q(quantidade=0) | Q(infantil_ou_fundamental="N/A"))
@@ -915,7 +1004,7 @@ def validate_lancamento_alimentacoes_medicao_cei(solicitacao, lista_erros):
     categoria = CategoriaMedicao.objects.get(nome="ALIMENTAÇÃO")
     faixas_etarias = FaixaEtaria.objects.filter(ativo=True)
     logs = LogAlunosMatriculadosFaixaEtariaDia.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     dias_letivos_geral = obter_periodos_corretos(solicitacao, escola)
     logs_ = list(
@@ -937,15 +1026,12 @@ def validate_lancamento_alimentacoes_medicao_cei(solicitacao, lista_erros):
         dias_letivos_uteis = [int(dia) for dia in dias_letivos]
 
         for dia in dias_letivos_uteis:
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "faixa_etaria_id",
-                        "dia",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "faixa_etaria_id",
+                "dia",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "alimentações"):
@@ -978,15 +1064,12 @@ def validate_lancamento_alimentacoes_medicao_cei_cemei(
     lista_erros, dias_letivos, medicao, faixas_etarias, logs, ano, mes, categoria
 ):
     for dia in dias_letivos:
-        valores_medicao_ = list(
-            set(
-                medicao.valores_medicao.values_list(
-                    "nome_campo",
-                    "categoria_medicao_id",
-                    "faixa_etaria_id",
-                    "dia",
-                )
-            )
+        valores_medicao_ = _valores_medicao_campos(
+            medicao,
+            "nome_campo",
+            "categoria_medicao_id",
+            "faixa_etaria_id",
+            "dia",
         )
         periodo_com_erro = False
         if lista_erros_com_periodo(lista_erros, medicao, "alimentações"):
@@ -1013,40 +1096,70 @@ def validate_lancamento_alimentacoes_medicao_cei_cemei(
     return lista_erros
 
 
+def _tem_valor_periodo(
+    solicitacao,
+    nome_campo,
+    periodo_escolar_nome,
+    dia,
+    categoria_medicao,
+    infantil_ou_fundamental=None,
+):
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    if contexto:
+        return contexto.tem_valor(
+            nome_campo,
+            dia,
+            categoria_medicao.id,
+            periodo_escolar_nome=periodo_escolar_nome,
+            infantil_ou_fundamental=infantil_ou_fundamental,
+        )
+    filtros = dict(
+        medicao__solicitacao_medicao_inicial=solicitacao,
+        nome_campo=nome_campo,
+        medicao__periodo_escolar__nome=periodo_escolar_nome,
+        dia=dia,
+        categoria_medicao=categoria_medicao,
+    )
+    if infantil_ou_fundamental is not None:
+        filtros["infantil_ou_fundamental"] = infantil_ou_fundamental
+    return ValorMedicao.objects.filter(**filtros).exclude(valor=None).exists()
+
+
 def buscar_valores_lancamento_inclusoes_emebs(
     inclusao, solicitacao, categoria_medicao, lista_erros, periodo_com_erro
 ):
-    tipos_alunos = (
-        LogAlunosMatriculadosPeriodoEscola.objects.filter(
-            escola=solicitacao.escola,
-            criado_em__year=solicitacao.ano,
-            criado_em__month=solicitacao.mes,
-            periodo_escolar__nome=inclusao["periodo_escolar"],
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    if contexto:
+        tipos_alunos = contexto.tipos_alunos_emebs(inclusao["periodo_escolar"])
+    else:
+        tipos_alunos = (
+            LogAlunosMatriculadosPeriodoEscola.objects.filter(
+                escola=solicitacao.escola,
+                **filtro_mes("data", solicitacao.ano, solicitacao.mes),
+                periodo_escolar__nome=inclusao["periodo_escolar"],
+            )
+            .exclude(Q(quantidade_alunos=0) | Q(infantil_ou_fundamental="N/A"))
+            .values_list("infantil_ou_fundamental", flat=True)
         )
-        .exclude(Q(quantidade_alunos=0) | Q(infantil_ou_fundamental="N/A"))
-        .values_list("infantil_ou_fundamental", flat=True)
-    )
-    tipos_alunos = list(set(tipos_alunos))
+        tipos_alunos = list(set(tipos_alunos))
     for tipo_aluno in tipos_alunos:
         for nome_campo in inclusao["linhas_da_tabela"]:
-            valores_da_medicao = ValorMedicao.objects.filter(
-                medicao__solicitacao_medicao_inicial=solicitacao,
-                nome_campo=nome_campo,
-                medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-                dia=inclusao["dia"],
-                categoria_medicao=categoria_medicao,
+            if not _tem_valor_periodo(
+                solicitacao,
+                nome_campo,
+                inclusao["periodo_escolar"],
+                inclusao["dia"],
+                categoria_medicao,
                 infantil_ou_fundamental=tipo_aluno,
-            ).exclude(valor=None)
-            if not valores_da_medicao:
-                valor_observacao = ValorMedicao.objects.filter(
-                    medicao__solicitacao_medicao_inicial=solicitacao,
-                    nome_campo="observacao",
-                    medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-                    dia=inclusao["dia"],
-                    categoria_medicao=categoria_medicao,
+            ):
+                if not _tem_valor_periodo(
+                    solicitacao,
+                    "observacao",
+                    inclusao["periodo_escolar"],
+                    inclusao["dia"],
+                    categoria_medicao,
                     infantil_ou_fundamental=tipo_aluno,
-                ).exclude(valor=None)
-                if not valor_observacao:
+                ):
                     periodo_com_erro = True
     return periodo_com_erro
 
@@ -1061,22 +1174,20 @@ def buscar_valores_lancamento_inclusoes(
         )
     else:
         for nome_campo in inclusao["linhas_da_tabela"]:
-            valores_da_medicao = ValorMedicao.objects.filter(
-                medicao__solicitacao_medicao_inicial=solicitacao,
-                nome_campo=nome_campo,
-                medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-                dia=inclusao["dia"],
-                categoria_medicao=categoria_medicao,
-            ).exclude(valor=None)
-            if not valores_da_medicao:
-                valor_observacao = ValorMedicao.objects.filter(
-                    medicao__solicitacao_medicao_inicial=solicitacao,
-                    nome_campo="observacao",
-                    medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-                    dia=inclusao["dia"],
-                    categoria_medicao=categoria_medicao,
-                ).exclude(valor=None)
-                if not valor_observacao:
+            if not _tem_valor_periodo(
+                solicitacao,
+                nome_campo,
+                inclusao["periodo_escolar"],
+                inclusao["dia"],
+                categoria_medicao,
+            ):
+                if not _tem_valor_periodo(
+                    solicitacao,
+                    "observacao",
+                    inclusao["periodo_escolar"],
+                    inclusao["dia"],
+                    categoria_medicao,
+                ):
                     periodo_com_erro = True
     if periodo_com_erro:
         lista_erros.append(
@@ -1093,20 +1204,12 @@ def buscar_valores_lancamento_inclusoes_emei_cemei(
 ):
     periodo_com_erro = False
     for nome_campo in inclusao["linhas_da_tabela"]:
-        valores_da_medicao = ValorMedicao.objects.filter(
-            medicao=inclusao["medicao"],
-            nome_campo=nome_campo,
-            dia=inclusao["dia"],
-            categoria_medicao=categoria_medicao,
-        ).exclude(valor=None)
-        if not valores_da_medicao.exists():
-            valor_observacao = ValorMedicao.objects.filter(
-                medicao=inclusao["medicao"],
-                nome_campo="observacao",
-                dia=inclusao["dia"],
-                categoria_medicao=categoria_medicao,
-            ).exclude(valor=None)
-            if not valor_observacao.exists():
+        if not _tem_valor_medicao(
+            inclusao["medicao"], nome_campo, inclusao["dia"], categoria_medicao
+        ):
+            if not _tem_valor_medicao(
+                inclusao["medicao"], "observacao", inclusao["dia"], categoria_medicao
+            ):
                 periodo_com_erro = True
     if periodo_com_erro:
         lista_erros.append(
@@ -1122,30 +1225,44 @@ def buscar_valores_lancamento_dietas_inclusoes(
     inclusao, solicitacao, categoria_medicao, lista_erros, nomes_campos
 ):
     periodo_com_erro = False
-    valor_dietas_autorizadas = ValorMedicao.objects.filter(
-        medicao__solicitacao_medicao_inicial=solicitacao,
-        nome_campo="dietas_autorizadas",
-        medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-        dia=inclusao["dia"],
-        categoria_medicao=categoria_medicao,
-    ).exclude(valor=0)
-    for nome_campo in nomes_campos:
-        valores_da_medicao = ValorMedicao.objects.filter(
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    if contexto:
+        valor_dietas_autorizadas = [
+            valor
+            for valor in contexto.valores(
+                "dietas_autorizadas",
+                inclusao["dia"],
+                categoria_medicao.id,
+                periodo_escolar_nome=inclusao["periodo_escolar"],
+            )
+            if valor["valor"] != "0"
+        ]
+    else:
+        valor_dietas_autorizadas = ValorMedicao.objects.filter(
             medicao__solicitacao_medicao_inicial=solicitacao,
-            nome_campo=nome_campo,
+            nome_campo="dietas_autorizadas",
             medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
             dia=inclusao["dia"],
             categoria_medicao=categoria_medicao,
-        ).exclude(valor=None)
-        if not valores_da_medicao and valor_dietas_autorizadas:
-            valor_observacao = ValorMedicao.objects.filter(
-                medicao__solicitacao_medicao_inicial=solicitacao,
-                nome_campo="observacao",
-                medicao__periodo_escolar__nome=inclusao["periodo_escolar"],
-                dia=inclusao["dia"],
-                categoria_medicao=categoria_medicao,
-            ).exclude(valor=None)
-            if not valor_observacao:
+        ).exclude(valor=0)
+    for nome_campo in nomes_campos:
+        if (
+            not _tem_valor_periodo(
+                solicitacao,
+                nome_campo,
+                inclusao["periodo_escolar"],
+                inclusao["dia"],
+                categoria_medicao,
+            )
+            and valor_dietas_autorizadas
+        ):
+            if not _tem_valor_periodo(
+                solicitacao,
+                "observacao",
+                inclusao["periodo_escolar"],
+                inclusao["dia"],
+                categoria_medicao,
+            ):
                 periodo_com_erro = True
     if periodo_com_erro:
         lista_erros.append(
@@ -1177,6 +1294,10 @@ def get_alimentacoes_permitidas(solicitacao, escola, periodo_escolar):
 
 
 def get_permissoes_especiais_da_solicitacao(solicitacao, escola, periodo_escolar):
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    if contexto:
+        return contexto.permissoes_especiais(escola, periodo_escolar)
+
     ano = int(solicitacao.ano)
     mes = int(solicitacao.mes)
 
@@ -1425,15 +1546,12 @@ def get_lista_erros_inclusoes_cei(
     )
     for dia in dias_nao_letivos:
         for medicao in solicitacao.medicoes.all():
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "faixa_etaria_id",
-                        "dia",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "faixa_etaria_id",
+                "dia",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "alimentações"):
@@ -1489,15 +1607,12 @@ def get_lista_erros_inclusoes_cei_cemei(
         )
     )
     for dia in dias_nao_letivos:
-        valores_medicao_ = list(
-            set(
-                medicao.valores_medicao.values_list(
-                    "nome_campo",
-                    "categoria_medicao_id",
-                    "faixa_etaria_id",
-                    "dia",
-                )
-            )
+        valores_medicao_ = _valores_medicao_campos(
+            medicao,
+            "nome_campo",
+            "categoria_medicao_id",
+            "faixa_etaria_id",
+            "dia",
         )
         periodo_com_erro = False
         if lista_erros_com_periodo(lista_erros, medicao, "alimentações"):
@@ -1557,15 +1672,12 @@ def get_lista_erros_inclusoes_dietas_emef_emebs(
     classificacoes = get_classificacoes_dietas(categoria)
     for dia in dias_nao_letivos:
         for medicao in solicitacao.medicoes.filter(periodo_escolar__isnull=False):
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "dia",
-                        "infantil_ou_fundamental",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "dia",
+                "infantil_ou_fundamental",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -1614,14 +1726,11 @@ def get_lista_erros_inclusoes_dietas_emei_cemei(
 ):
     classificacoes = get_classificacoes_dietas(categoria)
     for dia in dias_nao_letivos:
-        valores_medicao_ = list(
-            set(
-                medicao.valores_medicao.values_list(
-                    "nome_campo",
-                    "categoria_medicao_id",
-                    "dia",
-                )
-            )
+        valores_medicao_ = _valores_medicao_campos(
+            medicao,
+            "nome_campo",
+            "categoria_medicao_id",
+            "dia",
         )
         periodo_com_erro = False
         if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -1678,15 +1787,12 @@ def get_lista_erros_inclusoes_dietas_cei(
     )
     for dia in dias_nao_letivos:
         for medicao in solicitacao.medicoes.all():
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "faixa_etaria_id",
-                        "dia",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "faixa_etaria_id",
+                "dia",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -1743,15 +1849,12 @@ def get_lista_erros_inclusoes_dietas_cei_cemei(
         )
     )
     for dia in dias_nao_letivos:
-        valores_medicao_ = list(
-            set(
-                medicao.valores_medicao.values_list(
-                    "nome_campo",
-                    "categoria_medicao_id",
-                    "faixa_etaria_id",
-                    "dia",
-                )
-            )
+        valores_medicao_ = _valores_medicao_campos(
+            medicao,
+            "nome_campo",
+            "categoria_medicao_id",
+            "faixa_etaria_id",
+            "dia",
         )
         periodo_com_erro = False
         if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -1804,7 +1907,7 @@ def validate_lancamento_inclusoes_cei(solicitacao, lista_erros):
 
     categoria = CategoriaMedicao.objects.get(nome="ALIMENTAÇÃO")
     logs = LogAlunosMatriculadosFaixaEtariaDia.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     dias_nao_letivos = list(
         DiaCalendario.objects.filter(
@@ -1846,7 +1949,7 @@ def validate_lancamento_inclusoes_dietas_emef_emebs(
     if not inclusoes.exists():
         return lista_erros
 
-    logs = escola.logs_dietas_autorizadas.filter(data__month=mes, data__year=ano)
+    logs = escola.logs_dietas_autorizadas.filter(**filtro_mes("data", ano, mes))
     dias_nao_letivos = list(
         DiaCalendario.objects.filter(
             escola=escola, data__month=mes, data__year=ano, dia_letivo=False
@@ -1913,7 +2016,7 @@ def validate_lancamento_inclusoes_dietas_cei(solicitacao, lista_erros):
 
     faixas_etarias = FaixaEtaria.objects.filter(ativo=True)
     logs = LogQuantidadeDietasAutorizadasCEI.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     dias_nao_letivos = list(
         DiaCalendario.objects.filter(
@@ -2009,14 +2112,11 @@ def _validar_lancamento_dietas_dia(
     classificacoes,
     escola,
 ):
-    valores_medicao_ = list(
-        set(
-            medicao.valores_medicao.values_list(
-                "nome_campo",
-                "categoria_medicao_id",
-                "dia",
-            )
-        )
+    valores_medicao_ = _valores_medicao_campos(
+        medicao,
+        "nome_campo",
+        "categoria_medicao_id",
+        "dia",
     )
 
     if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -2050,7 +2150,7 @@ def validate_lancamento_dietas_emef(solicitacao, lista_erros):
     mes = solicitacao.mes
     escola = solicitacao.escola
     categorias = CategoriaMedicao.objects.exclude(nome__icontains="ALIMENTAÇÃO")
-    logs = escola.logs_dietas_autorizadas.filter(data__month=mes, data__year=ano)
+    logs = escola.logs_dietas_autorizadas.filter(**filtro_mes("data", ano, mes))
     logs_ = list(
         set(
             logs.values_list(
@@ -2098,14 +2198,11 @@ def validate_lancamento_dietas_emei_cemei(
     for categoria in categorias:
         classificacoes = get_classificacoes_dietas(categoria)
         for dia in dias_letivos:
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "dia",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "dia",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -2143,7 +2240,7 @@ def validate_lancamento_dietas_cei(solicitacao, lista_erros):
     ).exclude(nome__icontains="ENTERAL")
     faixas_etarias = FaixaEtaria.objects.filter(ativo=True)
     logs = LogQuantidadeDietasAutorizadasCEI.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     logs_ = list(
         set(
@@ -2176,15 +2273,12 @@ def validate_lancamento_dietas_cei(solicitacao, lista_erros):
         classificacoes = get_classificacoes_dietas_cei(categoria)
         for dia in dias_letivos_uteis:
             for medicao in solicitacao.medicoes.all():
-                valores_medicao_ = list(
-                    set(
-                        medicao.valores_medicao.values_list(
-                            "nome_campo",
-                            "categoria_medicao_id",
-                            "faixa_etaria_id",
-                            "dia",
-                        )
-                    )
+                valores_medicao_ = _valores_medicao_campos(
+                    medicao,
+                    "nome_campo",
+                    "categoria_medicao_id",
+                    "faixa_etaria_id",
+                    "dia",
                 )
                 periodo_com_erro = False
                 if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -2220,15 +2314,12 @@ def validate_lancamento_dietas_cei_cemei(
     for categoria in categorias:
         classificacoes = get_classificacoes_dietas_cei(categoria)
         for dia in dias_letivos:
-            valores_medicao_ = list(
-                set(
-                    medicao.valores_medicao.values_list(
-                        "nome_campo",
-                        "categoria_medicao_id",
-                        "faixa_etaria_id",
-                        "dia",
-                    )
-                )
+            valores_medicao_ = _valores_medicao_campos(
+                medicao,
+                "nome_campo",
+                "categoria_medicao_id",
+                "faixa_etaria_id",
+                "dia",
             )
             periodo_com_erro = False
             if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -2927,8 +3018,7 @@ def valida_dietas_solicitacoes_continuas(
     categorias = CategoriaMedicao.objects.filter(nome__icontains="dieta")
     nomes_campos = ["frequencia"]
     logs_dietas_autorizadas_no_mes = escola.logs_dietas_autorizadas.filter(
-        data__month=mes,
-        data__year=ano,
+        **filtro_mes("data", ano, mes),
         quantidade__gt=0,
         periodo_escolar__nome=None,
         infantil_ou_fundamental=infantil_ou_fundamental,
@@ -3019,7 +3109,7 @@ def valida_dietas_solicitacoes_continuas_emei_cemei(
     ids_categorias_existentes_no_mes = list(
         set(
             escola.logs_dietas_autorizadas.filter(
-                data__month=mes, data__year=ano, quantidade__gt=0
+                **filtro_mes("data", ano, mes), quantidade__gt=0
             )
             .exclude(classificacao__nome=TIPO_C)
             .values_list("classificacao", flat=True)
@@ -3409,7 +3499,7 @@ def validate_lancamento_dietas_inclusoes_escola_sem_alunos_regulares(
     ids_categorias_existentes_no_mes = list(
         set(
             escola.logs_dietas_autorizadas.filter(
-                data__month=mes, data__year=ano, quantidade__gt=0
+                **filtro_mes("data", ano, mes), quantidade__gt=0
             )
             .exclude(classificacao__nome=TIPO_C)
             .values_list("classificacao", flat=True)
@@ -3547,7 +3637,7 @@ def _validate_medicao_cei_cemei(
     ).exclude(nome__icontains="ENTERAL")
     faixas_etarias = FaixaEtaria.objects.filter(ativo=True)
     logs_faixas_etarias = LogAlunosMatriculadosFaixaEtariaDia.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     logs_faixas_etarias_dict = list(
         set(
@@ -3557,7 +3647,7 @@ def _validate_medicao_cei_cemei(
         )
     )
     logs_dietas_autorizadas = LogQuantidadeDietasAutorizadasCEI.objects.filter(
-        escola=escola, data__month=mes, data__year=ano
+        escola=escola, **filtro_mes("data", ano, mes)
     )
     logs_dietas_autorizadas_dict = list(
         set(
@@ -3630,7 +3720,7 @@ def _validate_medicao_emei_cemei(
 ):
     categorias_dieta = CategoriaMedicao.objects.exclude(nome__icontains="ALIMENTAÇÃO")
     logs_dietas_autorizadas = LogQuantidadeDietasAutorizadas.objects.filter(
-        escola=escola, data__month=mes, data__year=ano, cei_ou_emei="EMEI"
+        escola=escola, **filtro_mes("data", ano, mes), cei_ou_emei="EMEI"
     )
     logs_dietas_autorizadas_dict = list(
         set(
@@ -3808,92 +3898,139 @@ def validate_lancamento_alimentacoes_medicao_emebs(solicitacao, lista_erros):
     return erros_unicos(lista_erros)
 
 
-def buscar_valores_lancamento_alimentacoes_emebs(
-    linhas_da_tabela,
-    solicitacao,
-    periodo_escolar,
-    dias_letivos,
-    categoria_medicao,
-    lista_erros,
-):
-    periodo_com_erro = False
+def _tipos_alunos_emebs(contexto, solicitacao, periodo_escolar):
+    if contexto:
+        return contexto.tipos_alunos_emebs(periodo_escolar.nome)
     tipos_alunos = (
         LogAlunosMatriculadosPeriodoEscola.objects.filter(
             escola=solicitacao.escola,
-            criado_em__year=solicitacao.ano,
-            criado_em__month=solicitacao.mes,
+            **filtro_mes("data", solicitacao.ano, solicitacao.mes),
             periodo_escolar=periodo_escolar,
         )
         .exclude(Q(quantidade_alunos=0) | Q(infantil_ou_fundamental="N/A"))
         .values_list("infantil_ou_fundamental", flat=True)
     )
-    tipos_alunos = list(set(tipos_alunos))
-    for tipo_aluno in tipos_alunos:
-        for nome_campo in linhas_da_tabela:
-            valores_da_medicao = (
-                ValorMedicao.objects.filter(
-                    medicao__solicitacao_medicao_inicial=solicitacao,
-                    nome_campo=nome_campo,
-                    medicao__periodo_escolar=periodo_escolar,
-                    dia__in=dias_letivos,
-                    categoria_medicao=categoria_medicao,
-                    infantil_ou_fundamental=tipo_aluno,
-                )
-                .exclude(valor=None)
-                .values_list("dia", flat=True)
-            )
-            valores_da_medicao = list(set(valores_da_medicao))
-            dias_matriculados_zero = ValorMedicao.objects.filter(
-                medicao__solicitacao_medicao_inicial=solicitacao,
-                nome_campo="matriculados",
-                medicao__periodo_escolar=periodo_escolar,
-                dia__in=dias_letivos,
-                categoria_medicao=categoria_medicao,
+    return list(set(tipos_alunos))
+
+
+def _matriculados_emebs_por_dia(
+    contexto, solicitacao, periodo_escolar, dias_letivos, categoria_medicao, tipo_aluno
+):
+    """Valor do campo matriculados de cada dia letivo (None se não lançado)."""
+    if contexto:
+        matriculados = {}
+        for dia in dias_letivos:
+            valores = contexto.valores(
+                "matriculados",
+                dia,
+                categoria_medicao.id,
+                periodo_escolar_id=periodo_escolar.id,
                 infantil_ou_fundamental=tipo_aluno,
-                valor=0,
             )
-            permissoes_especiais = get_permissoes_especiais_da_solicitacao(
-                solicitacao, solicitacao.escola, periodo_escolar
-            )
-            permissoes_especiais_agrupadas_por_dia = (
-                agrupa_permissoes_especiais_por_dia(
-                    permissoes_especiais, solicitacao.mes, solicitacao.ano
-                )
+            matriculados[dia] = valores[0]["valor"] if valores else None
+        return matriculados
+    matriculados = dict.fromkeys(dias_letivos)
+    for dia, valor in (
+        ValorMedicao.objects.filter(
+            nome_campo="matriculados",
+            dia__in=dias_letivos,
+            **_filtros_valores_periodo(
+                solicitacao, periodo_escolar, categoria_medicao, tipo_aluno
+            ),
+        )
+        .order_by("-id")
+        .values_list("dia", "valor")
+    ):
+        matriculados[dia] = valor
+    return matriculados
+
+
+def _campo_emebs_com_erro(
+    contexto,
+    solicitacao,
+    periodo_escolar,
+    nome_campo,
+    dias_letivos,
+    categoria_medicao,
+    tipo_aluno,
+    matriculados_por_dia,
+    permissoes_por_dia,
+):
+    valores_da_medicao = _dias_preenchidos_periodo(
+        contexto,
+        solicitacao,
+        periodo_escolar,
+        nome_campo,
+        dias_letivos,
+        categoria_medicao,
+        tipo_aluno,
+    )
+    dias_matriculados_zero = [
+        dia for dia, valor in matriculados_por_dia.items() if valor == "0"
+    ]
+    dias_esperados = len(dias_letivos) - (
+        0 if nome_campo == "matriculados" else len(dias_matriculados_zero)
+    )
+    if len(valores_da_medicao) == dias_esperados:
+        return False
+    periodo_com_erro = False
+    for dia_sem_preenchimento in set(dias_letivos) - valores_da_medicao:
+        if (
+            _dia_dispensado_lancamento_especial(
+                nome_campo, dia_sem_preenchimento, permissoes_por_dia
             )
-            if len(valores_da_medicao) != (
-                len(dias_letivos)
-                - (0 if nome_campo == "matriculados" else len(dias_matriculados_zero))
+            or matriculados_por_dia.get(dia_sem_preenchimento) == "0"
+        ):
+            continue
+        periodo_com_erro = checa_valor_observacao(
+            _tem_observacao_periodo(
+                contexto,
+                solicitacao,
+                periodo_escolar,
+                dia_sem_preenchimento,
+                categoria_medicao,
+                tipo_aluno,
+            ),
+            periodo_com_erro,
+        )
+    return periodo_com_erro
+
+
+def buscar_valores_lancamento_alimentacoes_emebs(
+    linhas_da_tabela,
+    solicitacao,
+    periodo_escolar,
+    dias_letivos,
+    categoria_medicao,
+    lista_erros,
+):
+    periodo_com_erro = False
+    contexto = get_contexto_validacao_medicao(solicitacao)
+    permissoes_especiais_agrupadas_por_dia = _permissoes_especiais_agrupadas_por_dia(
+        solicitacao, periodo_escolar
+    )
+    for tipo_aluno in _tipos_alunos_emebs(contexto, solicitacao, periodo_escolar):
+        matriculados_por_dia = _matriculados_emebs_por_dia(
+            contexto,
+            solicitacao,
+            periodo_escolar,
+            dias_letivos,
+            categoria_medicao,
+            tipo_aluno,
+        )
+        for nome_campo in linhas_da_tabela:
+            if _campo_emebs_com_erro(
+                contexto,
+                solicitacao,
+                periodo_escolar,
+                nome_campo,
+                dias_letivos,
+                categoria_medicao,
+                tipo_aluno,
+                matriculados_por_dia,
+                permissoes_especiais_agrupadas_por_dia,
             ):
-                diferenca = list(set(dias_letivos) - set(valores_da_medicao))
-                for dia_sem_preenchimento in diferenca:
-                    valor_matriculados = ValorMedicao.objects.filter(
-                        medicao__solicitacao_medicao_inicial=solicitacao,
-                        nome_campo="matriculados",
-                        medicao__periodo_escolar=periodo_escolar,
-                        dia=dia_sem_preenchimento,
-                        categoria_medicao=categoria_medicao,
-                        infantil_ou_fundamental=tipo_aluno,
-                    ).first()
-                    if nome_campo in ALIMENTACOES_LANCAMENTOS_ESPECIAIS and (
-                        (
-                            not permissoes_especiais_agrupadas_por_dia.get(
-                                dia_sem_preenchimento
-                            )
-                        )
-                        or (valor_matriculados and valor_matriculados.valor == "0")
-                    ):
-                        continue
-                    valor_observacao = ValorMedicao.objects.filter(
-                        medicao__solicitacao_medicao_inicial=solicitacao,
-                        nome_campo="observacao",
-                        medicao__periodo_escolar=periodo_escolar,
-                        dia=dia_sem_preenchimento,
-                        categoria_medicao=categoria_medicao,
-                        infantil_ou_fundamental=tipo_aluno,
-                    ).exclude(valor=None)
-                    periodo_com_erro = checa_valor_observacao(
-                        valor_observacao, periodo_com_erro
-                    )
+                periodo_com_erro = True
     return checa_periodo_com_erro(periodo_com_erro, lista_erros, periodo_escolar)
 
 
@@ -3925,15 +4062,12 @@ def _validar_lancamento_dietas_emebs_dia(
     classificacoes,
     escola,
 ):
-    valores_medicao_ = list(
-        set(
-            medicao.valores_medicao.values_list(
-                "nome_campo",
-                "categoria_medicao_id",
-                "dia",
-                "infantil_ou_fundamental",
-            )
-        )
+    valores_medicao_ = _valores_medicao_campos(
+        medicao,
+        "nome_campo",
+        "categoria_medicao_id",
+        "dia",
+        "infantil_ou_fundamental",
     )
 
     if lista_erros_com_periodo(lista_erros, medicao, "dietas"):
@@ -3967,7 +4101,7 @@ def validate_lancamento_dietas_emebs(solicitacao, lista_erros):
     mes = solicitacao.mes
     escola = solicitacao.escola
     categorias = CategoriaMedicao.objects.exclude(nome__icontains="ALIMENTAÇÃO")
-    logs = escola.logs_dietas_autorizadas.filter(data__month=mes, data__year=ano)
+    logs = escola.logs_dietas_autorizadas.filter(**filtro_mes("data", ano, mes))
     logs_ = list(
         set(
             logs.values_list(
@@ -4041,8 +4175,7 @@ def validate_lancamento_alimentacoes_medicao_emebs_dietas(
     tipos_alunos = (
         LogQuantidadeDietasAutorizadas.objects.filter(
             escola=escola,
-            data__year=ano,
-            data__month=mes,
+            **filtro_mes("data", ano, mes),
             periodo_escolar=medicao.periodo_escolar,
         )
         .exclude(Q(quantidade=0) | Q(infantil_ou_fundamental="N/A"))
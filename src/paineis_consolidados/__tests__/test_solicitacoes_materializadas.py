@@ -0,0 +1,112 @@
+import pytest
+from django.db import connection
+from model_bakery import baker
+
+from src.dados_comuns.models import LogSolicitacoesUsuario
+from src.paineis_consolidados.services.solicitacoes_materializadas import (
+    TABELA,
+    VIEW,
+    agenda_atualizacao,
+    agenda_atualizacao_solicitacoes,
+    reconstroi,
+    solicitacoes_divergentes,
+    tabela_solicitacoes_consolidadas,
+)
+from src.paineis_consolidados.tasks import reconcilia_solicitacoes_consolidadas
+
+pytestmark = pytest.mark.django_db
+
+
+def _uuids_na_tabela():
+    with connection.cursor() as cursor:
+        cursor.execute(f"SELECT DISTINCT uuid FROM {TABELA}")
+        return {linha[0] for linha in cursor.fetchall()}
+
+
+def test_tabela_solicitacoes_consolidadas(settings):
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = False
+    assert tabela_solicitacoes_consolidadas() == VIEW
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = True
+    assert tabela_solicitacoes_consolidadas() == TABELA
+
+
+def test_reconstroi_sem_divergencias(alteracoes_cardapio):
+    reconstroi()
+    assert solicitacoes_divergentes() == set()
+    assert {alteracao.uuid for alteracao in alteracoes_cardapio} <= _uuids_na_tabela()
+
+
+def test_verificacao_detecta_solicitacao_desatualizada(alteracoes_cardapio):
+    reconstroi()
+    alteracao = alteracoes_cardapio[0]
+    alteracao.status = "DRE_A_VALIDAR"
+    alteracao.save()
+    assert alteracao.uuid in solicitacoes_divergentes()
+
+
+def test_log_de_transicao_atualiza_tabela(
+    settings, alteracoes_cardapio, django_capture_on_commit_callbacks
+):
+    reconstroi()
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = True
+    alteracao = alteracoes_cardapio[0]
+    with django_capture_on_commit_callbacks(execute=True) as callbacks:
+        baker.make(
+            LogSolicitacoesUsuario,
+            uuid_original=alteracao.uuid,
+            status_evento=LogSolicitacoesUsuario.DRE_VALIDOU,
+            solicitacao_tipo=LogSolicitacoesUsuario.ALTERACAO_DE_CARDAPIO,
+        )
+    assert callbacks
+    assert alteracao.uuid not in solicitacoes_divergentes()
+
+
+def test_agenda_atualizacao_inativa(settings, django_capture_on_commit_callbacks):
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = False
+    with django_capture_on_commit_callbacks() as callbacks:
+        agenda_atualizacao("4f7287e5-da63-4b23-8bbc-48cc6722c91e")
+    assert callbacks == []
+
+
+def test_agenda_atualizacao_solicitacoes_em_lote(
+    settings, alteracoes_cardapio, django_capture_on_commit_callbacks
+):
+    reconstroi()
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = True
+    uuids = [alteracao.uuid for alteracao in alteracoes_cardapio]
+    with django_capture_on_commit_callbacks(execute=True):
+        type(alteracoes_cardapio[0]).objects.filter(uuid__in=uuids).update(
+            status="DRE_A_VALIDAR"
+        )
+        agenda_atualizacao_solicitacoes(uuids)
+    assert solicitacoes_divergentes() == set()
+
+
+def test_alteracao_do_lote_atualiza_tabela(
+    settings, escola, alteracoes_cardapio, django_capture_on_commit_callbacks
+):
+    alteracoes_cardapio[0]._salva_rastro_solicitacao()
+    reconstroi()
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = True
+    with django_capture_on_commit_callbacks(execute=True):
+        escola.lote.nome = "LOTE RENOMEADO"
+        escola.lote.save()
+    assert solicitacoes_divergentes() == set()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT lote_nome FROM {TABELA} WHERE uuid = %s",
+            [alteracoes_cardapio[0].uuid],
+        )
+        assert cursor.fetchall() == [("LOTE RENOMEADO",)]
+
+
+def test_reconcilia_solicitacoes_consolidadas(settings, alteracoes_cardapio):
+    reconstroi()
+    settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS = True
+    alteracao = alteracoes_cardapio[0]
+    type(alteracao).objects.filter(uuid=alteracao.uuid).update(status="DRE_A_VALIDAR")
+    assert alteracao.uuid in solicitacoes_divergentes()
+
+    reconcilia_solicitacoes_consolidadas()
+
+    assert solicitacoes_divergentes() == set()
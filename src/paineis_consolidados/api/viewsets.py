@@ -9,6 +9,7 @@ from rest_framework.response import Response
 from rest_framework.status import HTTP_200_OK
 
 from ...dados_comuns.constants import FILTRO_PADRAO_PEDIDOS, SEM_FILTRO
+from ...dados_comuns.intervalos import filtro_dia
 from ...dados_comuns.permissions import (
     PermissaoParaRecuperarDietaEspecial,
     UsuarioCODAEDietaEspecial,
@@ -613,7 +614,7 @@ class NutrisupervisaoSolicitacoesViewSet(SolicitacoesViewSet):
         dia = request.query_params.get("dia")
         if dia:
             data = datetime.datetime.strptime(dia, "%d/%m/%Y").date()
-            queryset = queryset.filter(criado_em__date=data)
+            queryset = queryset.filter(**filtro_dia("criado_em", data))
         else:
             anos = request.query_params.get("anos")
             if anos:
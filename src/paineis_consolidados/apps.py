@@ -1,5 +1,10 @@
+import importlib
+
 from django.apps import AppConfig
 
 
 class PaineisConsolidadosConfig(AppConfig):
     name = "src.paineis_consolidados"
+
+    def ready(self):
+        importlib.import_module("src.paineis_consolidados.signals")
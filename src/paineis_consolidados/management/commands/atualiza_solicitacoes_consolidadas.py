@@ -0,0 +1,48 @@
+import logging
+
+from django.core.management import BaseCommand
+
+from src.paineis_consolidados.services.solicitacoes_materializadas import (
+    TABELA,
+    atualiza_solicitacoes,
+    reconstroi,
+    solicitacoes_divergentes,
+)
+
+logger = logging.getLogger("sigpae.cmd_atualiza_solicitacoes_consolidadas")
+
+
+class Command(BaseCommand):
+    help = (
+        f"Recarrega a tabela {TABELA} a partir da view solicitacoes_consolidadas. "
+        "Com --verificar, apenas compara tabela e view e corrige as solicitações "
+        "divergentes. Use --recriar após alterações na definição da view."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--verificar",
+            action="store_true",
+            help="Compara a tabela com a view e atualiza apenas o que diverge.",
+        )
+        parser.add_argument(
+            "--recriar",
+            action="store_true",
+            help="Remove e recria a tabela e os índices antes da carga completa.",
+        )
+
+    def handle(self, *args, **options):
+        if options["verificar"]:
+            divergentes = solicitacoes_divergentes()
+            logger.info(f"{len(divergentes)} solicitações divergentes em {TABELA}")
+            atualiza_solicitacoes(divergentes)
+            self.stdout.write(
+                self.style.SUCCESS(
+                    f"{len(divergentes)} solicitações divergentes atualizadas."
+                )
+            )
+            return
+
+        total = reconstroi(recriar=options["recriar"])
+        logger.info(f"{TABELA} recarregada com {total} linhas")
+        self.stdout.write(self.style.SUCCESS(f"{TABELA} recarregada: {total} linhas."))
@@ -0,0 +1,60 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """Cria a tabela solicitacoes_consolidadas_materializadas, projeção da view
+    solicitacoes_consolidadas, e os seus índices.
+
+    A tabela é criada vazia; a carga inicial é feita pelo comando
+    `atualiza_solicitacoes_consolidadas`.
+    """
+
+    dependencies = [
+        (
+            "paineis_consolidados",
+            "0045_merge_0043_solicitacoes_0044_otimizacao_indices_v2",
+        ),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE TABLE IF NOT EXISTS solicitacoes_consolidadas_materializadas AS "
+            "SELECT * FROM solicitacoes_consolidadas WITH NO DATA;",
+            reverse_sql="DROP TABLE IF EXISTS solicitacoes_consolidadas_materializadas;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_uuid "
+            "ON solicitacoes_consolidadas_materializadas (uuid);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_uuid;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_escola "
+            "ON solicitacoes_consolidadas_materializadas "
+            "(escola_uuid, status_atual, status_evento, data_log DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_escola;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_dre "
+            "ON solicitacoes_consolidadas_materializadas "
+            "(dre_uuid, status_atual, status_evento, data_log DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_dre;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_lote "
+            "ON solicitacoes_consolidadas_materializadas "
+            "(lote_uuid, status_atual, status_evento, data_log DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_lote;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_terceirizada "
+            "ON solicitacoes_consolidadas_materializadas "
+            "(terceirizada_uuid, status_atual, status_evento, data_log DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_terceirizada;",
+        ),
+        migrations.RunSQL(
+            "CREATE INDEX IF NOT EXISTS idx_sol_mat_status "
+            "ON solicitacoes_consolidadas_materializadas "
+            "(status_atual, status_evento, data_log DESC);",
+            reverse_sql="DROP INDEX IF EXISTS idx_sol_mat_status;",
+        ),
+    ]
@@ -34,6 +34,7 @@ from ..dados_comuns.fluxo_status import (
     PedidoAPartirDaDiretoriaRegionalWorkflow,
     PedidoAPartirDaEscolaWorkflow,
 )
+from ..dados_comuns.intervalos import filtro_dias, filtro_mes
 from ..dados_comuns.models import LogSolicitacoesUsuario
 from ..dieta_especial.solicitacao_dieta_especial.models import SolicitacaoDietaEspecial
 from ..escola.models import Codae, DiretoriaRegional, Escola
@@ -62,6 +63,7 @@ from ..kit_lanche.models import (
     SolicitacaoKitLancheUnificada,
 )
 from ..terceirizada.models import Terceirizada
+from .services.solicitacoes_materializadas import tabela_solicitacoes_consolidadas
 
 
 class SolicitacoesDestaSemanaManager(models.Manager):
@@ -93,6 +95,8 @@ class MoldeConsolidado(models.Model, TemPrioridade, TemIdentificadorExternoAmiga
 
     Mapeia a view gerada pelos sqls (solicitacoes_consolidadas) para objetos que
     são utilizados nos paineis consolidados, principalmente no painel de Gestão de Alimentação.
+    Com SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS ativo, a consulta é feita na tabela
+    materializada (ver services/solicitacoes_materializadas.py).
     """
 
     PENDENTES_STATUS = []
@@ -547,7 +551,7 @@ class MoldeConsolidado(models.Model, TemPrioridade, TemIdentificadorExternoAmiga
     ):
         if data_inicial and data_final:
             query_set = query_set.filter(
-                criado_em__date__range=(data_inicial, data_final)
+                **filtro_dias("criado_em", data_inicial, data_final)
             )
         if tipo_solicitacao != cls.TP_SOL_TODOS:
             query_set = query_set.filter(tipo_doc=tipo_solicitacao)
@@ -659,7 +663,7 @@ class MoldeConsolidado(models.Model, TemPrioridade, TemIdentificadorExternoAmiga
 
     class Meta:
         managed = False
-        db_table = "solicitacoes_consolidadas"
+        db_table = tabela_solicitacoes_consolidadas()
         abstract = True
 
 
@@ -1108,12 +1112,10 @@ class SolicitacoesCODAE(MoldeConsolidado):
             year=hoje.year, month=hoje.month, day=1
         ) - datetime.timedelta(days=1)
         query_set = cls.objects.filter(
-            criado_em__date__year=hoje.year,
-            criado_em__date__month=hoje.month,
+            **filtro_mes("criado_em", hoje.year, hoje.month),
         )
         query_set_mes_passado = cls.objects.filter(
-            criado_em__date__year=mes_passado.year,
-            criado_em__date__month=mes_passado.month,
+            **filtro_mes("criado_em", mes_passado.year, mes_passado.month),
         )
 
         return cls._conta_totais(query_set, query_set_mes_passado)
@@ -1514,13 +1516,11 @@ class SolicitacoesEscola(MoldeConsolidado):
         ) - datetime.timedelta(days=1)
         query_set = cls.objects.filter(
             escola_uuid=escola_uuid,
-            criado_em__date__year=hoje.year,
-            criado_em__date__month=hoje.month,
+            **filtro_mes("criado_em", hoje.year, hoje.month),
         )
         query_set_mes_passado = cls.objects.filter(
             escola_uuid=escola_uuid,
-            criado_em__date__year=mes_passado.year,
-            criado_em__date__month=mes_passado.month,
+            **filtro_mes("criado_em", mes_passado.year, mes_passado.month),
         )
 
         return cls._conta_totais(query_set, query_set_mes_passado)
@@ -1888,13 +1888,11 @@ class SolicitacoesDRE(MoldeConsolidado):
         ) - datetime.timedelta(days=1)
         query_set = cls.objects.filter(
             dre_uuid=dre_uuid,
-            criado_em__date__year=hoje.year,
-            criado_em__date__month=hoje.month,
+            **filtro_mes("criado_em", hoje.year, hoje.month),
         ).distinct("uuid")
         query_set_mes_passado = cls.objects.filter(
             dre_uuid=dre_uuid,
-            criado_em__date__year=mes_passado.year,
-            criado_em__date__month=mes_passado.month,
+            **filtro_mes("criado_em", mes_passado.year, mes_passado.month),
         ).distinct("uuid")
 
         return cls._conta_totais(query_set, query_set_mes_passado)
@@ -0,0 +1,160 @@
+"""
+Projeção materializada da view `solicitacoes_consolidadas`.
+
+A view une todos os tipos de solicitação com os seus logs e é reavaliada por
+completo a cada acesso aos paineis. A tabela `solicitacoes_consolidadas_materializadas`
+guarda o mesmo resultado e é atualizada por solicitação (uuid) ao final de cada
+transação que cria logs ou salva uma das solicitações de origem, e também quando
+muda um dado das tabelas que a view junta (escola, lote, DRE, terceirizada,
+aluno e histórico da escola). Ver paineis_consolidados/signals.py.
+
+Escritas que não disparam signals (`QuerySet.update`, `bulk_create`, SQL
+direto) precisam chamar `agenda_atualizacao_solicitacoes` com os uuids
+alterados. O que escapar disso é corrigido pela task diária
+`reconcilia_solicitacoes_consolidadas`, que compara a tabela com a view.
+"""
+
+import threading
+
+from django.conf import settings
+from django.db import connection, transaction
+
+VIEW = "solicitacoes_consolidadas"
+TABELA = "solicitacoes_consolidadas_materializadas"
+
+# Colunas da tabela pelas quais as solicitações de uma instituição são buscadas.
+COLUNAS_INSTITUICAO = {
+    "escola_uuid",
+    "escola_destino_uuid",
+    "lote_uuid",
+    "lote_escola_destino_uuid",
+    "dre_uuid",
+    "dre_escola_destino_uuid",
+    "terceirizada_uuid",
+}
+
+INDICES = {
+    "idx_sol_mat_uuid": "(uuid)",
+    "idx_sol_mat_escola": "(escola_uuid, status_atual, status_evento, data_log DESC)",
+    "idx_sol_mat_dre": "(dre_uuid, status_atual, status_evento, data_log DESC)",
+    "idx_sol_mat_lote": "(lote_uuid, status_atual, status_evento, data_log DESC)",
+    "idx_sol_mat_terceirizada": (
+        "(terceirizada_uuid, status_atual, status_evento, data_log DESC)"
+    ),
+    "idx_sol_mat_status": "(status_atual, status_evento, data_log DESC)",
+}
+
+_pendentes = threading.local()
+
+
+def projecao_ativa() -> bool:
+    return settings.SOLICITACOES_CONSOLIDADAS_MATERIALIZADAS
+
+
+def tabela_solicitacoes_consolidadas() -> str:
+    """Tabela ou view que os modelos de MoldeConsolidado devem consultar."""
+    return TABELA if projecao_ativa() else VIEW
+
+
+def cria_tabela(cursor, recriar=False):
+    if recriar:
+        cursor.execute(f"DROP TABLE IF EXISTS {TABELA}")
+    cursor.execute(
+        f"CREATE TABLE IF NOT EXISTS {TABELA} AS SELECT * FROM {VIEW} WITH NO DATA"
+    )
+    for nome, colunas in INDICES.items():
+        cursor.execute(f"CREATE INDEX IF NOT EXISTS {nome} ON {TABELA} {colunas}")
+
+
+def atualiza_solicitacoes(uuids) -> None:
+    """Substitui as linhas das solicitações informadas pelas linhas atuais da view."""
+    uuids = [str(uuid) for uuid in uuids]
+    if not uuids:
+        return
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"DELETE FROM {TABELA} WHERE uuid = ANY(%s::uuid[])", [uuids])
+        cursor.execute(
+            f"INSERT INTO {TABELA} SELECT * FROM {VIEW} WHERE uuid = ANY(%s::uuid[])",
+            [uuids],
+        )
+
+
+def reconstroi(recriar=False) -> int:
+    """Recarrega a tabela inteira a partir da view. Retorna o total de linhas."""
+    with transaction.atomic(), connection.cursor() as cursor:
+        cria_tabela(cursor, recriar=recriar)
+        cursor.execute(f"TRUNCATE {TABELA}")
+        cursor.execute(f"INSERT INTO {TABELA} SELECT * FROM {VIEW}")
+        return cursor.rowcount
+
+
+def solicitacoes_divergentes() -> set:
+    """
+    Uuids cujas linhas na tabela diferem das linhas atuais da view, comparando
+    o conteúdo completo de cada linha.
+    """
+    sql = f"""
+        SELECT DISTINCT uuid FROM (
+            (SELECT v.uuid, md5(v::text) FROM {VIEW} v
+             EXCEPT ALL
+             SELECT t.uuid, md5(t::text) FROM {TABELA} t)
+            UNION ALL
+            (SELECT t.uuid, md5(t::text) FROM {TABELA} t
+             EXCEPT ALL
+             SELECT v.uuid, md5(v::text) FROM {VIEW} v)
+        ) AS divergentes
+    """
+    with connection.cursor() as cursor:
+        cursor.execute(sql)
+        return {linha[0] for linha in cursor.fetchall()}
+
+
+def solicitacoes_das_instituicoes(colunas, valores) -> set:
+    """
+    Uuids das solicitações da tabela cujo valor em alguma das `colunas`
+    (de COLUNAS_INSTITUICAO) está em `valores`.
+    """
+    assert set(colunas) <= COLUNAS_INSTITUICAO, colunas
+    valores = [str(valor) for valor in valores]
+    if not valores:
+        return set()
+    filtro = " OR ".join(f"{coluna} = ANY(%s::uuid[])" for coluna in colunas)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f"SELECT DISTINCT uuid FROM {TABELA} WHERE {filtro}",
+            [valores] * len(colunas),
+        )
+        return {linha[0] for linha in cursor.fetchall()}
+
+
+def _aplica_pendentes():
+    uuids = getattr(_pendentes, "uuids", set())
+    _pendentes.uuids = set()
+    atualiza_solicitacoes(uuids)
+
+
+def agenda_atualizacao(uuid) -> None:
+    """
+    Agenda a atualização da solicitação para o commit da transação corrente.
+
+    Várias chamadas na mesma transação resultam em uma única atualização com
+    todos os uuids acumulados; fora de transação a atualização é imediata.
+    """
+    if uuid is not None:
+        agenda_atualizacao_solicitacoes([uuid])
+
+
+def agenda_atualizacao_solicitacoes(uuids) -> None:
+    """
+    Versão em lote de `agenda_atualizacao`, para quem grava solicitações ou
+    logs sem disparar signals (`QuerySet.update`, `bulk_create`).
+    """
+    if not projecao_ativa():
+        return
+    uuids = {uuid for uuid in uuids if uuid is not None}
+    if not uuids:
+        return
+    if not hasattr(_pendentes, "uuids"):
+        _pendentes.uuids = set()
+    _pendentes.uuids |= uuids
+    transaction.on_commit(_aplica_pendentes)
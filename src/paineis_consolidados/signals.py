@@ -0,0 +1,133 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from ..cardapio.alteracao_tipo_alimentacao.models import AlteracaoCardapio
+from ..cardapio.alteracao_tipo_alimentacao_cei.models import AlteracaoCardapioCEI
+from ..cardapio.alteracao_tipo_alimentacao_cemei.models import AlteracaoCardapioCEMEI
+from ..cardapio.inversao_dia_cardapio.models import InversaoCardapio
+from ..cardapio.suspensao_alimentacao.models import GrupoSuspensaoAlimentacao
+from ..cardapio.suspensao_alimentacao_cei.models import SuspensaoAlimentacaoDaCEI
+from ..dados_comuns.models import LogSolicitacoesUsuario
+from ..dieta_especial.solicitacao_dieta_especial.models import SolicitacaoDietaEspecial
+from ..escola.models import Aluno, DiretoriaRegional, Escola, HistoricoEscola, Lote
+from ..inclusao_alimentacao.models import (
+    GrupoInclusaoAlimentacaoNormal,
+    InclusaoAlimentacaoContinua,
+    InclusaoAlimentacaoDaCEI,
+    InclusaoDeAlimentacaoCEMEI,
+)
+from ..kit_lanche.models import (
+    SolicitacaoKitLancheAvulsa,
+    SolicitacaoKitLancheCEIAvulsa,
+    SolicitacaoKitLancheCEMEI,
+    SolicitacaoKitLancheUnificada,
+)
+from ..terceirizada.models import Terceirizada
+from .services.solicitacoes_materializadas import (
+    agenda_atualizacao,
+    agenda_atualizacao_solicitacoes,
+    projecao_ativa,
+    solicitacoes_das_instituicoes,
+)
+
+# Tabelas de origem da view solicitacoes_consolidadas (sql/0043_solicitacoes.sql).
+MODELOS_SOLICITACOES_CONSOLIDADAS = [
+    SolicitacaoDietaEspecial,
+    AlteracaoCardapio,
+    InversaoCardapio,
+    GrupoInclusaoAlimentacaoNormal,
+    InclusaoAlimentacaoContinua,
+    SolicitacaoKitLancheAvulsa,
+    GrupoSuspensaoAlimentacao,
+    SolicitacaoKitLancheUnificada,
+    InclusaoAlimentacaoDaCEI,
+    AlteracaoCardapioCEI,
+    SolicitacaoKitLancheCEIAvulsa,
+    SuspensaoAlimentacaoDaCEI,
+    SolicitacaoKitLancheCEMEI,
+    InclusaoDeAlimentacaoCEMEI,
+    AlteracaoCardapioCEMEI,
+]
+
+
+@receiver(post_save, sender=LogSolicitacoesUsuario)
+def log_solicitacao_salvo(sender, instance, **kwargs):
+    agenda_atualizacao(instance.uuid_original)
+
+
+def solicitacao_alterada(sender, instance, **kwargs):
+    agenda_atualizacao(instance.uuid)
+
+
+for modelo in MODELOS_SOLICITACOES_CONSOLIDADAS:
+    post_save.connect(
+        solicitacao_alterada,
+        sender=modelo,
+        dispatch_uid=f"solicitacoes_consolidadas_save_{modelo.__name__}",
+    )
+    post_delete.connect(
+        solicitacao_alterada,
+        sender=modelo,
+        dispatch_uid=f"solicitacoes_consolidadas_delete_{modelo.__name__}",
+    )
+
+
+# Tabelas juntadas pela view: modelo -> colunas da tabela materializada que
+# guardam o uuid da instância e campos do modelo que aparecem na view.
+INSTITUICOES_SOLICITACOES_CONSOLIDADAS = {
+    Escola: (
+        ("escola_uuid", "escola_destino_uuid"),
+        {"nome", "tipo_unidade", "tipo_gestao", "lote", "diretoria_regional"},
+    ),
+    Lote: (("lote_uuid", "lote_escola_destino_uuid"), {"nome"}),
+    DiretoriaRegional: (
+        ("dre_uuid", "dre_escola_destino_uuid"),
+        {"nome", "iniciais"},
+    ),
+    Terceirizada: (("terceirizada_uuid",), {"nome_fantasia"}),
+}
+
+
+def _campos_alterados(update_fields, campos):
+    return update_fields is None or bool(
+        {campo.removesuffix("_id") for campo in update_fields} & campos
+    )
+
+
+def instituicao_alterada(sender, instance, update_fields=None, **kwargs):
+    colunas, campos = INSTITUICOES_SOLICITACOES_CONSOLIDADAS[sender]
+    if not projecao_ativa() or not _campos_alterados(update_fields, campos):
+        return
+    agenda_atualizacao_solicitacoes(
+        solicitacoes_das_instituicoes(colunas, [instance.uuid])
+    )
+
+
+for modelo in INSTITUICOES_SOLICITACOES_CONSOLIDADAS:
+    post_save.connect(
+        instituicao_alterada,
+        sender=modelo,
+        dispatch_uid=f"solicitacoes_consolidadas_instituicao_{modelo.__name__}",
+    )
+
+
+@receiver(post_save, sender=Aluno)
+def aluno_salvo(sender, instance, update_fields=None, **kwargs):
+    campos = {"nome", "codigo_eol", "nao_matriculado", "serie"}
+    if not projecao_ativa() or not _campos_alterados(update_fields, campos):
+        return
+    agenda_atualizacao_solicitacoes(
+        SolicitacaoDietaEspecial.objects.filter(aluno=instance).values_list(
+            "uuid", flat=True
+        )
+    )
+
+
+@receiver(post_save, sender=HistoricoEscola)
+@receiver(post_delete, sender=HistoricoEscola)
+def historico_escola_alterado(sender, instance, **kwargs):
+    if not projecao_ativa():
+        return
+    agenda_atualizacao_solicitacoes(
+        solicitacoes_das_instituicoes(("escola_uuid",), [instance.escola.uuid])
+    )
@@ -21,6 +21,11 @@ from src.paineis_consolidados.models import (
     MoldeConsolidado,
     SolicitacoesCODAE,
 )
+from src.paineis_consolidados.services.solicitacoes_materializadas import (
+    atualiza_solicitacoes,
+    projecao_ativa,
+    solicitacoes_divergentes,
+)
 
 from ..perfil.models import Usuario
 from ..relatorios.utils import html_to_pdf_file
@@ -558,3 +563,22 @@ def gera_pdf_relatorio_solicitacoes_alimentacao_async(
         atualiza_central_download_com_erro(obj_central_download, str(e))
 
     logger.info(f"x-x-x-x Finaliza a geração do arquivo {nome_arquivo} x-x-x-x")
+
+
+@shared_task(
+    retry_backoff=2,
+    retry_kwargs={"max_retries": 8},
+)
+def reconcilia_solicitacoes_consolidadas():
+    """
+    Rede de segurança da tabela materializada: corrige as solicitações que
+    ficaram diferentes da view por escritas que não disparam signals.
+    """
+    if not projecao_ativa():
+        return
+    uuids = solicitacoes_divergentes()
+    if uuids:
+        logger.warning(
+            f"{len(uuids)} solicitações desatualizadas na tabela materializada"
+        )
+        atualiza_solicitacoes(uuids)
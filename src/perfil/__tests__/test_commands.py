@@ -1,8 +1,10 @@
 import datetime
 
 import pytest
+from django.core.cache import cache
 from django.core.management import call_command
 
+from src.perfil.identidade import chave_cache
 from src.perfil.models import Usuario
 from src.perfil.models.perfil import Perfil, Vinculo
 
@@ -96,6 +98,17 @@ def test_migra_vinculos_empresa_usuario_terceirizada(setup_vinculos_e_perfis):
     ).exists()
 
 
+@pytest.mark.django_db
+def test_migra_vinculos_invalida_identidade_em_cache(settings, setup_vinculos_e_perfis):
+    settings.IDENTIDADE_USUARIO_CACHE_TIMEOUT = 60
+    vinculo = Vinculo.objects.get(perfil__nome="DIRETOR")
+    cache.set(chave_cache(vinculo.usuario_id), "identidade antiga")
+
+    call_command("atualiza_vinculos_de_perfis_removidos")
+
+    assert cache.get(chave_cache(vinculo.usuario_id)) is None
+
+
 @pytest.mark.django_db
 def test_normaliza_vinculos(setup_normaliza_vinculos):
     hoje = datetime.date.today()
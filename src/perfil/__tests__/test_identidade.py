@@ -0,0 +1,51 @@
+import pytest
+from django.core.cache import cache
+
+from ..identidade import chave_cache, get_identidade, identidades_do_request
+
+pytestmark = pytest.mark.django_db
+
+
+def test_vinculo_atual_sem_request_ativo(usuario, vinculo):
+    assert get_identidade(usuario) is None
+    assert usuario.vinculo_atual == vinculo
+
+
+def test_vinculo_atual_resolvido_uma_vez_por_request(
+    usuario, vinculo, django_assert_num_queries
+):
+    with identidades_do_request():
+        with django_assert_num_queries(1):
+            assert usuario.vinculo_atual == vinculo
+            assert usuario.vinculo_atual.perfil == vinculo.perfil
+
+
+def test_identidade_compartilhada_entre_instancias(usuario, vinculo):
+    with identidades_do_request():
+        outra_instancia = type(usuario).objects.get(pk=usuario.pk)
+        assert get_identidade(usuario) is get_identidade(outra_instancia)
+
+
+def test_tipo_usuario_igual_com_e_sem_identidade(usuario, vinculo_diretoria_regional):
+    tipo_usuario = usuario.tipo_usuario
+    with identidades_do_request():
+        assert usuario.tipo_usuario == tipo_usuario == "diretoriaregional"
+
+
+def test_vinculo_salvo_invalida_identidade(usuario, vinculo):
+    with identidades_do_request():
+        assert usuario.vinculo_atual == vinculo
+        vinculo.finalizar_vinculo()
+        assert usuario.vinculo_atual is None
+
+
+def test_identidade_em_cache(settings, usuario, vinculo, django_assert_num_queries):
+    settings.IDENTIDADE_USUARIO_CACHE_TIMEOUT = 60
+    cache.delete(chave_cache(usuario.id))
+    with identidades_do_request():
+        assert usuario.vinculo_atual == vinculo
+    with identidades_do_request():
+        with django_assert_num_queries(0):
+            assert usuario.vinculo_atual == vinculo
+    vinculo.finalizar_vinculo()
+    assert cache.get(chave_cache(usuario.id)) is None
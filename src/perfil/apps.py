@@ -1,6 +1,11 @@
+import importlib
+
 from django.apps import AppConfig
 
 
 class PerfilConfig(AppConfig):
     name = "src.perfil"
     verbose_name = "Custom User Management"
+
+    def ready(self):
+        importlib.import_module("src.perfil.signals")
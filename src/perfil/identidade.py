@@ -0,0 +1,149 @@
+"""
+Identidade do usuário autenticado.
+
+`Usuario.vinculo_atual` e `Usuario.tipo_usuario` são consultados várias vezes
+por request (cada classe de permissão os acessa mais de uma vez e as views
+combinam várias classes). Enquanto um request está em andamento, o vínculo
+atual de cada usuário é resolvido uma única vez e guardado numa `Identidade`,
+junto com perfil, content type, instituição, editais e tipo de usuário.
+
+Opcionalmente (`IDENTIDADE_USUARIO_CACHE_TIMEOUT` > 0) a identidade também é
+guardada no cache padrão (Redis), por usuário, e invalidada a cada alteração
+de `Vinculo`.
+"""
+
+from contextlib import contextmanager
+from contextvars import ContextVar
+from functools import cached_property
+from typing import Optional
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
+
+_identidades_ativas: ContextVar[Optional[dict]] = ContextVar(
+    "identidades_usuarios", default=None
+)
+_usuario_do_request: ContextVar = ContextVar("usuario_do_request", default=None)
+
+FILTRO_VINCULO_ATUAL = Q(data_inicial=None, data_final=None, ativo=False) | Q(
+    data_inicial__isnull=False, data_final=None, ativo=True
+)
+
+
+def chave_cache(usuario_id) -> str:
+    return f"identidade_usuario:{usuario_id}"
+
+
+def busca_vinculo_atual(usuario):
+    """Vínculo ativo ou aguardando ativação do usuário, em uma única consulta."""
+    from .models import Vinculo
+
+    try:
+        return usuario.vinculos.select_related("perfil", "content_type").get(
+            FILTRO_VINCULO_ATUAL
+        )
+    except Vinculo.DoesNotExist:
+        return None
+
+
+class Identidade:
+    def __init__(self, vinculo):
+        self.vinculo = vinculo
+
+    @property
+    def perfil(self):
+        return self.vinculo.perfil if self.vinculo else None
+
+    @property
+    def content_type(self):
+        return self.vinculo.content_type if self.vinculo else None
+
+    @property
+    def instituicao(self):
+        # o GenericForeignKey guarda a instituição no próprio vínculo
+        return self.vinculo.instituicao if self.vinculo else None
+
+    @cached_property
+    def editais(self) -> list:
+        return list(getattr(self.instituicao, "editais", None) or [])
+
+    @cached_property
+    def tipo_usuario(self) -> str:
+        from .models.usuario import tipo_usuario_do_vinculo
+
+        return tipo_usuario_do_vinculo(self.vinculo)
+
+
+def _timeout_cache() -> int:
+    return getattr(settings, "IDENTIDADE_USUARIO_CACHE_TIMEOUT", 0)
+
+
+def _carrega_identidade(usuario) -> Identidade:
+    if _timeout_cache():
+        em_cache = cache.get(chave_cache(usuario.id))
+        if em_cache is not None:
+            return Identidade(em_cache["vinculo"])
+    vinculo = busca_vinculo_atual(usuario)
+    if _timeout_cache():
+        if vinculo:
+            vinculo.instituicao  # carrega a instituição antes de serializar
+        cache.set(chave_cache(usuario.id), {"vinculo": vinculo}, _timeout_cache())
+    return Identidade(vinculo)
+
+
+def get_identidade(usuario) -> Optional[Identidade]:
+    """
+    Identidade do usuário no request corrente, ou None quando não há request
+    ativo (tasks, comandos, shell), caso em que o chamador consulta o banco.
+    """
+    identidades = _identidades_ativas.get()
+    if identidades is None or usuario.pk is None:
+        return None
+    if usuario.pk not in identidades:
+        identidades[usuario.pk] = _carrega_identidade(usuario)
+    return identidades[usuario.pk]
+
+
+def invalida_identidade(usuario_id):
+    identidades = _identidades_ativas.get()
+    if identidades is not None:
+        identidades.pop(usuario_id, None)
+    if _timeout_cache():
+        cache.delete(chave_cache(usuario_id))
+        # um request concorrente pode ter gravado o vínculo antigo antes do commit
+        transaction.on_commit(lambda: cache.delete(chave_cache(usuario_id)))
+
+
+@contextmanager
+def identidades_do_request():
+    """
+    Ativa o registro de identidades no contexto corrente. Chamadas aninhadas
+    reaproveitam o registro já ativo.
+    """
+    if _identidades_ativas.get() is not None:
+        yield _identidades_ativas.get()
+        return
+    token = _identidades_ativas.set({})
+    try:
+        yield _identidades_ativas.get()
+    finally:
+        _identidades_ativas.reset(token)
+
+
+@contextmanager
+def usuario_do_request(usuario):
+    """
+    Expõe o usuário do request em andamento ao código que não recebe o
+    request (ex.: `convert_base64_to_contentfile` com token de upload).
+    """
+    token = _usuario_do_request.set(usuario)
+    try:
+        yield usuario
+    finally:
+        _usuario_do_request.reset(token)
+
+
+def get_usuario_do_request():
+    return _usuario_do_request.get()
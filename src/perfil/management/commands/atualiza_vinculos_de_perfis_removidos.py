@@ -7,6 +7,7 @@ from src.dados_comuns.constants import (
     ADMINISTRADOR_UE,
     USUARIO_EMPRESA,
 )
+from src.perfil.identidade import invalida_identidade
 from src.perfil.models import Perfil, Vinculo
 
 logger = logging.getLogger("sigpae.atualiza_vinculos_de_perfis_removidos")
@@ -22,8 +23,8 @@ class Command(BaseCommand):
 
     def migra_vinculos_escola(self):
         adm_ue, created = Perfil.objects.get_or_create(nome=ADMINISTRADOR_UE)
-        Vinculo.objects.filter(
-            perfil__nome__in=[
+        self.migra_vinculos(
+            [
                 "DIRETOR",
                 "DIRETOR_CEI",
                 "DIRETOR_ABASTECIMENTO",
@@ -33,21 +34,29 @@ class Command(BaseCommand):
                 "ADMINISTRADOR_UE_DIRETA",
                 "ADMINISTRADOR_UE_PARCEIRA",
                 "ADMINISTRADOR_ESCOLA_ABASTECIMENTO",
-            ]
-        ).update(perfil=adm_ue)
+            ],
+            adm_ue,
+        )
 
     def migra_vinculos_empresa(self):
         adm_empresa, created = Perfil.objects.get_or_create(nome=ADMINISTRADOR_EMPRESA)
-        Vinculo.objects.filter(
-            perfil__nome__in=[
+        self.migra_vinculos(
+            [
                 "NUTRI_ADMIN_RESPONSAVEL",
                 "ADMINISTRADOR_DISTRIBUIDORA",
                 "ADMINISTRADOR_FORNECEDOR",
-            ]
-        ).update(perfil=adm_empresa)
+            ],
+            adm_empresa,
+        )
 
     def migra_vinculos_empresa_usuario_terceirizada(self):
         usuario_empresa, created = Perfil.objects.get_or_create(nome=USUARIO_EMPRESA)
-        Vinculo.objects.filter(perfil__nome__in=["ADMINISTRADOR_TERCEIRIZADA"]).update(
-            perfil=usuario_empresa
-        )
+        self.migra_vinculos(["ADMINISTRADOR_TERCEIRIZADA"], usuario_empresa)
+
+    def migra_vinculos(self, perfis_extintos, novo_perfil):
+        vinculos = Vinculo.objects.filter(perfil__nome__in=perfis_extintos)
+        usuarios_ids = set(vinculos.values_list("usuario_id", flat=True))
+        vinculos.update(perfil=novo_perfil)
+        # o update não dispara o post_save que invalida a identidade em cache
+        for usuario_id in usuarios_ids:
+            invalida_identidade(usuario_id)
@@ -53,6 +53,7 @@ from ...dados_comuns.constants import (
 from ...dados_comuns.tasks import envia_email_unico_task
 from ...dados_comuns.utils import url_configs
 from ...eol_servico.utils import EOLServicoSGP
+from ..identidade import busca_vinculo_atual, get_identidade
 from ..models import Perfil, Vinculo
 from ..utils import get_cargo_eol
 
@@ -63,6 +64,64 @@ base_url = f'{env("REACT_APP_URL")}'
 senha_provisoria = f'{env("SENHA_PROVISORIA")}'
 
 
+def tipo_usuario_do_vinculo(vinculo):  # noqa C901
+    tipo_usuario = "indefinido"
+    if vinculo:
+        tipo_usuario = vinculo.content_type.model
+        if tipo_usuario == "codae":
+            if vinculo.perfil.nome in [
+                COORDENADOR_LOGISTICA,
+                COORDENADOR_CODAE_DILOG_LOGISTICA,
+                ADMINISTRADOR_CODAE_DILOG_JURIDICO,
+                ADMINISTRADOR_CODAE_DILOG_CONTABIL,
+                ADMINISTRADOR_REPRESENTANTE_CODAE,
+            ]:
+                tipo_usuario = "logistica_abastecimento"
+            elif vinculo.perfil.nome in [
+                COORDENADOR_GESTAO_ALIMENTACAO_TERCEIRIZADA,
+                ADMINISTRADOR_GESTAO_ALIMENTACAO_TERCEIRIZADA,
+            ]:
+                tipo_usuario = "gestao_alimentacao_terceirizada"
+            elif vinculo.perfil.nome in [
+                COORDENADOR_GESTAO_PRODUTO,
+                ADMINISTRADOR_GESTAO_PRODUTO,
+            ]:
+                tipo_usuario = "gestao_produto"
+            elif vinculo.perfil.nome in [
+                COORDENADOR_SUPERVISAO_NUTRICAO,
+                ADMINISTRADOR_SUPERVISAO_NUTRICAO,
+            ]:
+                tipo_usuario = "supervisao_nutricao"
+            elif vinculo.perfil.nome in [COORDENADOR_SUPERVISAO_NUTRICAO_MANIFESTACAO]:
+                tipo_usuario = "nutricao_manifestacao"
+            elif vinculo.perfil.nome in [ADMINISTRADOR_MEDICAO]:
+                tipo_usuario = "medicao"
+            elif vinculo.perfil.nome in [ADMINISTRADOR_CODAE_GABINETE]:
+                tipo_usuario = "codae_gabinete"
+            elif vinculo.perfil.nome in [
+                DILOG_CRONOGRAMA,
+                DILOG_QUALIDADE,
+                DILOG_DIRETORIA,
+                DILOG_ABASTECIMENTO,
+            ]:
+                tipo_usuario = "pre_recebimento"
+            elif vinculo.perfil.nome in [ORGAO_FISCALIZADOR]:
+                tipo_usuario = "orgao_fiscalizador"
+            elif vinculo.perfil.nome in [USUARIO_RELATORIOS]:
+                tipo_usuario = "usuario_relatorios"
+            elif vinculo.perfil.nome in [USUARIO_GTIC_CODAE]:
+                tipo_usuario = "usuario_gtic"
+            elif vinculo.perfil.nome in [ADMINISTRADOR_CONTRATOS]:
+                tipo_usuario = "administrador_contratos"
+            elif vinculo.perfil.nome == DINUTRE_DIRETORIA:
+                tipo_usuario = "dinutre"
+            elif vinculo.perfil.nome == DILOG_VISUALIZACAO:
+                tipo_usuario = "pre_recebimento_visualizacao"
+            else:
+                tipo_usuario = "dieta_especial"
+    return tipo_usuario
+
+
 # Thanks to https://github.com/jmfederico/django-use-email-as-username
 
 
@@ -234,19 +293,10 @@ class Usuario(
 
     @property
     def vinculo_atual(self):
-        if self.vinculos.filter(
-            Q(data_inicial=None, data_final=None, ativo=False)
-            | Q(  # noqa W504 esperando ativacao
-                data_inicial__isnull=False, data_final=None, ativo=True
-            )
-        ).exists():
-            return self.vinculos.get(
-                Q(data_inicial=None, data_final=None, ativo=False)
-                | Q(  # noqa W504 esperando ativacao
-                    data_inicial__isnull=False, data_final=None, ativo=True
-                )
-            )
-        return None
+        identidade = get_identidade(self)
+        if identidade is not None:
+            return identidade.vinculo
+        return busca_vinculo_atual(self)
 
     @property
     def existe_vinculo_ativo(self):
@@ -255,64 +305,11 @@ class Usuario(
         ).exists()
 
     @property
-    def tipo_usuario(self):  # noqa C901
-        tipo_usuario = "indefinido"
-        if self.vinculo_atual:
-            tipo_usuario = self.vinculo_atual.content_type.model
-            if tipo_usuario == "codae":
-                if self.vinculo_atual.perfil.nome in [
-                    COORDENADOR_LOGISTICA,
-                    COORDENADOR_CODAE_DILOG_LOGISTICA,
-                    ADMINISTRADOR_CODAE_DILOG_JURIDICO,
-                    ADMINISTRADOR_CODAE_DILOG_CONTABIL,
-                    ADMINISTRADOR_REPRESENTANTE_CODAE,
-                ]:
-                    tipo_usuario = "logistica_abastecimento"
-                elif self.vinculo_atual.perfil.nome in [
-                    COORDENADOR_GESTAO_ALIMENTACAO_TERCEIRIZADA,
-                    ADMINISTRADOR_GESTAO_ALIMENTACAO_TERCEIRIZADA,
-                ]:
-                    tipo_usuario = "gestao_alimentacao_terceirizada"
-                elif self.vinculo_atual.perfil.nome in [
-                    COORDENADOR_GESTAO_PRODUTO,
-                    ADMINISTRADOR_GESTAO_PRODUTO,
-                ]:
-                    tipo_usuario = "gestao_produto"
-                elif self.vinculo_atual.perfil.nome in [
-                    COORDENADOR_SUPERVISAO_NUTRICAO,
-                    ADMINISTRADOR_SUPERVISAO_NUTRICAO,
-                ]:
-                    tipo_usuario = "supervisao_nutricao"
-                elif self.vinculo_atual.perfil.nome in [
-                    COORDENADOR_SUPERVISAO_NUTRICAO_MANIFESTACAO
-                ]:
-                    tipo_usuario = "nutricao_manifestacao"
-                elif self.vinculo_atual.perfil.nome in [ADMINISTRADOR_MEDICAO]:
-                    tipo_usuario = "medicao"
-                elif self.vinculo_atual.perfil.nome in [ADMINISTRADOR_CODAE_GABINETE]:
-                    tipo_usuario = "codae_gabinete"
-                elif self.vinculo_atual.perfil.nome in [
-                    DILOG_CRONOGRAMA,
-                    DILOG_QUALIDADE,
-                    DILOG_DIRETORIA,
-                    DILOG_ABASTECIMENTO,
-                ]:
-                    tipo_usuario = "pre_recebimento"
-                elif self.vinculo_atual.perfil.nome in [ORGAO_FISCALIZADOR]:
-                    tipo_usuario = "orgao_fiscalizador"
-                elif self.vinculo_atual.perfil.nome in [USUARIO_RELATORIOS]:
-                    tipo_usuario = "usuario_relatorios"
-                elif self.vinculo_atual.perfil.nome in [USUARIO_GTIC_CODAE]:
-                    tipo_usuario = "usuario_gtic"
-                elif self.vinculo_atual.perfil.nome in [ADMINISTRADOR_CONTRATOS]:
-                    tipo_usuario = "administrador_contratos"
-                elif self.vinculo_atual.perfil.nome == DINUTRE_DIRETORIA:
-                    tipo_usuario = "dinutre"
-                elif self.vinculo_atual.perfil.nome == DILOG_VISUALIZACAO:
-                    tipo_usuario = "pre_recebimento_visualizacao"
-                else:
-                    tipo_usuario = "dieta_especial"
-        return tipo_usuario
+    def tipo_usuario(self):
+        identidade = get_identidade(self)
+        if identidade is not None:
+            return identidade.tipo_usuario
+        return tipo_usuario_do_vinculo(self.vinculo_atual)
 
     @property
     def eh_parceira(self):
@@ -0,0 +1,11 @@
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .identidade import invalida_identidade
+from .models import Vinculo
+
+
+@receiver(post_save, sender=Vinculo)
+@receiver(post_delete, sender=Vinculo)
+def invalida_identidade_do_vinculo(sender, instance, **kwargs):
+    invalida_identidade(instance.usuario_id)
@@ -23,6 +23,7 @@ from ..helpers import (
 )
 from ..validators import (
     ServiceValidacaoCorrecaoFichaTecnica,
+    valida_arquivo_pdf,
     valida_campos_dependentes_ficha_tecnica,
     valida_campos_flv_ficha_tecnica,
     valida_campos_nao_pereciveis_ficha_tecnica,
@@ -212,9 +213,7 @@ class FichaTecnicaRascunhoSerializer(serializers.ModelSerializer):
     informacoes_adicionais = serializers.CharField(required=False, allow_blank=True)
 
     def validate_arquivo(self, value):
-        if value and "pdf" not in value:
-            raise serializers.ValidationError("Arquivo deve ser um PDF.")
-        return value
+        return valida_arquivo_pdf(value, self.context["request"].user)
 
     def create(self, validated_data):
         """Cria a ficha técnica como rascunho (via helper) e registra o log
@@ -375,9 +374,7 @@ class FichaTecnicaCreateSerializer(serializers.ModelSerializer):
         return value
 
     def validate_arquivo(self, value):
-        if value and "pdf" not in value:
-            raise serializers.ValidationError("Arquivo deve ser um PDF.")
-        return value
+        return valida_arquivo_pdf(value, self.context["request"].user)
 
     def update(self, instance, validated_data):
         instance = atualiza_ficha_tecnica(instance, validated_data)
@@ -444,9 +441,7 @@ class FichaTecnicaFLVCreateSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_arquivo(self, value):
-        if value and "pdf" not in value:
-            raise serializers.ValidationError("Arquivo deve ser um PDF.")
-        return value
+        return valida_arquivo_pdf(value, self.context["request"].user)
 
     def create(self, validated_data):
         """Cria a ficha técnica FLV, registra o log de cadastro e inicia o
@@ -881,9 +876,7 @@ class FichaTecnicaAtualizacaoSerializer(serializers.ModelSerializer):
         return attrs
 
     def validate_arquivo(self, value):
-        if value and "pdf" not in value:
-            raise serializers.ValidationError("Arquivo deve ser um PDF.")
-        return value
+        return valida_arquivo_pdf(value, self.context["request"].user)
 
     def update(self, instance, validated_data):
         gerar_nova_analise_ficha_tecnica(instance, validated_data)
@@ -1,12 +1,29 @@
 from rest_framework import serializers
 
 from src.dados_comuns.fluxo_status import FichaTecnicaDoProdutoWorkflow
+from src.dados_comuns.models import ArquivoEmPartes, ArquivoEmPartesException
 from src.pre_recebimento.ficha_tecnica.models import (
     AnaliseFichaTecnica,
     FichaTecnicaDoProduto,
 )
 
 
+def valida_arquivo_pdf(arquivo, usuario):
+    """Aceita o base64 de um PDF ou o token de um PDF enviado em partes."""
+    if not arquivo:
+        return arquivo
+    if ArquivoEmPartes.eh_token(arquivo):
+        try:
+            eh_pdf = ArquivoEmPartes.do_token(arquivo, usuario).extensao == ".pdf"
+        except ArquivoEmPartesException as e:
+            raise serializers.ValidationError(str(e))
+    else:
+        eh_pdf = "pdf" in arquivo
+    if not eh_pdf:
+        raise serializers.ValidationError("Arquivo deve ser um PDF.")
+    return arquivo
+
+
 def valida_campos_flv_ficha_tecnica(attrs):
     attrs_obrigatorios_flv = {"organico", "especie_variedade"}
 
@@ -1,8 +1,17 @@
+import uuid
+from io import BytesIO
+from unittest.mock import patch
+
 import pandas as pd
 import pytest
+from django.core.files.uploadedfile import SimpleUploadedFile
+from model_bakery import baker
+from openpyxl import Workbook
 from openpyxl.cell import Cell
 
 from src.dados_comuns.constants import StatusProcessamentoArquivo
+from src.dados_comuns.fluxo_status import DietaEspecialWorkflow
+from src.dados_comuns.models import LogSolicitacoesUsuario
 from src.dieta_especial.carga_dados.models import ArquivoCargaDietaEspecial
 from src.dieta_especial.protocolo_padrao.models import SubstituicaoAlimento
 from src.dieta_especial.solicitacao_dieta_especial.models import (
@@ -10,6 +19,7 @@ from src.dieta_especial.solicitacao_dieta_especial.models import (
     SolicitacaoDietaEspecial,
 )
 from src.escola.models import Escola
+from src.perfil.models import Usuario
 from src.processamento_arquivos.dieta_especial import (
     importa_dietas_especiais as imp_dietas,
 )
@@ -452,3 +462,80 @@ def test_processamento_erro_colunas(usuario, arquivo_colunas_incorreta):
         processador.erros[0]
         == "Erro: O número de colunas diferente das estrutura definida."
     )
+
+
+def _arquivo_com_linhas(arquivo, cabecalhos, linhas):
+    wb = Workbook()
+    ws = wb.active
+    ws.append(cabecalhos)
+    for linha in linhas:
+        ws.append(linha)
+    buffer = BytesIO()
+    wb.save(buffer)
+    buffer.seek(0)
+    arquivo.conteudo = SimpleUploadedFile(
+        name=f"{uuid.uuid4()}.xlsx",
+        content=buffer.read(),
+        content_type="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+    )
+    arquivo.save()
+    return arquivo
+
+
+def test_processamento_grava_solicitacoes_em_lote(
+    usuario,
+    arquivo_carga_dieta_especial,
+    mock_cabecalho_e_informacoes_excel,
+    perfil,
+    substituicao_alimento,
+    django_assert_max_num_queries,
+):
+    cabecalhos, informacoes = mock_cabecalho_e_informacoes_excel
+    outro_aluno = baker.make("escola.Aluno", codigo_eol="7654321", nome="OUTRO ALUNO")
+    linhas = [
+        informacoes,
+        informacoes[:5] + ["7654321", outro_aluno.nome] + informacoes[7:],
+        informacoes[:5] + ["0000000", "INEXISTENTE"] + informacoes[7:],
+    ]
+    arquivo = _arquivo_com_linhas(arquivo_carga_dieta_especial, cabecalhos, linhas)
+
+    processador = ProcessadorPlanilha(usuario, arquivo)
+    with django_assert_max_num_queries(41):
+        with patch(
+            f"{ProcessadorPlanilha.__module__}.agenda_atualizacao_solicitacoes"
+        ) as agenda_atualizacao:
+            processador.processamento()
+
+    assert processador.erros == [
+        "Linha 4 - Erro: Aluno com código eol 0000000 não encontrado."
+    ]
+    solicitacoes = SolicitacaoDietaEspecial.objects.filter(eh_importado=True)
+    assert solicitacoes.count() == 2
+    for solicitacao in solicitacoes:
+        assert solicitacao.status == DietaEspecialWorkflow.CODAE_AUTORIZADO
+        assert solicitacao.rastro_escola == solicitacao.escola_destino
+        assert solicitacao.rastro_terceirizada is not None
+        assert solicitacao.alergias_intolerancias.count() == 4
+        assert {log.status_evento for log in solicitacao.logs} == {
+            LogSolicitacoesUsuario.INICIO_FLUXO,
+            LogSolicitacoesUsuario.CODAE_AUTORIZOU,
+        }
+    assert SubstituicaoAlimento.objects.count() == 2
+    assert Usuario.objects.filter(email__startswith="fake").count() == 1
+    (uuids,) = agenda_atualizacao.call_args.args
+    assert set(uuids) == {solicitacao.uuid for solicitacao in solicitacoes}
+
+
+def test_processamento_regrava_linha_a_linha_quando_lote_falha(
+    usuario, arquivo_carga_dieta_especial_com_informacoes, perfil
+):
+    processador = ProcessadorPlanilha(
+        usuario, arquivo_carga_dieta_especial_com_informacoes
+    )
+    with patch.object(
+        ProcessadorPlanilha, "grava_lote", side_effect=Exception("falha no lote")
+    ):
+        processador.processamento()
+
+    assert processador.erros == []
+    assert SolicitacaoDietaEspecial.objects.filter(eh_importado=True).count() == 1
@@ -1,25 +1,26 @@
 import logging
+from typing import List
 
-from django.db import transaction
 from django.db.models import Q
-from openpyxl import load_workbook
 
 from src.dieta_especial.carga_dados.models import (
     ArquivoCargaAlimentosSubstitutos,
 )
 from src.dieta_especial.protocolo_padrao.models import Alimento
 
+from ..importacao_em_lote import LinhaPlanilha, ProcessadorPlanilhaEmLote
 from .schemas import ArquivoCargaAlimentosSchema
 
 logger = logging.getLogger("sigpae.importa_dietas_especiais")
 
 
-# TODO: Melhorar essas duplicações de códigos nos processmantos das planilhas
-class ProcessadorPlanilha:
+class ProcessadorPlanilha(ProcessadorPlanilhaEmLote):
+    schema = ArquivoCargaAlimentosSchema
+
     def __init__(self, arquivo: ArquivoCargaAlimentosSubstitutos) -> None:
         """Prepara atributos importantes para o processamento da planilha."""
+        super().__init__()
         self.arquivo = arquivo
-        self.erros = []
         self.nomes_processados = set()
 
     @property
@@ -31,21 +32,24 @@ class ProcessadorPlanilha:
         if not self.validacao_inicial():
             return
 
-        workbook = load_workbook(self.path)
-        logger.info(f"Quantidade de worksheets: {len(workbook.worksheets)}")
-        if len(workbook.worksheets) != 2:
-            self.arquivo.log = "Erro: Número de abas na planilha é diferente de 2"
-            self.arquivo.erro_no_processamento()
-            return
-
-        worksheet_alimentos = workbook.worksheets[0]
-        worksheet_substitutos = workbook.worksheets[1]
-        self.processa_alimentos(
-            worksheet=worksheet_alimentos, tipo_listagem=Alimento.SO_ALIMENTOS
-        )
-        self.processa_alimentos(
-            worksheet=worksheet_substitutos, tipo_listagem=Alimento.SO_SUBSTITUTOS
-        )
+        workbook = self.abre_workbook(self.path)
+        try:
+            logger.info(f"Quantidade de worksheets: {len(workbook.worksheets)}")
+            if len(workbook.worksheets) != 2:
+                self.arquivo.log = "Erro: Número de abas na planilha é diferente de 2"
+                self.arquivo.erro_no_processamento()
+                return
+
+            worksheet_alimentos = workbook.worksheets[0]
+            worksheet_substitutos = workbook.worksheets[1]
+            self.processa_alimentos(
+                worksheet=worksheet_alimentos, tipo_listagem=Alimento.SO_ALIMENTOS
+            )
+            self.processa_alimentos(
+                worksheet=worksheet_substitutos, tipo_listagem=Alimento.SO_SUBSTITUTOS
+            )
+        finally:
+            workbook.close()
         if not self.erros:
             self.inativa_alimentos_ausentes()
 
@@ -66,47 +70,88 @@ class ProcessadorPlanilha:
             return False
         return True
 
-    def monta_dicionario_de_dados(self, linha: tuple) -> dict:
-        return {
-            key: linha[index].value
-            for index, key in enumerate(
-                ArquivoCargaAlimentosSchema.schema()["properties"].keys()
+    def processa_alimentos(self, worksheet, tipo_listagem=Alimento.SO_ALIMENTOS):
+        self.tipo_listagem = tipo_listagem
+        self.nomes_da_aba = set()
+        self.processa_worksheet(worksheet)
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        self.nomes_da_aba.add(linha.dados.nome)
+
+    def resolve_chaves(self) -> None:
+        nomes = self.nomes_da_aba | {nome.upper() for nome in self.nomes_da_aba}
+        # mesmo critério do filter(...).first(): o alimento de menor id vence
+        self.alimentos_por_nome = {}
+        for alimento in Alimento.objects.filter(nome__in=nomes).order_by("-id"):
+            self.alimentos_por_nome[alimento.nome] = alimento
+
+    def prepara_linha(self, linha: LinhaPlanilha):
+        nome = linha.dados.nome
+        candidatos = [
+            alimento
+            for alimento in (
+                self.alimentos_por_nome.get(nome),
+                self.alimentos_por_nome.get(nome.upper()),
             )
-        }
-
-    @transaction.atomic  # noqa C901
-    def processa_alimentos(
-        self, worksheet, tipo_listagem=Alimento.SO_ALIMENTOS
-    ):  # noqa C901
-        linhas = list(worksheet.rows)
-        for ind, linha in enumerate(
-            linhas[1:], 2
-        ):  # Começando em 2 pois a primeira linha é o cabeçalho da planilha
-            try:
-                dicionario_dados = self.monta_dicionario_de_dados(linha)
-
-                # Faz validações dos campos usando o schema para o alimento
-                alimentos_schema = ArquivoCargaAlimentosSchema(**dicionario_dados)
-                alimento: Alimento = Alimento.objects.filter(
-                    Q(nome=alimentos_schema.nome)
-                    | Q(nome=alimentos_schema.nome.upper())
-                ).first()
-                if not alimento:
-                    alimento = Alimento.objects.create(
-                        nome=alimentos_schema.nome.upper(),
-                        ativo=True,
-                        tipo_listagem_protocolo=tipo_listagem,
-                    )
-                else:
-                    alimento.nome = alimentos_schema.nome.upper()
+            if alimento
+        ]
+        linha.contexto["alimento"] = min(
+            candidatos, key=lambda alimento: alimento.id, default=None
+        )
 
-                    if alimento.tipo_listagem_protocolo != tipo_listagem:
+    def grava_lote(self, linhas: List[LinhaPlanilha]) -> None:
+        novos = {}
+        alterados = {}
+        for linha in linhas:
+            nome = linha.dados.nome.upper()
+            alimento = linha.contexto["alimento"]
+            if alimento is None:
+                novos.setdefault(
+                    nome,
+                    Alimento(
+                        nome=nome,
+                        ativo=True,
+                        tipo_listagem_protocolo=self.tipo_listagem,
+                    ),
+                )
+            else:
+                if alimento.nome != nome or (
+                    alimento.tipo_listagem_protocolo
+                    not in (self.tipo_listagem, Alimento.AMBOS)
+                ):
+                    alimento.nome = nome
+                    if alimento.tipo_listagem_protocolo != self.tipo_listagem:
                         alimento.tipo_listagem_protocolo = Alimento.AMBOS
-                    alimento.save()
+                    alterados[alimento.id] = alimento
+
+        criados = Alimento.objects.bulk_create(novos.values())
+        Alimento.objects.bulk_update(
+            alterados.values(), ["nome", "tipo_listagem_protocolo"]
+        )
+        # linhas seguintes com o mesmo nome passam a encontrar o alimento criado
+        for alimento in criados:
+            self.alimentos_por_nome[alimento.nome] = alimento
+        self.nomes_processados.update(linha.dados.nome.upper() for linha in linhas)
+
+    def grava_linha(self, linha: LinhaPlanilha) -> None:
+        alimentos_schema = linha.dados
+        alimento: Alimento = Alimento.objects.filter(
+            Q(nome=alimentos_schema.nome) | Q(nome=alimentos_schema.nome.upper())
+        ).first()
+        if not alimento:
+            alimento = Alimento.objects.create(
+                nome=alimentos_schema.nome.upper(),
+                ativo=True,
+                tipo_listagem_protocolo=self.tipo_listagem,
+            )
+        else:
+            alimento.nome = alimentos_schema.nome.upper()
+
+            if alimento.tipo_listagem_protocolo != self.tipo_listagem:
+                alimento.tipo_listagem_protocolo = Alimento.AMBOS
+            alimento.save()
 
-                self.nomes_processados.add(alimentos_schema.nome.upper())
-            except Exception as exc:
-                self.erros.append(f"Linha {ind} - {exc}")
+        self.nomes_processados.add(alimentos_schema.nome.upper())
 
     def inativa_alimentos_ausentes(self) -> None:
         """Inativa os alimentos que não foram encontrados em nenhuma das abas da planilha."""
@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from datetime import date
 from tempfile import NamedTemporaryFile
 from typing import List
@@ -6,9 +7,11 @@ from typing import List
 from django.core.files import File
 from django.db import transaction
 from django.db.models import Q
-from openpyxl import Workbook, load_workbook, styles
+from openpyxl import Workbook, styles
 
 from src.dados_comuns.constants import DJANGO_ADMIN_PASSWORD
+from src.dados_comuns.fluxo_status import DietaEspecialWorkflow
+from src.dados_comuns.models import LogSolicitacoesUsuario
 from src.dieta_especial.carga_dados.models import (
     ArquivoCargaDietaEspecial,
 )
@@ -23,85 +26,407 @@ from src.dieta_especial.solicitacao_dieta_especial.models import (
     SolicitacaoDietaEspecial,
 )
 from src.escola.models import Aluno, Escola
+from src.paineis_consolidados.services.solicitacoes_materializadas import (
+    agenda_atualizacao_solicitacoes,
+)
 from src.perfil.models.perfil import Perfil, Vinculo
 from src.perfil.models.usuario import Usuario
-from src.terceirizada.models import Edital
+from src.terceirizada.models import Contrato, Edital
 
+from ..importacao_em_lote import LinhaPlanilha, ProcessadorPlanilhaEmLote
 from .schemas import ArquivoCargaDietaEspecialSchema
 
 logger = logging.getLogger("sigpae.importa_dietas_especiais")
 
 
-class ProcessadorPlanilha:
+class ProcessadorPlanilha(ProcessadorPlanilhaEmLote):
+    """
+    Importa dietas especiais já autorizadas antes do SIGPAE.
+
+    As linhas são validadas e os alunos, escolas, protocolos, classificações e
+    diagnósticos de toda a planilha são consultados de uma vez; as solicitações,
+    M2Ms e logs são gravados em lote (ver `ProcessadorPlanilhaEmLote`). Se um lote
+    falha, cada linha dele é reprocessada pelo caminho individual
+    (`processa_linha`), que consulta e grava uma solicitação por vez.
+    """
+
+    schema = ArquivoCargaDietaEspecialSchema
+    tamanho_lote = 200
+
+    OBSERVACOES = (
+        """Essa Dieta Especial foi autorizada anteriormente a implantação do SIGPAE."""
+    )
+
     def __init__(self, usuario: Usuario, arquivo: ArquivoCargaDietaEspecial) -> None:
         """Prepara atributos importantes para o processamento da planilha."""
+        super().__init__()
         self.usuario = usuario
         self.arquivo = arquivo
-        self.erros = []
-        if self.arquivo.conteudo:
-            self.worksheet = self.abre_worksheet()
+        self.chaves = defaultdict(set)
 
     @property
     def path(self):
         return self.arquivo.conteudo.path
 
-    def processamento(self):  # noqa C901
+    def processamento(self):
         self.arquivo.inicia_processamento()
         if not self.validacao_inicial():
             return
 
-        linhas = list(self.worksheet.rows)
-        logger.info(
-            f"Quantidade de linhas: {len(linhas)} - Quantidade colunas {len(linhas[0])}"
+        workbook = self.abre_workbook(self.path)
+        try:
+            worksheet = workbook.active
+            quantidade_colunas = len(self.cabecalho(worksheet))
+            if quantidade_colunas != 12:
+                self.erros.append(
+                    "Erro: O número de colunas diferente das estrutura definida."
+                )
+                return
+
+            linhas = self.le_linhas(worksheet)
+            logger.info(
+                f"Quantidade de linhas válidas: {len(linhas)} - Quantidade colunas {quantidade_colunas}"
+            )
+            self.processa_linhas(linhas)
+        finally:
+            workbook.close()
+
+    def processa_linha(self, solicitacao_dieta_schema) -> None:
+        """Caminho individual: consulta e grava a solicitação de uma linha."""
+        aluno = self.consulta_aluno(solicitacao_dieta_schema)
+
+        escola = self.consulta_escola(solicitacao_dieta_schema)
+
+        protocolo_padrao = self.consulta_protocolo_padrao(
+            solicitacao_dieta_schema, escola
+        )
+
+        classificacao_dieta = self.consulta_classificacao(solicitacao_dieta_schema)
+
+        diagnosticos = self.monta_diagnosticos(
+            solicitacao_dieta_schema.codigo_diagnostico
+        )
+
+        self.checa_existencia_solicitacao(solicitacao_dieta_schema, aluno)
+
+        self.cria_solicitacao(
+            solicitacao_dieta_schema,
+            aluno,
+            classificacao_dieta,
+            diagnosticos,
+            escola,
+            protocolo_padrao,
+        )
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        dados = linha.dados
+        self.chaves["alunos"].add(dados.codigo_eol_aluno)
+        self.chaves["escolas"].add(dados.codigo_escola)
+        self.chaves["protocolos"].add(dados.protocolo_dieta)
+        self.chaves["classificacoes"].add(f"Tipo {dados.codigo_categoria_dieta}")
+        self.chaves["diagnosticos"].update(dados.codigo_diagnostico.split(";"))
+
+    @staticmethod
+    def _menor_id_por(queryset, campo) -> dict:
+        """Mesmo critério do filter(...).first(): o registro de menor id vence."""
+        registros = {}
+        for registro in queryset.order_by("-id"):
+            registros[getattr(registro, campo)] = registro
+        return registros
+
+    def resolve_chaves(self) -> None:
+        self.alunos = self._menor_id_por(
+            Aluno.objects.filter(codigo_eol__in=self.chaves["alunos"]), "codigo_eol"
+        )
+        self.escolas = self._menor_id_por(
+            Escola.objects.filter(
+                codigo_codae__in=self.chaves["escolas"]
+            ).select_related("diretoria_regional", "tipo_gestao", "lote__terceirizada"),
+            "codigo_codae",
+        )
+        self.classificacoes = self._menor_id_por(
+            ClassificacaoDieta.objects.filter(nome__in=self.chaves["classificacoes"]),
+            "nome",
         )
-        if self.worksheet.max_column != 12:
-            self.erros.append(
-                "Erro: O número de colunas diferente das estrutura definida."
+        self.resolve_protocolos()
+        self.diagnosticos = self.resolve_diagnosticos()
+
+        self.solicitacoes_importadas = defaultdict(list)
+        for solicitacao in (
+            SolicitacaoDietaEspecial.objects.filter(
+                aluno__in=self.alunos.values(), ativo=True, eh_importado=True
             )
-            return
+            .select_related("aluno", "escola_destino", "classificacao")
+            .prefetch_related("alergias_intolerancias")
+        ):
+            self.solicitacoes_importadas[solicitacao.aluno_id].append(solicitacao)
+        self.assinaturas_na_planilha = defaultdict(list)
 
-        for ind, linha in enumerate(
-            linhas[1:], 2
-        ):  # Começando em 2 pois a primeira linha é o cabeçalho da planilha
-            try:
-                dicionario_dados = self.monta_dicionario_de_dados(linha)
+        self.usuarios_escolas = {}
+        emails = {
+            f"fake{escola.id}@admin.com": escola for escola in self.escolas.values()
+        }
+        for email, usuario in self._menor_id_por(
+            Usuario.objects.filter(email__in=emails), "email"
+        ).items():
+            self.usuarios_escolas[emails[email].id] = usuario
+        self.perfil_diretor = Perfil.objects.filter(nome="DIRETOR_UE").first()
+
+    def resolve_protocolos(self) -> None:
+        """Protocolos dos editais (contratos não encerrados) dos lotes das escolas."""
+        self.editais_por_lote = defaultdict(set)
+        for lote_id, edital_id in Contrato.lotes.through.objects.filter(
+            lote_id__in={escola.lote_id for escola in self.escolas.values()},
+            contrato__edital__isnull=False,
+            contrato__encerrado=False,
+        ).values_list("lote_id", "contrato__edital_id"):
+            self.editais_por_lote[lote_id].add(edital_id)
+
+        self.protocolos = defaultdict(list)
+        for relacao in ProtocoloPadraoDietaEspecial.editais.through.objects.filter(
+            edital_id__in=set().union(*self.editais_por_lote.values()),
+            protocolopadraodietaespecial__nome_protocolo__in=self.chaves["protocolos"],
+        ).select_related("protocolopadraodietaespecial"):
+            protocolo = relacao.protocolopadraodietaespecial
+            self.protocolos[(relacao.edital_id, protocolo.nome_protocolo)].append(
+                protocolo
+            )
 
-                # Faz validações dos campos usando o schema para a dieta
-                solicitacao_dieta_schema = ArquivoCargaDietaEspecialSchema(
-                    **dicionario_dados
+        self.substituicoes_por_protocolo = defaultdict(list)
+        for substituicao in SubstituicaoAlimentoProtocoloPadrao.objects.filter(
+            protocolo_padrao__in={
+                protocolo.id
+                for protocolos in self.protocolos.values()
+                for protocolo in protocolos
+            }
+        ).prefetch_related("substitutos", "alimentos_substitutos"):
+            self.substituicoes_por_protocolo[substituicao.protocolo_padrao_id].append(
+                substituicao
+            )
+
+    def resolve_diagnosticos(self) -> dict:
+        """Versão em lote de `monta_diagnosticos` para todos os nomes da planilha."""
+        nomes = self.chaves["diagnosticos"]
+        existentes = self._menor_id_por(
+            AlergiaIntolerancia.objects.filter(
+                descricao__in=nomes | {nome.upper() for nome in nomes}
+            ),
+            "descricao",
+        )
+        diagnosticos, novos, alterados = {}, {}, {}
+        for nome in nomes:
+            diagnostico = min(
+                filter(None, (existentes.get(nome), existentes.get(nome.upper()))),
+                key=lambda diagnostico: diagnostico.id,
+                default=None,
+            )
+            if diagnostico is None:
+                diagnostico = novos.setdefault(
+                    nome.upper(), AlergiaIntolerancia(descricao=nome.upper())
                 )
+            elif diagnostico.descricao != diagnostico.descricao.upper():
+                diagnostico.descricao = diagnostico.descricao.upper()
+                alterados[diagnostico.id] = diagnostico
+            diagnosticos[nome] = diagnostico
+
+        with transaction.atomic():
+            AlergiaIntolerancia.objects.bulk_create(novos.values())
+            AlergiaIntolerancia.objects.bulk_update(alterados.values(), ["descricao"])
+        return diagnosticos
+
+    def protocolos_da_escola(self, escola, nome_protocolo) -> list:
+        return sorted(
+            {
+                protocolo
+                for edital_id in self.editais_por_lote.get(escola.lote_id, ())
+                for protocolo in self.protocolos.get((edital_id, nome_protocolo), ())
+            },
+            key=lambda protocolo: protocolo.id,
+        )
 
-                aluno = self.consulta_aluno(solicitacao_dieta_schema)
+    def prepara_linha(self, linha: LinhaPlanilha) -> None:
+        dados = linha.dados
+        aluno = self.valida_aluno(dados, self.alunos.get(dados.codigo_eol_aluno))
+        escola = self.valida_escola(dados, self.escolas.get(dados.codigo_escola))
+        protocolo_padrao = self.valida_protocolo_padrao(
+            dados, self.protocolos_da_escola(escola, dados.protocolo_dieta)
+        )
+        classificacao_dieta = self.valida_classificacao(
+            dados, self.classificacoes.get(f"Tipo {dados.codigo_categoria_dieta}")
+        )
+        diagnosticos = [
+            self.diagnosticos[nome] for nome in dados.codigo_diagnostico.split(";")
+        ]
+
+        importadas = self.solicitacoes_importadas.get(aluno.id, [])
+        if len(importadas) > 1:
+            raise SolicitacaoDietaEspecial.MultipleObjectsReturned(
+                f"get() returned more than one SolicitacaoDietaEspecial -- it returned {len(importadas)}!"
+            )
+        if importadas:
+            self.eh_exatamente_mesma_solicitacao(importadas[0], dados)
+        assinatura = (
+            dados.codigo_escola,
+            dados.codigo_eol_aluno,
+            dados.protocolo_dieta.upper(),
+            classificacao_dieta.id,
+            [diagnostico.descricao for diagnostico in diagnosticos],
+        )
+        if assinatura in self.assinaturas_na_planilha[aluno.id]:
+            raise Exception(
+                "Erro: Já existe uma solicitação ativa que foi importada para o aluno com código eol: "
+                + f"{dados.codigo_eol_aluno} exatamente igual a esta"
+            )
 
-                escola = self.consulta_escola(solicitacao_dieta_schema)
+        if escola.id not in self.usuarios_escolas and not self.perfil_diretor:
+            raise Perfil.DoesNotExist("Perfil matching query does not exist.")
 
-                protocolo_padrao = self.consulta_protocolo_padrao(
-                    solicitacao_dieta_schema, escola
-                )
+        solicitacao = SolicitacaoDietaEspecial(
+            aluno=aluno,
+            escola_destino=escola,
+            ativo=True,
+            status=DietaEspecialWorkflow.CODAE_AUTORIZADO,
+            nome_protocolo=dados.protocolo_dieta.upper(),
+            protocolo_padrao=protocolo_padrao,
+            orientacoes_gerais=protocolo_padrao.orientacoes_gerais,
+            classificacao=classificacao_dieta,
+            observacoes=self.OBSERVACOES,
+            registro_funcional_nutricionista=self.registro_funcional_nutricionista,
+            conferido=True,
+            eh_importado=True,
+        )
+        self.preenche_rastro(solicitacao, escola)
+        self.consulta_relacao_lote_terceirizada(solicitacao)
 
-                classificacao_dieta = self.consulta_classificacao(
-                    solicitacao_dieta_schema
+        self.assinaturas_na_planilha[aluno.id].append(assinatura)
+        linha.contexto.update(solicitacao=solicitacao, diagnosticos=diagnosticos)
+
+    @staticmethod
+    def preenche_rastro(solicitacao, escola) -> None:
+        """O mesmo que `_salva_rastro_solicitacao` faz no inicia_fluxo, sem salvar."""
+        solicitacao.rastro_escola = escola
+        solicitacao.rastro_dre = escola.diretoria_regional
+        if escola.tipo_gestao and escola.tipo_gestao.nome == "PARCEIRA":
+            solicitacao.rastro_lote = None
+            solicitacao.rastro_terceirizada = None
+        else:
+            solicitacao.rastro_lote = escola.lote
+            solicitacao.rastro_terceirizada = escola.lote.terceirizada
+
+    def grava_lote(self, linhas: List[LinhaPlanilha]) -> None:
+        """
+        Grava as solicitações já autorizadas, com os mesmos registros que
+        `inicia_fluxo` e `codae_autoriza(eh_importacao=True)` gerariam.
+        """
+        usuarios_criados = {}
+        solicitacoes = []
+        for linha in linhas:
+            solicitacao = linha.contexto["solicitacao"]
+            escola = solicitacao.escola_destino
+            usuario_escola = self.usuarios_escolas.get(
+                escola.id
+            ) or usuarios_criados.get(escola.id)
+            if not usuario_escola:
+                usuario_escola = usuarios_criados[escola.id] = self.cria_usuario_escola(
+                    escola, self.perfil_diretor
                 )
+            solicitacao.criado_por = usuario_escola
+            solicitacoes.append(solicitacao)
 
-                diagnosticos = self.monta_diagnosticos(
-                    solicitacao_dieta_schema.codigo_diagnostico
+        desativadas = SolicitacaoDietaEspecial.objects.filter(
+            aluno__in=[solicitacao.aluno_id for solicitacao in solicitacoes],
+            ativo=True,
+            eh_importado=False,
+        )
+        uuids_desativados = list(desativadas.values_list("uuid", flat=True))
+        desativadas.update(ativo=False)
+        SolicitacaoDietaEspecial.objects.bulk_create(solicitacoes)
+
+        SolicitacaoAlergias = SolicitacaoDietaEspecial.alergias_intolerancias.through
+        SolicitacaoAlergias.objects.bulk_create(
+            [
+                SolicitacaoAlergias(
+                    solicitacaodietaespecial_id=linha.contexto["solicitacao"].id,
+                    alergiaintolerancia_id=diagnostico_id,
                 )
+                for linha in linhas
+                for diagnostico_id in dict.fromkeys(
+                    diagnostico.id for diagnostico in linha.contexto["diagnosticos"]
+                )
+            ]
+        )
+        self.copia_substituicoes_do_protocolo(solicitacoes)
+
+        logs = []
+        for solicitacao in solicitacoes:
+            for status_evento, usuario in (
+                (LogSolicitacoesUsuario.INICIO_FLUXO, solicitacao.criado_por),
+                (LogSolicitacoesUsuario.CODAE_AUTORIZOU, self.usuario),
+            ):
+                logs.append(
+                    LogSolicitacoesUsuario(
+                        descricao=str(solicitacao),
+                        status_evento=status_evento,
+                        solicitacao_tipo=LogSolicitacoesUsuario.DIETA_ESPECIAL,
+                        usuario=usuario,
+                        uuid_original=solicitacao.uuid,
+                        justificativa="",
+                    )
+                )
+        LogSolicitacoesUsuario.objects.bulk_create(logs)
+        # update e bulk_create não disparam os signals da tabela materializada
+        agenda_atualizacao_solicitacoes(
+            uuids_desativados + [solicitacao.uuid for solicitacao in solicitacoes]
+        )
 
-                self.checa_existencia_solicitacao(solicitacao_dieta_schema, aluno)
-
-                self.cria_solicitacao(
-                    solicitacao_dieta_schema,
-                    aluno,
-                    classificacao_dieta,
-                    diagnosticos,
-                    escola,
-                    protocolo_padrao,
+        self.usuarios_escolas.update(usuarios_criados)
+
+    def copia_substituicoes_do_protocolo(self, solicitacoes) -> None:
+        copias = [
+            (
+                SubstituicaoAlimento(
+                    solicitacao_dieta_especial=solicitacao,
+                    alimento_id=substituicao.alimento_id,
+                    tipo=substituicao.tipo,
+                ),
+                substituicao,
+            )
+            for solicitacao in solicitacoes
+            for substituicao in self.substituicoes_por_protocolo.get(
+                solicitacao.protocolo_padrao_id, ()
+            )
+        ]
+        SubstituicaoAlimento.objects.bulk_create([copia for copia, _ in copias])
+
+        Substitutos = SubstituicaoAlimento.substitutos.through
+        AlimentosSubstitutos = SubstituicaoAlimento.alimentos_substitutos.through
+        Substitutos.objects.bulk_create(
+            [
+                Substitutos(substituicaoalimento_id=copia.id, produto_id=produto.id)
+                for copia, substituicao in copias
+                for produto in substituicao.substitutos.all()
+            ],
+            ignore_conflicts=True,
+        )
+        AlimentosSubstitutos.objects.bulk_create(
+            [
+                AlimentosSubstitutos(
+                    substituicaoalimento_id=copia.id, alimento_id=alimento.id
                 )
-            except Exception as exc:
-                self.erros.append(f"Linha {ind} - {exc}")
+                for copia, substituicao in copias
+                for alimento in substituicao.alimentos_substitutos.all()
+            ],
+            ignore_conflicts=True,
+        )
 
-    def abre_worksheet(self):
-        return load_workbook(self.path).active
+    def grava_linha(self, linha: LinhaPlanilha) -> None:
+        self.processa_linha(linha.dados)
+
+    @property
+    def registro_funcional_nutricionista(self):
+        return (
+            f"Elaborado por {self.usuario.nome} - RF {self.usuario.registro_funcional}"
+        )
 
     def validacao_inicial(self) -> bool:
         return self.existe_conteudo() and self.extensao_do_arquivo_esta_correta()
@@ -120,18 +445,13 @@ class ProcessadorPlanilha:
             return False
         return True
 
-    def monta_dicionario_de_dados(self, linha: tuple) -> dict:
-        return {
-            key: linha[index].value
-            for index, key in enumerate(
-                ArquivoCargaDietaEspecialSchema.schema()["properties"].keys()
-            )
-        }
-
     def consulta_aluno(self, solicitacao_dieta_schema) -> Aluno:
         aluno = Aluno.objects.filter(
             codigo_eol=solicitacao_dieta_schema.codigo_eol_aluno
         ).first()
+        return self.valida_aluno(solicitacao_dieta_schema, aluno)
+
+    def valida_aluno(self, solicitacao_dieta_schema, aluno) -> Aluno:
         if not aluno:
             raise Exception(
                 f"Erro: Aluno com código eol {solicitacao_dieta_schema.codigo_eol_aluno} não encontrado."
@@ -149,6 +469,9 @@ class ProcessadorPlanilha:
         escola = Escola.objects.filter(
             codigo_codae=solicitacao_dieta_schema.codigo_escola
         ).first()
+        return self.valida_escola(solicitacao_dieta_schema, escola)
+
+    def valida_escola(self, solicitacao_dieta_schema, escola) -> Escola:
         if not escola:
             raise Exception(
                 f"Erro: escola com código codae {solicitacao_dieta_schema.codigo_escola} não encontrada."
@@ -172,6 +495,11 @@ class ProcessadorPlanilha:
         protocolos = protocolos.filter(
             nome_protocolo=solicitacao_dieta_schema.protocolo_dieta
         )
+        return self.valida_protocolo_padrao(solicitacao_dieta_schema, protocolos)
+
+    def valida_protocolo_padrao(
+        self, solicitacao_dieta_schema, protocolos
+    ) -> ProtocoloPadraoDietaEspecial:
         if not protocolos:
             msg_part_1 = "Erro: protocolo padrão"
             msg_part_2 = (
@@ -180,12 +508,17 @@ class ProcessadorPlanilha:
             raise Exception(
                 f"{msg_part_1} {solicitacao_dieta_schema.protocolo_dieta} {msg_part_2}"
             )
-        return protocolos.first()
+        return protocolos[0]
 
     def consulta_classificacao(self, dieta_schema) -> ClassificacaoDieta:
         classificacao_dieta = ClassificacaoDieta.objects.filter(
             nome=f"Tipo {dieta_schema.codigo_categoria_dieta}"
         ).first()
+        return self.valida_classificacao(dieta_schema, classificacao_dieta)
+
+    def valida_classificacao(
+        self, dieta_schema, classificacao_dieta
+    ) -> ClassificacaoDieta:
         if not classificacao_dieta:
             raise Exception(
                 f"Erro: A categoria da dieta {dieta_schema.codigo_categoria_dieta} não encontrado."
@@ -265,33 +598,11 @@ class ProcessadorPlanilha:
         escola,
         protocolo_padrao,
     ):  # noqa C901
-        observacoes = """Essa Dieta Especial foi autorizada anteriormente a implantação do SIGPAE."""
-
         email_fake = f"fake{escola.id}@admin.com"
         usuario_escola = Usuario.objects.filter(email=email_fake).first()
-        registro_funcional_nutricionista = (
-            f"Elaborado por {self.usuario.nome} - RF {self.usuario.registro_funcional}"
-        )
         if not usuario_escola:
-            perfil = Perfil.objects.get(nome="DIRETOR_UE")
-            data_atual = date.today()
-            # Esse Usuário não consegue acessar o sistema
-            # Troquei a senha pra reforçar que essa não funciona
-            # já que o usuário não tem acesso ao sistema
-            usuario_escola = Usuario.objects.create(
-                username=email_fake,
-                email=email_fake,
-                password=DJANGO_ADMIN_PASSWORD,
-                nome=escola.nome,
-                cargo="DIRETOR",
-                is_active=False,
-            )
-            Vinculo.objects.create(
-                instituicao=escola,
-                perfil=perfil,
-                usuario=usuario_escola,
-                data_inicial=data_atual,
-                ativo=True,
+            usuario_escola = self.cria_usuario_escola(
+                escola, Perfil.objects.get(nome="DIRETOR_UE")
             )
 
         solicitacao: SolicitacaoDietaEspecial = SolicitacaoDietaEspecial.objects.create(
@@ -303,8 +614,8 @@ class ProcessadorPlanilha:
             protocolo_padrao=protocolo_padrao,
             orientacoes_gerais=protocolo_padrao.orientacoes_gerais,
             classificacao=classificacao_dieta,
-            observacoes=observacoes,
-            registro_funcional_nutricionista=registro_funcional_nutricionista,
+            observacoes=self.OBSERVACOES,
+            registro_funcional_nutricionista=self.registro_funcional_nutricionista,
             conferido=True,
             eh_importado=True,
         )
@@ -327,6 +638,29 @@ class ProcessadorPlanilha:
             )
         solicitacao.codae_autoriza(user=self.usuario, eh_importacao=True)
 
+    @staticmethod
+    def cria_usuario_escola(escola, perfil) -> Usuario:
+        email_fake = f"fake{escola.id}@admin.com"
+        # Esse Usuário não consegue acessar o sistema
+        # Troquei a senha pra reforçar que essa não funciona
+        # já que o usuário não tem acesso ao sistema
+        usuario_escola = Usuario.objects.create(
+            username=email_fake,
+            email=email_fake,
+            password=DJANGO_ADMIN_PASSWORD,
+            nome=escola.nome,
+            cargo="DIRETOR",
+            is_active=False,
+        )
+        Vinculo.objects.create(
+            instituicao=escola,
+            perfil=perfil,
+            usuario=usuario_escola,
+            data_inicial=date.today(),
+            ativo=True,
+        )
+        return usuario_escola
+
     def finaliza_processamento(self) -> None:
         if self.erros:
             self.arquivo.log = "\n".join(self.erros)
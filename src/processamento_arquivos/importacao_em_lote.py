@@ -0,0 +1,169 @@
+import logging
+from dataclasses import dataclass, field
+from itertools import islice
+from typing import Any, Iterable, Iterator, List, Optional, Tuple
+
+from django.db import transaction
+from openpyxl import load_workbook
+
+logger = logging.getLogger("sigpae.importacao_em_lote")
+
+
+@dataclass
+class LinhaPlanilha:
+    """Linha validada pelo schema, com o que for resolvido para ela na fase 2."""
+
+    numero: int
+    dados: Any
+    contexto: dict = field(default_factory=dict)
+
+
+class ProcessadorPlanilhaEmLote:
+    """
+    Base para importação de planilhas em duas fases.
+
+    1. `le_linhas` percorre a planilha (aberta com `read_only=True`), valida cada
+       linha com `schema` e chama `coleta_chaves` para juntar os valores que
+       precisam ser consultados no banco.
+    2. `resolve_chaves` faz essas consultas de uma vez (`__in`), `prepara_linha`
+       monta o que cada linha vai gravar sem acessar o banco e `grava_lote`
+       grava as linhas preparadas em lotes de `tamanho_lote`, cada lote em uma
+       transação.
+
+    Se um lote falha, ele é regravado linha a linha com `grava_linha`, para que
+    o relatório continue apontando a linha com erro. Subclasses que precisam
+    gravar linha a linha (ex.: chamadas a serviços externos) usam
+    `grava_em_lote = False`.
+
+    Os erros ficam em `self.erros`, no formato "Linha <n> - <erro>", ordenados
+    pelo número da linha.
+    """
+
+    schema = None
+    tamanho_lote = 500
+    grava_em_lote = True
+
+    def __init__(self) -> None:
+        self.erros = []
+        self._erros_por_linha: List[Tuple[int, str]] = []
+
+    def abre_workbook(self, path):
+        return load_workbook(path, read_only=True, data_only=True)
+
+    def campos(self) -> List[str]:
+        return list(self.schema.schema()["properties"].keys())
+
+    def monta_dicionario_de_dados(self, linha: tuple) -> dict:
+        return {
+            key: (
+                getattr(linha[index], "value", linha[index])
+                if index < len(linha)
+                else None
+            )
+            for index, key in enumerate(self.campos())
+        }
+
+    @staticmethod
+    def cabecalho(worksheet) -> list:
+        """Valores da primeira linha, sem as células vazias do final."""
+        cabecalho = list(
+            next(worksheet.iter_rows(max_row=1, values_only=True), ()) or ()
+        )
+        while cabecalho and cabecalho[-1] is None:
+            cabecalho.pop()
+        return cabecalho
+
+    def registra_erro(self, numero: int, erro) -> None:
+        self._erros_por_linha.append((numero, f"Linha {numero} - {erro}"))
+
+    def le_linhas(self, worksheet, primeira_linha: int = 2) -> List[LinhaPlanilha]:
+        """Fase 1: valida as linhas com o schema e coleta as chaves de consulta."""
+        linhas = []
+        for numero, linha in enumerate(
+            worksheet.iter_rows(min_row=primeira_linha), primeira_linha
+        ):
+            if all(getattr(celula, "value", None) is None for celula in linha):
+                continue
+            try:
+                dados = self.schema(**self.monta_dicionario_de_dados(linha))
+                linha_planilha = LinhaPlanilha(numero=numero, dados=dados)
+                self.coleta_chaves(linha_planilha)
+                linhas.append(linha_planilha)
+            except Exception as exc:
+                self.registra_erro(numero, exc)
+        return linhas
+
+    def processa_linhas(self, linhas: List[LinhaPlanilha]) -> None:
+        """Fase 2: resolve as chaves coletadas e grava as linhas em lotes."""
+        if linhas:
+            self.resolve_chaves()
+            for lote in self._em_lotes(linhas, self.tamanho_lote):
+                self._grava(self._prepara(lote))
+        self.consolida_erros()
+
+    def processa_worksheet(self, worksheet) -> None:
+        self.processa_linhas(self.le_linhas(worksheet))
+
+    def consolida_erros(self) -> None:
+        self.erros.extend(erro for _, erro in sorted(self._erros_por_linha))
+        self._erros_por_linha = []
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        """Guarda as chaves que a linha precisa consultar no banco."""
+
+    def resolve_chaves(self) -> None:
+        """Consulta de uma vez as chaves coletadas na fase 1."""
+
+    def prepara_linha(self, linha: LinhaPlanilha) -> Optional[bool]:
+        """
+        Valida a linha com os dados já resolvidos e preenche `linha.contexto`.
+        Lança exceção para registrar erro na linha; retornar False descarta a
+        linha sem erro.
+        """
+
+    def grava_lote(self, linhas: List[LinhaPlanilha]) -> None:
+        for linha in linhas:
+            self.grava_linha(linha)
+
+    def grava_linha(self, linha: LinhaPlanilha) -> None:
+        raise NotImplementedError("Deve criar um método grava_linha")
+
+    def _prepara(self, linhas: Iterable[LinhaPlanilha]) -> List[LinhaPlanilha]:
+        preparadas = []
+        for linha in linhas:
+            try:
+                if self.prepara_linha(linha) is not False:
+                    preparadas.append(linha)
+            except Exception as exc:
+                self.registra_erro(linha.numero, exc)
+        return preparadas
+
+    def _grava_lote_inteiro(self, linhas: List[LinhaPlanilha]) -> bool:
+        try:
+            with transaction.atomic():
+                self.grava_lote(linhas)
+            return True
+        except Exception as exc:
+            logger.warning(
+                f"Falha ao gravar o lote das linhas {linhas[0].numero} a "
+                f"{linhas[-1].numero} ({exc}); gravando linha a linha."
+            )
+            return False
+
+    def _grava(self, linhas: List[LinhaPlanilha]) -> None:
+        if not linhas:
+            return
+        if self.grava_em_lote and self._grava_lote_inteiro(linhas):
+            return
+        for linha in linhas:
+            try:
+                with transaction.atomic():
+                    self.grava_linha(linha)
+            except Exception as exc:
+                self.registra_erro(linha.numero, exc)
+
+    @staticmethod
+    def _em_lotes(itens, tamanho) -> Iterator[list]:
+        itens = iter(itens)
+        while lote := list(islice(itens, tamanho)):
+            yield lote
@@ -2,6 +2,7 @@ import datetime
 from unittest.mock import Mock
 
 import pytest
+from model_bakery import baker
 
 from src.produto.api.filters import (
     CadastroProdutosEditalFilter,
@@ -70,6 +71,24 @@ def test_produto_filter(produtos_edital_41):
     assert filtro_aditivos.qs.count() == 0
 
 
+def test_produto_filter_nome_busca_ignora_acentos_e_maiusculas():
+    marca = baker.make("Marca", nome="Pão de Açúcar")
+    produto = baker.make("Produto", nome="FEIJÃO  Carioca Tipo 1", marca=marca)
+    baker.make("Produto", nome="Feijoada")
+    assert produto.nome_busca == "feijao carioca tipo 1"
+
+    filtro = ProdutoFilter(
+        data={"nome_produto": "feijao car", "nome_marca": "ACUCAR"},
+        queryset=Produto.objects.all(),
+    )
+    assert list(filtro.qs) == [produto]
+
+    Marca.objects.filter(id=marca.id).update(nome="Sem Açúcar")
+    assert Marca.atualizar_nomes_busca() == 1
+    marca.refresh_from_db()
+    assert marca.nome_busca == "sem acucar"
+
+
 def test_marca_filter(produtos_edital_41):
     nome_marca_1 = "NAMORADOS"
     nome_marca_2 = "TIO JOÃO"
@@ -0,0 +1,39 @@
+from unittest import mock
+
+import pytest
+from django.core.management import call_command
+from model_bakery import baker
+
+from src.produto.models import Marca
+
+pytestmark = pytest.mark.django_db
+
+
+def test_corrige_marcas_fabricantes_duplicados_atualiza_nome_busca():
+    marca = baker.make("Marca", nome="Corpo & Sabor")
+    fabricante = baker.make("Fabricante", nome="Parati S.A.")
+
+    call_command("corrige_marcas_fabricantes_duplicados")
+
+    marca.refresh_from_db()
+    fabricante.refresh_from_db()
+    assert marca.nome == "CORPO E SABOR"
+    assert marca.nome_busca == "corpo e sabor"
+    assert fabricante.nome == "PARATI SA"
+    assert fabricante.nome_busca == "parati sa"
+
+
+def test_corrige_marcas_fabricantes_duplicados_atualiza_nome_busca_apos_falha():
+    marca = baker.make("Marca", nome="Vita Suco")
+    Marca.objects.filter(id=marca.id).update(nome="VITASUCO")
+
+    with mock.patch(
+        "src.produto.management.commands.corrige_marcas_fabricantes_duplicados."
+        "Command.normalizar_fabricantes",
+        side_effect=RuntimeError,
+    ):
+        with pytest.raises(RuntimeError):
+            call_command("corrige_marcas_fabricantes_duplicados")
+
+    marca.refresh_from_db()
+    assert marca.nome_busca == "vitasuco"
@@ -5,8 +5,10 @@ from django.db.models.functions import Cast, Substr
 from rest_framework.request import Request
 
 from src.dados_comuns import constants
+from src.dados_comuns.behaviors import TemNomeBusca
 from src.dados_comuns.fluxo_status import ReclamacaoProdutoWorkflow
 from src.dados_comuns.models import LogSolicitacoesUsuario
+from src.dados_comuns.normalizers import normalizar_busca
 from src.produto.models import HomologacaoProduto
 
 
@@ -60,9 +62,14 @@ def filtrar_query_params(
     if titulo:
         query_set = query_set.annotate(
             id_amigavel=Substr(Cast(F("uuid"), output_field=CharField()), 1, 5)
-        ).filter(Q(id_amigavel__icontains=titulo) | Q(produto__nome__icontains=titulo))
+        ).filter(
+            Q(id_amigavel__icontains=titulo)
+            | Q(produto__nome_busca__contains=normalizar_busca(titulo))
+        )
     if marca:
-        query_set = query_set.filter(produto__marca__nome__icontains=marca)
+        query_set = TemNomeBusca.filtra_por_nome_busca(
+            query_set, "produto__marca__nome_busca", marca
+        )
 
     if filtra_por_edital:
         query_set = filtra_editais(request, query_set)
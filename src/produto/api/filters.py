@@ -3,6 +3,7 @@ from datetime import timedelta
 from django.db.models import Q
 from django_filters import rest_framework as filters
 
+from src.dados_comuns.behaviors import TemNomeBusca
 from src.produto.models import InformacaoNutricional, Produto
 from src.produto.utils.genericos import (
     converte_para_datetime,
@@ -12,9 +13,7 @@ from src.produto.utils.genericos import (
 
 class ProdutoFilter(filters.FilterSet):
     uuid = filters.CharFilter(field_name="homologacao__uuid", lookup_expr="iexact")
-    nome_produto = filters.CharFilter(
-        field_name="nome__unaccent", lookup_expr="icontains"
-    )
+    nome_produto = filters.CharFilter(field_name="nome_busca", method="filtra_nome")
     data_inicial = filters.DateFilter(
         field_name="homologacao__criado_em", lookup_expr="date__gte"
     )
@@ -22,10 +21,10 @@ class ProdutoFilter(filters.FilterSet):
         field_name="homologacao__criado_em", lookup_expr="date__lte"
     )
     nome_marca = filters.CharFilter(
-        field_name="marca__nome__unaccent", lookup_expr="icontains"
+        field_name="marca__nome_busca", method="filtra_nome"
     )
     nome_fabricante = filters.CharFilter(
-        field_name="fabricante__nome__unaccent", lookup_expr="icontains"
+        field_name="fabricante__nome_busca", method="filtra_nome"
     )
     nome_terceirizada = filters.CharFilter(
         field_name="homologacao__rastro_terceirizada__nome_fantasia",
@@ -52,6 +51,9 @@ class ProdutoFilter(filters.FilterSet):
         filtro = cria_filtro_aditivos(value)
         return qs.filter(filtro)
 
+    def filtra_nome(self, qs, name, value):
+        return TemNomeBusca.filtra_por_nome_busca(qs, name, value)
+
 
 def aplica_filtro_editais(editais, filtro_reclamacao, filtro_homologacao):
     if editais:
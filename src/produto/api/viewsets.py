@@ -7,6 +7,7 @@ import environ
 from django.contrib.staticfiles.storage import staticfiles_storage
 from django.db import transaction
 from django.db.models import (
+    Case,
     CharField,
     Count,
     F,
@@ -15,6 +16,8 @@ from django.db.models import (
     Q,
     QuerySet,
     Subquery,
+    Value,
+    When,
     Window,
 )
 from django.db.models.functions import Cast, Substr
@@ -54,6 +57,7 @@ from ...dados_comuns.fluxo_status import (
     ReclamacaoProdutoWorkflow,
 )
 from ...dados_comuns.models import LogSolicitacoesUsuario
+from ...dados_comuns.normalizers import normalizar_busca
 from ...dados_comuns.permissions import (
     PermissaoParaReclamarDeProduto,
     UsuarioCODAEGabinete,
@@ -2425,12 +2429,18 @@ class ProdutoViewSet(viewsets.ModelViewSet):
     @action(detail=False, methods=["GET"], url_path="autocomplete-nomes")
     def autocomplete_nomes(self, request):
         queryset = self.filter_queryset(self.get_queryset())
-        return Response(
-            {
-                "count": queryset.count(),
-                "results": [value[0] for value in queryset.values_list("nome")],
-            }
-        )
+        termo = normalizar_busca(request.query_params.get("nome_produto", ""))
+        if termo:
+            # nomes que começam com o termo antes dos que apenas o contêm
+            queryset = queryset.order_by(
+                Case(
+                    When(nome_busca__startswith=termo, then=Value(0)),
+                    default=Value(1),
+                ),
+                "nome_busca",
+            )
+        nomes = list(queryset.values_list("nome", flat=True))
+        return Response({"count": len(nomes), "results": nomes})
 
     def obter_produtos_ordenados_por_edital_e_reclamacoes(
         self, filtro_reclamacao: dict, filtro_homologacao: dict
@@ -0,0 +1,21 @@
+from django.core.management import BaseCommand
+
+from ...models import Fabricante, Marca, Produto
+
+
+class Command(BaseCommand):
+    help = (
+        "Recalcula a coluna nome_busca de produtos, marcas e fabricantes "
+        "(necessário após alterações feitas com update() ou bulk_create())."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--tamanho-lote", type=int, default=2000)
+
+    def handle(self, *args, **options):
+        for model in (Produto, Marca, Fabricante):
+            alterados = model.atualizar_nomes_busca(options["tamanho_lote"])
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {alterados} atualizados"
+            )
+        self.stdout.write(self.style.SUCCESS("Nomes para busca atualizados."))
@@ -0,0 +1,89 @@
+import random
+import time
+
+from django.core.management import BaseCommand
+from django.db import connection, transaction
+
+from ....dados_comuns.normalizers import normalizar_busca
+from ...models import Produto
+
+PALAVRAS = [
+    "arroz",
+    "feijão",
+    "macarrão",
+    "açúcar",
+    "óleo",
+    "farinha",
+    "leite",
+    "biscoito",
+    "suco",
+    "café",
+    "integral",
+    "tipo 1",
+    "sem glúten",
+    "orgânico",
+    "parboilizado",
+    "carioca",
+    "refinado",
+    "desnatado",
+    "maçã",
+    "pêssego",
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Cria um catálogo sintético de produtos (desfeito ao final) e compara as "
+        "buscas por prefixo e por trecho do nome com unaccent()/icontains e com a "
+        "coluna nome_busca (índice trigram)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--produtos", type=int, default=200_000)
+        parser.add_argument("--repeticoes", type=int, default=20)
+        parser.add_argument("--seed", type=int, default=0)
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            self._cria_catalogo(options["produtos"], options["seed"])
+            with connection.cursor() as cursor:
+                cursor.execute(f"ANALYZE {Produto._meta.db_table}")
+
+            for descricao, termo in (
+                ("prefixo", "Arroz Parb"),
+                ("trecho", "glúten org"),
+                ("trecho sem acento", "pessego"),
+            ):
+                legado = Produto.objects.filter(nome__unaccent__icontains=termo)
+                nome_busca = Produto.filtra_por_nome_busca(
+                    Produto.objects.all(), "nome_busca", termo
+                )
+                tempo_legado = self._mede(legado, options["repeticoes"])
+                tempo_nome_busca = self._mede(nome_busca, options["repeticoes"])
+                usa_indice = "produto_nome_busca_trgm" in nome_busca.explain()
+                self.stdout.write(
+                    f"{descricao} ({termo!r}): {legado.count()} produtos | "
+                    f"unaccent/icontains: {tempo_legado * 1000:.1f}ms | "
+                    f"nome_busca: {tempo_nome_busca * 1000:.1f}ms "
+                    f"({'com' if usa_indice else 'sem'} índice trigram)"
+                )
+
+            transaction.set_rollback(True)
+        self.stdout.write(self.style.SUCCESS("Catálogo sintético removido."))
+
+    def _cria_catalogo(self, quantidade, seed):
+        sorteio = random.Random(seed)  # nosec B311
+        produtos = []
+        for indice in range(quantidade):
+            nome = " ".join(sorteio.sample(PALAVRAS, 4)).upper()
+            nome = f"{nome} {indice}"[:100]
+            produtos.append(Produto(nome=nome, nome_busca=normalizar_busca(nome)))
+        Produto.objects.bulk_create(produtos, batch_size=5000)
+
+    @staticmethod
+    def _mede(queryset, repeticoes):
+        """Tempo médio de uma consulta que lê os nomes encontrados."""
+        inicio = time.perf_counter()
+        for _ in range(repeticoes):
+            list(queryset.values_list("nome", flat=True))
+        return (time.perf_counter() - inicio) / repeticoes
@@ -18,16 +18,28 @@ class Command(BaseCommand):
     help = "Corrige marcas e produtos duplicadoss"
 
     def handle(self, *args, **options):
-        self.stdout.write(self.style.SUCCESS("*** Marcas ***"))
-        self.corrige_marcas()
-        self.normalizar_marcas()
-        self.remove_duplicados_marcas()
+        try:
+            self.stdout.write(self.style.SUCCESS("*** Marcas ***"))
+            self.corrige_marcas()
+            self.normalizar_marcas()
+            self.remove_duplicados_marcas()
 
-        self.stdout.write(self.style.SUCCESS("*** Fabricantes ***"))
-        self.corrige_fabricantes()
-        self.normalizar_fabricantes()
-        self.padronizar_SA_LTDA()
-        self.remove_duplicados_fabricantes()
+            self.stdout.write(self.style.SUCCESS("*** Fabricantes ***"))
+            self.corrige_fabricantes()
+            self.normalizar_fabricantes()
+            self.padronizar_SA_LTDA()
+            self.remove_duplicados_fabricantes()
+        finally:
+            # as correções usam update(), que não passa pelo TemNomeBusca.save();
+            # recalcula mesmo se alguma etapa falhar no meio do caminho
+            self.atualiza_nomes_busca()
+
+    def atualiza_nomes_busca(self):
+        for model in (Marca, Fabricante):
+            alterados = model.atualizar_nomes_busca()
+            self.stdout.write(
+                f"{model._meta.verbose_name_plural}: {alterados} nomes para busca atualizados"
+            )
 
     def remove_duplicados_marcas(self):  # noqa C901
         combinacoes_marcas = []
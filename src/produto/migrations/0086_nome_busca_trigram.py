@@ -0,0 +1,58 @@
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.operations import AddIndexConcurrently, TrigramExtension
+from django.db import migrations, models
+
+from src.dados_comuns.normalizers import normalizar_busca
+
+MODELS_COM_NOME_BUSCA = [
+    ("produto", "produto_nome_busca_trgm"),
+    ("marca", "marca_nome_busca_trgm"),
+    ("fabricante", "fabricante_nome_busca_trgm"),
+]
+
+
+def preenche_nome_busca(apps, schema_editor):
+    for model_name, _ in MODELS_COM_NOME_BUSCA:
+        model = apps.get_model("produto", model_name)
+        objetos = []
+        for objeto in model.objects.only("id", "nome").iterator(chunk_size=2000):
+            objeto.nome_busca = normalizar_busca(objeto.nome)
+            objetos.append(objeto)
+        model.objects.bulk_update(objetos, ["nome_busca"], batch_size=2000)
+
+
+class Migration(migrations.Migration):
+    atomic = False
+
+    dependencies = [
+        ("produto", "0085_alter_produtoedital_suspenso_justificativa"),
+    ]
+
+    operations = [
+        TrigramExtension(),
+        *[
+            migrations.AddField(
+                model_name=model_name,
+                name="nome_busca",
+                field=models.CharField(
+                    blank=True,
+                    editable=False,
+                    max_length=250,
+                    verbose_name="Nome para busca",
+                ),
+            )
+            for model_name, _ in MODELS_COM_NOME_BUSCA
+        ],
+        migrations.RunPython(preenche_nome_busca, migrations.RunPython.noop),
+        *[
+            AddIndexConcurrently(
+                model_name=model_name,
+                index=GinIndex(
+                    fields=["nome_busca"],
+                    opclasses=["gin_trgm_ops"],
+                    name=index_name,
+                ),
+            )
+            for model_name, index_name in MODELS_COM_NOME_BUSCA
+        ],
+    ]
@@ -4,6 +4,7 @@ from datetime import datetime
 
 from django.contrib.contenttypes.fields import GenericForeignKey, GenericRelation
 from django.contrib.contenttypes.models import ContentType
+from django.contrib.postgres.indexes import GinIndex
 from django.db import models, transaction
 from django.db.models import Case, QuerySet, When
 from sequences import get_last_value, get_next_value
@@ -18,6 +19,7 @@ from ..dados_comuns.behaviors import (
     TemAlteradoEm,
     TemChaveExterna,
     TemIdentificadorExternoAmigavel,
+    TemNomeBusca,
 )
 from ..dados_comuns.fluxo_status import (
     FluxoHomologacaoProduto,
@@ -52,19 +54,37 @@ class ProtocoloDeDietaEspecial(Ativavel, CriadoEm, CriadoPor, TemChaveExterna):
         verbose_name_plural = "Protocolos de Dieta Especial"
 
 
-class Fabricante(Nomeavel, TemChaveExterna):
+class Fabricante(TemNomeBusca, Nomeavel, TemChaveExterna):
     item = GenericRelation("ItemCadastro", related_query_name="fabricante")
 
     def __str__(self):
         return self.nome
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["nome_busca"],
+                opclasses=["gin_trgm_ops"],
+                name="fabricante_nome_busca_trgm",
+            )
+        ]
 
-class Marca(Nomeavel, TemChaveExterna):
+
+class Marca(TemNomeBusca, Nomeavel, TemChaveExterna):
     item = GenericRelation("ItemCadastro", related_query_name="marca")
 
     def __str__(self):
         return self.nome
 
+    class Meta:
+        indexes = [
+            GinIndex(
+                fields=["nome_busca"],
+                opclasses=["gin_trgm_ops"],
+                name="marca_nome_busca_trgm",
+            )
+        ]
+
 
 class UnidadeMedida(Nomeavel, TemChaveExterna):
     item = GenericRelation("ItemCadastro", related_query_name="unidade_medida")
@@ -145,6 +165,7 @@ class ImagemDoProduto(TemChaveExterna):
 
 
 class Produto(
+    TemNomeBusca,
     Ativavel,
     CriadoEm,
     CriadoPor,
@@ -250,6 +271,13 @@ class Produto(
     class Meta:
         verbose_name = "Produto"
         verbose_name_plural = "Produtos"
+        indexes = [
+            GinIndex(
+                fields=["nome_busca"],
+                opclasses=["gin_trgm_ops"],
+                name="produto_nome_busca_trgm",
+            )
+        ]
 
 
 class ProdutoEdital(TemChaveExterna, CriadoEm):
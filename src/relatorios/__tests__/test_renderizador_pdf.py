@@ -0,0 +1,79 @@
+import io
+import os
+
+from pypdf import PdfReader
+from weasyprint import HTML
+
+from ..renderizador_pdf import (
+    conteudo_arquivo_estatico,
+    estatisticas_renderizacao,
+    folha_de_estilo,
+    limpa_cache_renderizacao,
+    renderiza_pdf,
+)
+
+HTML_COM_LOGO = (
+    "<html><body><img src='images/logo-sigpae.png' /><p>Relatório</p></body></html>"
+)
+
+
+def test_renderiza_pdf_registra_tempo():
+    limpa_cache_renderizacao()
+
+    pdf = renderiza_pdf("<html><body><p>Relatório</p></body></html>")
+
+    assert pdf.startswith(b"%PDF")
+    assert estatisticas_renderizacao().renderizacoes == 1
+    assert estatisticas_renderizacao().tempo_total > 0
+
+
+def test_folha_de_estilo_interpretada_uma_vez():
+    limpa_cache_renderizacao()
+    css = "@page { size: 100mm 100mm; margin: 0; }"
+
+    assert folha_de_estilo(css) is folha_de_estilo(css)
+
+    pdf = renderiza_pdf("<html><body>teste</body></html>", stylesheets=[css])
+    pagina = PdfReader(io.BytesIO(pdf)).pages[0]
+    assert round(float(pagina.mediabox.width) * 0.352778) == 100
+
+
+def test_arquivos_estaticos_servidos_da_memoria(settings):
+    limpa_cache_renderizacao()
+    settings.STATIC_ROOT = os.path.abspath("src/relatorios/static")
+
+    renderiza_pdf(HTML_COM_LOGO, base_url=f"{settings.STATIC_ROOT}/")
+    renderiza_pdf(HTML_COM_LOGO, base_url=f"{settings.STATIC_ROOT}/")
+
+    assert estatisticas_renderizacao().recursos_lidos == 1
+    assert estatisticas_renderizacao().recursos_em_memoria == 1
+
+
+def test_conteudo_arquivo_estatico_lido_uma_vez(tmp_path):
+    caminho = tmp_path / "marca_dagua.pdf"
+    caminho.write_bytes(b"%PDF-1.4")
+
+    assert conteudo_arquivo_estatico(str(caminho)) == b"%PDF-1.4"
+    caminho.write_bytes(b"alterado")
+    assert conteudo_arquivo_estatico(str(caminho)) == b"%PDF-1.4"
+
+
+def test_cache_de_imagens_descartado_a_cada_renderizacao(monkeypatch):
+    caches = []
+    write_pdf = HTML.write_pdf
+
+    def write_pdf_espiao(self, *args, **kwargs):
+        caches.append(kwargs["cache"])
+        return write_pdf(self, *args, **kwargs)
+
+    monkeypatch.setattr(HTML, "write_pdf", write_pdf_espiao)
+    html = (
+        "<html><body>"
+        "<img src='data:image/gif;base64,R0lGODlhAQABAAAAACw=' />"
+        "</body></html>"
+    )
+
+    renderiza_pdf(html)
+    renderiza_pdf(html)
+
+    assert caches[0] is not caches[1]
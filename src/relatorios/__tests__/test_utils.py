@@ -54,18 +54,9 @@ def test_merge_pdf_com_rodape_assinatura_integration(monkeypatch):
     user_pdf_bytes = criar_pdf_com_texto("conteúdo do usuário")
     rodape_pdf_bytes = criar_pdf_com_texto(RODAPE_TEXTO_ESPERADO)
 
-    class FakeHTML:
-        def __init__(self, *args, **kwargs):
-            # Mock não requer inicialização
-            pass
-
-        @staticmethod
-        def write_pdf():
-            return rodape_pdf_bytes
-
     monkeypatch.setattr(
-        "src.relatorios.utils.HTML",
-        FakeHTML,
+        "src.relatorios.utils.renderiza_pdf",
+        lambda *args, **kwargs: rodape_pdf_bytes,
     )
 
     result_data_url = merge_pdf_com_rodape_assinatura(
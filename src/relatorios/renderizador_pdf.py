@@ -0,0 +1,195 @@
+"""
+Renderização de PDFs com WeasyPrint.
+
+Todos os relatórios passam por `renderiza_pdf`, que reaproveita entre as
+renderizações do mesmo processo (e thread):
+
+- a configuração de fontes (`FontConfiguration`), para não resolver de novo as
+  fontes dos `@font-face`;
+- as folhas de estilo passadas como string, já interpretadas (`CSS`);
+- os arquivos estáticos (CSS compilado, fontes, logos), servidos da memória
+  pelo url_fetcher após a primeira leitura.
+
+As imagens decodificadas (opção `cache` do WeasyPrint) ficam só durante uma
+renderização: incluem as `data:` URIs de cada relatório e cresceriam sem
+limite se fossem mantidas no processo.
+
+Cada renderização registra seu tempo no logger `sigpae.renderizador_pdf` e
+nas estatísticas do processo (`estatisticas_renderizacao`).
+"""
+
+import io
+import logging
+import os
+import threading
+import time
+from functools import lru_cache
+from urllib.parse import urlparse
+
+from django.conf import settings
+from django.contrib.staticfiles.storage import staticfiles_storage
+from django_weasyprint.utils import django_url_fetcher
+from weasyprint import CSS, HTML, default_url_fetcher
+from weasyprint.text.fonts import FontConfiguration
+
+logger = logging.getLogger("sigpae.renderizador_pdf")
+
+# limite de memória dos arquivos estáticos guardados por processo
+TAMANHO_MAXIMO_RECURSOS = 64 * 1024 * 1024
+
+_local = threading.local()
+
+
+class EstatisticasRenderizacao:
+    def __init__(self):
+        self.renderizacoes = 0
+        self.tempo_total = 0.0
+        self.recursos_em_memoria = 0
+        self.recursos_lidos = 0
+
+    @property
+    def tempo_medio(self) -> float:
+        return self.tempo_total / self.renderizacoes if self.renderizacoes else 0.0
+
+
+def _estado():
+    if not hasattr(_local, "font_config"):
+        _local.font_config = FontConfiguration()
+        _local.recursos = {}
+        _local.tamanho_recursos = 0
+        _local.estatisticas = EstatisticasRenderizacao()
+    return _local
+
+
+def estatisticas_renderizacao() -> EstatisticasRenderizacao:
+    return _estado().estatisticas
+
+
+def limpa_cache_renderizacao():
+    """Descarta fontes, folhas de estilo e recursos guardados neste processo."""
+    for atributo in (
+        "font_config",
+        "recursos",
+        "tamanho_recursos",
+        "estatisticas",
+    ):
+        if hasattr(_local, atributo):
+            delattr(_local, atributo)
+    _folha_de_estilo.cache_clear()
+
+
+@lru_cache(maxsize=128)
+def _folha_de_estilo(css_string: str, font_config: FontConfiguration) -> CSS:
+    return CSS(string=css_string, font_config=font_config)
+
+
+def folha_de_estilo(css_string: str) -> CSS:
+    """`CSS(string=...)` interpretado uma única vez por conteúdo."""
+    return _folha_de_estilo(css_string, _estado().font_config)
+
+
+# folhas de estilo e fontes externas usadas nos templates, que não mudam
+ORIGENS_EXTERNAS_ESTAVEIS = (
+    "https://fonts.googleapis.com/",
+    "https://fonts.gstatic.com/",
+)
+
+
+def _eh_estatico(url: str) -> bool:
+    """Arquivos que não mudam enquanto o processo estiver no ar."""
+    if url.startswith(ORIGENS_EXTERNAS_ESTAVEIS):
+        return True
+    caminho = urlparse(url).path
+    if url.startswith("file://"):
+        return caminho.startswith(os.path.abspath(settings.STATIC_ROOT)) or (
+            settings.STATIC_URL in caminho
+        )
+    return url.startswith(("http://", "https://")) and caminho.startswith(
+        settings.STATIC_URL
+    )
+
+
+def _fetcher_com_cache(url_fetcher):
+    def fetcher(url, *args, **kwargs):
+        if not _eh_estatico(url):
+            return url_fetcher(url, *args, **kwargs)
+        estado = _estado()
+        if url not in estado.recursos:
+            resultado = dict(url_fetcher(url, *args, **kwargs))
+            arquivo = resultado.pop("file_obj", None)
+            if arquivo is not None:
+                resultado["string"] = arquivo.read()
+                arquivo.close()
+            estado.estatisticas.recursos_lidos += 1
+            tamanho = len(resultado.get("string") or b"")
+            if estado.tamanho_recursos + tamanho > TAMANHO_MAXIMO_RECURSOS:
+                return resultado
+            estado.recursos[url] = resultado
+            estado.tamanho_recursos += tamanho
+        else:
+            estado.estatisticas.recursos_em_memoria += 1
+        return dict(estado.recursos[url])
+
+    return fetcher
+
+
+def renderiza_pdf(
+    html_string: str,
+    base_url: str = None,
+    stylesheets: list = None,
+    url_fetcher=None,
+    target=None,
+) -> bytes:
+    """
+    Renderiza o HTML em PDF.
+
+    Args:
+        html_string (str): HTML do relatório.
+        base_url (str, optional): base para os caminhos relativos. Por padrão,
+            o diretório dos arquivos estáticos.
+        stylesheets (list, optional): folhas de estilo adicionais; strings são
+            convertidas com `folha_de_estilo`.
+        url_fetcher (callable, optional): fetcher de origem (ex.:
+            django_url_fetcher). Arquivos estáticos são guardados em memória.
+        target (optional): arquivo onde gravar o PDF, como em `write_pdf`.
+
+    Returns:
+        bytes: conteúdo do PDF (None quando `target` é informado).
+    """
+    estado = _estado()
+    inicio = time.perf_counter()
+    html = HTML(
+        string=html_string,
+        base_url=base_url if base_url is not None else staticfiles_storage.location,
+        url_fetcher=_fetcher_com_cache(url_fetcher or default_url_fetcher),
+    )
+    pdf = html.write_pdf(
+        target,
+        stylesheets=[
+            folha_de_estilo(folha) if isinstance(folha, str) else folha
+            for folha in stylesheets or []
+        ],
+        font_config=estado.font_config,
+        cache={},
+    )
+    tempo = time.perf_counter() - inicio
+    estado.estatisticas.renderizacoes += 1
+    estado.estatisticas.tempo_total += tempo
+    logger.debug(f"PDF renderizado em {tempo:.3f}s ({len(html_string)} caracteres)")
+    return pdf
+
+
+def renderiza_pdf_django(html_string: str, base_url: str = "file://abobrinha") -> bytes:
+    """Renderiza resolvendo as URLs pelo Django (STATIC_URL e MEDIA_URL)."""
+    return renderiza_pdf(html_string, base_url=base_url, url_fetcher=django_url_fetcher)
+
+
+@lru_cache(maxsize=None)
+def conteudo_arquivo_estatico(caminho: str) -> bytes:
+    """Arquivo fixo do repositório (ex.: marca d'água), lido uma vez."""
+    with open(caminho, "rb") as arquivo:
+        return arquivo.read()
+
+
+def abre_arquivo_estatico(caminho: str) -> io.BytesIO:
+    return io.BytesIO(conteudo_arquivo_estatico(caminho))
@@ -3,15 +3,17 @@ import io
 import math
 from datetime import date
 
-from django.contrib.staticfiles.storage import staticfiles_storage
 from django.core.files.base import ContentFile
 from django.http import HttpResponse
-from django_weasyprint.utils import django_url_fetcher
 from pikepdf import Pdf
 from pypdf import PdfReader, PdfWriter
-from weasyprint import CSS, HTML
 
 from ..dados_comuns.models import LogSolicitacoesUsuario
+from .renderizador_pdf import (
+    abre_arquivo_estatico,
+    renderiza_pdf,
+    renderiza_pdf_django,
+)
 
 
 def formata_logs(logs):
@@ -51,9 +53,7 @@ def get_diretorias_regionais(lotes):
 
 def merge_pdf_com_rodape_assinatura(arquivo_usuario, string_pdf_rodape):
     arquivo_final = io.BytesIO()
-    pdf_rodape_assinatura = HTML(
-        string=string_pdf_rodape, base_url=staticfiles_storage.location
-    ).write_pdf()
+    pdf_rodape_assinatura = renderiza_pdf(string_pdf_rodape)
 
     pdf_usuario = PdfReader(arquivo_usuario)
     pdf_rodape = PdfReader(io.BytesIO(pdf_rodape_assinatura))
@@ -77,20 +77,17 @@ def merge_pdf_com_rodape_assinatura(arquivo_usuario, string_pdf_rodape):
 
 
 def html_to_pdf_response(html_string, pdf_filename, request=None):
-    pdf_file = HTML(
-        string=html_string,
-        url_fetcher=django_url_fetcher,
+    pdf_file = renderiza_pdf_django(
+        html_string,
         base_url=request.build_absolute_uri("/") if request else "file://abobrinha",
-    ).write_pdf()
+    )
     response = HttpResponse(pdf_file, content_type="application/pdf")
     response["Content-Disposition"] = f'filename="{pdf_filename}"'
     return response
 
 
 def html_to_pdf_file(html_string, pdf_filename, is_async=False):
-    pdf_file = HTML(
-        string=html_string, base_url=staticfiles_storage.location
-    ).write_pdf()
+    pdf_file = renderiza_pdf(html_string)
 
     if is_async:
         return pdf_file
@@ -102,12 +99,11 @@ def html_to_pdf_file(html_string, pdf_filename, is_async=False):
 
 def html_to_pdf_watermark(html_string, pdf_filename, watermark, is_async=False):
     arquivo_final = io.BytesIO()
-    pdf_file = HTML(
-        string=html_string, base_url=staticfiles_storage.location
-    ).write_pdf()
+    pdf_file = renderiza_pdf(html_string)
 
     watermark_instance = PdfReader(
-        f"src/relatorios/static/images/{watermark}", strict=False
+        abre_arquivo_estatico(f"src/relatorios/static/images/{watermark}"),
+        strict=False,
     )
     watermark_page = watermark_instance.pages[0]
     pdf_reader = PdfReader(io.BytesIO(pdf_file), strict=False)
@@ -131,9 +127,7 @@ def html_to_pdf_multiple(lista_strings, pdf_filename, is_async=False):
     arquivo_final = io.BytesIO()
     arquivo = Pdf.new()
     for html_string in lista_strings:
-        pdf_file = HTML(
-            string=html_string, base_url=staticfiles_storage.location
-        ).write_pdf()
+        pdf_file = renderiza_pdf(html_string)
         src = Pdf.open(io.BytesIO(pdf_file))
         arquivo.pages.extend(src.pages)
 
@@ -151,9 +145,7 @@ def html_to_pdf_multiple(lista_strings, pdf_filename, is_async=False):
 def html_to_pdf_email_anexo(html_string, pdf_filename=None):
     # O PDF gerado aqui pode ser anexado num email.
     # Utilizado para enviar email ao cancelar dietas ativas automaticamente.
-    pdf_file = HTML(
-        string=html_string, url_fetcher=django_url_fetcher, base_url="file://abobrinha"
-    ).write_pdf()
+    pdf_file = renderiza_pdf_django(html_string)
     return pdf_file
 
 
@@ -176,11 +168,7 @@ def merge_pdf_com_string_template(
         "html, body {font-family: 'Roboto', sans-serif; margin: 0; padding: 0}\n"
         f"@page {{ size: {largura_mm:.0f}mm {altura_mm:.0f}mm; margin: 0; }}"
     )
-    stylesheets = [CSS(string=css_string)]
-    html_para_mergear = HTML(
-        string=string_template,
-        base_url=staticfiles_storage.location,
-    ).write_pdf(stylesheets=stylesheets)
+    html_para_mergear = renderiza_pdf(string_template, stylesheets=[css_string])
 
     pdf_para_mergear = PdfReader(io.BytesIO(html_para_mergear))
 
@@ -428,17 +416,13 @@ def imagem_para_pdf(imagem_bytes: bytes, nome_arquivo: str = "imagem.pdf") -> by
     css_string = (
         f"@page {{ size: {largura}px {altura}px; margin: 0; }}"
     )
-    stylesheets = [CSS(string=css_string)]
-
     html_string = (
         "<html><body style='margin: 0; padding: 0;'>"
         f"<img src='{data_uri}' style='width: {largura}px; height: {altura}px;' />"
         "</body></html>"
     )
 
-    return HTML(
-        string=html_string, base_url=staticfiles_storage.location
-    ).write_pdf(stylesheets=stylesheets)
+    return renderiza_pdf(html_string, stylesheets=[css_string])
 
 
 class PDFMergeService:
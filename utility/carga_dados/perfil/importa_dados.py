@@ -1,4 +1,5 @@
 import logging
+from collections import defaultdict
 from datetime import date, datetime
 from tempfile import NamedTemporaryFile
 from typing import Type, Union
@@ -7,6 +8,7 @@ import magic
 from django.core.files import File
 from django.db import transaction
 from django.db.models import F, Func, Q, Value
+from django.db.models.functions import Upper
 from openpyxl import Workbook, load_workbook, styles
 from rest_framework import status
 
@@ -29,6 +31,10 @@ from src.perfil.models.usuario import (
     ImportacaoPlanilhaUsuarioUEParceiraCoreSSO,
 )
 from src.perfil.services.usuario_coresso_service import EOLUsuarioCoreSSO
+from src.processamento_arquivos.importacao_em_lote import (
+    LinhaPlanilha,
+    ProcessadorPlanilhaEmLote,
+)
 from src.terceirizada.models import Terceirizada
 from utility.carga_dados.escola.helper import bcolors
 from utility.carga_dados.helper import ja_existe, progressbar
@@ -964,18 +970,31 @@ def importa_usuarios_perfil_dre(
         logger.error(f"Erro genérico: {exc}")
 
 
-class ProcessaPlanilhaUsuarioServidorCoreSSO:
-    def __init__(
-        self, usuario: Usuario, arquivo: ImportacaoPlanilhaUsuarioServidorCoreSSO
-    ) -> None:
-        """Prepara atributos importantes para o processamento da planilha."""
-        if isinstance(usuario, Usuario) and isinstance(
-            arquivo, ImportacaoPlanilhaUsuarioServidorCoreSSO
-        ):
-            self.usuario = usuario
-            self.arquivo = arquivo
-            self.erros = []
-            self.worksheet = self.abre_worksheet()
+def _unicos_por(queryset, campo) -> dict:
+    """Registros por `campo`, deixando de fora valores repetidos (o `get` acusa o erro)."""
+    registros = defaultdict(list)
+    for registro in queryset:
+        registros[getattr(registro, campo)].append(registro)
+    return {chave: lista[0] for chave, lista in registros.items() if len(lista) == 1}
+
+
+class ProcessadorPlanilhaUsuarioCoreSSO(ProcessadorPlanilhaEmLote):
+    """
+    Base das cargas de usuários do CoreSSO: lê a planilha inteira em modo
+    streaming, valida as linhas e consulta de uma vez perfis e instituições.
+    A gravação continua linha a linha, pois cada usuário também é criado ou
+    atualizado no CoreSSO.
+    """
+
+    grava_em_lote = False
+
+    def __init__(self) -> None:
+        super().__init__()
+        self.perfis = {}
+        self.escolas = {}
+        self.diretorias_regionais = {}
+        self.terceirizadas = {}
+        self.chaves = defaultdict(set)
 
     @property
     def path(self):
@@ -986,40 +1005,118 @@ class ProcessaPlanilhaUsuarioServidorCoreSSO:
         if not self.validacao_inicial():
             return
 
-        linhas = list(self.worksheet.rows)
-        logger.info(
-            f"Quantidade de linhas: {len(linhas)} -- Quantidade de colunas: {len(linhas[0])}"
+        workbook = self.abre_workbook(self.path)
+        try:
+            linhas = self.le_linhas(workbook.active)
+        finally:
+            workbook.close()
+        logger.info(f"Quantidade de linhas válidas: {len(linhas)}")
+        self.processa_linhas(linhas)
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        if linha.dados.perfil:
+            self.chaves["perfis"].add(linha.dados.perfil.upper())
+
+    def resolve_chaves(self) -> None:
+        self.perfis = _unicos_por(
+            Perfil.objects.annotate(nome_maiusculo=Upper("nome")).filter(
+                nome_maiusculo__in=self.chaves["perfis"]
+            ),
+            "nome_maiusculo",
+        )
+        self.escolas = _unicos_por(
+            Escola.objects.filter(codigo_eol__in=self.chaves["escolas"]), "codigo_eol"
+        )
+        self.diretorias_regionais = _unicos_por(
+            DiretoriaRegional.objects.filter(codigo_eol__in=self.chaves["dres"]),
+            "codigo_eol",
+        )
+        self.terceirizadas = _unicos_por(
+            Terceirizada.objects.filter(cnpj__in=self.chaves["terceirizadas"]), "cnpj"
         )
 
-        for ind, linha in enumerate(
-            linhas[1:], 2
-        ):  # Começando em 2 pois a primeira linha é o cabeçalho da planilha
-            try:
-                dicionario_dados = self.monta_dicionario_de_dados(linha)
-                usuario_schema = ImportacaoPlanilhaUsuarioServidorCoreSSOSchema(
-                    **dicionario_dados
-                )
-                logger.info(
-                    f"Criando usuário: {usuario_schema.nome} -- {usuario_schema.email}"
-                )
-                self.cria_usuario_servidor(ind, usuario_schema)
-                self.loga_sucesso_carga_usuario(usuario_schema)
+    def get_perfil(self, dados_usuario):
+        return self.perfis.get(
+            (dados_usuario.perfil or "").upper()
+        ) or Perfil.objects.get(nome__iexact=dados_usuario.perfil)
 
-            except Exception as exc:
-                self.erros.append(f"Linha {ind} - {exc}")
+    def validacao_inicial(self) -> bool:
+        return self.existe_conteudo()
 
-    def abre_worksheet(self):
-        return load_workbook(self.path).active
+    def existe_conteudo(self) -> bool:
+        if not self.arquivo.conteudo:
+            self.arquivo.log = "Não foi feito o upload da planilha"
+            self.arquivo.erro_no_processamento()
+            return False
+        return True
+
+    def finaliza_processamento(self) -> None:
+        if self.erros:
+            self.arquivo.log = "\n".join(self.erros)
+            self.arquivo.processamento_com_erro()
+            self.cria_planilha_de_erros()
+            logger.error(f'Arquivo "{self.arquivo.uuid}" processado com erro(s).')
+        else:
+            self.arquivo.log = "Planilha processada com sucesso."
+            self.arquivo.processamento_com_sucesso()
+            logger.info(f'Arquivo "{self.arquivo.uuid}" processado com sucesso.')
+
+    def cria_planilha_de_erros(self) -> None:
+        workbook: Workbook = Workbook()
+        ws = workbook.active
+        ws.title = "Erros"
+        cabecalho = ws.cell(
+            row=1, column=1, value="Erros encontrados no processamento da planilha"
+        )
+        cabecalho.fill = styles.PatternFill("solid", fgColor="808080")
+        for index, erro in enumerate(self.erros, 2):
+            ws.cell(row=index, column=1, value=erro)
+
+        filename = f"arquivo_resultado_{self.arquivo.pk}.xlsx"
+        with NamedTemporaryFile() as tmp:
+            workbook.save(tmp.name)
+            self.arquivo.resultado.save(name=filename, content=File(tmp))
+
+
+class ProcessaPlanilhaUsuarioServidorCoreSSO(ProcessadorPlanilhaUsuarioCoreSSO):
+    schema = ImportacaoPlanilhaUsuarioServidorCoreSSOSchema
+
+    def __init__(
+        self, usuario: Usuario, arquivo: ImportacaoPlanilhaUsuarioServidorCoreSSO
+    ) -> None:
+        """Prepara atributos importantes para o processamento da planilha."""
+        super().__init__()
+        if isinstance(usuario, Usuario) and isinstance(
+            arquivo, ImportacaoPlanilhaUsuarioServidorCoreSSO
+        ):
+            self.usuario = usuario
+            self.arquivo = arquivo
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        super().coleta_chaves(linha)
+        dados_usuario = linha.dados
+        if dados_usuario.tipo_perfil == "ESCOLA":
+            self.chaves["escolas"].add(format(int(dados_usuario.codigo_eol), "06d"))
+        elif dados_usuario.tipo_perfil == "DRE":
+            self.chaves["dres"].add(format(int(dados_usuario.codigo_eol), "06d"))
+
+    def grava_linha(self, linha: LinhaPlanilha) -> None:
+        usuario_schema = linha.dados
+        logger.info(f"Criando usuário: {usuario_schema.nome} -- {usuario_schema.email}")
+        self.cria_usuario_servidor(linha.numero, usuario_schema)
+        self.loga_sucesso_carga_usuario(usuario_schema)
 
     def get_instituicao(self, dados_usuario):
         if dados_usuario.tipo_perfil == "ESCOLA":
-            return Escola.objects.get(
-                codigo_eol=format(int(dados_usuario.codigo_eol), "06d")
+            codigo_eol = format(int(dados_usuario.codigo_eol), "06d")
+            return self.escolas.get(codigo_eol) or Escola.objects.get(
+                codigo_eol=codigo_eol
             )
         elif dados_usuario.tipo_perfil == "DRE":
-            return DiretoriaRegional.objects.get(
-                codigo_eol=format(int(dados_usuario.codigo_eol), "06d")
-            )
+            codigo_eol = format(int(dados_usuario.codigo_eol), "06d")
+            return self.diretorias_regionais.get(
+                codigo_eol
+            ) or DiretoriaRegional.objects.get(codigo_eol=codigo_eol)
         else:
             return Codae.objects.annotate(
                 nome_sem_espacos=Func(
@@ -1027,9 +1124,6 @@ class ProcessaPlanilhaUsuarioServidorCoreSSO:
                 )
             ).get(nome_sem_espacos__icontains=f"codae-{dados_usuario.codae}")
 
-    def get_perfil(self, dados_usuario):
-        return Perfil.objects.get(nome__iexact=dados_usuario.perfil)
-
     def loga_sucesso_carga_usuario(self, dados_usuario):
         mensagem = f"Usuário {dados_usuario.rf} criado/atualizado com sucesso."
         logger.info(mensagem)
@@ -1064,43 +1158,13 @@ class ProcessaPlanilhaUsuarioServidorCoreSSO:
             ativo=True,
         )
 
-    def validacao_inicial(self) -> bool:
-        return self.existe_conteudo()
-
-    def existe_conteudo(self) -> bool:
-        if not self.arquivo.conteudo:
-            self.arquivo.log = "Não foi feito o upload da planilha"
-            self.arquivo.erro_no_processamento()
-            return False
-        return True
-
-    def monta_dicionario_de_dados(self, linha: tuple) -> dict:
-        try:
-            return {
-                key: linha[index].value
-                for index, key in enumerate(
-                    ImportacaoPlanilhaUsuarioServidorCoreSSOSchema.schema()[
-                        "properties"
-                    ].keys()
-                )
-            }
-        except AttributeError:
-            return {
-                key: linha[index]
-                for index, key in enumerate(
-                    ImportacaoPlanilhaUsuarioServidorCoreSSOSchema.schema()[
-                        "properties"
-                    ].keys()
-                )
-            }
-
     def cria_usuario_servidor(
         self, ind, usuario_schema: ImportacaoPlanilhaUsuarioServidorCoreSSOSchema
     ):  # noqa C901
         try:
             self.__criar_usuario_servidor(usuario_schema)
         except Exception as exd:
-            self.erros.append(f"Linha {ind} - {exd}")
+            self.registra_erro(ind, exd)
 
     @transaction.atomic
     def __criar_usuario_servidor(
@@ -1119,33 +1183,6 @@ class ProcessaPlanilhaUsuarioServidorCoreSSO:
             existe_core_sso=existe_core_sso,
         )
 
-    def finaliza_processamento(self) -> None:
-        if self.erros:
-            self.arquivo.log = "\n".join(self.erros)
-            self.arquivo.processamento_com_erro()
-            self.cria_planilha_de_erros()
-            logger.error(f'Arquivo "{self.arquivo.uuid}" processado com erro(s).')
-        else:
-            self.arquivo.log = "Planilha processada com sucesso."
-            self.arquivo.processamento_com_sucesso()
-            logger.info(f'Arquivo "{self.arquivo.uuid}" processado com sucesso.')
-
-    def cria_planilha_de_erros(self) -> None:
-        workbook: Workbook = Workbook()
-        ws = workbook.active
-        ws.title = "Erros"
-        cabecalho = ws.cell(
-            row=1, column=1, value="Erros encontrados no processamento da planilha"
-        )
-        cabecalho.fill = styles.PatternFill("solid", fgColor="808080")
-        for index, erro in enumerate(self.erros, 2):
-            ws.cell(row=index, column=1, value=erro)
-
-        filename = f"arquivo_resultado_{self.arquivo.pk}.xlsx"
-        with NamedTemporaryFile() as tmp:
-            workbook.save(tmp.name)
-            self.arquivo.resultado.save(name=filename, content=File(tmp))
-
 
 SchemaPlanilhaUsuarioExterno = Union[
     Type[ImportacaoPlanilhaUsuarioExternoCoreSSOSchema],
@@ -1153,7 +1190,7 @@ SchemaPlanilhaUsuarioExterno = Union[
 ]
 
 
-class ProcessaPlanilhaUsuarioExternoCoreSSO:
+class ProcessaPlanilhaUsuarioExternoCoreSSO(ProcessadorPlanilhaUsuarioCoreSSO):
     def __init__(
         self,
         usuario: Usuario,
@@ -1161,56 +1198,40 @@ class ProcessaPlanilhaUsuarioExternoCoreSSO:
         class_schema: SchemaPlanilhaUsuarioExterno,
     ) -> None:
         """Prepara atributos importantes para o processamento da planilha."""
+        super().__init__()
         self.usuario = usuario
         self.arquivo = arquivo
         self.class_schema = class_schema
-        self.erros = []
-        self.worksheet = self.abre_worksheet()
-
-    @property
-    def path(self):
-        return self.arquivo.conteudo.path
-
-    def processamento(self):  # noqa C901
-        self.arquivo.inicia_processamento()
-        if not self.validacao_inicial():
-            return
-
-        linhas = list(self.worksheet.rows)
+        self.schema = class_schema
+
+    def coleta_chaves(self, linha: LinhaPlanilha) -> None:
+        super().coleta_chaves(linha)
+        codigo_eol = getattr(linha.dados, "codigo_eol", None)
+        if codigo_eol:
+            self.chaves["escolas"].add(format(int(codigo_eol), "06d"))
+        elif getattr(linha.dados, "cnpj_terceirizada", None):
+            self.chaves["terceirizadas"].add(linha.dados.cnpj_terceirizada)
+
+    def grava_linha(self, linha: LinhaPlanilha) -> None:
+        usuario_schema = linha.dados
         logger.info(
-            f"Quantidade de linhas: {len(linhas)} -- Quantidade de colunas: {len(linhas[0])}"
+            f"Validando se usuário externo {usuario_schema.nome} é uma UE Parceira"
         )
+        self.valida_se_usuario_eh_ue_parceira(usuario_schema)
 
-        for ind, linha in enumerate(
-            linhas[1:], 2
-        ):  # Começando em 2 pois a primeira linha é o cabeçalho da planilha
-            try:
-                dicionario_dados = self.monta_dicionario_de_dados(linha)
-                usuario_schema = self.class_schema(**dicionario_dados)
-
-                logger.info(
-                    f"Validando se usuário externo {usuario_schema.nome} é uma UE Parceira"
-                )
-                self.valida_se_usuario_eh_ue_parceira(usuario_schema)
-
-                logger.info(
-                    f"Criando usuário: {usuario_schema.nome} -- {usuario_schema.email}"
-                )
-                self.cria_usuario_externo(ind, usuario_schema)
-                self.loga_sucesso_carga_usuario(usuario_schema)
-
-            except Exception as exc:
-                self.erros.append(f"Linha {ind} - {exc}")
-
-    def abre_worksheet(self):
-        return load_workbook(self.path).active
+        logger.info(f"Criando usuário: {usuario_schema.nome} -- {usuario_schema.email}")
+        self.cria_usuario_externo(linha.numero, usuario_schema)
+        self.loga_sucesso_carga_usuario(usuario_schema)
 
     def get_instituicao(self, dados_usuario):
         if dados_usuario.codigo_eol:
-            return Escola.objects.get(
-                codigo_eol=format(int(dados_usuario.codigo_eol), "06d")
+            codigo_eol = format(int(dados_usuario.codigo_eol), "06d")
+            return self.escolas.get(codigo_eol) or Escola.objects.get(
+                codigo_eol=codigo_eol
             )
-        return Terceirizada.objects.get(cnpj=dados_usuario.cnpj_terceirizada)
+        return self.terceirizadas.get(
+            dados_usuario.cnpj_terceirizada
+        ) or Terceirizada.objects.get(cnpj=dados_usuario.cnpj_terceirizada)
 
     def valida_se_usuario_eh_ue_parceira(self, dados_usuario):
         if dados_usuario.codigo_eol:
@@ -1226,9 +1247,6 @@ class ProcessaPlanilhaUsuarioExternoCoreSSO:
                     "Usuário não pertence a Unidade Parceira informada na planilha"
                 )
 
-    def get_perfil(self, dados_usuario):
-        return Perfil.objects.get(nome__iexact=dados_usuario.perfil)
-
     def loga_sucesso_carga_usuario(self, dados_usuario):
         mensagem = f"Usuário {dados_usuario.cpf} criado/atualizado com sucesso."
         logger.info(mensagem)
@@ -1259,29 +1277,13 @@ class ProcessaPlanilhaUsuarioExternoCoreSSO:
             ativo=True,
         )
 
-    def validacao_inicial(self) -> bool:
-        return self.existe_conteudo()
-
-    def existe_conteudo(self) -> bool:
-        if not self.arquivo.conteudo:
-            self.arquivo.log = "Não foi feito o upload da planilha"
-            self.arquivo.erro_no_processamento()
-            return False
-        return True
-
-    def monta_dicionario_de_dados(self, linha: tuple) -> dict:
-        return {
-            key: linha[index].value
-            for index, key in enumerate(self.class_schema.schema()["properties"].keys())
-        }
-
     def cria_usuario_externo(
         self, ind, usuario_schema: SchemaPlanilhaUsuarioExterno
     ):  # noqa C901
         try:
             self.__criar_usuario_externo(usuario_schema)
         except Exception as exd:
-            self.erros.append(f"Linha {ind} - {exd}")
+            self.registra_erro(ind, exd)
 
     @transaction.atomic
     def __criar_usuario_externo(self, usuario_schema: SchemaPlanilhaUsuarioExterno):
@@ -1298,33 +1300,6 @@ class ProcessaPlanilhaUsuarioExternoCoreSSO:
             existe_core_sso=existe_core_sso,
         )
 
-    def finaliza_processamento(self) -> None:
-        if self.erros:
-            self.arquivo.log = "\n".join(self.erros)
-            self.arquivo.processamento_com_erro()
-            self.cria_planilha_de_erros()
-            logger.error(f'Arquivo "{self.arquivo.uuid}" processado com erro(s).')
-        else:
-            self.arquivo.log = "Planilha processada com sucesso."
-            self.arquivo.processamento_com_sucesso()
-            logger.info(f'Arquivo "{self.arquivo.uuid}" processado com sucesso.')
-
-    def cria_planilha_de_erros(self) -> None:
-        workbook: Workbook = Workbook()
-        ws = workbook.active
-        ws.title = "Erros"
-        cabecalho = ws.cell(
-            row=1, column=1, value="Erros encontrados no processamento da planilha"
-        )
-        cabecalho.fill = styles.PatternFill("solid", fgColor="808080")
-        for index, erro in enumerate(self.erros, 2):
-            ws.cell(row=index, column=1, value=erro)
-
-        filename = f"arquivo_resultado_{self.arquivo.pk}.xlsx"
-        with NamedTemporaryFile() as tmp:
-            workbook.save(tmp.name)
-            self.arquivo.resultado.save(name=filename, content=File(tmp))
-
 
 def importa_usuarios_servidores_coresso(
     usuario: Usuario, arquivo: ImportacaoPlanilhaUsuarioServidorCoreSSO